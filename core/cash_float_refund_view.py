@@ -88,7 +88,7 @@ def add_drawer_refund(request):
             }, status=404)
         
         # Calculate new cash amount (subtract refund)
-        current_cash = cash_float.current_breakdown.get('cash', Decimal('0'))
+        current_cash = cash_float.current_cash_usd
         new_cash = current_cash - refund_amount
         
         if new_cash < 0:
@@ -97,40 +97,9 @@ def add_drawer_refund(request):
                 'error': 'Insufficient cash in drawer for refund'
             }, status=400)
         
-        # Update cash float with refund
-        # Get current cash amount from current_breakdown JSONField
-        current_breakdown = cash_float.current_breakdown or {}
-        current_cash = Decimal(str(current_breakdown.get('cash', 0)))
-        new_cash = current_cash - refund_amount
-        
-        if new_cash < 0:
-            return JsonResponse({
-                'success': False,
-                'error': 'Insufficient cash in drawer for refund'
-            }, status=400)
-        
-        # Update the breakdown
-        current_breakdown['cash'] = float(new_cash)
-        cash_float.current_breakdown = current_breakdown
-        
-        # Update session sales (subtract refund from cash sales)
-        session_sales = cash_float.session_sales or {}
-        current_cash_sales = Decimal(str(session_sales.get('cash', 0)))
-        new_cash_sales = max(Decimal('0'), current_cash_sales - refund_amount)
-        session_sales['cash'] = float(new_cash_sales)
-        cash_float.session_sales = session_sales
-        
-        # Update total session sales
-        cash_float.session_total_sales = max(Decimal('0'), cash_float.session_total_sales - refund_amount)
-        
-        # Update current cash amount (keep in sync with breakdown)
-        cash_float.current_cash = new_cash
-        
-        # Update EOD expectations
-        cash_float.expected_cash_at_eod = cash_float.float_amount + new_cash
-        
-        # Save the updated cash float
-        cash_float.save()
+        # Take the refund out of the drawer's USD cash and its cash sales
+        # (expected cash at EOD follows the cash sales)
+        cash_float.add_to_balance('USD', 'cash', current=-refund_amount, session=-refund_amount)
         
         # Log the refund operation
         logger.info(f"Refund processed: Cashier {cashier_id}, Amount: {refund_amount}, Reason: {refund_reason}")
@@ -8,6 +8,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
 from django.db import models
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
 from decimal import Decimal
 import logging
 
@@ -29,8 +31,12 @@ class CashierHistoryView(APIView):
     - status: Filter by count status (BALANCED, SHORTAGE, OVER)
     
     NOTE: This reads from PERMANENT archive that survives EOD deletion
+    Statistics for every cashier come from one grouped query and the recent history
+    from one windowed query, so the cost does not grow with the number of cashiers.
     """
     
+    HISTORY_LIMIT = 50
+    
     def get(self, request):
         """Get cashier history with filtering options"""
         try:
@@ -61,59 +67,59 @@ class CashierHistoryView(APIView):
                 return Response({"error": "Invalid date_to format. Use YYYY-MM-DD"}, 
                               status=status.HTTP_400_BAD_REQUEST)
         
-        # Get cashiers
+        # Get cashiers - by name, or by ID when a numeric ID is given
         cashiers = Cashier.objects.filter(shop=shop, status='active')
         if cashier_id:
-            try:
-                # Try to find by name first, then by ID
-                try:
-                    cashiers = Cashier.objects.filter(shop=shop, name=cashier_id)
-                except:
-                    cashiers = Cashier.objects.filter(shop=shop, id=cashier_id)
-            except:
-                return Response({"error": "Cashier not found"}, status=status.HTTP_404_NOT_FOUND)
+            cashier_match = Q(name=cashier_id)
+            if str(cashier_id).isdigit():
+                cashier_match |= Q(id=int(cashier_id))
+            cashiers = Cashier.objects.filter(shop=shop).filter(cashier_match)
+        cashiers = list(cashiers)
+        
+        # Get archived counts for these cashiers (PERMANENT RECORDS)
+        archives = CashierCountArchive.objects.filter(
+            shop=shop, cashier__in=cashiers, **date_filter
+        )
+        if status_filter:
+            archives = archives.filter(status=status_filter)
+        
+        stats_by_cashier = {
+            row['cashier_id']: row
+            for row in CashierCountArchive.status_totals(archives, 'cashier_id')
+        }
+        
+        # Latest HISTORY_LIMIT counts per cashier in a single query
+        recent_archives = archives.annotate(
+            position=Window(
+                expression=RowNumber(),
+                partition_by=[F('cashier_id')],
+                order_by=[F('date').desc(), F('archived_at').desc()]
+            )
+        ).filter(position__lte=self.HISTORY_LIMIT).order_by('cashier_id', '-date', '-archived_at')
+        
+        history_by_cashier = {}
+        for archive in recent_archives:
+            history_by_cashier.setdefault(archive.cashier_id, []).append({
+                'date': archive.date.isoformat(),
+                'status': archive.status,
+                'archived_at': archive.archived_at.isoformat() if archive.archived_at else None,
+                'total_cash': float(archive.total_cash),
+                'expected_cash': float(archive.expected_cash),
+                'cash_variance': float(archive.cash_variance),
+                'total_variance': float(archive.total_variance),
+                'denominations': archive.denominations_snapshot,
+                'notes': archive.notes
+            })
         
         # Prepare response data
         cashier_data = []
         
         for cashier in cashiers:
-            # Get archived counts for this cashier (PERMANENT RECORDS)
-            archive_filter = {'shop': shop, 'cashier': cashier}
-            archive_filter.update(date_filter)
-            
-            if status_filter:
-                archive_filter['status'] = status_filter
-            
-            archives = CashierCountArchive.objects.filter(**archive_filter).order_by('-date')
-            
-            # Build count history from archives
-            count_history = []
-            total_counts = 0
-            balanced_count = 0
-            shortage_count = 0
-            over_count = 0
-            
-            for archive in archives:
-                total_counts += 1
-                
-                if archive.status == 'BALANCED':
-                    balanced_count += 1
-                elif archive.status == 'SHORTAGE':
-                    shortage_count += 1
-                elif archive.status == 'OVER':
-                    over_count += 1
-                
-                count_history.append({
-                    'date': archive.date.isoformat(),
-                    'status': archive.status,
-                    'archived_at': archive.archived_at.isoformat() if archive.archived_at else None,
-                    'total_cash': float(archive.total_cash),
-                    'expected_cash': float(archive.expected_cash),
-                    'cash_variance': float(archive.cash_variance),
-                    'total_variance': float(archive.total_variance),
-                    'denominations': archive.denominations_snapshot,
-                    'notes': archive.notes
-                })
+            row = stats_by_cashier.get(cashier.id, {})
+            total_counts = row.get('total_counts', 0)
+            balanced_count = row.get('balanced', 0)
+            shortage_count = row.get('shortages', 0)
+            over_count = row.get('overs', 0)
             
             # Calculate statistics
             stats = {
@@ -131,7 +137,7 @@ class CashierHistoryView(APIView):
                 'cashier_code': getattr(cashier, 'code', None),
                 'joined_date': cashier.created_at.isoformat() if hasattr(cashier, 'created_at') else None,
                 'statistics': stats,
-                'count_history': count_history[:50]  # Limit to last 50 records
+                'count_history': history_by_cashier.get(cashier.id, [])
             })
         
         # Sort by reliability (best cashiers first)
@@ -196,37 +202,32 @@ class CashierPerformanceView(APIView):
         days = int(request.query_params.get('days', 30))
         date_from = timezone.now().date() - timedelta(days=days)
         
-        cashiers = Cashier.objects.filter(shop=shop, status='active')
+        cashiers = {cashier.id: cashier for cashier in Cashier.objects.filter(shop=shop, status='active')}
+        
+        # Every cashier's counts for the period in one grouped query
+        rows = CashierCountArchive.status_totals(
+            CashierCountArchive.objects.filter(shop=shop, cashier_id__in=cashiers, date__gte=date_from),
+            'cashier_id'
+        )
         
         performance_data = []
         
-        for cashier in cashiers:
-            # Get archived counts for this period
-            archives = CashierCountArchive.objects.filter(
-                shop=shop,
-                cashier=cashier,
-                date__gte=date_from
-            )
-            
-            if not archives.exists():
-                continue
-            
-            total_variance = sum(float(a.total_variance) for a in archives)
-            avg_variance = total_variance / archives.count() if archives.count() > 0 else 0
+        for row in rows:
+            cashier = cashiers[row['cashier_id']]
+            total_counts = row['total_counts']
+            balanced = row['balanced']
             
-            # Count by status
-            balanced = archives.filter(status='BALANCED').count()
-            shortages = archives.filter(status='SHORTAGE').count()
-            overs = archives.filter(status='OVER').count()
+            total_variance = float(row['variance_total'] or 0)
+            avg_variance = total_variance / total_counts if total_counts > 0 else 0
             
             performance_data.append({
                 'cashier_name': cashier.name,
                 'period_days': days,
-                'total_counts': archives.count(),
+                'total_counts': total_counts,
                 'balanced': balanced,
-                'shortages': shortages,
-                'overs': overs,
-                'balance_rate': round(balanced / archives.count() * 100, 1) if archives.count() > 0 else 0,
+                'shortages': row['shortages'],
+                'overs': row['overs'],
+                'balance_rate': round(balanced / total_counts * 100, 1) if total_counts > 0 else 0,
                 'average_variance': round(avg_variance, 2),
                 'total_variance': round(total_variance, 2),
                 'trend': 'IMPROVING' if avg_variance > -0.5 else 'DECLINING' if avg_variance < -2 else 'STABLE'
@@ -256,18 +257,20 @@ class CashierArchiveStatsView(APIView):
         except ShopConfiguration.DoesNotExist:
             return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        total_archived = CashierCountArchive.objects.filter(shop=shop).count()
-        
-        # Get date range
-        dates = CashierCountArchive.objects.filter(shop=shop).aggregate(
+        # Totals, date range and status breakdown in one aggregate
+        stats = CashierCountArchive.objects.filter(shop=shop).aggregate(
+            total=models.Count('id'),
             oldest=models.Min('date'),
-            newest=models.Max('date')
+            newest=models.Max('date'),
+            balanced=models.Count('id', filter=Q(status='BALANCED')),
+            shortages=models.Count('id', filter=Q(status='SHORTAGE')),
+            overs=models.Count('id', filter=Q(status='OVER'))
         )
-        
-        # Status breakdown
-        balanced = CashierCountArchive.objects.filter(shop=shop, status='BALANCED').count()
-        shortages = CashierCountArchive.objects.filter(shop=shop, status='SHORTAGE').count()
-        overs = CashierCountArchive.objects.filter(shop=shop, status='OVER').count()
+        total_archived = stats['total']
+        dates = {'oldest': stats['oldest'], 'newest': stats['newest']}
+        balanced = stats['balanced']
+        shortages = stats['shortages']
+        overs = stats['overs']
         
         return Response({
             "success": True,
@@ -282,3 +285,57 @@ class CashierArchiveStatsView(APIView):
                 }
             }
         }, status=status.HTTP_200_OK)
+
+
+class CashierArchiveBackfillView(APIView):
+    """
+    API View to archive live cashier counts that were never archived
+    POST /api/v1/shop/cashiers/archive-backfill/
+    
+    Body:
+    - start_date: First date (YYYY-MM-DD)
+    - end_date: Last date (YYYY-MM-DD, defaults to today)
+    - chunk_days: Days handled by this call (default 31)
+    
+    One chunk is archived per call; repeat with next_start_date until it is null.
+    Dates already archived for a cashier are skipped, so calls can be retried.
+    """
+    
+    DEFAULT_CHUNK_DAYS = 31
+    MAX_CHUNK_DAYS = 366
+    
+    def post(self, request):
+        try:
+            shop = ShopConfiguration.objects.get()
+        except ShopConfiguration.DoesNotExist:
+            return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
+        
+        from datetime import datetime, timedelta
+        try:
+            start_date = datetime.strptime(request.data.get('start_date', ''), '%Y-%m-%d').date()
+            end_date = request.data.get('end_date')
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else timezone.localdate()
+        except (TypeError, ValueError):
+            return Response({"error": "start_date is required and dates must be YYYY-MM-DD"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            chunk_days = min(max(int(request.data.get('chunk_days', self.DEFAULT_CHUNK_DAYS)), 1), self.MAX_CHUNK_DAYS)
+        except (TypeError, ValueError):
+            return Response({"error": "chunk_days must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({"error": "start_date must not be after end_date"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        chunk_end = min(start_date + timedelta(days=chunk_days - 1), end_date)
+        result = CashierCountArchive.backfill(shop, start_date, chunk_end)
+        next_start = chunk_end + timedelta(days=1) if chunk_end < end_date else None
+        logger.info(f"Archive backfill {start_date}..{chunk_end}: {result['archived']} counts over {result['dates']} days")
+        
+        return Response({
+            "success": True,
+            "start_date": start_date.isoformat(),
+            "chunk_end_date": chunk_end.isoformat(),
+            "end_date": end_date.isoformat(),
+            "dates_archived": result['dates'],
+            "counts_archived": result['archived'],
+            "next_start_date": next_start.isoformat() if next_start else None
+        }, status=status.HTTP_200_OK)
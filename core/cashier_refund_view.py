@@ -104,56 +104,14 @@ def process_cashier_refund(request):
         sale.refunded_by = cashier
         sale.save()
         
-        # Update cash drawer if this was a cash sale
-        drawer_updated = False
-        if sale.payment_method == 'cash':
-            try:
-                # Get or create cash float for today
-                today = timezone.now().date()
-                cash_float, created = CashFloat.objects.get_or_create(
-                    shop=shop_config,
-                    cashier=cashier,
-                    date=today,
-                    defaults={
-                        'status': 'INACTIVE',
-                        'float_amount': Decimal('0.00'),
-                        'current_cash': Decimal('0.00'),
-                        'current_card': Decimal('0.00'),
-                        'current_ecocash': Decimal('0.00'),
-                        'current_transfer': Decimal('0.00'),
-                        'current_total': Decimal('0.00'),
-                        'session_cash_sales': Decimal('0.00'),
-                        'session_card_sales': Decimal('0.00'),
-                        'session_ecocash_sales': Decimal('0.00'),
-                        'session_transfer_sales': Decimal('0.00'),
-                        'session_total_sales': Decimal('0.00'),
-                        'expected_cash_at_eod': Decimal('0.00'),
-                    }
-                )
-                
-                # Subtract refund from cash drawer
-                cash_float.current_cash -= refund_amount
-                cash_float.session_cash_sales -= refund_amount
-                cash_float.session_total_sales -= refund_amount
-                cash_float.current_total -= refund_amount
-                cash_float.expected_cash_at_eod -= refund_amount
-                
-                # Ensure values don't go negative
-                cash_float.current_cash = max(Decimal('0.00'), cash_float.current_cash)
-                cash_float.session_cash_sales = max(Decimal('0.00'), cash_float.session_cash_sales)
-                cash_float.session_total_sales = max(Decimal('0.00'), cash_float.session_total_sales)
-                cash_float.current_total = max(Decimal('0.00'), cash_float.current_total)
-                cash_float.expected_cash_at_eod = max(Decimal('0.00'), cash_float.expected_cash_at_eod)
-                
-                cash_float.save()
-                drawer_updated = True
-                
-                logger.info(f"Refund processed: Cashier {cashier.name}, Sale {sale_id}, Amount: {refund_amount}")
-                
-            except Exception as drawer_error:
-                logger.warning(f"Could not update cash drawer: {str(drawer_error)}")
-                # Don't fail the entire refund if drawer update fails
-                drawer_updated = False
+        # The sale signal takes a refunded sale back out of its cashier's drawer for today
+        drawer_updated = sale.payment_method == 'cash' and CashFloat.objects.filter(
+            shop=shop_config,
+            cashier_id=sale.cashier_id,
+            date=timezone.localdate()
+        ).exists()
+        if drawer_updated:
+            logger.info(f"Refund processed: Cashier {cashier.name}, Sale {sale_id}, Amount: {refund_amount}")
         
         # Prepare response
         response_data = {
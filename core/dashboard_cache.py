@@ -0,0 +1,168 @@
+"""
+Dashboard and analytics response caches.
+The owner app polls the dashboard and analytics endpoints constantly while the data
+behind them changes far less often, so computed payloads are cached per shop.
+
+- The owner dashboard has an entry per shop, business day and data generation.
+- The shop drawer status likewise, also dropped when a drawer's float changes.
+- Analytics responses are keyed by endpoint, shop, normalized query params and the
+  shop's data generation. Signals bump the generation when sales, refunds, waste,
+  stock or exchange rates change, so entries from an older generation are never read.
+- The founder portfolio is keyed by the generations of every shop.
+
+The cache is the shared database cache (settings.CACHES), so a generation bumped by a
+management command or another process is seen by every request.
+"""
+from functools import wraps
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.response import Response
+
+# Safety net for changes that don't go through a signal (raw SQL, queryset.update)
+OWNER_DASHBOARD_TIMEOUT = 300
+ANALYTICS_CACHE_TIMEOUT = 600
+PORTFOLIO_CACHE_TIMEOUT = 300
+DRAWER_STATUS_TIMEOUT = 60
+
+
+def owner_dashboard_cache_key(shop_id):
+    """
+    Keyed by local date so "today" figures roll over at midnight, and by the data
+    generation so a request still computing when a change commits stores its
+    figures under a key nobody reads any more. Compute it once, before building.
+    """
+    return f'owner_dashboard:{shop_id}:{timezone.localdate().isoformat()}:{data_generation(shop_id)}'
+
+
+def get_cached_owner_dashboard(key):
+    return cache.get(key)
+
+
+def cache_owner_dashboard(key, data):
+    cache.set(key, data, OWNER_DASHBOARD_TIMEOUT)
+
+
+def drawer_status_cache_key(shop_id):
+    return f'drawer_status:{shop_id}:{timezone.localdate().isoformat()}'
+
+
+def get_cached_drawer_status(shop_id):
+    return cache.get(drawer_status_cache_key(shop_id))
+
+
+def cache_drawer_status(shop_id, data):
+    cache.set(drawer_status_cache_key(shop_id), data, DRAWER_STATUS_TIMEOUT)
+
+
+def invalidate_drawer_status(shop_id):
+    """Drop the cached drawer status once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(drawer_status_cache_key(shop_id)))
+
+
+def _generation_key(shop_id):
+    return f'data_generation:{shop_id}'
+
+
+def data_generation(shop_id):
+    """
+    Current data generation for a shop.
+    Seeded from the clock so a generation lost to cache eviction never reuses an
+    older number (which would bring stale entries back).
+    """
+    return cache.get_or_set(_generation_key(shop_id), lambda: time.time_ns() // 1000, None)
+
+
+def _bump_data_generation(shop_id):
+    try:
+        cache.incr(_generation_key(shop_id))
+    except ValueError:
+        # Key evicted - reseed past every generation handed out so far
+        cache.set(_generation_key(shop_id), time.time_ns() // 1000, None)
+
+
+def invalidate_shop_caches(shop_id):
+    """
+    Move the shop to a new data generation (retiring its dashboard and analytics
+    entries) and drop the drawer status once the current transaction commits.
+    Waiting for the commit lets the post-commit rollup refresh land first.
+    """
+    def invalidate():
+        cache.delete(drawer_status_cache_key(shop_id))
+        _bump_data_generation(shop_id)
+
+    transaction.on_commit(invalidate)
+
+
+def analytics_cache_key(endpoint, shop_id, params):
+    """Cache key for an analytics response; params is a QueryDict or dict"""
+    if hasattr(params, 'lists'):
+        items = sorted((key, sorted(values)) for key, values in params.lists())
+    else:
+        items = sorted((key, [str(value)]) for key, value in params.items())
+    params_hash = hashlib.md5(repr(items).encode()).hexdigest()
+    return f'analytics:{endpoint}:{shop_id}:{data_generation(shop_id)}:{params_hash}'
+
+
+def portfolio_cache_key(shop_ids):
+    """
+    Founder portfolio key - built from every shop's data generation, so a change
+    in any one shop (or a shop being added) moves the portfolio to a new key
+    """
+    keys = {shop_id: _generation_key(shop_id) for shop_id in shop_ids}
+    generations = cache.get_many(list(keys.values()))
+    for shop_id, key in keys.items():
+        if key not in generations:
+            generations[key] = data_generation(shop_id)
+    digest = hashlib.md5(repr(sorted(generations.items())).encode()).hexdigest()
+    return f'founder_portfolio:{timezone.localdate().isoformat()}:{digest}'
+
+
+def get_cached_portfolio(key):
+    return cache.get(key)
+
+
+def cache_portfolio(key, data):
+    """
+    Store a portfolio under the key computed before it was built - a change landing
+    mid-build moves readers to a new key instead of this one serving old figures
+    """
+    cache.set(key, data, PORTFOLIO_CACHE_TIMEOUT)
+
+
+def cache_analytics_response(endpoint):
+    """
+    Decorator for GET handlers of single-shop analytics views.
+    Successful responses are cached for the shop's current data generation; DRF
+    Responses are cached as data, plain JSON responses as their rendered body.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            from .models import ShopConfiguration
+
+            shop_id = ShopConfiguration.objects.values_list('id', flat=True).first()
+            if shop_id is None:
+                return view_method(self, request, *args, **kwargs)
+
+            key = analytics_cache_key(endpoint, shop_id, request.GET)
+            cached = cache.get(key)
+            if cached is not None:
+                kind, payload = cached
+                if kind == 'data':
+                    return Response(payload)
+                return HttpResponse(payload, content_type='application/json')
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                if isinstance(response, Response):
+                    cache.set(key, ('data', response.data), ANALYTICS_CACHE_TIMEOUT)
+                else:
+                    cache.set(key, ('content', response.content), ANALYTICS_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,77 @@
+"""
+Drawer reset service.
+Opening and closing the day touch every cashier's drawer; these helpers do it with a
+fixed number of statements - one upsert to open, one UPDATE plus one DELETE of the
+balance rows to reset - so the cost doesn't grow with the number of staff. Queryset
+updates skip the model signals, so the drawer and dashboard caches are dropped here.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+
+def _drawers_changed(shop_id, reset=False):
+    from .dashboard_cache import invalidate_shop_caches
+    from .live_events import publish_on_commit
+    invalidate_shop_caches(shop_id)
+    if reset:
+        # Streams can't follow a bulk reset drawer by drawer - clients refetch
+        publish_on_commit(shop_id, 'drawers_reset', {})
+
+
+def open_drawers(shop, day):
+    """
+    Give every active cashier an empty, inactive drawer for the day - existing
+    drawers are reset in the same upsert. Returns the number of drawers.
+    """
+    from .models import CashFloat, Cashier, DrawerBalance
+
+    cashier_ids = list(Cashier.objects.filter(shop=shop, status='active').values_list('id', flat=True))
+    if not cashier_ids:
+        return 0
+
+    with transaction.atomic():
+        CashFloat.objects.bulk_create(
+            [
+                CashFloat(shop=shop, cashier_id=cashier_id, date=day, status='INACTIVE', float_amount=Decimal('0.00'))
+                for cashier_id in cashier_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['shop', 'cashier', 'date'],
+            update_fields=['status', 'float_amount', 'updated_at', 'last_activity'],
+        )
+        # Clear session sales and drawer contents for the new day
+        DrawerBalance.objects.filter(drawer__shop=shop, drawer__date=day, drawer__cashier_id__in=cashier_ids).delete()
+    _drawers_changed(shop.id, reset=True)
+    return len(cashier_ids)
+
+
+def reset_drawers(drawers, status='SETTLED'):
+    """
+    Set the status of every drawer in the queryset and wipe their balances.
+    Returns the number of drawers reset.
+    """
+    from .models import DrawerBalance
+
+    with transaction.atomic():
+        shop_ids = set(drawers.values_list('shop_id', flat=True))
+        # Balances first - the update may change which drawers the queryset matches
+        DrawerBalance.objects.filter(drawer__in=drawers).delete()
+        reset_count = drawers.update(status=status, last_activity=timezone.now(), updated_at=timezone.now())
+    for shop_id in shop_ids:
+        _drawers_changed(shop_id, reset=True)
+    return reset_count
+
+
+def close_shifts(shop, day):
+    """End every active shift that started on the day. Returns the number closed."""
+    from .models import Shift
+
+    closed = Shift.objects.filter(shop=shop, start_time__date=day, is_active=True).update(
+        is_active=False,
+        end_time=timezone.now()
+    )
+    if closed:
+        _drawers_changed(shop.id)
+    return closed
@@ -0,0 +1,80 @@
+"""
+Drawer totals engine.
+What each cashier's drawer took in over a local business day - per currency and
+payment method, net of change given - read from the reconciliation snapshot in one
+query instead of walking every sale. The drawer session endpoints, the enhanced EOD
+reconciliation and CashierCount.update_from_cash_float all read these same cells, and
+they come from sale_contribution like the DrawerBalance rows, so the screens agree.
+"""
+import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+
+CURRENCIES = ('usd', 'zig', 'rand')
+METHODS = ('cash', 'card', 'ecocash', 'transfer')
+ZERO = Decimal('0')
+
+
+def local_day_range(day):
+    """Timezone-aware first and last instant of a local business day"""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.datetime.combine(day, datetime.time.min), tz),
+        timezone.make_aware(datetime.datetime.combine(day, datetime.time.max), tz),
+    )
+
+
+def active_exchange_rate():
+    """
+    The current exchange rate row, or None when none is configured. Rates are
+    system-wide; unlike ExchangeRate.get_current_rates this never creates one.
+    """
+    from .models_exchange_rates import ExchangeRate
+    return ExchangeRate.objects.filter(is_active=True).order_by('-date', '-created_at').first()
+
+
+def empty_totals():
+    """{currency: {method: amount, 'total': amount, 'count': transactions}}"""
+    return {
+        currency: {**{method: ZERO for method in METHODS}, 'total': ZERO, 'count': 0}
+        for currency in CURRENCIES
+    }
+
+
+def totals_as_float(totals):
+    return {
+        currency: {key: value if key == 'count' else float(value) for key, value in buckets.items()}
+        for currency, buckets in totals.items()
+    }
+
+
+def drawer_totals(shop, day, cashier_ids=None):
+    """
+    {cashier_id: empty_totals()-shaped inflows} for the completed sales of a local
+    day, optionally limited to some cashiers. Cashiers without sales are absent.
+    Amounts are the snapshot's drawer cells - the same sale_contribution figures the
+    DrawerBalance rows hold - and counts are completed sales by payment currency.
+    """
+    from .models_reconciliation_snapshot import ReconciliationSnapshot
+
+    rows = ReconciliationSnapshot.objects.filter(
+        shop=shop, date=day, kind__in=('drawer', 'sales'), cashier__isnull=False
+    )
+    if cashier_ids is not None:
+        rows = rows.filter(cashier_id__in=cashier_ids)
+
+    totals = {}
+    for cashier_id, kind, currency, method, amount, count in rows.values_list(
+        'cashier_id', 'kind', 'currency', 'method', 'amount', 'count'
+    ):
+        key = (currency or 'USD').lower()
+        if key not in CURRENCIES:
+            continue
+        bucket = totals.setdefault(cashier_id, empty_totals())[key]
+        if kind == 'sales':
+            bucket['count'] += count
+        elif method in METHODS:
+            bucket[method] += amount
+            bucket['total'] += amount
+    return totals
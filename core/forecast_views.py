@@ -0,0 +1,112 @@
+"""
+Demand Forecast API Views
+Serves precomputed per-product demand forecasts for DemandForecastingScreen
+"""
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+import logging
+
+from .models import ShopConfiguration
+from .models_forecast import DemandForecast
+from .forecasting import run_forecasts
+
+logger = logging.getLogger(__name__)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class DemandForecastView(APIView):
+    """
+    GET  /api/v1/shop/demand-forecast/ - Precomputed forecasts (paginated, highest demand first)
+    POST /api/v1/shop/demand-forecast/ - Recompute forecasts now
+
+    Query Parameters (GET):
+    - product_id: Comma separated product ids to fetch
+    - category: Filter by product category
+    - page, page_size: Pagination (max 200 per page)
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        try:
+            shop = ShopConfiguration.objects.get()
+        except ShopConfiguration.DoesNotExist:
+            return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = min(max(1, int(request.query_params.get('page_size', 50))), 200)
+        except ValueError:
+            return Response({"error": "page and page_size must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        forecasts = DemandForecast.objects.filter(shop=shop).select_related('product')
+
+        product_ids = request.query_params.get('product_id')
+        if product_ids:
+            try:
+                forecasts = forecasts.filter(product_id__in=[int(pid) for pid in product_ids.split(',') if pid.strip()])
+            except ValueError:
+                return Response({"error": "product_id must be a comma separated list of integers"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        category = request.query_params.get('category')
+        if category:
+            forecasts = forecasts.filter(product__category=category)
+
+        total = forecasts.count()
+        offset = (page - 1) * page_size
+        results = []
+        for forecast in forecasts.order_by('-total_forecast', 'product_id')[offset:offset + page_size]:
+            data = forecast.to_dict()
+            data['product_name'] = forecast.product.name
+            data['category'] = forecast.product.category
+            data['stock_quantity'] = float(forecast.product.stock_quantity)
+            results.append(data)
+
+        latest = DemandForecast.objects.filter(shop=shop).order_by('-computed_at').values_list('computed_at', flat=True).first()
+
+        return Response({
+            'forecasts': results,
+            'computed_at': latest.isoformat() if latest else None,
+            'pagination': {
+                'page': page,
+                'page_size': page_size,
+                'total': total,
+                'pages': (total + page_size - 1) // page_size,
+                'has_more': offset + page_size < total,
+            },
+        })
+
+    def post(self, request):
+        try:
+            shop = ShopConfiguration.objects.get()
+        except ShopConfiguration.DoesNotExist:
+            return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            history_days = int(request.data.get('history_days', 56))
+            horizon_days = int(request.data.get('horizon_days', 7))
+        except (TypeError, ValueError):
+            return Response({"error": "history_days and horizon_days must be integers"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if not (1 <= history_days <= 366) or not (1 <= horizon_days <= 60):
+            return Response({"error": "history_days must be 1-366 and horizon_days 1-60"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            count = run_forecasts(shop, history_days=history_days, horizon_days=horizon_days)
+        except Exception as e:
+            logger.error(f"Error computing demand forecasts: {e}")
+            return Response({"error": f"Failed to compute forecasts: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            'success': True,
+            'message': f'Forecasts computed for {count} products',
+            'products_forecast': count,
+        })
@@ -0,0 +1,162 @@
+"""
+Demand Forecasting
+Lightweight per-product demand models (moving average and exponential smoothing
+with weekday seasonality). The fitting functions work on plain lists so they can
+run in a process pool without touching the ORM.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+import logging
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MOVING_AVERAGE_WINDOW = 7
+SMOOTHING_ALPHA = 0.3
+MIN_DAYS_FOR_SEASONALITY = 14
+# Methods are scored on the last HOLDOUT_DAYS; shorter histories get no error metrics
+# rather than scores computed from a handful of days
+HOLDOUT_DAYS = 7
+MIN_TRAINING_DAYS = 7
+
+
+def moving_average_forecast(series, horizon, start_weekday, window=MOVING_AVERAGE_WINDOW):
+    """Flat forecast at the mean of the last `window` days"""
+    recent = series[-window:] if series else []
+    level = sum(recent) / len(recent) if recent else 0.0
+    return [level] * horizon
+
+
+def weekday_factors(series, start_weekday):
+    """Multiplicative weekday indices (1.0 everywhere when history is too short)"""
+    if len(series) < MIN_DAYS_FOR_SEASONALITY:
+        return [1.0] * 7
+    overall = sum(series) / len(series)
+    if overall <= 0:
+        return [1.0] * 7
+    totals = [0.0] * 7
+    counts = [0] * 7
+    for offset, value in enumerate(series):
+        weekday = (start_weekday + offset) % 7
+        totals[weekday] += value
+        counts[weekday] += 1
+    return [(totals[d] / counts[d]) / overall if counts[d] else 1.0 for d in range(7)]
+
+
+def seasonal_smoothing_forecast(series, horizon, start_weekday, alpha=SMOOTHING_ALPHA):
+    """Simple exponential smoothing on the deseasonalized series, reseasonalized by weekday"""
+    if not series:
+        return [0.0] * horizon
+    factors = weekday_factors(series, start_weekday)
+    level = None
+    for offset, value in enumerate(series):
+        factor = factors[(start_weekday + offset) % 7] or 1.0
+        deseasonalized = value / factor
+        level = deseasonalized if level is None else alpha * deseasonalized + (1 - alpha) * level
+    next_weekday = start_weekday + len(series)
+    return [max(0.0, level * factors[(next_weekday + h) % 7]) for h in range(horizon)]
+
+
+FORECAST_METHODS = {
+    'MOVING_AVERAGE': moving_average_forecast,
+    'SEASONAL_ES': seasonal_smoothing_forecast,
+}
+
+
+def _error_metrics(actual, predicted):
+    """Mean absolute error and weighted absolute percentage error"""
+    if not actual:
+        return None, None
+    abs_errors = [abs(a - p) for a, p in zip(actual, predicted)]
+    mae = sum(abs_errors) / len(abs_errors)
+    total_actual = sum(abs(a) for a in actual)
+    wape = (sum(abs_errors) / total_actual * 100) if total_actual > 0 else None
+    return mae, wape
+
+
+def fit_product(job):
+    """
+    Fit every method on one product's series, score each on a holdout of the
+    most recent days, and forecast with the best one.
+    job = (product_id, series, start_weekday, horizon)
+    """
+    product_id, series, start_weekday, horizon = job
+    holdout = HOLDOUT_DAYS if len(series) >= HOLDOUT_DAYS + MIN_TRAINING_DAYS else 0
+
+    scores = {}
+    if holdout > 0:
+        train, test = series[:-holdout], series[-holdout:]
+        for method, forecast_fn in FORECAST_METHODS.items():
+            scores[method] = _error_metrics(test, forecast_fn(train, holdout, start_weekday))
+
+    if scores:
+        best_method = min(scores, key=lambda m: scores[m][0])
+        mae, wape = scores[best_method]
+    else:
+        best_method = 'MOVING_AVERAGE'
+        mae, wape = None, None
+
+    forecast = FORECAST_METHODS[best_method](series, horizon, start_weekday)
+    return {
+        'product_id': product_id,
+        'method': best_method,
+        'forecast': forecast,
+        'mae': mae,
+        'wape': wape,
+        'observations': len(series),
+    }
+
+
+def build_daily_series(shop, history_days):
+    """
+    One query over the product daily sales rollups -> {product_id: [net units per day]},
+    zero-filled, along with the first date of the series. The rollups outlive close of
+    day, so the series covers the whole history window.
+    """
+    from .models import ProductDailySalesRollup
+
+    today = timezone.localdate()
+    start_date = today - timedelta(days=history_days - 1)
+
+    rows = ProductDailySalesRollup.objects.filter(
+        shop=shop,
+        date__gte=start_date,
+    ).values_list('product_id', 'date', 'quantity_sold', 'refund_quantity')
+
+    series = {}
+    for product_id, day, quantity_sold, refund_quantity in rows:
+        index = (day - start_date).days
+        if not 0 <= index < history_days:
+            continue
+        values = series.setdefault(product_id, [0.0] * history_days)
+        values[index] += float(max((quantity_sold or 0) - (refund_quantity or 0), 0))
+
+    return series, start_date
+
+
+def run_forecasts(shop, history_days=56, horizon_days=7, workers=0):
+    """
+    Forecast demand for every product with sales history and persist the results.
+    workers > 1 fits the models in a process pool. Returns the number of forecasts saved.
+    """
+    from .models_forecast import DemandForecast
+
+    series_by_product, start_date = build_daily_series(shop, history_days)
+
+    jobs = []
+    for product_id, series in series_by_product.items():
+        # Start each series at the product's first recorded sale, so days before it (or
+        # before the rollups existed) don't dilute the fit or the holdout metrics
+        first_sale = next((index for index, value in enumerate(series) if value > 0), 0)
+        start_weekday = (start_date + timedelta(days=first_sale)).weekday()
+        jobs.append((product_id, series[first_sale:], start_weekday, horizon_days))
+
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fit_product, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        results = [fit_product(job) for job in jobs]
+
+    forecast_start = timezone.localdate() + timedelta(days=1)
+    return DemandForecast.save_results(shop, results, forecast_start, history_days, horizon_days)
@@ -0,0 +1,187 @@
+"""
+Founder portfolio - headline figures for every shop at once.
+Each figure is one grouped query across all shops (sales from the daily rollups,
+stock from the inventory summaries, staff and alerts from small grouped reads), so
+the cost barely grows with the number of shops. The only per-shop work - building
+an inventory summary a shop has never had - is fanned out over a thread pool.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+import logging
+
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Cashier, Sale, Shift, ShopInventorySummary, DailySalesRollup
+from .sales_rollups import shop_timezone
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_WORKERS = 4
+LARGE_SALE_AMOUNT = 1000
+
+
+def _growth(current, previous):
+    return round(float((current - previous) / max(previous, 1) * 100), 1) if previous > 0 else 0
+
+
+def _build_inventory_summary(shop):
+    # Worker threads get their own connection - close it before the thread is reused
+    try:
+        return ShopInventorySummary.rebuild_for_shop(shop)
+    except Exception as e:
+        logger.error(f"Failed to build inventory summary for shop {shop.id}: {e}")
+        return None
+    finally:
+        connection.close()
+
+
+def _inventory_summaries(shops):
+    summaries = {summary.shop_id: summary for summary in ShopInventorySummary.objects.filter(shop__in=shops)}
+    missing = [shop for shop in shops if shop.id not in summaries]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(PORTFOLIO_WORKERS, len(missing))) as executor:
+            for shop, summary in zip(missing, executor.map(_build_inventory_summary, missing)):
+                if summary is not None:
+                    summaries[shop.id] = summary
+    return summaries
+
+
+def _today_counts(queryset, time_field, local_today, timezones):
+    """{shop_id: rows whose time_field falls on the shop's local today}"""
+    earliest = timezone.now() - timedelta(days=2)
+    counts = {}
+    for shop_id, moment in queryset.filter(**{f'{time_field}__gte': earliest}).values_list('shop_id', time_field):
+        if timezone.localtime(moment, timezones[shop_id]).date() == local_today[shop_id]:
+            counts[shop_id] = counts.get(shop_id, 0) + 1
+    return counts
+
+
+def build_portfolio(shops):
+    """Per-shop headline figures plus portfolio totals for the given shops"""
+    shops = list(shops)
+    shop_ids = [shop.id for shop in shops]
+    timezones = {shop.id: shop_timezone(shop) for shop in shops}
+    local_today = {shop.id: timezone.localdate(timezone=timezones[shop.id]) for shop in shops}
+
+    # Widest window any shop needs: this month and the one before, in local dates
+    earliest_day = min(local_today.values(), default=timezone.localdate()) - timedelta(days=61)
+    latest_day = max(local_today.values(), default=timezone.localdate())
+    daily_totals = DailySalesRollup.totals_by_shop_and_date(shop_ids, earliest_day, latest_day)
+
+    inventory = _inventory_summaries(shops)
+    cashier_counts = dict(
+        Cashier.objects.filter(shop_id__in=shop_ids).values('shop_id').annotate(count=Count('id')).values_list('shop_id', 'count')
+    )
+    active_today = _today_counts(Shift.objects.filter(shop_id__in=shop_ids, is_active=True), 'start_time', local_today, timezones)
+    large_sales_today = _today_counts(
+        Sale.objects.filter(shop_id__in=shop_ids, status='completed', total_amount__gte=LARGE_SALE_AMOUNT),
+        'created_at', local_today, timezones
+    )
+
+    totals = {
+        'shops': len(shops),
+        'activeShops': 0,
+        'today': {'revenue': Decimal('0'), 'orders': 0},
+        'week': {'revenue': Decimal('0'), 'orders': 0},
+        'month': {'revenue': Decimal('0'), 'orders': 0},
+        'inventoryValue': Decimal('0'),
+        'lowStockItems': 0,
+        'negativeStockItems': 0,
+        'totalCashiers': 0,
+        'activeToday': 0,
+        'alerts': 0,
+    }
+    shops_data = []
+    for shop in shops:
+        today = local_today[shop.id]
+        week_ago = today - timedelta(days=7)
+        month_ago = today - timedelta(days=30)
+        shop_days = daily_totals.get(shop.id, {})
+
+        def period(start, end):
+            return DailySalesRollup.sum_days(shop_days, start, end)
+
+        today_totals = period(today, today)
+        yesterday_totals = period(today - timedelta(days=1), today - timedelta(days=1))
+        week_totals = period(week_ago, today)
+        prev_week_totals = period(week_ago - timedelta(days=7), week_ago - timedelta(days=1))
+        month_totals = period(month_ago, today)
+        prev_month_totals = period(month_ago - timedelta(days=30), month_ago - timedelta(days=1))
+
+        summary = inventory.get(shop.id)
+        low_stock = summary.low_stock_count if summary else 0
+        negative_stock = summary.negative_stock_count if summary else 0
+        stock_value = summary.total_value if summary else Decimal('0')
+
+        alerts = []
+        if (low_stock + negative_stock) > 0:
+            alerts.append({
+                'type': 'low_stock',
+                'message': f'{low_stock} products are running low on stock, {negative_stock} products have negative stock'
+            })
+        if today_totals['revenue'] == 0 and today_totals['order_count'] == 0:
+            alerts.append({'type': 'no_sales', 'message': 'No sales recorded today'})
+        if large_sales_today.get(shop.id):
+            alerts.append({
+                'type': 'large_sales',
+                'message': f'{large_sales_today[shop.id]} large transaction(s) recorded today'
+            })
+
+        shops_data.append({
+            'id': shop.id,
+            'name': shop.name,
+            'is_active': shop.is_active,
+            'sales': {
+                'today': {
+                    'revenue': float(today_totals['revenue']),
+                    'orders': today_totals['order_count'],
+                    'growth': _growth(today_totals['revenue'], yesterday_totals['revenue'])
+                },
+                'week': {
+                    'revenue': float(week_totals['revenue']),
+                    'orders': week_totals['order_count'],
+                    'growth': _growth(week_totals['revenue'], prev_week_totals['revenue'])
+                },
+                'month': {
+                    'revenue': float(month_totals['revenue']),
+                    'orders': month_totals['order_count'],
+                    'growth': _growth(month_totals['revenue'], prev_month_totals['revenue'])
+                }
+            },
+            'inventory': {
+                'totalProducts': summary.total_products if summary else 0,
+                'lowStockItems': low_stock,
+                'negativeStockItems': negative_stock,
+                'totalValue': float(stock_value)
+            },
+            'employees': {
+                'totalCashiers': cashier_counts.get(shop.id, 0),
+                'activeToday': active_today.get(shop.id, 0)
+            },
+            'alerts': alerts
+        })
+
+        totals['activeShops'] += 1 if shop.is_active else 0
+        for name, period_totals in (('today', today_totals), ('week', week_totals), ('month', month_totals)):
+            totals[name]['revenue'] += period_totals['revenue']
+            totals[name]['orders'] += period_totals['order_count']
+        totals['inventoryValue'] += stock_value
+        totals['lowStockItems'] += low_stock
+        totals['negativeStockItems'] += negative_stock
+        totals['totalCashiers'] += cashier_counts.get(shop.id, 0)
+        totals['activeToday'] += active_today.get(shop.id, 0)
+        totals['alerts'] += len(alerts)
+
+    for name in ('today', 'week', 'month'):
+        totals[name]['revenue'] = float(totals[name]['revenue'])
+    totals['inventoryValue'] = float(totals['inventoryValue'])
+
+    shops_data.sort(key=lambda shop_data: shop_data['sales']['month']['revenue'], reverse=True)
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'totals': totals,
+        'shops': shops_data
+    }
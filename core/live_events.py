@@ -0,0 +1,79 @@
+"""
+Live event bus.
+The drawer, sales and owner dashboard screens used to poll their endpoints on timers,
+recomputing everything each time. Instead, the sale commit path and the drawer and
+shop day signals publish compact deltas here once their transaction commits, and
+clients hold a server-sent events stream (see live_events_views) that only wakes up
+when something happened.
+
+The bus is in-process: a stream only sees the writes served by its own process, so
+the app runs as one threaded gunicorn worker (gunicorn.conf.py refuses to start
+with more). Events are numbered per process and the last BUFFER_SIZE are kept, so a
+client reconnecting with Last-Event-ID gets what it missed - or a 'resync' event
+telling it to refetch the full figures when that is no longer possible.
+"""
+from collections import deque
+import threading
+import uuid
+
+from django.db import transaction
+
+BUFFER_SIZE = 500
+
+# Distinguishes event ids of this process from those of a previous one
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class EventBus:
+    def __init__(self, size=BUFFER_SIZE):
+        self._events = deque(maxlen=size)
+        self._condition = threading.Condition()
+        self._last_seq = 0
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    def publish(self, shop_id, event_type, data):
+        """Record an event and wake every waiting stream. Returns its sequence number."""
+        with self._condition:
+            self._last_seq += 1
+            self._events.append((self._last_seq, shop_id, event_type, data))
+            self._condition.notify_all()
+            return self._last_seq
+
+    def resume_point(self, last_event_id):
+        """
+        (sequence to stream after, whether the client missed events we no longer have)
+        for a client's Last-Event-ID; a new client starts from now.
+        """
+        with self._condition:
+            if not last_event_id:
+                return self._last_seq, False
+            boot_id, _, seq = last_event_id.partition(':')
+            try:
+                seq = int(seq)
+            except ValueError:
+                return self._last_seq, True
+            if boot_id != BOOT_ID or seq > self._last_seq:
+                return self._last_seq, True
+            oldest = self._events[0][0] if self._events else self._last_seq + 1
+            return seq, seq < oldest - 1
+
+    def wait(self, after, timeout):
+        """Events numbered after `after`, waiting up to timeout seconds for one to arrive"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_seq > after, timeout)
+            return [event for event in self._events if event[0] > after]
+
+
+bus = EventBus()
+
+
+def event_id(seq):
+    return f'{BOOT_ID}:{seq}'
+
+
+def publish_on_commit(shop_id, event_type, data):
+    """Publish once the current transaction commits - streams never see rolled back writes"""
+    transaction.on_commit(lambda: bus.publish(shop_id, event_type, data))
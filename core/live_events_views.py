@@ -0,0 +1,70 @@
+"""
+Live Events Stream View
+Server-sent events for the drawer, sales and owner dashboard screens. A client
+subscribes once and receives compact deltas as sales, drawers and the shop day
+change, instead of polling the full endpoints.
+"""
+import json
+import time
+
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+
+from .live_events import bus, event_id
+from .models import ShopConfiguration
+
+# Comment line sent while idle so proxies keep the connection open
+HEARTBEAT_SECONDS = 15
+# Each stream ends after this long and EventSource reconnects with its Last-Event-ID,
+# so a worker thread is never held indefinitely
+STREAM_SECONDS = 300
+RETRY_MILLISECONDS = 3000
+
+
+def _format_event(seq, event_type, data):
+    return f'id: {event_id(seq)}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+def _event_stream(shop_id, last_event_id):
+    yield f'retry: {RETRY_MILLISECONDS}\n\n'
+
+    cursor, missed = bus.resume_point(last_event_id)
+    if missed:
+        # Events were lost (restart or buffer overrun) - refetch the full figures
+        yield _format_event(cursor, 'resync', {})
+
+    deadline = time.monotonic() + STREAM_SECONDS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = bus.wait(cursor, min(HEARTBEAT_SECONDS, remaining))
+        if not events:
+            yield ': keepalive\n\n'
+            continue
+        for seq, event_shop_id, event_type, data in events:
+            cursor = seq
+            if event_shop_id == shop_id:
+                yield _format_event(seq, event_type, data)
+
+
+@csrf_exempt
+@require_GET
+def live_events_stream(request):
+    """
+    GET /api/v1/shop/events/ - text/event-stream of the shop's live changes
+    Events: sale, drawer_totals, drawer, drawers_reset, shop_day, and resync when
+    the client must refetch. Reconnects resume from the Last-Event-ID header
+    (or ?last_event_id=).
+    """
+    shop_id = ShopConfiguration.objects.values_list('id', flat=True).first()
+    if shop_id is None:
+        return JsonResponse({"error": "Shop not found"}, status=404)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    response = StreamingHttpResponse(_event_stream(shop_id, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
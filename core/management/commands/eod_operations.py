@@ -8,6 +8,7 @@ from decimal import Decimal
 import datetime
 
 from core.models import ShopConfiguration, Cashier, ShopDay
+from core.models_eod_job import EndOfDayJob
 from core.models_reconciliation import CashierCount, ReconciliationSession
 from core.models_cashier_archive import CashierCountArchive
 
@@ -160,13 +161,15 @@ class Command(BaseCommand):
         # Calculate final summary
         session.calculate_session_summary()
         
-        # ARCHIVE all cashier counts BEFORE completing (permanent history)
-        self.stdout.write('Archiving cashier counts for permanent history...')
-        archived = CashierCountArchive.archive_all_counts_for_date(shop, date)
-        self.stdout.write(self.style.SUCCESS(f'  ✓ Archived {len(archived)} cashier count records'))
-        
-        # Complete the session
-        session.complete_session(cashier)
+        # Complete the session - the shop close job archives the cashier counts (permanent history)
+        session.complete_session(cashier, background=False)
+        if session.eod_job:
+            self.report_job(session.eod_job)
+        else:
+            # Shop already closed - archive the counts here
+            self.stdout.write('Archiving cashier counts for permanent history...')
+            archived = CashierCountArchive.archive_all_counts_for_date(shop, date)
+            self.stdout.write(self.style.SUCCESS(f'  ✓ Archived {len(archived)} cashier count records'))
         
         # Add closing notes
         if notes:
@@ -222,14 +225,29 @@ class Command(BaseCommand):
 
         try:
             shop_day = ShopDay.objects.get(shop=shop, date=date)
-            if shop_day.status == 'CLOSED':
-                self.stdout.write(self.style.WARNING('Shop is already closed'))
-                return
-            
-            shop_day.close_shop(closed_by=cashier, notes=notes or 'Force closed via management command')
-            self.stdout.write(self.style.SUCCESS(f'\n✓ Shop force closed successfully'))
+            # Resumes an unfinished close job from its last completed stage
+            job = EndOfDayJob.submit(shop_day, closed_by=cashier, notes=notes or 'Force closed via management command')
         except ShopDay.DoesNotExist:
             self.stdout.write(self.style.ERROR(f'No shop day record found for {date}'))
+            return
+        except ValueError:
+            self.stdout.write(self.style.WARNING('Shop is already closed'))
+            return
+        
+        job.run()
+        self.report_job(job)
+        if job.status == 'COMPLETED':
+            self.stdout.write(self.style.SUCCESS(f'\n✓ Shop force closed successfully'))
+
+    def report_job(self, job):
+        """Print the stages of an end of day job"""
+        for stage in job.to_dict()['stages']:
+            mark = '✓' if stage['completed'] else '✗'
+            result = f" ({stage['result']})" if stage['result'] is not None else ''
+            self.stdout.write(f"  {mark} {stage['label']}{result}")
+        if job.status == 'FAILED':
+            self.stdout.write(self.style.ERROR(f'Shop close failed at {job.current_stage}: {job.error}'))
+            self.stdout.write('Run the same command again to resume from the failed stage.')
 
     def create_session(self, shop, date):
         """Create a new reconciliation session"""
@@ -15,7 +15,6 @@ For complete reset (all dates):
 """
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from decimal import Decimal
 from core.models import CashFloat, ShopConfiguration, Sale
 import datetime
 
@@ -76,56 +75,8 @@ class Command(BaseCommand):
                 
                 # Clear all currency fields
                 drawer.status = 'SETTLED'
-                drawer.current_cash = Decimal('0.00')
-                drawer.current_card = Decimal('0.00')
-                drawer.current_ecocash = Decimal('0.00')
-                drawer.current_transfer = Decimal('0.00')
-                drawer.current_total = Decimal('0.00')
-                drawer.current_cash_usd = Decimal('0.00')
-                drawer.current_cash_zig = Decimal('0.00')
-                drawer.current_cash_rand = Decimal('0.00')
-                drawer.current_card_usd = Decimal('0.00')
-                drawer.current_card_zig = Decimal('0.00')
-                drawer.current_card_rand = Decimal('0.00')
-                drawer.current_ecocash_usd = Decimal('0.00')
-                drawer.current_ecocash_zig = Decimal('0.00')
-                drawer.current_ecocash_rand = Decimal('0.00')
-                drawer.current_transfer_usd = Decimal('0.00')
-                drawer.current_transfer_zig = Decimal('0.00')
-                drawer.current_transfer_rand = Decimal('0.00')
-                drawer.current_total_usd = Decimal('0.00')
-                drawer.current_total_zig = Decimal('0.00')
-                drawer.current_total_rand = Decimal('0.00')
-                
-                # Clear session sales
-                drawer.session_cash_sales = Decimal('0.00')
-                drawer.session_card_sales = Decimal('0.00')
-                drawer.session_ecocash_sales = Decimal('0.00')
-                drawer.session_transfer_sales = Decimal('0.00')
-                drawer.session_total_sales = Decimal('0.00')
-                drawer.session_cash_sales_usd = Decimal('0.00')
-                drawer.session_cash_sales_zig = Decimal('0.00')
-                drawer.session_cash_sales_rand = Decimal('0.00')
-                drawer.session_card_sales_usd = Decimal('0.00')
-                drawer.session_card_sales_zig = Decimal('0.00')
-                drawer.session_card_sales_rand = Decimal('0.00')
-                drawer.session_ecocash_sales_usd = Decimal('0.00')
-                drawer.session_ecocash_sales_zig = Decimal('0.00')
-                drawer.session_ecocash_sales_rand = Decimal('0.00')
-                drawer.session_transfer_sales_usd = Decimal('0.00')
-                drawer.session_transfer_sales_zig = Decimal('0.00')
-                drawer.session_transfer_sales_rand = Decimal('0.00')
-                drawer.session_total_sales_usd = Decimal('0.00')
-                drawer.session_total_sales_zig = Decimal('0.00')
-                drawer.session_total_sales_rand = Decimal('0.00')
-                
-                # Clear EOD expectations
-                drawer.expected_cash_at_eod = Decimal('0.00')
-                drawer.expected_cash_usd = Decimal('0.00')
-                drawer.expected_cash_zig = Decimal('0.00')
-                drawer.expected_cash_rand = Decimal('0.00')
-                
                 drawer.save()
+                drawer.reset_balances()
                 reset_count += 1
                 
             except Exception as e:
@@ -0,0 +1,50 @@
+"""
+Django management command to compute per-product demand forecasts.
+Schedule it after close of day so DemandForecastingScreen reads precomputed results.
+"""
+from django.core.management.base import BaseCommand
+from core.models import ShopConfiguration
+from core.forecasting import run_forecasts
+
+
+class Command(BaseCommand):
+    help = 'Fit demand forecasts (moving average / seasonal exponential smoothing) for every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--history-days',
+            type=int,
+            default=56,
+            help='Days of sales history to fit on (default 56)',
+        )
+        parser.add_argument(
+            '--horizon',
+            type=int,
+            default=7,
+            help='Number of days to forecast (default 7)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help='Fit models in a process pool with this many workers (default: in-process)',
+        )
+
+    def handle(self, *args, **options):
+        history_days = options['history_days']
+        horizon = options['horizon']
+
+        if history_days < 1 or horizon < 1:
+            self.stderr.write(self.style.ERROR('--history-days and --horizon must be positive'))
+            return
+
+        shops = ShopConfiguration.objects.all()
+        if not shops.exists():
+            self.stderr.write(self.style.ERROR('No shop found'))
+            return
+
+        for shop in shops:
+            count = run_forecasts(shop, history_days=history_days, horizon_days=horizon, workers=options['workers'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{shop.name}: saved {count} forecasts ({history_days} days history, {horizon} day horizon)'
+            ))
@@ -0,0 +1,23 @@
+"""
+Django management command to rebuild the monthly cashier performance summaries
+from the permanent cashier count archive.
+"""
+from django.core.management.base import BaseCommand
+from core.models import ShopConfiguration
+from core.models_cashier_archive import CashierPerformanceSummary
+
+
+class Command(BaseCommand):
+    help = 'Recompute every CashierPerformanceSummary from CashierCountArchive'
+
+    def handle(self, *args, **options):
+        shops = ShopConfiguration.objects.all()
+        if not shops.exists():
+            self.stderr.write(self.style.ERROR('No shop found'))
+            return
+
+        for shop in shops:
+            rebuilt = CashierPerformanceSummary.recalculate_all(shop)
+            self.stdout.write(self.style.SUCCESS(
+                f"{shop.name}: rebuilt {rebuilt} cashier performance summaries"
+            ))
@@ -0,0 +1,45 @@
+"""
+Django management command to rebuild the reconciliation snapshot from live sales,
+staff lunches and cashier counts. Use it to backfill the snapshot or to repair it
+after data was changed outside the app.
+"""
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import ShopConfiguration, ReconciliationSnapshot
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-day reconciliation snapshot from the live sales, lunches and counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Date to rebuild (YYYY-MM-DD), defaults to today',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=1,
+            help='Rebuild this many days ending on --date',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            end_date = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            self.stderr.write(self.style.ERROR('Dates must be in YYYY-MM-DD format'))
+            return
+
+        shops = ShopConfiguration.objects.all()
+        if not shops.exists():
+            self.stderr.write(self.style.ERROR('No shop found'))
+            return
+
+        days = [end_date - timedelta(days=offset) for offset in range(max(options['days'], 1))]
+        for shop in shops:
+            cells = sum(ReconciliationSnapshot.rebuild(shop.id, day) for day in days)
+            self.stdout.write(self.style.SUCCESS(
+                f"{shop.name}: rebuilt the reconciliation snapshot for {len(days)} days ({cells} figures)"
+            ))
@@ -0,0 +1,54 @@
+"""
+Django management command to rebuild the pre-aggregated sales rollups from raw sales.
+Days are recomputed from their live and archived sales. Days whose sales were
+deleted at close of day before the archive existed keep their rollups, since
+those rows are the only record left.
+"""
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import ShopConfiguration
+from core.sales_rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily, hourly and product sales rollups from live and archived sales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=str,
+            help='First shop-local date to rebuild (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--end',
+            type=str,
+            help='Last shop-local date to rebuild (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Rebuild the last N days (ignored when --start is given)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options['start']) if options['start'] else None
+            end_date = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError:
+            self.stderr.write(self.style.ERROR('Dates must be in YYYY-MM-DD format'))
+            return
+
+        if start_date is None and options['days']:
+            start_date = timezone.localdate() - timedelta(days=options['days'] - 1)
+
+        shops = ShopConfiguration.objects.all()
+        if not shops.exists():
+            self.stderr.write(self.style.ERROR('No shop found'))
+            return
+
+        for shop in shops:
+            result = rebuild_sales_rollups(shop, start_date=start_date, end_date=end_date)
+            self.stdout.write(self.style.SUCCESS(
+                f"{shop.name}: rebuilt rollups for {result['days']} days from {result['sales']} sales"
+            ))
@@ -0,0 +1,57 @@
+"""
+Django management command to rebuild the per-shop inventory summary from the Product table.
+Run this after bulk imports or raw SQL fixes that bypass Product.save().
+"""
+from django.core.management.base import BaseCommand
+from core.models import ShopConfiguration, ShopInventorySummary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the incrementally maintained inventory summary for every shop'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift between the stored summary and the products without saving',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        shops = ShopConfiguration.objects.all()
+
+        if not shops.exists():
+            self.stderr.write(self.style.ERROR('No shop found'))
+            return
+
+        for shop in shops:
+            stored = ShopInventorySummary.objects.filter(shop=shop).first()
+            stored_values = None
+            if stored:
+                stored_values = (stored.total_products, stored.total_value, stored.low_stock_count,
+                                 stored.negative_stock_count, stored.out_of_stock_count)
+
+            if dry_run:
+                # Rebuild inside a rolled-back transaction so nothing is persisted
+                from django.db import transaction
+                with transaction.atomic():
+                    fresh = ShopInventorySummary.rebuild_for_shop(shop)
+                    fresh_values = (fresh.total_products, fresh.total_value, fresh.low_stock_count,
+                                    fresh.negative_stock_count, fresh.out_of_stock_count)
+                    transaction.set_rollback(True)
+            else:
+                fresh = ShopInventorySummary.rebuild_for_shop(shop)
+                fresh_values = (fresh.total_products, fresh.total_value, fresh.low_stock_count,
+                                fresh.negative_stock_count, fresh.out_of_stock_count)
+
+            if stored_values is not None and stored_values != fresh_values:
+                self.stdout.write(self.style.WARNING(
+                    f'{shop.name}: drift detected (stored {stored_values}, actual {fresh_values})'
+                ))
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{shop.name}: {fresh.total_products} products, value ${fresh.total_value:.2f}, '
+                f'{fresh.low_stock_count} low, {fresh.negative_stock_count} negative, '
+                f'{fresh.out_of_stock_count} out of stock'
+                + (' (dry run)' if dry_run else '')
+            ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0062_rename_core_cashie_shop_id_f81286_idx_core_cashie_shop_id_52310c_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopInventorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_products', models.IntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=4, default=0, help_text='Sum of max(0, stock) * cost_price', max_digits=18)),
+                ('low_stock_count', models.IntegerField(default=0, help_text='Products with stock at or below min_stock_level')),
+                ('negative_stock_count', models.IntegerField(default=0)),
+                ('out_of_stock_count', models.IntegerField(default=0, help_text='Products with zero or negative stock')),
+                ('category_values', models.JSONField(blank=True, default=dict, help_text='Stock value per category (decimal strings)')),
+                ('last_reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_summary', to='core.shopconfiguration')),
+            ],
+            options={
+                'verbose_name': 'Shop Inventory Summary',
+                'verbose_name_plural': 'Shop Inventory Summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0063_shopinventorysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestockSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=255)),
+                ('category', models.CharField(blank=True, max_length=100)),
+                ('stock_quantity', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('min_stock_level', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('cost_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('units_sold', models.DecimalField(decimal_places=2, default=0, help_text='Net units sold in the window', max_digits=12)),
+                ('window_days', models.IntegerField(default=30, help_text='Days of sales history the velocity is based on')),
+                ('daily_velocity', models.DecimalField(decimal_places=4, default=0, help_text='Average net units sold per day', max_digits=12)),
+                ('days_of_cover', models.DecimalField(blank=True, decimal_places=1, help_text='Days until stock runs out at current velocity (null = no sales)', max_digits=10, null=True)),
+                ('suggested_quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('estimated_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('priority', models.CharField(choices=[('URGENT', 'Urgent'), ('HIGH', 'High'), ('MEDIUM', 'Medium'), ('LOW', 'Low'), ('NONE', 'No action needed')], default='NONE', max_length=10)),
+                ('priority_score', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='restock_suggestions', to='core.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.shopconfiguration')),
+            ],
+            options={
+                'verbose_name': 'Restock Suggestion',
+                'verbose_name_plural': 'Restock Suggestions',
+                'ordering': ['-priority_score'],
+                'indexes': [models.Index(fields=['shop', '-priority_score'], name='core_restoc_shop_id_1981a2_idx'), models.Index(fields=['shop', 'priority'], name='core_restoc_shop_id_01d4fe_idx')],
+                'unique_together': {('shop', 'product')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0064_restocksuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('MOVING_AVERAGE', 'Moving Average'), ('SEASONAL_ES', 'Exponential Smoothing (weekday seasonality)')], max_length=20)),
+                ('forecast_start', models.DateField(help_text='First forecast day')),
+                ('horizon_days', models.IntegerField(default=7)),
+                ('history_days', models.IntegerField(default=56, help_text='Days of history the model was fitted on')),
+                ('observations', models.IntegerField(default=0)),
+                ('daily_forecast', models.JSONField(default=list, help_text='[{date, quantity}] for each forecast day')),
+                ('total_forecast', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('avg_daily_demand', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('mae', models.DecimalField(blank=True, decimal_places=4, help_text='Mean absolute error on holdout days', max_digits=12, null=True)),
+                ('wape', models.DecimalField(blank=True, decimal_places=2, help_text='Weighted absolute percentage error on holdout days', max_digits=8, null=True)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecasts', to='core.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.shopconfiguration')),
+            ],
+            options={
+                'verbose_name': 'Demand Forecast',
+                'verbose_name_plural': 'Demand Forecasts',
+                'ordering': ['-total_forecast'],
+                'unique_together': {('shop', 'product')},
+            },
+        ),
+    ]
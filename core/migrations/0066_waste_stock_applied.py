@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0065_demandforecast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='waste',
+            name='stock_applied',
+            field=models.BooleanField(default=True, help_text='Whether this waste has been deducted from product stock'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0066_waste_stock_applied'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contribution', models.JSONField(default=dict, help_text='{table: {key: {metric: decimal string}}}')),
+                ('unit_costs', models.JSONField(default=dict, help_text='Cost price per sale item id, captured when first rolled up')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sale', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rollup_state', to='core.sale')),
+            ],
+            options={
+                'verbose_name': 'Sale Rollup State',
+                'verbose_name_plural': 'Sale Rollup States',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local (shop timezone) business date')),
+                ('currency', models.CharField(max_length=4)),
+                ('payment_method', models.CharField(max_length=20)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Total of completed sales', max_digits=14)),
+                ('order_count', models.IntegerField(default=0, help_text='Number of completed sales')),
+                ('items_sold', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cost_of_goods', models.DecimalField(decimal_places=4, default=0, help_text='Cost price at time of sale x quantity', max_digits=16)),
+                ('refund_count', models.IntegerField(default=0, help_text='Sales with any refund')),
+                ('refund_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales_rollups', to='core.shopconfiguration')),
+            ],
+            options={
+                'verbose_name': 'Daily Sales Rollup',
+                'verbose_name_plural': 'Daily Sales Rollups',
+                'indexes': [models.Index(fields=['shop', 'date'], name='core_dailys_shop_id_559a44_idx')],
+                'unique_together': {('shop', 'date', 'currency', 'payment_method')},
+            },
+        ),
+    ]
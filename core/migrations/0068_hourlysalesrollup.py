@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0067_salerollupstate_dailysalesrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local (shop timezone) business date')),
+                ('hour', models.PositiveSmallIntegerField(help_text='Local hour of day, 0-23')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('items_sold', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_sales_rollups', to='core.shopconfiguration')),
+            ],
+            options={
+                'verbose_name': 'Hourly Sales Rollup',
+                'verbose_name_plural': 'Hourly Sales Rollups',
+                'indexes': [models.Index(fields=['shop', 'date', 'hour'], name='core_hourly_shop_id_af0f67_idx')],
+                'unique_together': {('shop', 'date', 'hour')},
+            },
+        ),
+    ]
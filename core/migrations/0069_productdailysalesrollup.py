@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0068_hourlysalesrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local (shop timezone) business date')),
+                ('quantity_sold', models.DecimalField(decimal_places=2, default=0, help_text='Quantity on completed sales', max_digits=14)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Quantity x unit price on completed sales', max_digits=14)),
+                ('cost_of_goods', models.DecimalField(decimal_places=4, default=0, help_text='Cost price at time of sale x quantity', max_digits=16)),
+                ('transaction_count', models.IntegerField(default=0, help_text='Completed sales containing the product')),
+                ('refund_quantity', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refund_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales_rollups', to='core.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_sales_rollups', to='core.shopconfiguration')),
+            ],
+            options={
+                'verbose_name': 'Product Daily Sales Rollup',
+                'verbose_name_plural': 'Product Daily Sales Rollups',
+                'indexes': [models.Index(fields=['shop', 'date'], name='core_produc_shop_id_b281c6_idx')],
+                'unique_together': {('shop', 'product', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0069_productdailysalesrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['shop', '-created_at', '-id'], name='core_sale_shop_id_90fbac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['shop', 'customer_name'], name='core_sale_shop_id_f32b81_idx'),
+        ),
+    ]
@@ -0,0 +1,233 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+CURRENCIES = ('USD', 'ZIG', 'RAND')
+METHODS = ('cash', 'card', 'ecocash', 'transfer')
+
+
+def copy_drawer_balances(apps, schema_editor):
+    """Move each drawer's per-currency columns into DrawerBalance rows (the float stays on the drawer)"""
+    CashFloat = apps.get_model('core', 'CashFloat')
+    DrawerBalance = apps.get_model('core', 'DrawerBalance')
+    floats = {'USD': 'float_amount', 'ZIG': 'float_amount_zig', 'RAND': 'float_amount_rand'}
+
+    rows = []
+    for drawer in CashFloat.objects.iterator(chunk_size=500):
+        for currency in CURRENCIES:
+            suffix = currency.lower()
+            for method in METHODS:
+                current = getattr(drawer, f'current_{method}_{suffix}')
+                session = getattr(drawer, f'session_{method}_sales_{suffix}')
+                if method == 'cash':
+                    current -= getattr(drawer, floats[currency])
+                if current or session:
+                    rows.append(DrawerBalance(drawer=drawer, currency=currency, method=method,
+                                              current=current, session=session))
+    DrawerBalance.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0070_sale_core_sale_shop_id_90fbac_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DrawerBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=10)),
+                ('method', models.CharField(max_length=20)),
+                ('current', models.DecimalField(decimal_places=2, default=0, help_text='Amount in the drawer, float excluded', max_digits=15)),
+                ('session', models.DecimalField(decimal_places=2, default=0, help_text='Sales taken this session', max_digits=15)),
+                ('drawer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='core.cashfloat')),
+            ],
+            options={
+                'verbose_name': 'Drawer Balance',
+                'verbose_name_plural': 'Drawer Balances',
+                'unique_together': {('drawer', 'currency', 'method')},
+            },
+        ),
+        migrations.RunPython(copy_drawer_balances, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_card',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_card_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_card_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_card_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_cash',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_cash_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_cash_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_cash_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_ecocash',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_ecocash_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_ecocash_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_ecocash_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_total',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_total_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_total_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_total_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_transfer',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_transfer_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_transfer_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='current_transfer_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='expected_cash_at_eod',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='expected_cash_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='expected_cash_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='expected_cash_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_card_sales',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_card_sales_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_card_sales_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_card_sales_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_cash_sales',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_cash_sales_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_cash_sales_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_cash_sales_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_ecocash_sales',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_ecocash_sales_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_ecocash_sales_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_ecocash_sales_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_total_sales',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_total_sales_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_total_sales_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_total_sales_zig',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_transfer_sales',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_transfer_sales_rand',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_transfer_sales_usd',
+        ),
+        migrations.RemoveField(
+            model_name='cashfloat',
+            name='session_transfer_sales_zig',
+        ),
+
+    ]
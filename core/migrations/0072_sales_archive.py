@@ -0,0 +1,112 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0071_drawer_balances'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSale',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Id of the original sale', primary_key=True, serialize=False)),
+                ('shop_day_id', models.IntegerField(blank=True, help_text='Reference to the closed ShopDay', null=True)),
+                ('cashier_name', models.CharField(blank=True, help_text='Cashier name at close of day', max_length=255)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('currency', models.CharField(default='USD', max_length=4)),
+                ('payment_currency', models.CharField(default='USD', max_length=4)),
+                ('payment_method', models.CharField(max_length=20)),
+                ('wallet_account', models.CharField(default='USD', max_length=4)),
+                ('amount_received', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('customer_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(default='completed', max_length=20)),
+                ('refund_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('created_at', models.DateTimeField(help_text='When the original sale was made')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cashier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_sales', to='core.cashier')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_sales', to='core.shopconfiguration')),
+            ],
+            options={
+                'verbose_name': 'Archived Sale',
+                'verbose_name_plural': 'Archived Sales',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSaleItem',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Id of the original sale item', primary_key=True, serialize=False)),
+                ('product_name', models.CharField(blank=True, max_length=255)),
+                ('category', models.CharField(blank=True, max_length=100)),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('refunded', models.BooleanField(default=False)),
+                ('refund_quantity', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('refund_reason', models.TextField(blank=True)),
+                ('refund_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_sale_items', to='core.product')),
+                ('sale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.archivedsale')),
+            ],
+            options={
+                'verbose_name': 'Archived Sale Item',
+                'verbose_name_plural': 'Archived Sale Items',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSalePayment',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Id of the original sale payment', primary_key=True, serialize=False)),
+                ('payment_method', models.CharField(max_length=20)),
+                ('currency', models.CharField(default='USD', max_length=4)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('amount_received', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('amount_usd_equivalent', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('change_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('created_at', models.DateTimeField()),
+                ('sale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='core.archivedsale')),
+            ],
+            options={
+                'verbose_name': 'Archived Sale Payment',
+                'verbose_name_plural': 'Archived Sale Payments',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedStaffLunch',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Id of the original staff lunch', primary_key=True, serialize=False)),
+                ('product_name', models.CharField(blank=True, help_text='Empty for a money lunch', max_length=255)),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('currency', models.CharField(default='USD', max_length=4)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cashier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_staff_lunches', to='core.cashier')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_staff_lunches', to='core.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_staff_lunches', to='core.shopconfiguration')),
+            ],
+            options={
+                'verbose_name': 'Archived Staff Lunch',
+                'verbose_name_plural': 'Archived Staff Lunches',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['shop', '-created_at', '-id'], name='core_archiv_shop_id_151b67_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['cashier', '-created_at'], name='core_archiv_cashier_599951_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedstafflunch',
+            index=models.Index(fields=['shop', '-created_at'], name='core_archiv_shop_id_63c5f5_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0072_sales_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EndOfDayJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('current_stage', models.CharField(blank=True, help_text='Stage being run, or the one that failed', max_length=40)),
+                ('completed_stages', models.JSONField(default=list)),
+                ('results', models.JSONField(default=dict, help_text='Rows affected per completed stage')),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, help_text='Last progress from the worker', null=True)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eod_jobs', to='core.cashier')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eod_jobs', to='core.shopconfiguration')),
+                ('shop_day', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eod_jobs', to='core.shopday')),
+            ],
+            options={
+                'verbose_name': 'End of Day Job',
+                'verbose_name_plural': 'End of Day Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['shop', '-created_at'], name='core_endofd_shop_id_35aaf8_idx'), models.Index(fields=['shop_day', 'status'], name='core_endofd_shop_da_bc680d_idx')],
+            },
+        ),
+    ]
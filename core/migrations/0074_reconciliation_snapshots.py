@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0073_eod_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local (shop timezone) business date')),
+                ('kind', models.CharField(choices=[('sales', 'Completed Sales'), ('refunds', 'Refunded Sales'), ('drawer', 'Drawer Takings'), ('lunch', 'Staff Lunches'), ('expected', 'Count Expected'), ('counted', 'Count Counted')], max_length=20)),
+                ('currency', models.CharField(blank=True, max_length=10)),
+                ('method', models.CharField(blank=True, max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('count', models.IntegerField(default=0, help_text='Sales, lunches or counts behind the amount')),
+                ('cashier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation_snapshots', to='core.cashier')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation_snapshots', to='core.shopconfiguration')),
+            ],
+            options={
+                'verbose_name': 'Reconciliation Snapshot',
+                'verbose_name_plural': 'Reconciliation Snapshots',
+                'indexes': [models.Index(fields=['shop', 'date'], name='core_reconc_shop_id_9aff90_idx')],
+                'unique_together': {('shop', 'date', 'cashier', 'kind', 'currency', 'method')},
+            },
+        ),
+    ]
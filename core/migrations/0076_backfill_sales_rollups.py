@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models.signals import post_migrate
+
+
+def _backfill_after_migrate(using='default', **kwargs):
+    from core.models import ShopConfiguration
+    from core.sales_rollups import rebuild_sales_rollups
+
+    post_migrate.disconnect(dispatch_uid='core_backfill_sales_rollups')
+    for shop in ShopConfiguration.objects.using(using).all():
+        rebuild_sales_rollups(shop)
+
+
+def backfill_sales_rollups(apps, schema_editor):
+    """
+    Fill the daily, hourly and product rollups (0067-0069) from the live and archived
+    sales, so the dashboards don't read zeros until someone runs the rebuild by hand.
+    The rebuild uses the app's current models, so it runs once every migration has
+    applied (post_migrate) rather than against this migration's schema. Safe to
+    re-run - it recomputes whole days.
+    """
+    post_migrate.connect(_backfill_after_migrate, weak=False, dispatch_uid='core_backfill_sales_rollups')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0075_cache_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sales_rollups, migrations.RunPython.noop),
+    ]
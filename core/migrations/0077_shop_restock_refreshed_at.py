@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0076_backfill_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shopconfiguration',
+            name='restock_refreshed_at',
+            field=models.DateTimeField(blank=True, help_text='When restock suggestions were last recomputed', null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0077_shop_restock_refreshed_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sale',
+            name='core_sale_shop_id_f32b81_idx',
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(models.F('shop'), django.db.models.functions.text.Upper('customer_name'), name='core_sale_shop_cust_upper_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
+import json
 import uuid
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone
 from django.conf import settings
@@ -8,6 +10,26 @@ from decimal import Decimal
 # Import exchange rate models
 from .models_exchange_rates import ExchangeRate, ExchangeRateHistory
 
+# Import inventory summary, restock and forecast models
+from .models_inventory_summary import ShopInventorySummary
+from .models_restock import RestockSuggestion
+from .models_forecast import DemandForecast
+
+# Import sales rollup models
+from .models_sales_rollup import DailySalesRollup, HourlySalesRollup, ProductDailySalesRollup, SaleRollupState
+
+# Import drawer balance models
+from .models_drawer_balances import DrawerBalance, DrawerBalanceMixin
+
+# Import sales archive models
+from .models_sales_archive import ArchivedSale, ArchivedSaleItem, ArchivedSalePayment, ArchivedStaffLunch
+
+# Import end of day job model
+from .models_eod_job import EndOfDayJob
+
+# Import reconciliation snapshot model
+from .models_reconciliation_snapshot import ReconciliationSnapshot
+
 # Forward declaration to avoid circular import
 from django.apps import apps
 def get_stock_movement_model():
@@ -64,6 +86,7 @@ class ShopConfiguration(models.Model):
     registration_time = models.DateTimeField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
     last_login = models.DateTimeField(blank=True, null=True)
+    restock_refreshed_at = models.DateTimeField(blank=True, null=True, help_text="When restock suggestions were last recomputed")
 
     class Meta:
         verbose_name = "Shop Configuration"
@@ -186,6 +209,15 @@ class Product(models.Model):
             return ((self.price - self.cost_price) / self.cost_price) * 100
         return 0
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded stock/cost state so the inventory summary can apply deltas
+        if all(field in field_names for field in ('stock_quantity', 'cost_price', 'min_stock_level', 'category')):
+            from .models_inventory_summary import product_inventory_state
+            instance._inventory_state = product_inventory_state(instance)
+        return instance
+
     @classmethod
     def generate_random_line_code(cls):
         """Generate a random 8-digit line code"""
@@ -456,179 +488,78 @@ class ShopDay(models.Model):
         self.save()
         # Ensure each active cashier has a CashFloat record for today (zeroed) so UI shows drawers
         try:
-            from decimal import Decimal
-            today = self.date
-            active_cashiers = Cashier.objects.filter(shop=self.shop, status='active')
-            for cashier in active_cashiers:
-                try:
-                    # Use get_or_create with comprehensive defaults to ensure all fields are zeroed
-                    CashFloat.objects.update_or_create(
-                        shop=self.shop,
-                        cashier=cashier,
-                        date=today,
-                        defaults={
-                            'status': 'INACTIVE',
-                            'float_amount': Decimal('0.00'),
-                            
-                            # Legacy USD fields
-                            'current_cash': Decimal('0.00'),
-                            'current_card': Decimal('0.00'),
-                            'current_ecocash': Decimal('0.00'),
-                            'current_transfer': Decimal('0.00'),
-                            'current_total': Decimal('0.00'),
-                            
-                            # Currency-specific current amounts
-                            'current_cash_usd': Decimal('0.00'),
-                            'current_cash_zig': Decimal('0.00'),
-                            'current_cash_rand': Decimal('0.00'),
-                            'current_card_usd': Decimal('0.00'),
-                            'current_card_zig': Decimal('0.00'),
-                            'current_card_rand': Decimal('0.00'),
-                            'current_ecocash_usd': Decimal('0.00'),
-                            'current_ecocash_zig': Decimal('0.00'),
-                            'current_ecocash_rand': Decimal('0.00'),
-                            'current_transfer_usd': Decimal('0.00'),
-                            'current_transfer_zig': Decimal('0.00'),
-                            'current_transfer_rand': Decimal('0.00'),
-                            'current_total_usd': Decimal('0.00'),
-                            'current_total_zig': Decimal('0.00'),
-                            'current_total_rand': Decimal('0.00'),
-                            
-                            # Session sales (clear for new day)
-                            'session_cash_sales': Decimal('0.00'),
-                            'session_card_sales': Decimal('0.00'),
-                            'session_ecocash_sales': Decimal('0.00'),
-                            'session_transfer_sales': Decimal('0.00'),
-                            'session_total_sales': Decimal('0.00'),
-                            
-                            # Currency-specific session sales
-                            'session_cash_sales_usd': Decimal('0.00'),
-                            'session_cash_sales_zig': Decimal('0.00'),
-                            'session_cash_sales_rand': Decimal('0.00'),
-                            'session_card_sales_usd': Decimal('0.00'),
-                            'session_card_sales_zig': Decimal('0.00'),
-                            'session_card_sales_rand': Decimal('0.00'),
-                            'session_ecocash_sales_usd': Decimal('0.00'),
-                            'session_ecocash_sales_zig': Decimal('0.00'),
-                            'session_ecocash_sales_rand': Decimal('0.00'),
-                            'session_transfer_sales_usd': Decimal('0.00'),
-                            'session_transfer_sales_zig': Decimal('0.00'),
-                            'session_transfer_sales_rand': Decimal('0.00'),
-                            'session_total_sales_usd': Decimal('0.00'),
-                            'session_total_sales_zig': Decimal('0.00'),
-                            'session_total_sales_rand': Decimal('0.00'),
-                            
-                            # EOD expectations
-                            'expected_cash_at_eod': Decimal('0.00'),
-                        }
-                    )
-                except Exception:
-                    continue
+            from .drawer_reset import open_drawers
+            open_drawers(self.shop, self.date)
         except Exception:
             # Non-fatal: do not block opening the shop if float creation fails
             pass
         return self
     
     def close_shop(self, closed_by=None, notes=''):
-        """Close the shop for business and delete all sales and staff lunches for this day"""
-        from django.db import transaction
+        """
+        Close the shop for business and archive all sales and staff lunches for this day.
+        Runs the end of day job inline - requests submit it to run in the background instead.
+        """
+        from .models_eod_job import EndOfDayJob
         
-        if self.status != 'OPEN':
-            raise ValueError("Shop can only be closed when open")
+        job = EndOfDayJob.submit(self, closed_by=closed_by, notes=notes)
+        job.run()
+        if job.status != 'COMPLETED':
+            raise RuntimeError(f"Shop close failed at {job.current_stage}: {job.error}")
         
+        self.refresh_from_db()
+        return self
+    
+    def _begin_closing(self, closed_by=None, notes=''):
+        """Stop trading for the day while the end of day job runs"""
+        self.status = 'CLOSING'
+        self.closed_by = closed_by
+        self.closing_notes = notes
+        self.save()
+    
+    def _finish_closing(self):
+        self.status = 'CLOSED'
+        self.closed_at = timezone.now()
+        self.save()
+    
+    def _refresh_restock(self):
+        """Refresh restock suggestions while today's sales still exist"""
+        from django.db import transaction
         try:
             with transaction.atomic():
-                self.status = 'CLOSED'
-                self.closed_at = timezone.now()
-                self.closed_by = closed_by
-                self.closing_notes = notes
-                self.save()
-                
-                # CRITICAL: DELETE ALL SALES FOR THIS DAY - No retrieval, no history
-                # This ensures when shop reopens, no old sales appear
-                deleted_count, _ = Sale.objects.filter(shop_day=self).delete()
-                print(f"🗑️ DELETED {deleted_count} sales for shop day {self.date}")
-                
-                # CRITICAL: DELETE ALL STAFF LUNCHES FOR THE SHOP
-                # This clears all staff lunch records so the system starts fresh
-                staff_lunch_count, _ = StaffLunch.objects.filter(shop=self.shop).delete()
-                print(f"🗑️ DELETED {staff_lunch_count} staff lunch records for shop {self.shop.name}")
-                
-                # At close of day, mark/clear all today's cash floats so the next day starts fresh.
-                self._clear_drawers()
-                
-                # Close all active shifts
-                self._close_shifts()
+                RestockSuggestion.refresh_for_shop(self.shop)
         except Exception as e:
-            print(f"Error during shop close: {e}")
-            raise
-        
-        return self
+            print(f"Error refreshing restock suggestions: {e}")
+    
+    def _archive_sales(self):
+        """
+        Move this day's sales out of the live tables into the archive
+        This ensures when shop reopens, no old sales appear - history endpoints read the archive
+        """
+        # Local days the sales fall on - their reconciliation snapshot is recomputed
+        # from what is left live once the bulk archive has removed them
+        sale_days = {moment.date() for moment in Sale.objects.filter(shop_day=self).datetimes('created_at', 'day')}
+        archived_count = ArchivedSale.archive_shop_day(self)
+        for day in sale_days:
+            ReconciliationSnapshot.rebuild(self.shop_id, day)
+        print(f"📦 ARCHIVED {archived_count} sales for shop day {self.date}")
+        return archived_count
+    
+    def _archive_staff_lunches(self):
+        """Clear all staff lunch records so the system starts fresh (archived too)"""
+        staff_lunch_count = ArchivedStaffLunch.archive_shop(self.shop)
+        print(f"📦 ARCHIVED {staff_lunch_count} staff lunch records for shop {self.shop.name}")
+        return staff_lunch_count
     
     def _clear_drawers(self):
         """Clear all drawer amounts for this shop day"""
-        from decimal import Decimal
-        today = self.date
-        drawers = CashFloat.objects.filter(shop=self.shop, date=today)
-        for d in drawers:
-            try:
-                d.status = 'SETTLED'
-                d.current_cash = Decimal('0.00')
-                d.current_card = Decimal('0.00')
-                d.current_ecocash = Decimal('0.00')
-                d.current_transfer = Decimal('0.00')
-                d.current_total = Decimal('0.00')
-                d.current_cash_usd = Decimal('0.00')
-                d.current_cash_zig = Decimal('0.00')
-                d.current_cash_rand = Decimal('0.00')
-                d.current_card_usd = Decimal('0.00')
-                d.current_card_zig = Decimal('0.00')
-                d.current_card_rand = Decimal('0.00')
-                d.current_ecocash_usd = Decimal('0.00')
-                d.current_ecocash_zig = Decimal('0.00')
-                d.current_ecocash_rand = Decimal('0.00')
-                d.current_transfer_usd = Decimal('0.00')
-                d.current_transfer_zig = Decimal('0.00')
-                d.current_transfer_rand = Decimal('0.00')
-                d.current_total_usd = Decimal('0.00')
-                d.current_total_zig = Decimal('0.00')
-                d.current_total_rand = Decimal('0.00')
-                d.session_cash_sales = Decimal('0.00')
-                d.session_card_sales = Decimal('0.00')
-                d.session_ecocash_sales = Decimal('0.00')
-                d.session_transfer_sales = Decimal('0.00')
-                d.session_total_sales = Decimal('0.00')
-                d.session_cash_sales_usd = Decimal('0.00')
-                d.session_cash_sales_zig = Decimal('0.00')
-                d.session_cash_sales_rand = Decimal('0.00')
-                d.session_card_sales_usd = Decimal('0.00')
-                d.session_card_sales_zig = Decimal('0.00')
-                d.session_card_sales_rand = Decimal('0.00')
-                d.session_ecocash_sales_usd = Decimal('0.00')
-                d.session_ecocash_sales_zig = Decimal('0.00')
-                d.session_ecocash_sales_rand = Decimal('0.00')
-                d.session_transfer_sales_usd = Decimal('0.00')
-                d.session_transfer_sales_zig = Decimal('0.00')
-                d.session_transfer_sales_rand = Decimal('0.00')
-                d.session_total_sales_usd = Decimal('0.00')
-                d.session_total_sales_zig = Decimal('0.00')
-                d.session_total_sales_rand = Decimal('0.00')
-                d.expected_cash_at_eod = Decimal('0.00')
-                d.save()
-            except Exception:
-                continue
+        from .drawer_reset import reset_drawers
+        return reset_drawers(CashFloat.objects.filter(shop=self.shop, date=self.date))
     
     def _close_shifts(self):
         """Close all active shifts for this shop day"""
-        active_shifts = Shift.objects.filter(
-            shop=self.shop,
-            start_time__date=self.date,
-            is_active=True
-        )
-        for shift in active_shifts:
-            shift.is_active = False
-            shift.end_time = timezone.now()
-            shift.save()
+        from .drawer_reset import close_shifts
+        return close_shifts(self.shop, self.date)
     
     @classmethod
     def get_current_day(cls, shop):
@@ -779,10 +710,29 @@ class Sale(models.Model):
     class Meta:
         verbose_name = "Sale"
         verbose_name_plural = "Sales"
+        indexes = [
+            # Newest-first ledgers paged by (created_at, id) keyset
+            models.Index(fields=['shop', '-created_at', '-id']),
+            # Case-insensitive customer name prefix search in the sales feed
+            models.Index(models.F('shop'), Upper('customer_name'), name='core_sale_shop_cust_upper_idx'),
+        ]
 
     def __str__(self):
         return f"Sale #{self.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded payment state so the cashier's drawer can apply deltas
+        if all(field in field_names for field in ('status', 'payment_method', 'payment_currency', 'total_amount', 'amount_received')):
+            from .models_drawer_balances import sale_drawer_state
+            instance._drawer_state = sale_drawer_state(instance)
+            # ...and the reconciliation snapshot
+            if all(field in field_names for field in ('cashier_id', 'created_at', 'refund_amount')):
+                from .models_reconciliation_snapshot import sale_snapshot_state
+                instance._snapshot_state = sale_snapshot_state(instance)
+        return instance
+
     def save(self, *args, **kwargs):
         # Auto-set shop_day to current shop day if not set
         if not self.shop_day and self.shop:
@@ -1354,6 +1304,14 @@ class StockMovement(models.Model):
             return "OK"
 
     def save(self, *args, **kwargs):
+        self.compute_derived_fields(self.product.min_stock_level)
+        super().save(*args, **kwargs)
+
+    def compute_derived_fields(self, min_stock_level):
+        """
+        Fill in total cost value, inventory value change and transition type.
+        Called by save() and by bulk paths that bypass save().
+        """
         # Auto-calculate total cost value and inventory value change
         if not self.total_cost_value:
             self.total_cost_value = abs(self.quantity_change) * self.cost_price
@@ -1370,10 +1328,17 @@ class StockMovement(models.Model):
             self.transition_type = 'POSITIVE_TO_NEGATIVE'
         elif self.is_addition and self.previous_stock < 0:
             self.transition_type = 'RESTOCK'
-        elif self.is_deduction and self.previous_stock > self.product.min_stock_level and self.new_stock <= self.product.min_stock_level:
+        elif self.is_deduction and self.previous_stock > min_stock_level and self.new_stock <= min_stock_level:
             self.transition_type = 'OVERSTOCK_CORRECTION'
-        
-        super().save(*args, **kwargs)
+
+
+class StockConflict(Exception):
+    """A batch transfer's source no longer has the stock it was validated against"""
+
+    def __init__(self, index, product, available, required):
+        super().__init__(f"Insufficient stock for {product.name}. Available: {available}, Required: {required}")
+        self.index = index
+        self.product = {'id': product.id, 'name': product.name, 'available': float(available), 'required': float(required)}
 
 
 class StockTransfer(models.Model):
@@ -1460,7 +1425,6 @@ class StockTransfer(models.Model):
         """Validate if the transfer can be processed with business impact analysis"""
         errors = []
         warnings = []
-        print(f"DEBUG: Starting validation for transfer")
         
         # Check if from product exists
         if not self.from_product and not (self.from_line_code or self.from_barcode):
@@ -1468,12 +1432,9 @@ class StockTransfer(models.Model):
         elif not self.from_product:
             # Try to find the from product
             identifier = self.from_line_code or self.from_barcode
-            print(f"DEBUG: Attempting to find source product with identifier: {identifier}")
             self.from_product = self._find_product_by_identifier(identifier)
             if not self.from_product:
                 errors.append(f"Source product not found: {identifier}")
-            else:
-                print(f"DEBUG: Source product found: {self.from_product.name}")
         
         # Check if to product exists
         if not self.to_product and not (self.to_line_code or self.to_barcode):
@@ -1481,19 +1442,15 @@ class StockTransfer(models.Model):
         elif not self.to_product:
             # For SPLIT operations, we'll create the product during processing
             if self.transfer_type == 'SPLIT':
-                print(f"DEBUG: SPLIT operation - will create destination product during processing")
                 # For SPLIT operations, we allow the product to not exist yet
                 # It will be created in the process_transfer method
                 pass
             else:
                 # Try to find the to product for other transfer types
                 identifier = self.to_line_code or self.to_barcode
-                print(f"DEBUG: Attempting to find destination product with identifier: {identifier}")
                 self.to_product = self._find_product_by_identifier(identifier)
                 if not self.to_product:
                     errors.append(f"Destination product not found: {identifier}")
-                else:
-                    print(f"DEBUG: Destination product found: {self.to_product.name}")
         
         # COST VALIDATION - Now treated as WARNINGS (user can confirm)
         if self.from_product and float(self.from_product.cost_price) <= 0:
@@ -1512,7 +1469,6 @@ class StockTransfer(models.Model):
         # Check if we have enough stock for transfer (if applicable)
         if self.from_product and self.from_quantity > 0:
             current_stock = float(self.from_product.stock_quantity) if self.from_product.stock_quantity else 0
-            print(f"DEBUG: Source product stock check - Current: {current_stock}, Required: {self.from_quantity}")
             if current_stock < float(self.from_quantity):
                 errors.append(f"Insufficient stock. Available: {current_stock}, Required: {self.from_quantity}")
         
@@ -1522,8 +1478,6 @@ class StockTransfer(models.Model):
             expected_yield = float(self.from_quantity) * float(conversion_ratio)
             actual_yield = float(self.to_quantity)
             
-            print(f"DEBUG: Yield Analysis - Expected: {expected_yield}, Actual: {actual_yield}")
-            
             # Calculate potential shrinkage
             if actual_yield < expected_yield:
                 shrinkage_qty = expected_yield - actual_yield
@@ -1534,12 +1488,6 @@ class StockTransfer(models.Model):
                 surplus_value = surplus_qty * float(self.to_product.cost_price)
                 warnings.append(f"SURPLUS DETECTED: Expected {expected_yield} units but produced {actual_yield}. Gain: {surplus_qty:.2f} units (${surplus_value:.2f})")
         
-        print(f"DEBUG: Validation complete. Errors: {len(errors)}, Warnings: {len(warnings)}")
-        for error in errors:
-            print(f"DEBUG: Validation error: {error}")
-        for warning in warnings:
-            print(f"DEBUG: Validation warning: {warning}")
-        
         return {
             'errors': errors,
             'warnings': warnings,
@@ -1549,29 +1497,21 @@ class StockTransfer(models.Model):
     
     def process_transfer(self):
         """Execute the stock transfer"""
-        print(f"DEBUG: process_transfer called for transfer ID: {self.id}")
-        print(f"DEBUG: Transfer status: {self.status}")
-        print(f"DEBUG: Transfer type: {self.transfer_type}")
         
         if self.status != 'PENDING':
-            print(f"DEBUG: Transfer is not in pending status: {self.status}")
             return False, ["Transfer is not in pending status"]
         
         # Validate transfer
         validation_result = self.validate_transfer()
-        print(f"DEBUG: Validation result: {validation_result}")
         if not validation_result['can_proceed']:
-            print(f"DEBUG: Validation failed with errors: {validation_result['errors']}")
             return False, validation_result['errors']
         
         try:
             from django.db import transaction
             
-            print(f"DEBUG: Finding products...")
             # Find products if not already set
             if not self.from_product and (self.from_line_code or self.from_barcode):
                 self.from_product = self._find_product_by_identifier(self.from_line_code or self.from_barcode)
-                print(f"DEBUG: Found from_product: {self.from_product.name if self.from_product else 'Not found'}")
                 if not self.from_product:
                     return False, [f"Source product not found: {self.from_line_code or self.from_barcode}"]
             
@@ -1614,7 +1554,6 @@ class StockTransfer(models.Model):
                                     barcode=self.to_barcode or '',
                                     stock_quantity=0  # Start with 0, will be updated below
                                 )
-                                print(f"DEBUG: Created new product for split: {self.to_product.name}")
                             else:
                                 # Create basic product without detailed data
                                 self.to_product = Product.objects.create(
@@ -1628,15 +1567,12 @@ class StockTransfer(models.Model):
                                     barcode=self.to_barcode or '',
                                     stock_quantity=0
                                 )
-                                print(f"DEBUG: Created basic product for split: {self.to_product.name}")
                     except Exception as e:
-                        print(f"DEBUG: Error creating new product: {e}")
                         return False, [f"Failed to create new product for split: {str(e)}"]
                 else:
                     # Try to find existing product for other transfer types
                     identifier = self.to_line_code or self.to_barcode
                     self.to_product = self._find_product_by_identifier(identifier)
-                    print(f"DEBUG: Found to_product: {self.to_product.name if self.to_product else 'Not found'}")
                     if not self.to_product:
                         return False, [f"Destination product not found: {self.to_line_code or self.to_barcode}"]
             
@@ -1651,12 +1587,10 @@ class StockTransfer(models.Model):
             
             # Process the transfer
             with transaction.atomic():
-                print(f"DEBUG: Processing transfer in transaction...")
                 # Deduct from source product
                 if self.from_product and self.from_quantity > 0:
                     old_from_stock = float(self.from_product.stock_quantity) or 0
                     new_from_stock = old_from_stock - float(self.from_quantity)
-                    print(f"DEBUG: Updating from_product stock: {old_from_stock} -> {new_from_stock}")
                     self.from_product.stock_quantity = new_from_stock
                     self.from_product.save()
                 
@@ -1669,13 +1603,6 @@ class StockTransfer(models.Model):
                 if self.from_product:
                     from_cost_price = float(self.from_product.cost_price or 0)
                     from_product_cost = float(self.from_quantity) * from_cost_price
-                    print(f"DEBUG: Source product cost calculation:")
-                    print(f"DEBUG: Product name: {self.from_product.name}")
-                    print(f"DEBUG: Cost price from DB: ${from_cost_price}")
-                    print(f"DEBUG: Quantity: {self.from_quantity}")
-                    print(f"DEBUG: Total source cost: {self.from_quantity} × ${from_cost_price} = ${from_product_cost}")
-                else:
-                    print(f"DEBUG: No source product found for cost calculation")
                 
                 if self.to_product:
                     to_cost_price = float(self.to_product.cost_price or 0)
@@ -1688,18 +1615,11 @@ class StockTransfer(models.Model):
                     if self.transfer_type == 'SPLIT':
                         quantity_to_add = float(self.from_quantity) * float(conversion_ratio)
                         new_to_stock = old_to_stock + quantity_to_add
-                        print(f"DEBUG: SPLIT operation - Adding {quantity_to_add} (from {self.from_quantity} × {conversion_ratio})")
                     else:
                         quantity_to_add = float(self.to_quantity)
                         new_to_stock = old_to_stock + quantity_to_add
-                        print(f"DEBUG: ADD operation - Adding {self.to_quantity}")
                     
                     to_product_cost = quantity_to_add * to_cost_price
-                    print(f"DEBUG: Destination product cost calculation:")
-                    print(f"DEBUG: Product name: {self.to_product.name}")
-                    print(f"DEBUG: Cost price from DB: ${to_cost_price}")
-                    print(f"DEBUG: Quantity to add: {quantity_to_add}")
-                    print(f"DEBUG: Total destination cost: {quantity_to_add} × ${to_cost_price} = ${to_product_cost}")
                     
                     # Calculate inventory value change
                     old_inventory_value = max(0, old_to_stock) * float(self.to_product.cost_price)
@@ -1717,8 +1637,6 @@ class StockTransfer(models.Model):
                     else:
                         net_inventory_value_change = to_inventory_change
                     
-                    print(f"DEBUG: Inventory value change: ${net_inventory_value_change}")
-                    
                     # Update destination product stock
                     self.to_product.stock_quantity = new_to_stock
                     self.to_product.save()
@@ -1729,12 +1647,6 @@ class StockTransfer(models.Model):
                     shrinkage_qty = max(0, expected_yield - actual_yield)
                     shrinkage_val = shrinkage_qty * float(self.to_product.cost_price)
                     
-                    print(f"DEBUG: Shrinkage Analysis:")
-                    print(f"DEBUG: Expected yield: {expected_yield}")
-                    print(f"DEBUG: Actual yield: {actual_yield}")
-                    print(f"DEBUG: Shrinkage quantity: {shrinkage_qty}")
-                    print(f"DEBUG: Shrinkage value: ${shrinkage_val}")
-                    
                     # Store all financial calculations including shrinkage
                     self.from_product_cost = from_product_cost
                     self.to_product_cost = to_product_cost
@@ -1750,14 +1662,9 @@ class StockTransfer(models.Model):
                 self.completed_at = timezone.now()
                 self.save()
                 
-                print(f"DEBUG: Transfer completed successfully!")
                 return True, ["Transfer completed successfully"]
                 
         except Exception as e:
-            print(f"DEBUG: Exception in process_transfer: {str(e)}")
-            print(f"DEBUG: Exception type: {type(e)}")
-            import traceback
-            print(f"DEBUG: Traceback: {traceback.format_exc()}")
             return False, [f"Error processing transfer: {str(e)}"]
     
     def get_financial_impact_summary(self):
@@ -1879,7 +1786,6 @@ class StockTransfer(models.Model):
     
     def _find_product_by_identifier(self, identifier):
         """Find product by line code or barcode with comprehensive search"""
-        print(f"DEBUG: Searching for product with identifier: '{identifier}'")
         
         # Get shop context - we need to filter by shop
         shop = self.shop
@@ -1887,18 +1793,16 @@ class StockTransfer(models.Model):
         # Search by line code first
         try:
             product = Product.objects.get(line_code=identifier, shop=shop)
-            print(f"DEBUG: Found product by line_code: {product.name}")
             return product
         except Product.DoesNotExist:
-            print(f"DEBUG: Product not found by line_code: {identifier}")
+            pass
         
         # Search by primary barcode
         try:
             product = Product.objects.get(barcode=identifier, shop=shop)
-            print(f"DEBUG: Found product by barcode: {product.name}")
             return product
         except Product.DoesNotExist:
-            print(f"DEBUG: Product not found by barcode: {identifier}")
+            pass
         
         # Search in additional barcodes
         try:
@@ -1907,10 +1811,9 @@ class StockTransfer(models.Model):
                 additional_barcodes__contains=identifier
             ).first()
             if product:
-                print(f"DEBUG: Found product by additional_barcodes: {product.name}")
                 return product
-        except Exception as e:
-            print(f"DEBUG: Error searching additional_barcodes: {e}")
+        except Exception:
+            pass
         
         # Search by product name (case insensitive, partial match)
         try:
@@ -1919,13 +1822,333 @@ class StockTransfer(models.Model):
                 name__icontains=identifier
             ).first()
             if product:
-                print(f"DEBUG: Found product by name search: {product.name}")
                 return product
-        except Exception as e:
-            print(f"DEBUG: Error searching by name: {e}")
+        except Exception:
+            pass
         
-        print(f"DEBUG: Product not found with identifier: '{identifier}'")
         return None
+    
+    @classmethod
+    def resolve_products(cls, shop, identifiers):
+        """
+        Resolve many line codes / barcodes in one pass.
+        Returns (products_by_id, product_id_by_identifier). Line codes win over
+        barcodes, which win over additional barcodes - same order as
+        _find_product_by_identifier (name matching is not used for batches).
+        """
+        identifiers = {identifier for identifier in identifiers if identifier}
+        products_by_id = {}
+        id_by_identifier = {}
+        if not identifiers:
+            return products_by_id, id_by_identifier
+        
+        from django.db.models import Q
+        matches = list(Product.objects.filter(shop=shop).filter(
+            Q(line_code__in=identifiers) | Q(barcode__in=identifiers)
+        ))
+        for product in matches:
+            products_by_id[product.id] = product
+            if product.barcode in identifiers:
+                id_by_identifier.setdefault(product.barcode, product.id)
+        for product in matches:
+            if product.line_code in identifiers:
+                id_by_identifier[product.line_code] = product.id
+        
+        missing = identifiers - id_by_identifier.keys()
+        if missing:
+            # Only products whose stored barcode list mentions a missing code (as a JSON
+            # string); the exact match is checked below. A text match rather than a JSON
+            # containment lookup, which SQLite doesn't support.
+            lookup = Q()
+            for code in missing:
+                lookup |= Q(additional_barcodes__icontains=json.dumps(str(code)))
+            for product in Product.objects.filter(shop=shop).filter(lookup):
+                for code in product.additional_barcodes or []:
+                    if code in missing and code not in id_by_identifier:
+                        products_by_id.setdefault(product.id, product)
+                        id_by_identifier[code] = product.id
+        
+        return products_by_id, id_by_identifier
+    
+    @classmethod
+    def process_batch(cls, shop, entries, performed_by=None, confirm_warnings=False):
+        """
+        Validate and apply many transfers/splits in one atomic pass.
+        
+        Every entry is validated up front against a running view of stock, so
+        several transfers drawing on the same source are checked together. If
+        any entry fails nothing is applied. Stock changes are netted per product
+        and written with a single bulk update; transfer records are bulk created.
+        
+        Each entry accepts the same fields as a single transfer plus an optional
+        expected_ratio (expected destination units per source unit) used for
+        shrinkage detection.
+        """
+        from decimal import InvalidOperation
+        
+        malformed = [index for index, entry in enumerate(entries) if not isinstance(entry, dict)]
+        if malformed:
+            return {
+                'success': False,
+                'can_proceed': False,
+                'requires_confirmation': False,
+                'results': [{
+                    'index': index,
+                    'errors': ["Each entry must be an object"] if index in malformed else [],
+                    'warnings': [],
+                } for index in range(len(entries))],
+            }
+        
+        parsed = []
+        results = []
+        for index, entry in enumerate(entries):
+            errors = []
+            transfer_type = entry.get('transfer_type', 'CONVERSION')
+            if transfer_type not in dict(cls.TRANSFER_TYPES):
+                errors.append(f"Invalid transfer type: {transfer_type}")
+            try:
+                from_quantity = Decimal(str(entry.get('from_quantity', 0)))
+                to_quantity = Decimal(str(entry.get('to_quantity', 0)))
+                expected_ratio = entry.get('expected_ratio')
+                expected_ratio = Decimal(str(expected_ratio)) if expected_ratio not in (None, '') else None
+            except (InvalidOperation, ValueError, TypeError):
+                errors.append("Quantities must be numbers")
+                from_quantity = to_quantity = Decimal('0')
+                expected_ratio = None
+            if from_quantity <= 0:
+                errors.append("Source quantity must be greater than 0")
+            if to_quantity <= 0:
+                errors.append("Destination quantity must be greater than 0")
+            
+            parsed.append({
+                'index': index,
+                'transfer_type': transfer_type,
+                'from_identifier': entry.get('from_line_code') or entry.get('from_barcode') or '',
+                'to_identifier': entry.get('to_line_code') or entry.get('to_barcode') or '',
+                'from_line_code': entry.get('from_line_code', ''),
+                'from_barcode': entry.get('from_barcode', ''),
+                'to_line_code': entry.get('to_line_code', ''),
+                'to_barcode': entry.get('to_barcode', ''),
+                'from_quantity': from_quantity,
+                'to_quantity': to_quantity,
+                'expected_ratio': expected_ratio,
+                'reason': entry.get('reason', ''),
+                'notes': entry.get('notes', ''),
+                'new_product_data': entry.get('new_product_data'),
+            })
+            results.append({'index': index, 'errors': errors, 'warnings': []})
+        
+        products_by_id, id_by_identifier = cls.resolve_products(
+            shop, [p['from_identifier'] for p in parsed] + [p['to_identifier'] for p in parsed]
+        )
+        
+        # Validate every pair against running stock levels
+        running_stock = {pid: Decimal(str(product.stock_quantity or 0)) for pid, product in products_by_id.items()}
+        for item, result in zip(parsed, results):
+            errors, warnings = result['errors'], result['warnings']
+            from_id = id_by_identifier.get(item['from_identifier'])
+            to_id = id_by_identifier.get(item['to_identifier'])
+            item['from_id'], item['to_id'] = from_id, to_id
+            
+            if not item['from_identifier']:
+                errors.append("Source product must be specified")
+            elif from_id is None:
+                errors.append(f"Source product not found: {item['from_identifier']}")
+            
+            if not item['to_identifier']:
+                errors.append("Destination product must be specified")
+            elif to_id is None and item['transfer_type'] != 'SPLIT':
+                errors.append(f"Destination product not found: {item['to_identifier']}")
+            
+            if from_id is not None and from_id == to_id:
+                errors.append("Source and destination must be different products")
+            
+            if errors:
+                continue
+            
+            from_product = products_by_id[from_id]
+            to_product = products_by_id.get(to_id)
+            if from_product.cost_price <= 0:
+                warnings.append(f"WARNING: Source product '{from_product.name}' has $0.00 cost price. This will mask shrinkage losses!")
+            if to_product and to_product.cost_price <= 0:
+                warnings.append(f"WARNING: Destination product '{to_product.name}' has $0.00 cost price. This will mask shrinkage losses!")
+            
+            if running_stock[from_id] < item['from_quantity']:
+                errors.append(f"Insufficient stock. Available: {running_stock[from_id]}, Required: {item['from_quantity']}")
+                continue
+            running_stock[from_id] -= item['from_quantity']
+            if to_id is not None:
+                running_stock[to_id] += item['to_quantity']
+            
+            if item['expected_ratio'] is not None:
+                expected_yield = item['from_quantity'] * item['expected_ratio']
+                if item['to_quantity'] < expected_yield:
+                    warnings.append(f"SHRINKAGE DETECTED: Expected {expected_yield} units but only {item['to_quantity']} produced")
+        
+        has_errors = any(result['errors'] for result in results)
+        has_warnings = any(result['warnings'] for result in results)
+        if has_errors or (has_warnings and not confirm_warnings):
+            return {
+                'success': False,
+                'can_proceed': not has_errors,
+                'requires_confirmation': not has_errors and has_warnings,
+                'results': results,
+            }
+        
+        try:
+            return cls._apply_batch(shop, parsed, results, performed_by)
+        except StockConflict as conflict:
+            # Stock moved between validation and the locked re-check - nothing was applied
+            for result in results:
+                for key in list(result):
+                    if key not in ('index', 'errors', 'warnings'):
+                        del result[key]
+            results[conflict.index]['errors'].append(str(conflict))
+            return {
+                'success': False,
+                'can_proceed': False,
+                'requires_confirmation': False,
+                'conflict': True,
+                'product': conflict.product,
+                'results': results,
+            }
+    
+    @classmethod
+    def _apply_batch(cls, shop, parsed, results, performed_by):
+        """Write a validated batch; raises StockConflict when a locked re-check fails"""
+        from django.db import transaction
+        from .models_inventory_summary import product_inventory_state, ShopInventorySummary
+        
+        now = timezone.now()
+        with transaction.atomic():
+            # Lock every touched product and re-check stock against committed values
+            touched_ids = {item['from_id'] for item in parsed} | {item['to_id'] for item in parsed if item['to_id']}
+            locked = {p.id: p for p in Product.objects.select_for_update().filter(id__in=touched_ids)}
+            old_states = {pid: product_inventory_state(product) for pid, product in locked.items()}
+            stock = {pid: Decimal(str(product.stock_quantity or 0)) for pid, product in locked.items()}
+            
+            # SPLIT destinations that don't exist yet are created once per identifier
+            created_ids = {}
+            for item in parsed:
+                if item['to_id'] is not None:
+                    continue
+                if item['to_identifier'] in created_ids:
+                    item['to_id'] = created_ids[item['to_identifier']]
+                    continue
+                from_product = locked[item['from_id']]
+                data = item['new_product_data'] or {}
+                new_product = Product.objects.create(
+                    shop=shop,
+                    name=data.get('name') or f"Split Product from {from_product.name}",
+                    price=Decimal(str(data.get('price', from_product.price))),
+                    cost_price=Decimal(str(data.get('cost_price', (from_product.cost_price * item['from_quantity'] / item['to_quantity']).quantize(Decimal('0.01'))))),
+                    category=data.get('category', from_product.category),
+                    currency=data.get('currency', from_product.currency),
+                    line_code=item['to_line_code'],
+                    barcode=item['to_barcode'] or '',
+                    stock_quantity=0,
+                )
+                locked[new_product.id] = new_product
+                old_states[new_product.id] = product_inventory_state(new_product)
+                stock[new_product.id] = Decimal('0')
+                created_ids[item['to_identifier']] = new_product.id
+                item['to_id'] = new_product.id
+            
+            transfers = []
+            totals = {
+                'from_product_cost': Decimal('0'),
+                'to_product_cost': Decimal('0'),
+                'net_inventory_value_change': Decimal('0'),
+                'shrinkage_quantity': Decimal('0'),
+                'shrinkage_value': Decimal('0'),
+            }
+            for item, result in zip(parsed, results):
+                from_product, to_product = locked[item['from_id']], locked[item['to_id']]
+                from_qty, to_qty = item['from_quantity'], item['to_quantity']
+                if stock[from_product.id] < from_qty:
+                    raise StockConflict(item['index'], from_product, stock[from_product.id], from_qty)
+                
+                from_before, to_before = stock[from_product.id], stock[to_product.id]
+                stock[from_product.id] = from_before - from_qty
+                stock[to_product.id] = to_before + to_qty
+                
+                from_cost = from_qty * from_product.cost_price
+                to_cost = to_qty * to_product.cost_price
+                value_change = (
+                    (max(Decimal('0'), stock[to_product.id]) - max(Decimal('0'), to_before)) * to_product.cost_price
+                    + (max(Decimal('0'), stock[from_product.id]) - max(Decimal('0'), from_before)) * from_product.cost_price
+                )
+                conversion_ratio = to_qty / from_qty
+                expected_yield = from_qty * (item['expected_ratio'] if item['expected_ratio'] is not None else conversion_ratio)
+                shrinkage_qty = max(Decimal('0'), expected_yield - to_qty)
+                shrinkage_val = shrinkage_qty * to_product.cost_price
+                
+                totals['from_product_cost'] += from_cost
+                totals['to_product_cost'] += to_cost
+                totals['net_inventory_value_change'] += value_change
+                totals['shrinkage_quantity'] += shrinkage_qty
+                totals['shrinkage_value'] += shrinkage_val
+                
+                transfers.append(cls(
+                    shop=shop,
+                    transfer_type=item['transfer_type'],
+                    status='COMPLETED',
+                    from_product=from_product,
+                    from_quantity=from_qty,
+                    from_line_code=item['from_line_code'],
+                    from_barcode=item['from_barcode'],
+                    to_product=to_product,
+                    to_quantity=to_qty,
+                    to_line_code=item['to_line_code'],
+                    to_barcode=item['to_barcode'],
+                    conversion_ratio=conversion_ratio.quantize(Decimal('0.0001')),
+                    cost_impact=(to_cost - from_cost).quantize(Decimal('0.01')),
+                    shrinkage_quantity=shrinkage_qty.quantize(Decimal('0.01')),
+                    shrinkage_value=shrinkage_val.quantize(Decimal('0.01')),
+                    from_product_cost=from_cost.quantize(Decimal('0.01')),
+                    to_product_cost=to_cost.quantize(Decimal('0.01')),
+                    net_inventory_value_change=value_change.quantize(Decimal('0.01')),
+                    reason=item['reason'],
+                    performed_by=performed_by,
+                    completed_at=now,
+                    notes=item['notes'],
+                ))
+                result.update({
+                    'from_product': {'id': from_product.id, 'name': from_product.name, 'new_stock': float(stock[from_product.id])},
+                    'to_product': {'id': to_product.id, 'name': to_product.name, 'new_stock': float(stock[to_product.id]),
+                                   'created': to_product.id in created_ids.values()},
+                    'from_quantity': float(from_qty),
+                    'to_quantity': float(to_qty),
+                    'cost_impact': float(to_cost - from_cost),
+                    'net_inventory_value_change': float(value_change),
+                    'shrinkage_quantity': float(shrinkage_qty),
+                    'shrinkage_value': float(shrinkage_val),
+                })
+            
+            # One bulk write for all stock changes
+            changed = []
+            for pid, product in locked.items():
+                if stock[pid] != Decimal(str(product.stock_quantity or 0)):
+                    product.stock_quantity = stock[pid]
+                    product.updated_at = now
+                    changed.append(product)
+            Product.objects.bulk_update(changed, ['stock_quantity', 'updated_at'])
+            ShopInventorySummary.apply_product_changes(
+                shop.id, [(old_states[p.id], product_inventory_state(p)) for p in changed]
+            )
+            for product in changed:
+                product._inventory_state = product_inventory_state(product)
+            
+            created = cls.objects.bulk_create(transfers)
+            for transfer, result in zip(created, results):
+                result['transfer_id'] = transfer.id
+        
+        return {
+            'success': True,
+            'transfers_processed': len(created),
+            'results': results,
+            'totals': {key: float(value) for key, value in totals.items()},
+        }
 
 class WasteBatch(models.Model):
     """
@@ -1991,24 +2214,37 @@ class WasteBatch(models.Model):
         return f"WB-{timestamp}-{unique_id}"
     
     def add_waste_item(self, product, quantity, specific_reason=None, specific_details=None):
-        """Add a product to this waste batch"""
+        """
+        Add a product to this waste batch.
+        Draft items only record the waste - stock is reduced when the batch is completed.
+        """
         if self.status != 'DRAFT':
             raise ValueError("Cannot add items to completed or cancelled batch")
         
         try:
-            # Create individual waste record for this product
+            quantity = Decimal(str(quantity))
+            cost_price = product.cost_price or Decimal('0')
+            
+            # Create individual waste record for this product (stock applied on completion)
             waste_item = Waste.objects.create(
                 shop=self.shop,
                 shop_batch=self,  # Associate with this batch
                 product=product,
                 quantity=quantity,
+                cost_price=cost_price,
                 reason=specific_reason or self.reason,
                 reason_details=specific_details or self.reason_details,
-                recorded_by=self.recorded_by
+                recorded_by=self.recorded_by,
+                stock_applied=False
             )
             
-            # Update batch totals
-            self._update_totals()
+            # Keep running totals with a single UPDATE instead of re-aggregating the batch
+            WasteBatch.objects.filter(pk=self.pk).update(
+                total_waste_value=models.F('total_waste_value') + waste_item.waste_value,
+                total_waste_quantity=models.F('total_waste_quantity') + quantity
+            )
+            self.total_waste_value = Decimal(str(self.total_waste_value or 0)) + waste_item.waste_value
+            self.total_waste_quantity = Decimal(str(self.total_waste_quantity or 0)) + quantity
             
             return waste_item
         except Exception as e:
@@ -2016,35 +2252,109 @@ class WasteBatch(models.Model):
     
     def _update_totals(self):
         """Update batch totals based on individual waste records"""
-        waste_items = Waste.objects.filter(shop_batch=self)
-        self.total_waste_value = waste_items.aggregate(
-            total=models.Sum('waste_value')
-        )['total'] or 0
-        self.total_waste_quantity = waste_items.aggregate(
-            total=models.Sum('quantity')
-        )['total'] or 0
+        totals = Waste.objects.filter(shop_batch=self).aggregate(
+            total_value=models.Sum('waste_value'),
+            total_quantity=models.Sum('quantity')
+        )
+        self.total_waste_value = totals['total_value'] or 0
+        self.total_waste_quantity = totals['total_quantity'] or 0
         self.save()
     
+    def _apply_stock_changes(self, waste_items, direction, note_prefix):
+        """
+        Apply (direction=-1) or reverse (direction=1) the stock effect of waste items in one pass:
+        one locked product fetch, one bulk stock update, one bulk movement insert.
+        """
+        from .models_inventory_summary import product_inventory_state, ShopInventorySummary
+        
+        if not waste_items:
+            return
+        
+        products = {
+            p.id: p for p in Product.objects.select_for_update().filter(
+                id__in={item.product_id for item in waste_items}
+            )
+        }
+        old_states = {pid: product_inventory_state(product) for pid, product in products.items()}
+        stock = {pid: Decimal(str(product.stock_quantity or 0)) for pid, product in products.items()}
+        
+        movements = []
+        for item in waste_items:
+            product = products[item.product_id]
+            previous_stock = stock[product.id]
+            quantity_change = direction * item.quantity
+            stock[product.id] = previous_stock + quantity_change
+            
+            movement = StockMovement(
+                shop=self.shop,
+                product=product,
+                movement_type='DAMAGE',  # Waste is treated as damage
+                previous_stock=previous_stock,
+                quantity_change=quantity_change,
+                new_stock=stock[product.id],
+                cost_price=item.cost_price,
+                reference_number=self.batch_number,
+                notes=f'{note_prefix}: {item.get_reason_display()} - {item.reason_details[:100] if item.reason_details else "No details"}',
+                performed_by_id=item.recorded_by_id if direction < 0 else self.recorded_by_id
+            )
+            movement.compute_derived_fields(product.min_stock_level)
+            movements.append(movement)
+        
+        now = timezone.now()
+        for pid, product in products.items():
+            product.stock_quantity = stock[pid]
+            product.updated_at = now
+        Product.objects.bulk_update(list(products.values()), ['stock_quantity', 'updated_at'])
+        StockMovement.objects.bulk_create(movements)
+        
+        ShopInventorySummary.apply_product_changes(
+            self.shop_id, [(old_states[pid], product_inventory_state(product)) for pid, product in products.items()]
+        )
+        for product in products.values():
+            product._inventory_state = product_inventory_state(product)
+    
     def complete_batch(self):
-        """Mark batch as completed"""
-        if self.status != 'DRAFT':
-            raise ValueError("Only draft batches can be completed")
+        """
+        Mark batch as completed.
+        Applies every pending stock reduction, movement record and the batch totals in one pass.
+        """
+        from django.db import transaction
         
-        self.status = 'COMPLETED'
-        self.completed_at = timezone.now()
-        self._update_totals()
-        self.save()
+        with transaction.atomic():
+            locked = WasteBatch.objects.select_for_update().get(pk=self.pk)
+            if locked.status != 'DRAFT':
+                raise ValueError("Only draft batches can be completed")
+            
+            pending = list(Waste.objects.filter(shop_batch=self, stock_applied=False).order_by('created_at', 'id'))
+            self._apply_stock_changes(pending, -1, 'Waste recorded')
+            Waste.objects.filter(id__in=[item.id for item in pending]).update(stock_applied=True)
+            
+            self.status = 'COMPLETED'
+            self.completed_at = timezone.now()
+            self._update_totals()
     
     def cancel_batch(self):
-        """Cancel the batch (reverses all waste records)"""
-        if self.status != 'DRAFT':
-            raise ValueError("Only draft batches can be cancelled")
-        
-        # Delete all waste records in this batch
-        Waste.objects.filter(shop_batch=self).delete()
+        """
+        Cancel the batch (reverses all waste records).
+        Any stock already taken by the batch is put back in one pass before the records are removed.
+        """
+        from django.db import transaction
         
-        self.status = 'CANCELLED'
-        self.save()
+        with transaction.atomic():
+            locked = WasteBatch.objects.select_for_update().get(pk=self.pk)
+            if locked.status not in ('DRAFT', 'COMPLETED'):
+                raise ValueError("Only draft or completed batches can be cancelled")
+            
+            applied = list(Waste.objects.filter(shop_batch=self, stock_applied=True).order_by('created_at', 'id'))
+            self._apply_stock_changes(applied, 1, 'Waste reversed (batch cancelled)')
+            
+            # Delete all waste records in this batch
+            Waste.objects.filter(shop_batch=self).delete()
+            
+            self.status = 'CANCELLED'
+            self.total_waste_value = 0
+            self.total_waste_quantity = 0
+            self.save()
     
     def get_waste_items(self):
         """Get all waste items in this batch"""
@@ -2093,6 +2403,9 @@ class Waste(models.Model):
     cost_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, help_text="Cost price at time of waste")
     waste_value = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Total value of wasted items")
     
+    # Stock tracking - draft batch items are applied when the batch is completed
+    stock_applied = models.BooleanField(default=True, help_text="Whether this waste has been deducted from product stock")
+    
     # Tracking
     recorded_by = models.ForeignKey('Cashier', on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -2114,8 +2427,9 @@ class Waste(models.Model):
         # Calculate waste value based on current cost price
         if not self.cost_price:
             self.cost_price = self.product.cost_price
-        # Ensure proper type conversion to avoid float * Decimal errors
-        self.waste_value = float(self.quantity) * float(self.cost_price)
+        # Decimal arithmetic keeps waste values exact
+        self.quantity = Decimal(str(self.quantity))
+        self.waste_value = (self.quantity * Decimal(str(self.cost_price))).quantize(Decimal('0.01'))
         
         # Store product identifiers
         if not self.line_code:
@@ -2126,7 +2440,9 @@ class Waste(models.Model):
         super().save(*args, **kwargs)
         
         # Automatically reduce product stock when waste is recorded
-        self._reduce_stock()
+        # (draft batch items are applied in bulk by WasteBatch.complete_batch)
+        if self.stock_applied:
+            self._reduce_stock()
     
     def _reduce_stock(self):
         """Reduce product stock when waste is recorded"""
@@ -2134,8 +2450,8 @@ class Waste(models.Model):
             # Get StockMovement model dynamically to avoid circular import
             StockMovement = get_stock_movement_model()
             
-            previous_stock = float(self.product.stock_quantity or 0)
-            new_stock = previous_stock - float(self.quantity)
+            previous_stock = Decimal(str(self.product.stock_quantity or 0))
+            new_stock = previous_stock - self.quantity
             
             # Update product stock
             self.product.stock_quantity = new_stock
@@ -2147,9 +2463,9 @@ class Waste(models.Model):
                 product=self.product,
                 movement_type='DAMAGE',  # Waste is treated as damage
                 previous_stock=previous_stock,
-                quantity_change=-float(self.quantity),  # Negative for waste
+                quantity_change=-self.quantity,  # Negative for waste
                 new_stock=new_stock,
-                cost_price=float(self.cost_price),  # Convert to float to avoid type issues
+                cost_price=self.cost_price,
                 notes=f'Waste recorded: {self.get_reason_display()} - {self.reason_details[:100] if self.reason_details else "No details"}',
                 performed_by=self.recorded_by
             )
@@ -2212,7 +2528,7 @@ class Waste(models.Model):
         }
 
 
-class CashFloat(models.Model):
+class CashFloat(DrawerBalanceMixin, models.Model):
     """
     Cash Float Management System
     Tracks float amounts, drawer contents, and real-time cash flow
@@ -2234,79 +2550,8 @@ class CashFloat(models.Model):
     float_set_by = models.ForeignKey('Cashier', on_delete=models.SET_NULL, null=True, blank=True, related_name='floats_set', help_text="Who set the float")
     float_set_at = models.DateTimeField(null=True, blank=True, help_text="When float was last set")
     
-    # Current Drawer Contents (Real-time tracking) - Legacy USD-only fields (keeping for backward compatibility)
-    current_cash = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current cash in drawer (USD only)")
-    current_card = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current card payments in drawer (USD only)")
-    current_ecocash = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current EcoCash in drawer (USD only)")
-    current_transfer = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current bank transfers in drawer (USD only)")
-    current_total = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Total current amount in drawer (USD only)")
-    
-    # Currency-specific current drawer contents
-    # Cash by currency
-    current_cash_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current USD cash in drawer")
-    current_cash_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current ZIG cash in drawer")
-    current_cash_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current RAND cash in drawer")
-    
-    # Card by currency
-    current_card_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current USD card payments in drawer")
-    current_card_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current ZIG card payments in drawer")
-    current_card_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current RAND card payments in drawer")
-    
-    # EcoCash by currency
-    current_ecocash_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current USD EcoCash in drawer")
-    current_ecocash_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current ZIG EcoCash in drawer")
-    current_ecocash_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current RAND EcoCash in drawer")
-    
-    # Transfer by currency
-    current_transfer_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current USD bank transfers in drawer")
-    current_transfer_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current ZIG bank transfers in drawer")
-    current_transfer_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current RAND bank transfers in drawer")
-    
-    # Total by currency
-    current_total_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current total USD in drawer")
-    current_total_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current total ZIG in drawer")
-    current_total_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current total RAND in drawer")
-    
-    # Sales Tracking (for current session) - Legacy USD-only fields (keeping for backward compatibility)
-    session_cash_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    session_card_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    session_ecocash_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    session_transfer_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    session_total_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    
-    # Currency-specific session sales
-    # Cash sales by currency
-    session_cash_sales_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session cash sales in USD")
-    session_cash_sales_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session cash sales in ZIG")
-    session_cash_sales_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session cash sales in RAND")
-    
-    # Card sales by currency
-    session_card_sales_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session card sales in USD")
-    session_card_sales_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session card sales in ZIG")
-    session_card_sales_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session card sales in RAND")
-    
-    # EcoCash sales by currency
-    session_ecocash_sales_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session EcoCash sales in USD")
-    session_ecocash_sales_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session EcoCash sales in ZIG")
-    session_ecocash_sales_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session EcoCash sales in RAND")
-    
-    # Transfer sales by currency
-    session_transfer_sales_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session transfer sales in USD")
-    session_transfer_sales_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session transfer sales in ZIG")
-    session_transfer_sales_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session transfer sales in RAND")
-    
-    # Total sales by currency
-    session_total_sales_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session total sales in USD")
-    session_total_sales_zig = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session total sales in ZIG")
-    session_total_sales_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Session total sales in RAND")
-    
-    # EOD Integration - Legacy USD-only field
-    expected_cash_at_eod = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Expected cash at end of day (float + cash sales) - USD only")
-    
-    # Multi-currency EOD expected cash
-    expected_cash_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Expected USD cash at EOD (float + cash sales)")
-    expected_cash_zig = models.DecimalField(max_digits=15, decimal_places=2, default=0, help_text="Expected ZIG cash at EOD (float + cash sales)")
-    expected_cash_rand = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Expected RAND cash at EOD (float + cash sales)")
+    # Drawer contents and session sales per currency and payment method live in
+    # DrawerBalance rows; DrawerBalanceMixin exposes them under the old column names
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='INACTIVE')
     
@@ -2397,7 +2642,6 @@ class CashFloat(models.Model):
         
         self.float_set_by = set_by
         self.float_set_at = timezone.now()
-        self.update_expected_cash()
         self.save()
         return self
     
@@ -2410,90 +2654,12 @@ class CashFloat(models.Model):
         # Normalize currency to uppercase
         currency = currency.upper() if isinstance(currency, str) else 'USD'
         
-        if payment_method == 'cash':
-            self.session_cash_sales += amount
-            self.current_cash += amount
-            # Currency-specific tracking
-            if currency == 'USD':
-                self.session_cash_sales_usd += amount
-                self.current_cash_usd += amount
-            elif currency == 'ZIG':
-                self.session_cash_sales_zig += amount
-                self.current_cash_zig += amount
-            elif currency == 'RAND':
-                self.session_cash_sales_rand += amount
-                self.current_cash_rand += amount
-        elif payment_method == 'card':
-            self.session_card_sales += amount
-            self.current_card += amount
-            # Currency-specific tracking
-            if currency == 'USD':
-                self.session_card_sales_usd += amount
-                self.current_card_usd += amount
-            elif currency == 'ZIG':
-                self.session_card_sales_zig += amount
-                self.current_card_zig += amount
-            elif currency == 'RAND':
-                self.session_card_sales_rand += amount
-                self.current_card_rand += amount
-        elif payment_method == 'ecocash':
-            self.session_ecocash_sales += amount
-            self.current_ecocash += amount
-            # Currency-specific tracking
-            if currency == 'USD':
-                self.session_ecocash_sales_usd += amount
-                self.current_ecocash_usd += amount
-            elif currency == 'ZIG':
-                self.session_ecocash_sales_zig += amount
-                self.current_ecocash_zig += amount
-            elif currency == 'RAND':
-                self.session_ecocash_sales_rand += amount
-                self.current_ecocash_rand += amount
-        elif payment_method == 'transfer':
-            self.session_transfer_sales += amount
-            self.current_transfer += amount
-            # Currency-specific tracking
-            if currency == 'USD':
-                self.session_transfer_sales_usd += amount
-                self.current_transfer_usd += amount
-            elif currency == 'ZIG':
-                self.session_transfer_sales_zig += amount
-                self.current_transfer_zig += amount
-            elif currency == 'RAND':
-                self.session_transfer_sales_rand += amount
-                self.current_transfer_rand += amount
-        
-        # Update totals
-        self.session_total_sales += amount
-        self.current_total = (self.current_cash + self.current_card + 
-                             self.current_ecocash + self.current_transfer)
-        
-        # Update currency-specific totals
-        if currency == 'USD':
-            self.session_total_sales_usd += amount
-            self.current_total_usd += amount
-        elif currency == 'ZIG':
-            self.session_total_sales_zig += amount
-            self.current_total_zig += amount
-        elif currency == 'RAND':
-            self.session_total_sales_rand += amount
-            self.current_total_rand += amount
-        
-        self.update_expected_cash()
+        self.add_to_balance(currency, payment_method, current=amount, session=amount)
         self.last_activity = timezone.now()
-        self.save()
+        self.save(update_fields=['last_activity', 'updated_at'])
         
         return self
     
-    def update_expected_cash(self):
-        """Update expected cash amount at EOD - Multi-currency support"""
-        # Legacy USD-only expected cash for backward compatibility
-        self.expected_cash_at_eod = self.float_amount + self.session_cash_sales
-        # Update multi-currency expected cash fields
-        self.expected_cash_usd = self.float_amount + self.session_cash_sales_usd
-        self.expected_cash_zig = self.float_amount_zig + self.session_cash_sales_zig
-        self.expected_cash_rand = self.float_amount_rand + self.session_cash_sales_rand
-        
     def _get_primary_currency(self):
         """Determine the primary currency based on total sales"""
         totals = {
@@ -2505,60 +2671,45 @@ class CashFloat(models.Model):
         # Return the currency with the highest total
         return max(totals, key=totals.get) if any(totals.values()) else 'USD'
     
-    def get_drawer_summary(self):
-        """Get comprehensive drawer summary with currency differentiation and transaction counts"""
+    @classmethod
+    def transaction_counts(cls, shop, cashier_ids):
+        """
+        {cashier_id: {currency: completed sales today}} for several cashiers in one
+        grouped query
+        """
         from django.db.models import Count
-        from django.db.models import Q
-        import datetime
-        
-        # Get today's date for business day
-        today = timezone.localdate()  # Local date (Africa/Harare)
+        from .drawer_totals import local_day_range
         
-        # Create proper timezone-aware datetime range for the local day
-        day_start = timezone.make_aware(
-            datetime.datetime.combine(today, datetime.time.min),
-            timezone.get_current_timezone()
-        )
-        day_end = timezone.make_aware(
-            datetime.datetime.combine(today, datetime.time.max),
-            timezone.get_current_timezone()
-        )
+        day_start, day_end = local_day_range(timezone.localdate())
+        rows = Sale.objects.filter(
+            shop=shop,
+            cashier_id__in=cashier_ids,
+            created_at__range=[day_start, day_end],
+            status='completed',
+            payment_currency__in=['USD', 'ZIG', 'RAND']
+        ).order_by().values('cashier_id', 'payment_currency').annotate(count=Count('id'))
         
-        # Check if this drawer is for today or a previous day
-        is_today_drawer = (self.date == today)
+        counts = {}
+        for row in rows:
+            counts.setdefault(row['cashier_id'], {})[row['payment_currency']] = row['count']
+        return counts
+    
+    def get_drawer_summary(self, transaction_counts=None):
+        """
+        Get comprehensive drawer summary with currency differentiation and transaction counts.
+        transaction_counts ({currency: count}, from transaction_counts()) skips the count query
+        when summarising many drawers.
+        """
+        # Only count sales for the CURRENT business day - a drawer from a
+        # previous day shows 0 for the new day
+        if self.date != timezone.localdate():
+            transaction_counts = {}
+        elif transaction_counts is None:
+            transaction_counts = CashFloat.transaction_counts(self.shop, [self.cashier_id]).get(self.cashier_id, {})
         
-        # Calculate transaction counts by currency from actual sales
-        # CRITICAL FIX: Use proper timezone-aware datetime range instead of __date lookup
-        # Only count sales for the CURRENT business day
-        if is_today_drawer:
-            usd_count = Sale.objects.filter(
-                shop=self.shop,
-                cashier=self.cashier,
-                created_at__range=[day_start, day_end],
-                status='completed',
-                payment_currency='USD'
-            ).count()
-            
-            zig_count = Sale.objects.filter(
-                shop=self.shop,
-                cashier=self.cashier,
-                created_at__range=[day_start, day_end],
-                status='completed',
-                payment_currency='ZIG'
-            ).count()
-            
-            rand_count = Sale.objects.filter(
-                shop=self.shop,
-                cashier=self.cashier,
-                created_at__range=[day_start, day_end],
-                status='completed',
-                payment_currency='RAND'
-            ).count()
-        else:
-            # This is a drawer from a previous day - show 0 for new day
-            usd_count = 0
-            zig_count = 0
-            rand_count = 0
+        usd_count = transaction_counts.get('USD', 0)
+        zig_count = transaction_counts.get('ZIG', 0)
+        rand_count = transaction_counts.get('RAND', 0)
         
         return {
             'cashier': self.cashier.name,
@@ -2678,9 +2829,8 @@ class CashFloat(models.Model):
         expected_cash = self.expected_cash_at_eod
         variance = actual_cash_counted - expected_cash
         
-        self.current_cash = actual_cash_counted
-        self.current_total = (actual_cash_counted + self.current_card + 
-                             self.current_ecocash + self.current_transfer)
+        # The counted cash replaces what the drawer held
+        self.add_to_balance(self.legacy_currency, 'cash', current=actual_cash_counted - self.current_cash)
         self.status = 'SETTLED'
         self.save()
         
@@ -2703,107 +2853,62 @@ class CashFloat(models.Model):
             drawer = cls.objects.get(shop=shop, cashier=cashier, date=today)
             return drawer
         except cls.DoesNotExist:
-            # Create new drawer for today with ALL fields explicitly zeroed
-            # This ensures a fresh start for each new day
+            # A new drawer has no balance rows yet, so every amount reads as zero
             drawer = cls.objects.create(
                 shop=shop,
                 cashier=cashier,
                 date=today,
                 status='INACTIVE',
                 float_amount=Decimal('0.00'),
-                
-                # Legacy USD fields
-                current_cash=Decimal('0.00'),
-                current_card=Decimal('0.00'),
-                current_ecocash=Decimal('0.00'),
-                current_transfer=Decimal('0.00'),
-                current_total=Decimal('0.00'),
-                
-                # Currency-specific current amounts
-                current_cash_usd=Decimal('0.00'),
-                current_cash_zig=Decimal('0.00'),
-                current_cash_rand=Decimal('0.00'),
-                current_card_usd=Decimal('0.00'),
-                current_card_zig=Decimal('0.00'),
-                current_card_rand=Decimal('0.00'),
-                current_ecocash_usd=Decimal('0.00'),
-                current_ecocash_zig=Decimal('0.00'),
-                current_ecocash_rand=Decimal('0.00'),
-                current_transfer_usd=Decimal('0.00'),
-                current_transfer_zig=Decimal('0.00'),
-                current_transfer_rand=Decimal('0.00'),
-                current_total_usd=Decimal('0.00'),
-                current_total_zig=Decimal('0.00'),
-                current_total_rand=Decimal('0.00'),
-                
-                # Session sales (clear for new day)
-                session_cash_sales=Decimal('0.00'),
-                session_card_sales=Decimal('0.00'),
-                session_ecocash_sales=Decimal('0.00'),
-                session_transfer_sales=Decimal('0.00'),
-                session_total_sales=Decimal('0.00'),
-                
-                # Currency-specific session sales
-                session_cash_sales_usd=Decimal('0.00'),
-                session_cash_sales_zig=Decimal('0.00'),
-                session_cash_sales_rand=Decimal('0.00'),
-                session_card_sales_usd=Decimal('0.00'),
-                session_card_sales_zig=Decimal('0.00'),
-                session_card_sales_rand=Decimal('0.00'),
-                session_ecocash_sales_usd=Decimal('0.00'),
-                session_ecocash_sales_zig=Decimal('0.00'),
-                session_ecocash_sales_rand=Decimal('0.00'),
-                session_transfer_sales_usd=Decimal('0.00'),
-                session_transfer_sales_zig=Decimal('0.00'),
-                session_transfer_sales_rand=Decimal('0.00'),
-                session_total_sales_usd=Decimal('0.00'),
-                session_total_sales_zig=Decimal('0.00'),
-                session_total_sales_rand=Decimal('0.00'),
-                
-                # EOD expectations
-                expected_cash_at_eod=Decimal('0.00'),
             )
             return drawer
     
     @classmethod
     def get_shop_drawer_status(cls, shop):
-        """Get status of all drawers in shop with multi-currency support"""
-        from django.db.models import Sum
+        """
+        Get status of all drawers in shop with multi-currency support.
+        Cached per shop until the next sale or drawer change.
+        """
+        from .dashboard_cache import get_cached_drawer_status, cache_drawer_status
+        
+        drawer_status = get_cached_drawer_status(shop.id)
+        if drawer_status is None:
+            drawer_status = cls._build_shop_drawer_status(shop)
+            cache_drawer_status(shop.id, drawer_status)
+        return drawer_status
+    
+    @classmethod
+    def _build_shop_drawer_status(cls, shop):
+        """One drawer fetch plus one grouped transaction count query"""
+        from .drawer_totals import active_exchange_rate
         today = timezone.localdate()
-        drawers = cls.objects.filter(shop=shop, date=today)
+        drawers_list = list(cls.objects.filter(shop=shop, date=today).select_related('cashier').prefetch_related('balances'))
         
-        active_drawers = drawers.filter(status='ACTIVE')
-        inactive_drawers = drawers.filter(status='INACTIVE')
-        settled_drawers = drawers.filter(status='SETTLED')
+        active_drawers = [d for d in drawers_list if d.status == 'ACTIVE']
+        inactive_count = len([d for d in drawers_list if d.status == 'INACTIVE'])
+        settled_count = len([d for d in drawers_list if d.status == 'SETTLED'])
         
         total_expected_cash = sum([d.expected_cash_usd for d in active_drawers])
         total_current_cash = sum([d.current_total_usd for d in active_drawers])
         
         # Get exchange rates for multi-currency conversion to USD
-        try:
-            usd_to_zig = 1.0
-            usd_to_rand = 1.0
-            from .models_exchange_rates import ExchangeRate
-            rates = ExchangeRate.objects.filter(shop=shop, is_active=True).order_by('-created_at')[:5]
-            if rates:
-                for rate in rates:
-                    if rate.from_currency == 'USD' and rate.to_currency == 'ZIG':
-                        usd_to_zig = float(rate.rate)
-                    elif rate.from_currency == 'USD' and rate.to_currency == 'RAND':
-                        usd_to_rand = float(rate.rate)
-        except Exception:
-            usd_to_zig = 1.0
-            usd_to_rand = 1.0
+        exchange_rates = active_exchange_rate()
+        usd_to_zig = float(exchange_rates.usd_to_zig) if exchange_rates else 1.0
+        usd_to_rand = float(exchange_rates.usd_to_rand) if exchange_rates else 1.0
         
         # Calculate multi-currency breakdowns from ALL drawers (not just active)
         # This ensures we see all cashier data including inactive drawers
-        drawers_list = list(drawers)
+        # Per-drawer figures are converted once and reused for totals and summaries
+        expected_by_drawer = [{
+            'zig': float(d.float_amount_zig) + float(d.session_cash_sales_zig),
+            'usd': float(d.float_amount) + float(d.session_cash_sales_usd),
+            'rand': float(d.float_amount_rand) + float(d.session_cash_sales_rand),
+        } for d in drawers_list]
         
         # Aggregate expected amounts by currency from model fields
-        # Use multi-currency expected cash fields
-        expected_zig = sum([float(d.float_amount_zig) + float(d.session_cash_sales_zig) for d in drawers_list])
-        expected_usd = sum([float(d.float_amount) + float(d.session_cash_sales_usd) for d in drawers_list])
-        expected_rand = sum([float(d.float_amount_rand) + float(d.session_cash_sales_rand) for d in drawers_list])
+        expected_zig = sum([e['zig'] for e in expected_by_drawer])
+        expected_usd = sum([e['usd'] for e in expected_by_drawer])
+        expected_rand = sum([e['rand'] for e in expected_by_drawer])
         
         # Aggregate current amounts by currency from model fields
         current_zig = sum([float(d.current_total_zig) for d in drawers_list])
@@ -2820,29 +2925,29 @@ class CashFloat(models.Model):
         total_expected_cash_multi = expected_usd + (expected_zig / usd_to_zig if usd_to_zig > 0 else 0) + (expected_rand / usd_to_rand if usd_to_rand > 0 else 0)
         total_current_cash_multi = current_usd + (current_zig / usd_to_zig if usd_to_zig > 0 else 0) + (current_rand / usd_to_rand if usd_to_rand > 0 else 0)
         
-        # Get drawer summaries for the response
-        drawer_summaries = [d.get_drawer_summary() for d in drawers]
-        
-        # Update eod_expectations in each drawer summary to include currency breakdown
-        for i, summary in enumerate(drawer_summaries):
-            drawer = drawers_list[i]
+        # Get drawer summaries for the response - counts for every drawer in one query
+        counts = cls.transaction_counts(shop, [d.cashier_id for d in drawers_list])
+        drawer_summaries = []
+        for drawer, expected in zip(drawers_list, expected_by_drawer):
+            summary = drawer.get_drawer_summary(transaction_counts=counts.get(drawer.cashier_id, {}))
             # Use currency-specific float fields for expected calculations
             summary['eod_expectations'] = {
-                'expected_cash': float(drawer.expected_cash_at_eod),
-                'expected_zig': float(drawer.float_amount_zig) + float(drawer.session_cash_sales_zig),
-                'expected_usd': float(drawer.float_amount) + float(drawer.session_cash_sales_usd),
-                'expected_rand': float(drawer.float_amount_rand) + float(drawer.session_cash_sales_rand),
-                'variance': float(drawer.cash_variance),
-                'efficiency': float(drawer.drawer_efficiency)
+                'expected_cash': summary['eod_expectations']['expected_cash'],
+                'expected_zig': expected['zig'],
+                'expected_usd': expected['usd'],
+                'expected_rand': expected['rand'],
+                'variance': summary['eod_expectations']['variance'],
+                'efficiency': summary['eod_expectations']['efficiency']
             }
+            drawer_summaries.append(summary)
         
         return {
             'shop': shop.name,
             'date': today.isoformat(),
-            'total_drawers': drawers.count(),
-            'active_drawers': active_drawers.count(),
-            'inactive_drawers': inactive_drawers.count(),
-            'settled_drawers': settled_drawers.count(),
+            'total_drawers': len(drawers_list),
+            'active_drawers': len(active_drawers),
+            'inactive_drawers': inactive_count,
+            'settled_drawers': settled_count,
             'cash_flow': {
                 # Legacy fields (USD only)
                 'total_expected_cash': float(total_expected_cash),
@@ -3025,6 +3130,8 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
+from .drawer_totals import drawer_totals, empty_totals, totals_as_float
+
 
 @api_view(['GET', 'POST'])
 def cash_float_management(request):
@@ -3285,70 +3392,9 @@ def reset_all_drawers_at_eod(request):
                 'reset_count': 0
             })
         
-        # Reset all drawer amounts to zero
-        reset_count = 0
-        for drawer in drawers:
-            try:
-                # Mark as settled and wipe out ALL running totals
-                drawer.status = 'SETTLED'
-                
-                # Legacy USD fields
-                drawer.current_cash = Decimal('0.00')
-                drawer.current_card = Decimal('0.00')
-                drawer.current_ecocash = Decimal('0.00')
-                drawer.current_transfer = Decimal('0.00')
-                drawer.current_total = Decimal('0.00')
-                
-                # Currency-specific current amounts
-                drawer.current_cash_usd = Decimal('0.00')
-                drawer.current_cash_zig = Decimal('0.00')
-                drawer.current_cash_rand = Decimal('0.00')
-                drawer.current_card_usd = Decimal('0.00')
-                drawer.current_card_zig = Decimal('0.00')
-                drawer.current_card_rand = Decimal('0.00')
-                drawer.current_ecocash_usd = Decimal('0.00')
-                drawer.current_ecocash_zig = Decimal('0.00')
-                drawer.current_ecocash_rand = Decimal('0.00')
-                drawer.current_transfer_usd = Decimal('0.00')
-                drawer.current_transfer_zig = Decimal('0.00')
-                drawer.current_transfer_rand = Decimal('0.00')
-                drawer.current_total_usd = Decimal('0.00')
-                drawer.current_total_zig = Decimal('0.00')
-                drawer.current_total_rand = Decimal('0.00')
-                
-                # Session sales (clear for next day)
-                drawer.session_cash_sales = Decimal('0.00')
-                drawer.session_card_sales = Decimal('0.00')
-                drawer.session_ecocash_sales = Decimal('0.00')
-                drawer.session_transfer_sales = Decimal('0.00')
-                drawer.session_total_sales = Decimal('0.00')
-                
-                # Currency-specific session sales
-                drawer.session_cash_sales_usd = Decimal('0.00')
-                drawer.session_cash_sales_zig = Decimal('0.00')
-                drawer.session_cash_sales_rand = Decimal('0.00')
-                drawer.session_card_sales_usd = Decimal('0.00')
-                drawer.session_card_sales_zig = Decimal('0.00')
-                drawer.session_card_sales_rand = Decimal('0.00')
-                drawer.session_ecocash_sales_usd = Decimal('0.00')
-                drawer.session_ecocash_sales_zig = Decimal('0.00')
-                drawer.session_ecocash_sales_rand = Decimal('0.00')
-                drawer.session_transfer_sales_usd = Decimal('0.00')
-                drawer.session_transfer_sales_zig = Decimal('0.00')
-                drawer.session_transfer_sales_rand = Decimal('0.00')
-                drawer.session_total_sales_usd = Decimal('0.00')
-                drawer.session_total_sales_zig = Decimal('0.00')
-                drawer.session_total_sales_rand = Decimal('0.00')
-                
-                # EOD expectations
-                drawer.expected_cash_at_eod = Decimal('0.00')
-                
-                drawer.save()
-                reset_count += 1
-                
-            except Exception as e:
-                print(f"Warning: Could not reset drawer for cashier {drawer.cashier.name}: {e}")
-                continue
+        # Mark as settled and wipe out ALL running totals in one pass
+        from .drawer_reset import reset_drawers
+        reset_count = reset_drawers(drawers)
         
         return Response({
             'success': True,
@@ -3399,8 +3445,6 @@ def get_all_drawers_session(request):
     was showing old drawer values.
     """
     try:
-        import datetime
-        
         # Get shop - handle case where no shop exists
         try:
             shop = ShopConfiguration.objects.get()
@@ -3438,17 +3482,6 @@ def get_all_drawers_session(request):
         
         today = timezone.localdate()  # Local date (Africa/Harare)
         
-        # Create proper timezone-aware datetime range for the local day
-        # This ensures we capture all sales made during local business hours (00:00 to 23:59:59 local time)
-        day_start = timezone.make_aware(
-            datetime.datetime.combine(today, datetime.time.min),
-            timezone.get_current_timezone()
-        )
-        day_end = timezone.make_aware(
-            datetime.datetime.combine(today, datetime.time.max),
-            timezone.get_current_timezone()
-        )
-        
         # Check if shop is open - handle multiple objects returned
         # CRITICAL: If shop is CLOSED, return empty drawers (no sales data)
         # This ensures when shop reopens next day, no old sales appear
@@ -3533,152 +3566,20 @@ def get_all_drawers_session(request):
         # This ensures we only show today's sales regardless of drawer state
         drawers_list = []
 
-        # Get exchange rates for multi-currency conversion
-        try:
-            from .models_exchange_rates import ExchangeRate
-            rates = ExchangeRate.objects.filter(shop=shop, is_active=True).order_by('-created_at')[:5]
-            usd_to_zig = 1.0
-            usd_to_rand = 1.0
-            exchange_rates = None
-            if rates:
-                exchange_rates = rates[0]
-                for rate in rates:
-                    if rate.from_currency == 'USD' and rate.to_currency == 'ZIG':
-                        usd_to_zig = float(rate.rate)
-                    elif rate.from_currency == 'USD' and rate.to_currency == 'RAND':
-                        usd_to_rand = float(rate.rate)
-        except Exception:
-            usd_to_zig = 1.0
-            usd_to_rand = 1.0
-            exchange_rates = None
+        # Every cashier's inflows for today in one snapshot query
+        cashiers = list(cashiers)
+        all_totals = drawer_totals(shop, today, cashier_ids=[cashier.id for cashier in cashiers])
+        drawers = {
+            drawer.cashier_id: drawer
+            for drawer in CashFloat.objects.filter(shop=shop, date=today, cashier__in=cashiers)
+        }
 
         for cashier in cashiers:
-            # Calculate sales from Sale table for TODAY ONLY - THIS IS THE SOURCE OF TRUTH
-            # CRITICAL FIX: Use proper timezone-aware datetime range instead of __date lookup
-            today_sales = Sale.objects.filter(
-                shop=shop,
-                cashier=cashier,
-                created_at__range=[day_start, day_end],
-                status='completed'
-            )
-
-            # Calculate totals by currency and payment method from Sale table
-            sales_by_currency = {
-                'usd': {'cash': 0, 'card': 0, 'ecocash': 0, 'transfer': 0, 'total': 0, 'count': 0},
-                'zig': {'cash': 0, 'card': 0, 'ecocash': 0, 'transfer': 0, 'total': 0, 'count': 0},
-                'rand': {'cash': 0, 'card': 0, 'ecocash': 0, 'transfer': 0, 'total': 0, 'count': 0}
-            }
-
-            for sale in today_sales:
-                # Handle split payments differently - use SalePayment records
-                if sale.payment_method == 'split':
-                    # For split payments, get individual payment components
-                    sale_payments = SalePayment.objects.filter(sale=sale)
-                    for payment in sale_payments:
-                        currency = payment.currency.upper()
-                        payment_method = payment.payment_method
-
-                        # Convert to lowercase for dictionary key lookup
-                        currency_key = currency.lower()
-                        if currency_key not in sales_by_currency:
-                            currency_key = 'usd'
-
-                        # Add to appropriate payment method
-                        if payment_method == 'cash':
-                            sales_by_currency[currency_key]['cash'] += float(payment.amount)
-                        elif payment_method == 'card':
-                            sales_by_currency[currency_key]['card'] += float(payment.amount)
-                        elif payment_method == 'ecocash':
-                            sales_by_currency[currency_key]['ecocash'] += float(payment.amount)
-                        elif payment_method == 'transfer':
-                            sales_by_currency[currency_key]['transfer'] += float(payment.amount)
-
-                        sales_by_currency[currency_key]['total'] += float(payment.amount)
-                        sales_by_currency[currency_key]['count'] += 1
-
-                    # Calculate change for split payments
-                    total_paid_usd = 0
-                    for payment in sale_payments:
-                        if payment.currency == 'USD':
-                            total_paid_usd += float(payment.amount)
-                        elif exchange_rates:
-                            try:
-                                amount_usd = exchange_rates.convert_amount(payment.amount, payment.currency, 'USD')
-                                total_paid_usd += float(amount_usd)
-                            except:
-                                pass
-
-                    if total_paid_usd > float(sale.total_amount):
-                        change_usd = total_paid_usd - float(sale.total_amount)
-                        change_int_usd = int(change_usd)
-                        change_frac_usd = change_usd - change_int_usd
-
-                        if change_int_usd > 0:
-                            sales_by_currency['usd']['cash'] -= change_int_usd
-                            sales_by_currency['usd']['total'] -= change_int_usd
-
-                        if change_frac_usd > 0 and exchange_rates:
-                            change_zig = exchange_rates.convert_amount(Decimal(str(change_frac_usd)), 'USD', 'ZIG')
-                            sales_by_currency['zig']['cash'] -= float(change_zig)
-                            sales_by_currency['zig']['total'] -= float(change_zig)
+            # Totals by currency and payment method from the Sale table - THIS IS THE SOURCE OF TRUTH
+            sales_by_currency = totals_as_float(all_totals.get(cashier.id) or empty_totals())
 
-                else:
-                    # Handle regular single payments
-                    # Calculate actual sale amount from items
-                    sale_amount = sum(float(item.total_price) for item in sale.items.all())
-                    amount_paid = float(sale.total_amount)
-                    currency = sale.payment_currency.upper() if sale.payment_currency else 'USD'
-                    payment_method = sale.payment_method
-
-                    # Convert to lowercase for dictionary key lookup
-                    currency_key = currency.lower()
-                    if currency_key not in sales_by_currency:
-                        currency_key = 'usd'
-
-                    # Add sale amount to currency totals
-                    if payment_method == 'cash':
-                        sales_by_currency[currency_key]['cash'] += sale_amount
-                    elif payment_method == 'card':
-                        sales_by_currency[currency_key]['card'] += sale_amount
-                    elif payment_method == 'ecocash':
-                        sales_by_currency[currency_key]['ecocash'] += sale_amount
-                    elif payment_method == 'transfer':
-                        sales_by_currency[currency_key]['transfer'] += sale_amount
-
-                    sales_by_currency[currency_key]['total'] += sale_amount
-                    sales_by_currency[currency_key]['count'] += 1
-
-                    # Handle change for cash payments
-                    if payment_method == 'cash' and amount_paid > sale_amount:
-                        change_usd = amount_paid - sale_amount
-
-                        if currency_key == 'usd':
-                            change_in_usd = change_usd
-                        elif exchange_rates:
-                            try:
-                                change_in_usd = float(exchange_rates.convert_amount(Decimal(str(change_usd)), currency_key.upper(), 'USD'))
-                            except:
-                                change_in_usd = change_usd
-                        else:
-                            change_in_usd = change_usd
-
-                        change_int_usd = int(change_in_usd)
-                        change_frac_usd = change_in_usd - change_int_usd
-
-                        if change_int_usd > 0:
-                            sales_by_currency['usd']['cash'] -= change_int_usd
-                            sales_by_currency['usd']['total'] -= change_int_usd
-
-                        if change_frac_usd > 0 and exchange_rates:
-                            try:
-                                change_zig = exchange_rates.convert_amount(Decimal(str(change_frac_usd)), 'USD', 'ZIG')
-                                sales_by_currency['zig']['cash'] -= float(change_zig)
-                                sales_by_currency['zig']['total'] -= float(change_zig)
-                            except:
-                                pass
-            
             # Get drawer for float amounts (but NEVER use drawer session sales fields)
-            drawer = CashFloat.get_active_drawer(shop, cashier)
+            drawer = drawers.get(cashier.id) or CashFloat.get_active_drawer(shop, cashier)
             
             # PERMANENT FIX: Staff lunch should NOT be subtracted from current drawer amounts
             # The drawer shows RAW sales (what physically came into the till)
@@ -3901,70 +3802,9 @@ def emergency_reset_all_drawers(request):
                 'reset_count': 0
             })
         
-        # Reset all drawer amounts to zero
-        reset_count = 0
-        for drawer in drawers:
-            try:
-                # Mark as settled and wipe out ALL running totals
-                drawer.status = 'SETTLED'
-                
-                # Legacy USD fields
-                drawer.current_cash = Decimal('0.00')
-                drawer.current_card = Decimal('0.00')
-                drawer.current_ecocash = Decimal('0.00')
-                drawer.current_transfer = Decimal('0.00')
-                drawer.current_total = Decimal('0.00')
-                
-                # Currency-specific current amounts
-                drawer.current_cash_usd = Decimal('0.00')
-                drawer.current_cash_zig = Decimal('0.00')
-                drawer.current_cash_rand = Decimal('0.00')
-                drawer.current_card_usd = Decimal('0.00')
-                drawer.current_card_zig = Decimal('0.00')
-                drawer.current_card_rand = Decimal('0.00')
-                drawer.current_ecocash_usd = Decimal('0.00')
-                drawer.current_ecocash_zig = Decimal('0.00')
-                drawer.current_ecocash_rand = Decimal('0.00')
-                drawer.current_transfer_usd = Decimal('0.00')
-                drawer.current_transfer_zig = Decimal('0.00')
-                drawer.current_transfer_rand = Decimal('0.00')
-                drawer.current_total_usd = Decimal('0.00')
-                drawer.current_total_zig = Decimal('0.00')
-                drawer.current_total_rand = Decimal('0.00')
-                
-                # Session sales (clear)
-                drawer.session_cash_sales = Decimal('0.00')
-                drawer.session_card_sales = Decimal('0.00')
-                drawer.session_ecocash_sales = Decimal('0.00')
-                drawer.session_transfer_sales = Decimal('0.00')
-                drawer.session_total_sales = Decimal('0.00')
-                
-                # Currency-specific session sales
-                drawer.session_cash_sales_usd = Decimal('0.00')
-                drawer.session_cash_sales_zig = Decimal('0.00')
-                drawer.session_cash_sales_rand = Decimal('0.00')
-                drawer.session_card_sales_usd = Decimal('0.00')
-                drawer.session_card_sales_zig = Decimal('0.00')
-                drawer.session_card_sales_rand = Decimal('0.00')
-                drawer.session_ecocash_sales_usd = Decimal('0.00')
-                drawer.session_ecocash_sales_zig = Decimal('0.00')
-                drawer.session_ecocash_sales_rand = Decimal('0.00')
-                drawer.session_transfer_sales_usd = Decimal('0.00')
-                drawer.session_transfer_sales_zig = Decimal('0.00')
-                drawer.session_transfer_sales_rand = Decimal('0.00')
-                drawer.session_total_sales_usd = Decimal('0.00')
-                drawer.session_total_sales_zig = Decimal('0.00')
-                drawer.session_total_sales_rand = Decimal('0.00')
-                
-                # EOD expectations
-                drawer.expected_cash_at_eod = Decimal('0.00')
-                
-                drawer.save()
-                reset_count += 1
-                
-            except Exception as e:
-                print(f"Warning: Could not reset drawer for cashier {drawer.cashier.name}: {e}")
-                continue
+        # Mark as settled and wipe out ALL running totals in one pass
+        from .drawer_reset import reset_drawers
+        reset_count = reset_drawers(drawers)
         
         message = f'All {reset_count} drawers have been emergency reset'
         if date_str:
@@ -4112,21 +3952,9 @@ def get_cashier_drawer_session(request):
     was showing old drawer values.
     """
     try:
-        import datetime
-        
         shop = ShopConfiguration.objects.get()
         today = timezone.localdate()  # Local date (Africa/Harare)
         
-        # Create proper timezone-aware datetime range for the local day
-        day_start = timezone.make_aware(
-            datetime.datetime.combine(today, datetime.time.min),
-            timezone.get_current_timezone()
-        )
-        day_end = timezone.make_aware(
-            datetime.datetime.combine(today, datetime.time.max),
-            timezone.get_current_timezone()
-        )
-        
         # Check if shop is open - use get_current_day to inherit status from previous day
         shop_day = ShopDay.get_current_day(shop)
         is_shop_open = shop_day.is_open
@@ -4180,139 +4008,9 @@ def get_cashier_drawer_session(request):
                     'error': 'Authentication required or cashier_id parameter missing'
                 }, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Get exchange rates
-        try:
-            from .models_exchange_rates import ExchangeRate
-            rates = ExchangeRate.objects.filter(shop=shop, is_active=True).order_by('-created_at')[:5]
-            exchange_rates = None
-            if rates:
-                exchange_rates = rates[0]
-        except Exception:
-            exchange_rates = None
-
-        # Calculate sales from Sale table for TODAY ONLY
-        # CRITICAL FIX: Use proper timezone-aware datetime range instead of __date lookup
-        today_sales = Sale.objects.filter(
-            shop=shop,
-            cashier=cashier,
-            created_at__range=[day_start, day_end],
-            status='completed'
-        )
-
-        # Calculate totals by currency and payment method
-        sales_by_currency = {
-            'usd': {'cash': 0, 'card': 0, 'ecocash': 0, 'transfer': 0, 'total': 0, 'count': 0},
-            'zig': {'cash': 0, 'card': 0, 'ecocash': 0, 'transfer': 0, 'total': 0, 'count': 0},
-            'rand': {'cash': 0, 'card': 0, 'ecocash': 0, 'transfer': 0, 'total': 0, 'count': 0}
-        }
-
-        for sale in today_sales:
-            # Handle split payments differently - use SalePayment records
-            if sale.payment_method == 'split':
-                # For split payments, get individual payment components
-                sale_payments = SalePayment.objects.filter(sale=sale)
-                for payment in sale_payments:
-                    currency = payment.currency.upper()
-                    payment_method = payment.payment_method
-
-                    # Convert to lowercase for dictionary key lookup
-                    currency_key = currency.lower()
-                    if currency_key not in sales_by_currency:
-                        currency_key = 'usd'
-
-                    # Add to appropriate payment method
-                    if payment_method == 'cash':
-                        sales_by_currency[currency_key]['cash'] += float(payment.amount)
-                    elif payment_method == 'card':
-                        sales_by_currency[currency_key]['card'] += float(payment.amount)
-                    elif payment_method == 'ecocash':
-                        sales_by_currency[currency_key]['ecocash'] += float(payment.amount)
-                    elif payment_method == 'transfer':
-                        sales_by_currency[currency_key]['transfer'] += float(payment.amount)
-
-                    sales_by_currency[currency_key]['total'] += float(payment.amount)
-                    sales_by_currency[currency_key]['count'] += 1
-
-                # Calculate change for split payments
-                total_paid_usd = 0
-                for payment in sale_payments:
-                    if payment.currency == 'USD':
-                        total_paid_usd += float(payment.amount)
-                    elif exchange_rates:
-                        try:
-                            amount_usd = exchange_rates.convert_amount(payment.amount, payment.currency, 'USD')
-                            total_paid_usd += float(amount_usd)
-                        except:
-                            pass
-
-                if total_paid_usd > float(sale.total_amount):
-                    change_usd = total_paid_usd - float(sale.total_amount)
-                    change_int_usd = int(change_usd)
-                    change_frac_usd = change_usd - change_int_usd
-
-                    if change_int_usd > 0:
-                        sales_by_currency['usd']['cash'] -= change_int_usd
-                        sales_by_currency['usd']['total'] -= change_int_usd
-
-                    if change_frac_usd > 0 and exchange_rates:
-                        change_zig = exchange_rates.convert_amount(Decimal(str(change_frac_usd)), 'USD', 'ZIG')
-                        sales_by_currency['zig']['cash'] -= float(change_zig)
-                        sales_by_currency['zig']['total'] -= float(change_zig)
-
-            else:
-                # Handle regular single payments
-                # Calculate actual sale amount from items
-                sale_amount = sum(float(item.total_price) for item in sale.items.all())
-                amount_paid = float(sale.total_amount)
-                currency = sale.payment_currency.upper() if sale.payment_currency else 'USD'
-                payment_method = sale.payment_method
-
-                # Convert to lowercase for dictionary key lookup
-                currency_key = currency.lower()
-                if currency_key not in sales_by_currency:
-                    currency_key = 'usd'
-
-                # Add sale amount to currency totals
-                if payment_method == 'cash':
-                    sales_by_currency[currency_key]['cash'] += sale_amount
-                elif payment_method == 'card':
-                    sales_by_currency[currency_key]['card'] += sale_amount
-                elif payment_method == 'ecocash':
-                    sales_by_currency[currency_key]['ecocash'] += sale_amount
-                elif payment_method == 'transfer':
-                    sales_by_currency[currency_key]['transfer'] += sale_amount
-
-                sales_by_currency[currency_key]['total'] += sale_amount
-                sales_by_currency[currency_key]['count'] += 1
-
-                # Handle change for cash payments
-                if payment_method == 'cash' and amount_paid > sale_amount:
-                    change_usd = amount_paid - sale_amount
-
-                    if currency_key == 'usd':
-                        change_in_usd = change_usd
-                    elif exchange_rates:
-                        try:
-                            change_in_usd = float(exchange_rates.convert_amount(Decimal(str(change_usd)), currency_key.upper(), 'USD'))
-                        except:
-                            change_in_usd = change_usd
-                    else:
-                        change_in_usd = change_usd
-
-                    change_int_usd = int(change_in_usd)
-                    change_frac_usd = change_in_usd - change_int_usd
-
-                    if change_int_usd > 0:
-                        sales_by_currency['usd']['cash'] -= change_int_usd
-                        sales_by_currency['usd']['total'] -= change_int_usd
-
-                    if change_frac_usd > 0 and exchange_rates:
-                        try:
-                            change_zig = exchange_rates.convert_amount(Decimal(str(change_frac_usd)), 'USD', 'ZIG')
-                            sales_by_currency['zig']['cash'] -= float(change_zig)
-                            sales_by_currency['zig']['total'] -= float(change_zig)
-                        except:
-                            pass
+        # Calculate totals by currency and payment method from the Sale table for TODAY ONLY
+        cashier_totals = drawer_totals(shop, today, cashier_ids=[cashier.id]).get(cashier.id)
+        sales_by_currency = totals_as_float(cashier_totals or empty_totals())
         
         # Get or create drawer for float amounts
         drawer = CashFloat.get_active_drawer(shop, cashier)
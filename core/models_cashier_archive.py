@@ -2,7 +2,9 @@
 Cashier Count Archive Model
 This stores permanent records of cashier counts that survive EOD deletion
 """
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Sum, Max, Q, OuterRef, Subquery
+from django.db.models.functions import ExtractYear, ExtractMonth
 from django.utils import timezone
 from decimal import Decimal
 
@@ -72,21 +74,19 @@ class CashierCountArchive(models.Model):
     def __str__(self):
         return f"{self.cashier_name} - {self.date} - {self.status}"
     
-    @classmethod
-    def archive_cashier_count(cls, count_record):
-        """
-        Archive a CashierCount record before it's deleted during EOD
-        This creates a permanent snapshot
-        """
-        # Determine status based on variance
-        variance = float(count_record.total_variance)
+    @staticmethod
+    def variance_status(total_variance):
+        """BALANCED within a cent, otherwise SHORTAGE or OVER"""
+        variance = float(total_variance)
         if abs(variance) < 0.01:
-            status = 'BALANCED'
-        elif variance < 0:
-            status = 'SHORTAGE'
-        else:
-            status = 'OVER'
-        
+            return 'BALANCED'
+        if variance < 0:
+            return 'SHORTAGE'
+        return 'OVER'
+    
+    @classmethod
+    def from_count(cls, count_record):
+        """Unsaved archive snapshot of a CashierCount (cashier should be select_related)"""
         # Build denominations snapshot
         denominations = {
             'usd': {
@@ -130,8 +130,8 @@ class CashierCountArchive(models.Model):
             }
         }
         
-        archive = cls.objects.create(
-            shop=count_record.shop,
+        return cls(
+            shop_id=count_record.shop_id,
             cashier=count_record.cashier,
             cashier_name=count_record.cashier.name if count_record.cashier else 'Unknown',
             date=count_record.date,
@@ -150,30 +150,82 @@ class CashierCountArchive(models.Model):
             expected_ecocash=count_record.expected_ecocash,
             cash_variance=count_record.cash_variance,
             total_variance=count_record.total_variance,
-            status=status,
+            status=cls.variance_status(count_record.total_variance),
             denominations_snapshot=denominations,
             notes=count_record.notes
         )
-        
+    
+    @classmethod
+    def archive_cashier_count(cls, count_record):
+        """
+        Archive a CashierCount record before it's deleted during EOD
+        This creates a permanent snapshot
+        """
+        with transaction.atomic():
+            archive = cls.from_count(count_record)
+            archive.save()
+            # Keep the cashier's monthly summary current without a recalculation
+            CashierPerformanceSummary.record_archives([archive])
         return archive
     
     @classmethod
-    def archive_all_counts_for_date(cls, shop, date):
+    def archive_all_counts_for_date(cls, shop, date, skip_archived=False):
         """
         Archive all cashier counts for a specific date
-        Called during EOD finalization before deleting counts
+        Called during EOD finalization before deleting counts. The archive rows are
+        written in one bulk insert and the monthly summaries updated in the same
+        transaction. skip_archived leaves out cashiers already archived for the date,
+        so backfills can be re-run.
         """
         from .models_reconciliation import CashierCount
         
-        counts = CashierCount.objects.filter(shop=shop, date=date)
-        archived = []
-        
-        for count in counts:
-            archive = cls.archive_cashier_count(count)
-            archived.append(archive)
+        counts = CashierCount.objects.filter(shop=shop, date=date).select_related('cashier')
+        if skip_archived:
+            counts = counts.exclude(cashier_id__in=cls.objects.filter(
+                shop=shop, date=date, cashier__isnull=False
+            ).values('cashier_id'))
         
+        with transaction.atomic():
+            archived = cls.objects.bulk_create([cls.from_count(count) for count in counts])
+            CashierPerformanceSummary.record_archives(archived)
         return archived
     
+    @classmethod
+    def backfill(cls, shop, start_date, end_date):
+        """
+        Archive the live counts of a date range that aren't archived yet.
+        Returns {'dates': days with new archives, 'archived': rows written}.
+        """
+        from .models_reconciliation import CashierCount
+        
+        dates = CashierCount.objects.filter(
+            shop=shop, date__range=[start_date, end_date]
+        ).order_by('date').values_list('date', flat=True).distinct()
+        
+        result = {'dates': 0, 'archived': 0}
+        for date in dates:
+            archived = cls.archive_all_counts_for_date(shop, date, skip_archived=True)
+            if archived:
+                result['dates'] += 1
+                result['archived'] += len(archived)
+        return result
+    
+    @classmethod
+    def status_totals(cls, queryset, *group_by):
+        """
+        Count and variance totals per status for each group_by combination,
+        computed in a single grouped query
+        """
+        return queryset.order_by().values(*group_by).annotate(
+            total_counts=Count('id'),
+            balanced=Count('id', filter=Q(status='BALANCED')),
+            shortages=Count('id', filter=Q(status='SHORTAGE')),
+            overs=Count('id', filter=Q(status='OVER')),
+            shortage_total=Sum('total_variance', filter=Q(status='SHORTAGE')),
+            over_total=Sum('total_variance', filter=Q(status='OVER')),
+            variance_total=Sum('total_variance'),
+        )
+    
     def get_summary(self):
         """Get summary of this archived count"""
         return {
@@ -228,66 +280,141 @@ class CashierPerformanceSummary(models.Model):
     def __str__(self):
         return f"{self.cashier_name} - {self.year}/{self.month} - {self.balance_rate}%"
     
+    @staticmethod
+    def calculate_rates(total_counts, balanced, shortages):
+        """(balance_rate, reliability_score) - balanced scores 100, over 80, shortage 0"""
+        if total_counts == 0:
+            return 0, 100
+        over = total_counts - balanced - shortages
+        balance_rate = round(balanced / total_counts * 100, 2)
+        reliability = round((balanced * 100 + over * 80) / total_counts, 2)
+        return balance_rate, reliability
+    
     @classmethod
-    def recalculate_for_period(cls, shop, year, month):
-        """Recalculate performance summary for a specific period"""
-        from django.db.models import Sum, Count, Q
-        
-        # Get all archived counts for this period
-        archives = CashierCountArchive.objects.filter(
-            shop=shop,
-            date__year=year,
-            date__month=month
-        )
+    def record_archives(cls, archives):
+        """
+        Fold newly archived counts into their cashiers' monthly summaries - the
+        touched summaries are locked and read in one query and written back in bulk.
+        Missing months are first inserted empty, ignoring ones a concurrent archiver
+        (the EOD job, a backfill) just created, so the counts are always added to the
+        locked row rather than written over it.
+        """
+        groups = {}
+        for archive in archives:
+            if archive.cashier_id is None:
+                continue
+            key = (archive.shop_id, archive.cashier_id, archive.date.year, archive.date.month)
+            groups.setdefault(key, []).append(archive)
+        if not groups:
+            return 0
         
-        # Group by cashier
-        cashier_ids = archives.values_list('cashier', flat=True).distinct()
+        def locked(keys):
+            lookup = Q()
+            for shop_id, cashier_id, year, month in keys:
+                lookup |= Q(shop_id=shop_id, cashier_id=cashier_id, year=year, month=month)
+            return {
+                (summary.shop_id, summary.cashier_id, summary.year, summary.month): summary
+                for summary in cls.objects.select_for_update().filter(lookup)
+            }
         
-        for cashier_id in cashier_ids:
-            if not cashier_id:
-                continue
-                
-            cashier_archives = archives.filter(cashier_id=cashier_id)
-            
-            # Calculate stats
-            total_counts = cashier_archives.count()
-            balanced = cashier_archives.filter(status='BALANCED').count()
-            shortages = cashier_archives.filter(status='SHORTAGE').count()
-            overs = cashier_archives.filter(status='OVER').count()
-            
-            # Financial totals
-            shortage_total = cashier_archives.filter(status='SHORTAGE').aggregate(
-                total=Sum('total_variance')
-            )['total'] or Decimal('0')
+        with transaction.atomic():
+            summaries = locked(groups)
+            missing = [key for key in groups if key not in summaries]
+            if missing:
+                cls.objects.bulk_create([
+                    cls(shop_id=shop_id, cashier_id=cashier_id, year=year, month=month,
+                        cashier_name=groups[(shop_id, cashier_id, year, month)][-1].cashier_name)
+                    for shop_id, cashier_id, year, month in missing
+                ], ignore_conflicts=True)
+                summaries.update(locked(missing))
             
-            over_total = cashier_archives.filter(status='OVER').aggregate(
-                total=Sum('total_variance')
-            )['total'] or Decimal('0')
+            for key, group in groups.items():
+                summary = summaries[key]
+                for archive in group:
+                    summary.cashier_name = archive.cashier_name
+                    summary.total_counts += 1
+                    if archive.status == 'BALANCED':
+                        summary.balanced_count += 1
+                    elif archive.status == 'SHORTAGE':
+                        summary.shortage_count += 1
+                        summary.total_shortage_amount += abs(archive.total_variance)
+                    elif archive.status == 'OVER':
+                        summary.over_count += 1
+                        summary.total_over_amount += archive.total_variance
+                summary.balance_rate, summary.reliability_score = cls.calculate_rates(
+                    summary.total_counts, summary.balanced_count, summary.shortage_count
+                )
+                summary.updated_at = timezone.now()
             
-            # Balance rate
-            balance_rate = (balanced / total_counts * 100) if total_counts > 0 else 0
-            
-            # Reliability score
-            over = total_counts - balanced - shortages
-            reliability = (balanced * 100 + over * 80) / total_counts if total_counts > 0 else 100
-            
-            # Get or create summary
-            summary, created = cls.objects.update_or_create(
+            cls.objects.bulk_update(list(summaries.values()), [
+                'cashier_name', 'total_counts', 'balanced_count', 'shortage_count', 'over_count',
+                'total_shortage_amount', 'total_over_amount', 'balance_rate', 'reliability_score', 'updated_at'
+            ])
+        return len(groups)
+    
+    @classmethod
+    def rebuild_from_archives(cls, shop, archives):
+        """
+        Recompute the summaries covered by an archive queryset - every cashier and
+        month in one grouped query, written back in one upsert
+        """
+        archives = archives.filter(shop=shop, cashier__isnull=False).annotate(
+            year=ExtractYear('date'),
+            month=ExtractMonth('date')
+        )
+        # Name as of the cashier's latest count in the month
+        latest_name = CashierCountArchive.objects.filter(
+            shop=shop,
+            cashier_id=OuterRef('cashier_id'),
+            date__year=OuterRef('year'),
+            date__month=OuterRef('month')
+        ).order_by('-date', '-archived_at').values('cashier_name')[:1]
+        # Wrapped in Max so the subquery stays out of the GROUP BY
+        rows = CashierCountArchive.status_totals(archives, 'cashier_id', 'year', 'month').annotate(
+            latest_name=Max(Subquery(latest_name))
+        )
+        
+        summaries = []
+        for row in rows:
+            balance_rate, reliability = cls.calculate_rates(row['total_counts'], row['balanced'], row['shortages'])
+            summaries.append(cls(
                 shop=shop,
-                cashier_id=cashier_id,
-                year=year,
-                month=month,
-                defaults={
-                    'cashier_name': cashier_archives.first().cashier_name if cashier_archives.exists() else 'Unknown',
-                    'total_counts': total_counts,
-                    'balanced_count': balanced,
-                    'shortage_count': shortages,
-                    'over_count': overs,
-                    'total_shortage_amount': abs(shortage_total),
-                    'total_over_amount': over_total,
-                    'balance_rate': balance_rate,
-                    'reliability_score': reliability
-                }
-            )
+                cashier_id=row['cashier_id'],
+                year=row['year'],
+                month=row['month'],
+                cashier_name=row['latest_name'] or 'Unknown',
+                total_counts=row['total_counts'],
+                balanced_count=row['balanced'],
+                shortage_count=row['shortages'],
+                over_count=row['overs'],
+                total_shortage_amount=abs(row['shortage_total'] or Decimal('0')),
+                total_over_amount=row['over_total'] or Decimal('0'),
+                balance_rate=balance_rate,
+                reliability_score=reliability
+            ))
         
+        cls.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['shop', 'cashier', 'year', 'month'],
+            update_fields=[
+                'cashier_name', 'total_counts', 'balanced_count', 'shortage_count', 'over_count',
+                'total_shortage_amount', 'total_over_amount', 'balance_rate', 'reliability_score', 'updated_at'
+            ],
+            batch_size=500
+        )
+        return len(summaries)
+    
+    @classmethod
+    def recalculate_for_period(cls, shop, year, month):
+        """Recalculate performance summary for a specific period"""
+        cls.rebuild_from_archives(
+            shop,
+            CashierCountArchive.objects.filter(date__year=year, date__month=month)
+        )
         return True
+    
+    @classmethod
+    def recalculate_all(cls, shop):
+        """Recalculate every cashier's summary for every archived month"""
+        return cls.rebuild_from_archives(shop, CashierCountArchive.objects.all())
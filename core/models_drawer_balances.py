@@ -0,0 +1,286 @@
+"""
+Drawer Balance Model
+A drawer's takings are stored as narrow rows keyed by drawer, currency and payment
+method instead of ~50 columns on CashFloat. A sale only increments the cells it
+touches, resetting a drawer deletes its rows (a missing cell reads as zero) and a
+new currency needs no schema change. DrawerBalanceMixin gives CashFloat read-only
+properties with the old column names so existing callers keep working.
+"""
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from decimal import Decimal
+
+CURRENCIES = ('USD', 'ZIG', 'RAND')
+METHODS = ('cash', 'card', 'ecocash', 'transfer')
+ZERO = Decimal('0.00')
+
+
+def sale_drawer_state(sale):
+    """Snapshot of the sale fields that decide what it put in the cashier's drawer"""
+    return {
+        'status': sale.status,
+        'payment_method': sale.payment_method,
+        'payment_currency': sale.payment_currency or 'USD',
+        'total_amount': Decimal(str(sale.total_amount or 0)),
+        'amount_received': None if sale.amount_received is None else Decimal(str(sale.amount_received)),
+    }
+
+
+def needs_exchange_rate(state):
+    """Only USD cash sales giving change in cents convert part of it to ZiG"""
+    if state is None or state['payment_method'] != 'cash' or state['payment_currency'] != 'USD':
+        return False
+    received = state['amount_received']
+    return received is not None and received > state['total_amount']
+
+
+def sale_contribution(state, payments=(), exchange_rates=None):
+    """
+    {(currency, method): amount} a sale adds to its drawer - money received less
+    change given. Only completed sales count; payments are the SalePayment rows of
+    a split sale.
+    """
+    cells = {}
+    if state is None or state['status'] != 'completed':
+        return cells
+
+    def add(currency, method, amount):
+        cells[(currency, method)] = cells.get((currency, method), ZERO) + amount
+
+    if state['payment_method'] == 'split':
+        for payment in payments:
+            # Physical cash counts what was handed over; change comes out of the same currency
+            amount_to_add = payment.amount
+            if payment.payment_method == 'cash' and payment.amount_received is not None:
+                amount_to_add = payment.amount_received
+            if payment.currency in CURRENCIES and payment.payment_method in METHODS:
+                add(payment.currency, payment.payment_method, amount_to_add)
+            if payment.amount_received and payment.amount_received > payment.amount and payment.currency in CURRENCIES:
+                add(payment.currency, 'cash', -(payment.amount_received - payment.amount))
+        return cells
+
+    currency = state['payment_currency']
+    method = state['payment_method']
+    total = state['total_amount']
+    received = state['amount_received'] if state['amount_received'] is not None else total
+    if currency in CURRENCIES and method in METHODS:
+        add(currency, method, received)
+
+    if method == 'cash' and received > total:
+        change = received - total
+        if currency == 'USD':
+            # Whole dollars come out of the USD notes, the cents are given as ZiG
+            whole = int(change)
+            fraction = change - Decimal(whole)
+            if whole > 0:
+                add('USD', 'cash', -Decimal(whole))
+            if fraction > 0:
+                try:
+                    add('ZIG', 'cash', -Decimal(str(exchange_rates.convert_amount(fraction, 'USD', 'ZIG'))))
+                except Exception:
+                    # No usable rate - the cents come out of the USD cash instead
+                    add('USD', 'cash', -fraction)
+        elif currency in CURRENCIES:
+            add(currency, 'cash', -change)
+    return cells
+
+
+class DrawerBalance(models.Model):
+    """
+    One currency and payment method of a drawer.
+    current is what the drawer holds from sales net of change and adjustments
+    (the float is kept on CashFloat), session is what was taken in sales.
+    """
+    drawer = models.ForeignKey('CashFloat', on_delete=models.CASCADE, related_name='balances')
+    currency = models.CharField(max_length=10)
+    method = models.CharField(max_length=20)
+    current = models.DecimalField(max_digits=15, decimal_places=2, default=0, help_text="Amount in the drawer, float excluded")
+    session = models.DecimalField(max_digits=15, decimal_places=2, default=0, help_text="Sales taken this session")
+
+    class Meta:
+        verbose_name = "Drawer Balance"
+        verbose_name_plural = "Drawer Balances"
+        unique_together = ['drawer', 'currency', 'method']
+
+    def __str__(self):
+        return f"Drawer {self.drawer_id} - {self.currency} {self.method}: {self.current}"
+
+    @classmethod
+    def apply(cls, drawer_id, deltas):
+        """
+        Add {(currency, method): (current, session)} deltas to a drawer's cells as
+        atomic increments; cells are created the first time they are touched
+        """
+        for (currency, method), (current, session) in deltas.items():
+            if not current and not session:
+                continue
+            cell = cls.objects.filter(drawer_id=drawer_id, currency=currency, method=method)
+            if cell.update(current=F('current') + current, session=F('session') + session):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(drawer_id=drawer_id, currency=currency, method=method,
+                                       current=current, session=session)
+            except IntegrityError:
+                # Created by a concurrent sale in the meantime
+                cell.update(current=F('current') + current, session=F('session') + session)
+
+    @classmethod
+    def rebuild_for_drawer(cls, drawer):
+        """Recompute a drawer's cells from the completed sales of its day"""
+        from .models import Sale
+        from .drawer_totals import local_day_range, active_exchange_rate
+
+        day_start, day_end = local_day_range(drawer.date)
+        sales = Sale.objects.filter(
+            shop_id=drawer.shop_id,
+            cashier_id=drawer.cashier_id,
+            created_at__range=[day_start, day_end],
+            status='completed'
+        ).prefetch_related('payments')
+        exchange_rates = active_exchange_rate()
+
+        cells = {}
+        for sale in sales:
+            payments = sale.payments.all() if sale.payment_method == 'split' else ()
+            for key, amount in sale_contribution(sale_drawer_state(sale), payments, exchange_rates).items():
+                cells[key] = cells.get(key, ZERO) + amount
+
+        with transaction.atomic():
+            cls.objects.filter(drawer=drawer).delete()
+            cls.objects.bulk_create([
+                cls(drawer=drawer, currency=currency, method=method, current=amount, session=amount)
+                for (currency, method), amount in cells.items()
+            ])
+        drawer._balances_changed()
+
+
+def _balance_property(kind, method, currency=None):
+    """
+    Read-only stand-in for an old CashFloat balance column. method 'total' sums the
+    payment methods; currency None follows the drawer's legacy currency.
+    """
+    def getter(self):
+        return self.balance(kind, method, currency or self.legacy_currency)
+    return property(getter)
+
+
+def _expected_cash_property(currency=None):
+    def getter(self):
+        return self.float_for(currency or 'USD') + self.balance('session', 'cash', currency or self.legacy_currency)
+    return property(getter)
+
+
+class DrawerBalanceMixin:
+    """Balance accessors for CashFloat, backed by its DrawerBalance rows"""
+
+    # Legacy fields - figures of the legacy currency
+    current_cash = _balance_property('current', 'cash')
+    current_card = _balance_property('current', 'card')
+    current_ecocash = _balance_property('current', 'ecocash')
+    current_transfer = _balance_property('current', 'transfer')
+    current_total = _balance_property('current', 'total')
+    session_cash_sales = _balance_property('session', 'cash')
+    session_card_sales = _balance_property('session', 'card')
+    session_ecocash_sales = _balance_property('session', 'ecocash')
+    session_transfer_sales = _balance_property('session', 'transfer')
+    session_total_sales = _balance_property('session', 'total')
+
+    # Current drawer contents by currency
+    current_cash_usd = _balance_property('current', 'cash', 'USD')
+    current_cash_zig = _balance_property('current', 'cash', 'ZIG')
+    current_cash_rand = _balance_property('current', 'cash', 'RAND')
+    current_card_usd = _balance_property('current', 'card', 'USD')
+    current_card_zig = _balance_property('current', 'card', 'ZIG')
+    current_card_rand = _balance_property('current', 'card', 'RAND')
+    current_ecocash_usd = _balance_property('current', 'ecocash', 'USD')
+    current_ecocash_zig = _balance_property('current', 'ecocash', 'ZIG')
+    current_ecocash_rand = _balance_property('current', 'ecocash', 'RAND')
+    current_transfer_usd = _balance_property('current', 'transfer', 'USD')
+    current_transfer_zig = _balance_property('current', 'transfer', 'ZIG')
+    current_transfer_rand = _balance_property('current', 'transfer', 'RAND')
+    current_total_usd = _balance_property('current', 'total', 'USD')
+    current_total_zig = _balance_property('current', 'total', 'ZIG')
+    current_total_rand = _balance_property('current', 'total', 'RAND')
+
+    # Session sales by currency
+    session_cash_sales_usd = _balance_property('session', 'cash', 'USD')
+    session_cash_sales_zig = _balance_property('session', 'cash', 'ZIG')
+    session_cash_sales_rand = _balance_property('session', 'cash', 'RAND')
+    session_card_sales_usd = _balance_property('session', 'card', 'USD')
+    session_card_sales_zig = _balance_property('session', 'card', 'ZIG')
+    session_card_sales_rand = _balance_property('session', 'card', 'RAND')
+    session_ecocash_sales_usd = _balance_property('session', 'ecocash', 'USD')
+    session_ecocash_sales_zig = _balance_property('session', 'ecocash', 'ZIG')
+    session_ecocash_sales_rand = _balance_property('session', 'ecocash', 'RAND')
+    session_transfer_sales_usd = _balance_property('session', 'transfer', 'USD')
+    session_transfer_sales_zig = _balance_property('session', 'transfer', 'ZIG')
+    session_transfer_sales_rand = _balance_property('session', 'transfer', 'RAND')
+    session_total_sales_usd = _balance_property('session', 'total', 'USD')
+    session_total_sales_zig = _balance_property('session', 'total', 'ZIG')
+    session_total_sales_rand = _balance_property('session', 'total', 'RAND')
+
+    # Expected cash at EOD - float plus cash sales
+    expected_cash_at_eod = _expected_cash_property()
+    expected_cash_usd = _expected_cash_property('USD')
+    expected_cash_zig = _expected_cash_property('ZIG')
+    expected_cash_rand = _expected_cash_property('RAND')
+
+    @property
+    def balance_cells(self):
+        """{(currency, method): (current, session)}, read once per instance (or from prefetch_related('balances'))"""
+        cells = self.__dict__.get('_balance_cells')
+        if cells is None:
+            cells = {(cell.currency, cell.method): (cell.current, cell.session) for cell in self.balances.all()}
+            self._balance_cells = cells
+        return cells
+
+    def refresh_balances(self):
+        """Forget the loaded cells so the next read sees the database"""
+        self.__dict__.pop('_balance_cells', None)
+        getattr(self, '_prefetched_objects_cache', {}).pop('balances', None)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.refresh_balances()
+
+    def float_for(self, currency):
+        return {
+            'USD': self.float_amount,
+            'ZIG': self.float_amount_zig,
+            'RAND': self.float_amount_rand,
+        }.get(currency, ZERO)
+
+    def balance(self, kind, method, currency):
+        """One figure of the drawer; current cash includes the currency's float"""
+        index = 0 if kind == 'current' else 1
+        cells = self.balance_cells
+        if method == 'total':
+            return sum((cells.get((currency, m), (ZERO, ZERO))[index] for m in METHODS), ZERO)
+        amount = cells.get((currency, method), (ZERO, ZERO))[index]
+        if kind == 'current' and method == 'cash':
+            amount += self.float_for(currency)
+        return amount
+
+    @property
+    def legacy_currency(self):
+        """The currency the unsuffixed legacy figures report - ZiG, then Rand, once they've had sales"""
+        for currency in ('ZIG', 'RAND'):
+            if self.balance('session', 'total', currency) > 0:
+                return currency
+        return 'USD'
+
+    def _balances_changed(self):
+        from .dashboard_cache import invalidate_drawer_status
+        self.refresh_balances()
+        invalidate_drawer_status(self.shop_id)
+
+    def add_to_balance(self, currency, method, current=ZERO, session=ZERO):
+        """Atomically adjust one cell of the drawer"""
+        DrawerBalance.apply(self.pk, {(currency, method): (current, session)})
+        self._balances_changed()
+
+    def reset_balances(self):
+        """Zero every currency and method of the drawer"""
+        DrawerBalance.objects.filter(drawer_id=self.pk).delete()
+        self._balances_changed()
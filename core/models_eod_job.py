@@ -0,0 +1,285 @@
+"""
+End of Day Job Model
+Closing the day touches every sale, count, drawer and shift of the shop - too much to
+finish reliably inside one HTTP request. The close is recorded as an EndOfDayJob and
+run on a background thread in stages. Each stage commits together with the job's
+progress, so a job that died part-way resumes from the first unfinished stage and
+the EOD screen can poll the job for live progress.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import models, transaction, connection
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# A running job that hasn't reported progress for this long is assumed dead and resumed
+STALE_AFTER = timedelta(minutes=2)
+
+# Jobs running in this process - a long stage reports no progress but isn't dead
+_running_jobs = set()
+_running_lock = threading.Lock()
+
+
+class JobSuperseded(Exception):
+    """Another worker claimed the job after this one was presumed dead"""
+
+
+class EndOfDayJob(models.Model):
+    """
+    The close of one shop day.
+    Stages run in order and are safe to re-run; completed_stages records which ones
+    have committed, so a resumed job skips them.
+    """
+
+    STAGES = [
+        ('begin_closing', 'Stopping sales for the day'),
+        ('reconciliation', 'Summarising the reconciliation'),
+        ('restock', 'Refreshing restock suggestions'),
+        ('archive_sales', 'Archiving sales'),
+        ('archive_staff_lunches', 'Archiving staff lunches'),
+        ('archive_cashier_counts', 'Archiving cashier counts'),
+        ('clear_drawers', 'Clearing drawers'),
+        ('close_shifts', 'Closing shifts'),
+        ('finish_closing', 'Closing the shop day'),
+    ]
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    shop = models.ForeignKey('ShopConfiguration', on_delete=models.CASCADE, related_name='eod_jobs')
+    shop_day = models.ForeignKey('ShopDay', on_delete=models.CASCADE, related_name='eod_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    current_stage = models.CharField(max_length=40, blank=True, help_text="Stage being run, or the one that failed")
+    completed_stages = models.JSONField(default=list)
+    results = models.JSONField(default=dict, help_text="Rows affected per completed stage")
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    closed_by = models.ForeignKey('Cashier', on_delete=models.SET_NULL, null=True, blank=True, related_name='eod_jobs')
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last progress from the worker")
+
+    class Meta:
+        verbose_name = "End of Day Job"
+        verbose_name_plural = "End of Day Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['shop', '-created_at']),
+            models.Index(fields=['shop_day', 'status']),
+        ]
+
+    def __str__(self):
+        return f"EOD job #{self.id} - {self.shop_day.date} ({self.status})"
+
+    @classmethod
+    def submit(cls, shop_day, closed_by=None, notes=''):
+        """
+        The close job for a shop day. An unfinished job is returned as is, so
+        submitting twice never closes the day twice; otherwise the day must be open.
+        """
+        job = cls.objects.filter(shop_day=shop_day).exclude(status='COMPLETED').first()
+        if job:
+            return job
+        if shop_day.status != 'OPEN':
+            raise ValueError("Shop can only be closed when open")
+        return cls.objects.create(shop=shop_day.shop, shop_day=shop_day, closed_by=closed_by, notes=notes)
+
+    @property
+    def is_stale(self):
+        """Pending or running with no progress for STALE_AFTER - its worker has gone away"""
+        if self.status not in ('PENDING', 'RUNNING'):
+            return False
+        last_seen = self.heartbeat_at or self.created_at
+        return last_seen < timezone.now() - STALE_AFTER
+
+    @property
+    def progress(self):
+        """Percentage of stages completed"""
+        return round(len(self.completed_stages) * 100 / len(self.STAGES))
+
+    def claim(self):
+        """
+        Mark the job running for this worker. Returns False when another worker is
+        still making progress on it.
+        """
+        now = timezone.now()
+        stale = now - STALE_AFTER
+        claimable = (
+            Q(status__in=['PENDING', 'FAILED']) |
+            Q(status='RUNNING', heartbeat_at__lt=stale) |
+            Q(status='RUNNING', heartbeat_at__isnull=True)
+        )
+        claimed = type(self).objects.filter(claimable, pk=self.pk).update(
+            status='RUNNING',
+            error='',
+            attempts=F('attempts') + 1,
+            started_at=Coalesce('started_at', Value(now)),
+            heartbeat_at=now
+        )
+        return bool(claimed)
+
+    def _hold(self, stage):
+        """
+        Record the stage as this worker's claim (attempts) and, inside a transaction,
+        lock the job row until it commits. Raises JobSuperseded when another worker
+        claimed the job since.
+        """
+        held = type(self).objects.filter(pk=self.pk, status='RUNNING', attempts=self.attempts).update(
+            current_stage=stage, heartbeat_at=timezone.now()
+        )
+        if not held:
+            raise JobSuperseded()
+
+    def run(self):
+        """
+        Run the stages not completed yet, each committed together with the job's
+        progress. A stage holds the job row while it runs, so a worker resuming the
+        job waits for it, and a worker whose claim was taken over stops before
+        committing anything.
+        """
+        with _running_lock:
+            if self.pk in _running_jobs:
+                return self
+            _running_jobs.add(self.pk)
+        try:
+            return self._run()
+        finally:
+            with _running_lock:
+                _running_jobs.discard(self.pk)
+
+    def _run(self):
+        if not self.claim():
+            return self
+        self.refresh_from_db()
+
+        try:
+            for stage, label in self.STAGES:
+                if stage in self.completed_stages:
+                    continue
+                # Visible to pollers while the stage runs
+                self.current_stage = stage
+                self._hold(stage)
+
+                with transaction.atomic():
+                    self._hold(stage)
+                    result = getattr(self, f'_stage_{stage}')()
+                    self.completed_stages = self.completed_stages + [stage]
+                    self.results = {**self.results, stage: result}
+                    self.heartbeat_at = timezone.now()
+                    self.save(update_fields=['completed_stages', 'results', 'current_stage', 'heartbeat_at'])
+                logger.info(f"EOD job {self.id}: {label} done ({result})")
+
+            self.status = 'COMPLETED'
+            self.current_stage = ''
+            self.finished_at = timezone.now()
+            self.save(update_fields=['status', 'current_stage', 'finished_at'])
+        except JobSuperseded:
+            logger.info(f"EOD job {self.id}: taken over by another worker at {self.current_stage}")
+            self.refresh_from_db()
+        except Exception as e:
+            logger.exception(f"EOD job {self.id} failed at {self.current_stage}")
+            self.status = 'FAILED'
+            self.error = str(e)
+            self.save(update_fields=['status', 'error', 'current_stage'])
+        return self
+
+    def start(self):
+        """Run the job on a background thread once the current transaction commits"""
+        job_id = self.pk
+        transaction.on_commit(lambda: threading.Thread(
+            target=_run_job, args=(job_id,), name=f'eod-job-{job_id}', daemon=True
+        ).start())
+
+    def resume_if_stale(self):
+        """Restart a job whose worker has gone away (e.g. the process was recycled)"""
+        with _running_lock:
+            if self.pk in _running_jobs:
+                return False
+        if self.is_stale:
+            self.start()
+            return True
+        return False
+
+    def to_dict(self):
+        stage_labels = dict(self.STAGES)
+        return {
+            'job_id': self.id,
+            'date': self.shop_day.date.isoformat(),
+            'status': self.status,
+            'progress': self.progress,
+            'current_stage': self.current_stage,
+            'current_stage_label': stage_labels.get(self.current_stage, ''),
+            'stages': [{
+                'stage': stage,
+                'label': label,
+                'completed': stage in self.completed_stages,
+                'result': self.results.get(stage)
+            } for stage, label in self.STAGES],
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    # Stages - each returns the number of rows it handled (or None)
+
+    def _stage_begin_closing(self):
+        if self.shop_day.status != 'OPEN':
+            return 0
+        self.shop_day._begin_closing(closed_by=self.closed_by, notes=self.notes)
+        return 1
+
+    def _stage_reconciliation(self):
+        from .models_reconciliation import ReconciliationSession
+        session, _ = ReconciliationSession.get_or_create_session(self.shop, self.shop_day.date)
+        session.calculate_session_summary()
+        return 1
+
+    def _stage_restock(self):
+        self.shop_day._refresh_restock()
+        return None
+
+    def _stage_archive_sales(self):
+        return self.shop_day._archive_sales()
+
+    def _stage_archive_staff_lunches(self):
+        return self.shop_day._archive_staff_lunches()
+
+    def _stage_archive_cashier_counts(self):
+        from .models_reconciliation import CashierCount
+        from .models_cashier_archive import CashierCountArchive
+        archived = CashierCountArchive.archive_all_counts_for_date(self.shop, self.shop_day.date)
+        CashierCount.objects.filter(shop=self.shop, date=self.shop_day.date).delete()
+        return len(archived)
+
+    def _stage_clear_drawers(self):
+        return self.shop_day._clear_drawers()
+
+    def _stage_close_shifts(self):
+        return self.shop_day._close_shifts()
+
+    def _stage_finish_closing(self):
+        self.shop_day._finish_closing()
+        return 1
+
+
+def _run_job(job_id):
+    try:
+        EndOfDayJob.objects.select_related('shop', 'shop_day', 'closed_by').get(pk=job_id).run()
+    except Exception as e:
+        logger.error(f"Could not run EOD job {job_id}: {e}")
+    finally:
+        # The thread's own connection - don't leave it open
+        connection.close()
@@ -0,0 +1,95 @@
+"""
+Demand Forecast Model
+Stores the latest precomputed demand forecast per product so clients fetch
+a few numbers instead of raw sales history
+"""
+from django.db import models, transaction
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+
+
+class DemandForecast(models.Model):
+    """Latest demand forecast for a product, replaced on every forecasting run"""
+
+    METHOD_CHOICES = [
+        ('MOVING_AVERAGE', 'Moving Average'),
+        ('SEASONAL_ES', 'Exponential Smoothing (weekday seasonality)'),
+    ]
+
+    shop = models.ForeignKey('ShopConfiguration', on_delete=models.CASCADE)
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='demand_forecasts')
+
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES)
+    forecast_start = models.DateField(help_text="First forecast day")
+    horizon_days = models.IntegerField(default=7)
+    history_days = models.IntegerField(default=56, help_text="Days of history the model was fitted on")
+    observations = models.IntegerField(default=0)
+
+    daily_forecast = models.JSONField(default=list, help_text="[{date, quantity}] for each forecast day")
+    total_forecast = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    avg_daily_demand = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+
+    # Holdout error metrics (null when history is too short to score)
+    mae = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True, help_text="Mean absolute error on holdout days")
+    wape = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, help_text="Weighted absolute percentage error on holdout days")
+
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Demand Forecast"
+        verbose_name_plural = "Demand Forecasts"
+        unique_together = ['shop', 'product']
+        ordering = ['-total_forecast']
+
+    def __str__(self):
+        return f"{self.product_id} - {self.total_forecast} over {self.horizon_days} days ({self.method})"
+
+    @classmethod
+    def save_results(cls, shop, results, forecast_start, history_days, horizon_days):
+        """Replace the shop's forecasts with a fresh batch of fit_product() results"""
+        now = timezone.now()
+        forecasts = []
+        for result in results:
+            daily = [round(quantity, 2) for quantity in result['forecast']]
+            total = sum(daily)
+            forecasts.append(cls(
+                shop=shop,
+                product_id=result['product_id'],
+                method=result['method'],
+                forecast_start=forecast_start,
+                horizon_days=horizon_days,
+                history_days=history_days,
+                observations=result['observations'],
+                daily_forecast=[
+                    {'date': (forecast_start + timedelta(days=offset)).isoformat(), 'quantity': quantity}
+                    for offset, quantity in enumerate(daily)
+                ],
+                total_forecast=Decimal(str(round(total, 2))),
+                avg_daily_demand=Decimal(str(round(total / horizon_days, 4))) if horizon_days else Decimal('0'),
+                mae=Decimal(str(round(result['mae'], 4))) if result['mae'] is not None else None,
+                wape=Decimal(str(round(result['wape'], 2))) if result['wape'] is not None else None,
+                computed_at=now,
+            ))
+
+        with transaction.atomic():
+            cls.objects.filter(shop=shop).delete()
+            cls.objects.bulk_create(forecasts, batch_size=500)
+
+        return len(forecasts)
+
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'method': self.method,
+            'forecast_start': self.forecast_start.isoformat(),
+            'horizon_days': self.horizon_days,
+            'history_days': self.history_days,
+            'observations': self.observations,
+            'daily_forecast': self.daily_forecast,
+            'total_forecast': float(self.total_forecast),
+            'avg_daily_demand': float(self.avg_daily_demand),
+            'mae': float(self.mae) if self.mae is not None else None,
+            'wape': float(self.wape) if self.wape is not None else None,
+            'computed_at': self.computed_at.isoformat(),
+        }
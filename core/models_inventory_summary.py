@@ -0,0 +1,155 @@
+"""
+Shop Inventory Summary Model
+Keeps running inventory totals per shop so dashboards don't have to scan every product
+"""
+from django.db import models, transaction
+from django.utils import timezone
+from decimal import Decimal
+
+
+def product_inventory_state(product):
+    """Snapshot of the product fields that feed the inventory summary"""
+    return {
+        'stock_quantity': Decimal(str(product.stock_quantity or 0)),
+        'cost_price': Decimal(str(product.cost_price or 0)),
+        'min_stock_level': Decimal(str(product.min_stock_level or 0)),
+        'category': product.category or '',
+    }
+
+
+def _contribution(state):
+    """What a single product adds to the shop totals (same rules as Product.stock_value / is_low_stock)"""
+    quantity = state['stock_quantity']
+    return {
+        'total_products': 1,
+        'total_value': max(Decimal('0'), quantity) * state['cost_price'],
+        'low_stock_count': 1 if quantity <= state['min_stock_level'] else 0,
+        'negative_stock_count': 1 if quantity < 0 else 0,
+        'out_of_stock_count': 1 if quantity <= 0 else 0,
+        'category': state['category'],
+    }
+
+
+class ShopInventorySummary(models.Model):
+    """
+    Running inventory aggregates for a shop.
+    Updated incrementally whenever a product is saved or deleted; the
+    reconcile_inventory_summary command rebuilds it from scratch.
+    """
+
+    COUNTER_FIELDS = ['total_products', 'low_stock_count', 'negative_stock_count', 'out_of_stock_count']
+
+    shop = models.OneToOneField('ShopConfiguration', on_delete=models.CASCADE, related_name='inventory_summary')
+    total_products = models.IntegerField(default=0)
+    total_value = models.DecimalField(max_digits=18, decimal_places=4, default=0, help_text="Sum of max(0, stock) * cost_price")
+    low_stock_count = models.IntegerField(default=0, help_text="Products with stock at or below min_stock_level")
+    negative_stock_count = models.IntegerField(default=0)
+    out_of_stock_count = models.IntegerField(default=0, help_text="Products with zero or negative stock")
+    category_values = models.JSONField(default=dict, blank=True, help_text="Stock value per category (decimal strings)")
+    last_reconciled_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Shop Inventory Summary"
+        verbose_name_plural = "Shop Inventory Summaries"
+
+    def __str__(self):
+        return f"Inventory summary - {self.shop.name}"
+
+    @classmethod
+    def get_for_shop(cls, shop):
+        """Return the summary row for a shop, building it on first access"""
+        summary = cls.objects.filter(shop=shop).first()
+        if summary is None:
+            summary = cls.rebuild_for_shop(shop)
+        return summary
+
+    @classmethod
+    def apply_product_change(cls, shop_id, old_state=None, new_state=None):
+        """
+        Apply the difference between a product's previous and current contribution.
+        old_state is None for newly created products, new_state is None for deletions.
+        """
+        cls.apply_product_changes(shop_id, [(old_state, new_state)])
+
+    @classmethod
+    def apply_product_changes(cls, shop_id, changes):
+        """Apply a batch of (old_state, new_state) product changes under a single row lock"""
+        changes = [(old, new) for old, new in changes if old != new]
+        if not changes:
+            return
+
+        with transaction.atomic():
+            summary = cls.objects.select_for_update().filter(shop_id=shop_id).first()
+            if summary is None:
+                # First touch for this shop - a full rebuild already reflects these changes
+                from .models import ShopConfiguration
+                shop = ShopConfiguration.objects.filter(id=shop_id).first()
+                if shop is not None:
+                    cls.rebuild_for_shop(shop)
+                return
+
+            category_values = dict(summary.category_values or {})
+            for old_state, new_state in changes:
+                for state, sign in ((old_state, -1), (new_state, 1)):
+                    if state is None:
+                        continue
+                    contribution = _contribution(state)
+                    for field in cls.COUNTER_FIELDS:
+                        setattr(summary, field, getattr(summary, field) + sign * contribution[field])
+                    summary.total_value += sign * contribution['total_value']
+
+                    category = contribution['category']
+                    category_value = Decimal(category_values.get(category, '0')) + sign * contribution['total_value']
+                    if category_value == 0 and sign < 0:
+                        category_values.pop(category, None)
+                    else:
+                        category_values[category] = str(category_value)
+
+            summary.category_values = category_values
+            summary.save()
+
+        # Bulk stock paths (batch transfers, waste batches) skip Product signals
+        from .dashboard_cache import invalidate_shop_caches
+        invalidate_shop_caches(shop_id)
+
+    @classmethod
+    def rebuild_for_shop(cls, shop):
+        """Recompute every aggregate for a shop straight from the Product table"""
+        from .models import Product
+
+        totals = {field: 0 for field in cls.COUNTER_FIELDS}
+        total_value = Decimal('0')
+        category_values = {}
+
+        rows = Product.objects.filter(shop=shop).values_list(
+            'stock_quantity', 'cost_price', 'min_stock_level', 'category'
+        )
+        for stock_quantity, cost_price, min_stock_level, category in rows.iterator():
+            contribution = _contribution({
+                'stock_quantity': stock_quantity or Decimal('0'),
+                'cost_price': cost_price or Decimal('0'),
+                'min_stock_level': min_stock_level or Decimal('0'),
+                'category': category or '',
+            })
+            for field in cls.COUNTER_FIELDS:
+                totals[field] += contribution[field]
+            total_value += contribution['total_value']
+            category_values[contribution['category']] = (
+                category_values.get(contribution['category'], Decimal('0')) + contribution['total_value']
+            )
+
+        summary, _ = cls.objects.update_or_create(
+            shop=shop,
+            defaults={
+                **totals,
+                'total_value': total_value,
+                'category_values': {category: str(value) for category, value in category_values.items()},
+                'last_reconciled_at': timezone.now(),
+            }
+        )
+        return summary
+
+    def get_category_values(self):
+        """Category values as Decimals"""
+        return {category: Decimal(value) for category, value in (self.category_values or {}).items()}
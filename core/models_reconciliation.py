@@ -385,136 +385,25 @@ class CashierCount(models.Model):
         CRITICAL FIX: This method does NOT call self.save() - the caller must save.
         This prevents double-save issues and allows the view to control the save timing.
         """
-        from .models import Sale, SalePayment, StaffLunch
-        import datetime
+        from .models import StaffLunch
+        from .models_reconciliation_snapshot import ReconciliationSnapshot
+        from .drawer_totals import local_day_range
         
-        # Create proper timezone-aware datetime range
-        day_start = timezone.make_aware(
-            datetime.datetime.combine(self.date, datetime.time.min),
-            timezone.get_current_timezone()
-        )
-        day_end = timezone.make_aware(
-            datetime.datetime.combine(self.date, datetime.time.max),
-            timezone.get_current_timezone()
-        )
+        day_start, day_end = local_day_range(self.date)
         
-        # Get exchange rates for change calculations
-        exchange_rates = None
-        try:
-            from .models_exchange_rates import ExchangeRate
-            rates = ExchangeRate.objects.filter(shop=self.shop, is_active=True).order_by('-created_at')[:5]
-            if rates:
-                exchange_rates = rates[0]
-        except Exception:
-            pass
-        
-        # Calculate expected amounts from actual sales
+        # Calculate expected amounts from actual sales - the cashier's drawer takings
+        # for the day as kept in the reconciliation snapshot (same per-sale contribution,
+        # change and exchange rate handling as the drawer). One narrow read, however
+        # many sales the cashier rang up.
         exp_usd = {'cash': Decimal('0'), 'card': Decimal('0'), 'ecocash': Decimal('0')}
         exp_zig = {'cash': Decimal('0'), 'card': Decimal('0'), 'ecocash': Decimal('0')}
         exp_rand = {'cash': Decimal('0'), 'card': Decimal('0'), 'ecocash': Decimal('0')}
         
         try:
-            today_sales = Sale.objects.filter(
-                shop=self.shop,
-                cashier=self.cashier,
-                created_at__range=[day_start, day_end],
-                status='completed'
-            )
-            
-            for sale in today_sales:
-                if sale.payment_method == 'split':
-                    # Handle split payments
-                    sale_payments = SalePayment.objects.filter(sale=sale)
-                    for payment in sale_payments:
-                        currency = payment.currency.upper()
-                        method = payment.payment_method
-                        amount = Decimal(str(payment.amount))
-                        
-                        if currency == 'USD' and method in exp_usd:
-                            exp_usd[method] += amount
-                        elif currency == 'ZIG' and method in exp_zig:
-                            exp_zig[method] += amount
-                        elif currency == 'RAND' and method in exp_rand:
-                            exp_rand[method] += amount
-                    
-                    # Calculate change for split payments
-                    total_paid_usd = Decimal('0')
-                    for payment in sale_payments:
-                        if payment.currency == 'USD':
-                            total_paid_usd += Decimal(str(payment.amount))
-                        elif exchange_rates:
-                            try:
-                                amount_usd = exchange_rates.convert_amount(payment.amount, payment.currency, 'USD')
-                                total_paid_usd += Decimal(str(amount_usd))
-                            except:
-                                pass
-                    
-                    sale_total = Decimal(str(sale.total_amount))
-                    if total_paid_usd > sale_total:
-                        change_usd = total_paid_usd - sale_total
-                        change_int_usd = int(change_usd)
-                        change_frac_usd = change_usd - Decimal(change_int_usd)
-                        
-                        if change_int_usd > 0:
-                            exp_usd['cash'] -= Decimal(change_int_usd)
-                        
-                        if change_frac_usd > 0 and exchange_rates:
-                            try:
-                                change_zig = exchange_rates.convert_amount(change_frac_usd, 'USD', 'ZIG')
-                                exp_zig['cash'] -= Decimal(str(change_zig))
-                            except:
-                                exp_usd['cash'] -= change_frac_usd
-                else:
-                    # Handle regular payments
-                    sale_amount = Decimal(str(sale.total_amount))
-                    currency = (sale.payment_currency or 'USD').upper()
-                    method = sale.payment_method
-                    
-                    if currency == 'USD':
-                        if method == 'cash':
-                            exp_usd['cash'] += sale_amount
-                        elif method == 'card':
-                            exp_usd['card'] += sale_amount
-                        elif method == 'ecocash':
-                            exp_usd['ecocash'] += sale_amount
-                    elif currency == 'ZIG':
-                        if method == 'cash':
-                            exp_zig['cash'] += sale_amount
-                        elif method == 'card':
-                            exp_zig['card'] += sale_amount
-                        elif method == 'ecocash':
-                            exp_zig['ecocash'] += sale_amount
-                    elif currency == 'RAND':
-                        if method == 'cash':
-                            exp_rand['cash'] += sale_amount
-                        elif method == 'card':
-                            exp_rand['card'] += sale_amount
-                        elif method == 'ecocash':
-                            exp_rand['ecocash'] += sale_amount
-                    
-                    # Handle change for cash payments
-                    if method == 'cash' and sale.amount_received:
-                        amount_received = Decimal(str(sale.amount_received))
-                        if amount_received > sale_amount:
-                            change_amount = amount_received - sale_amount
-                            
-                            if currency == 'USD':
-                                change_int_usd = int(change_amount)
-                                change_frac_usd = change_amount - Decimal(change_int_usd)
-                                
-                                if change_int_usd > 0:
-                                    exp_usd['cash'] -= Decimal(change_int_usd)
-                                
-                                if change_frac_usd > 0 and exchange_rates:
-                                    try:
-                                        change_zig = exchange_rates.convert_amount(change_frac_usd, 'USD', 'ZIG')
-                                        exp_zig['cash'] -= Decimal(str(change_zig))
-                                    except:
-                                        exp_usd['cash'] -= change_frac_usd
-                            elif currency == 'ZIG':
-                                exp_zig['cash'] -= change_amount
-                            elif currency == 'RAND':
-                                exp_rand['cash'] -= change_amount
+            snapshot = ReconciliationSnapshot.totals(self.shop, [self.date], cashier_ids=[self.cashier_id])
+            for currency, expected in (('USD', exp_usd), ('ZIG', exp_zig), ('RAND', exp_rand)):
+                for method in expected:
+                    expected[method] = snapshot.amount('drawer', currency=currency, method=method)
         except Exception as e:
             # Log error but don't fail - will return zero expected amounts
             print(f"ERROR calculating sales in update_from_cash_float: {e}")
@@ -522,13 +411,12 @@ class CashierCount(models.Model):
         # Subtract staff lunch deductions (CRITICAL FIX: Only subtract if there's actual lunch)
         staff_lunch_total = Decimal('0')
         try:
-            staff_lunches = StaffLunch.objects.filter(
+            staff_lunch_total = StaffLunch.objects.filter(
                 shop=self.shop,
                 cashier=self.cashier,
                 created_at__range=[day_start, day_end],
                 product=None
-            )
-            staff_lunch_total = sum([Decimal(str(lunch.total_cost)) for lunch in staff_lunches])
+            ).aggregate(total=models.Sum('total_cost'))['total'] or Decimal('0')
             
             # CRITICAL FIX: Only subtract staff lunch if it's greater than 0
             # AND only if there are actual sales to deduct from
@@ -652,19 +540,29 @@ class ReconciliationSession(models.Model):
         self.save()
         return self
     
-    def complete_session(self, completed_by=None):
-        """Complete the reconciliation session and close the shop"""
+    def complete_session(self, completed_by=None, background=True):
+        """
+        Complete the reconciliation session and close the shop.
+        The close runs as an end of day job, in the background unless background=False;
+        the job is left on self.eod_job.
+        """
         self.status = 'COMPLETED'
         self.completed_at = timezone.now()
         self.completed_by = completed_by
         self.save()
         
         # Also close the shop for the day
+        self.eod_job = None
         try:
             from .models import ShopDay
+            from .models_eod_job import EndOfDayJob
             shop_day = ShopDay.get_current_day(self.shop)
             if shop_day.status == 'OPEN':
-                shop_day.close_shop(closed_by=completed_by, notes=f'Closed after EOD reconciliation on {self.date}')
+                self.eod_job = EndOfDayJob.submit(shop_day, closed_by=completed_by, notes=f'Closed after EOD reconciliation on {self.date}')
+                if background:
+                    self.eod_job.start()
+                else:
+                    self.eod_job.run()
         except Exception as e:
             print(f"Warning: Could not close shop after reconciliation: {e}")
             # Don't fail the reconciliation if shop closing fails
@@ -673,24 +571,32 @@ class ReconciliationSession(models.Model):
     
     def calculate_session_summary(self):
         """Calculate overall session summary from cashier counts (multi-currency)"""
-        counts = CashierCount.objects.filter(shop=self.shop, date=self.date)
+        from .models_reconciliation_snapshot import ReconciliationSnapshot
+        # The counts' figures are mirrored in the reconciliation snapshot - one narrow read
+        snapshot = ReconciliationSnapshot.totals(self.shop, [self.date])
+
+        def expected(method, currency=''):
+            return snapshot.amount('expected', currency=currency, method=method)
+
+        def counted(method, currency=''):
+            return snapshot.amount('counted', currency=currency, method=method)
 
         # Cash totals by currency
-        self.total_expected_cash = sum(count.expected_cash for count in counts)
-        self.total_expected_cash_usd = sum(count.expected_cash_usd for count in counts)
-        self.total_expected_cash_zig = sum(count.expected_cash_zig for count in counts)
-        self.total_expected_cash_rand = sum(count.expected_cash_rand for count in counts)
+        self.total_expected_cash = expected('cash')
+        self.total_expected_cash_usd = expected('cash', 'USD')
+        self.total_expected_cash_zig = expected('cash', 'ZIG')
+        self.total_expected_cash_rand = expected('cash', 'RAND')
 
-        self.total_counted_cash = sum(count.total_cash for count in counts)
-        self.total_counted_cash_usd = sum(count.total_cash_usd for count in counts)
-        self.total_counted_cash_zig = sum(count.total_cash_zig for count in counts)
-        self.total_counted_cash_rand = sum(count.total_cash_rand for count in counts)
+        self.total_counted_cash = counted('cash')
+        self.total_counted_cash_usd = counted('cash', 'USD')
+        self.total_counted_cash_zig = counted('cash', 'ZIG')
+        self.total_counted_cash_rand = counted('cash', 'RAND')
 
         # Card and Ecocash totals
-        total_expected_card = sum(count.expected_card for count in counts)
-        total_expected_ecocash = sum(count.expected_ecocash for count in counts)
-        total_counted_card = sum(count.total_card for count in counts)
-        total_counted_ecocash = sum(count.total_ecocash for count in counts)
+        total_expected_card = expected('card')
+        total_expected_ecocash = expected('ecocash')
+        total_counted_card = counted('card')
+        total_counted_ecocash = counted('ecocash')
 
         # Calculate per-currency variances (LINKED BALANCE LOGIC)
         self.variance_usd = self.total_counted_cash_usd - self.total_expected_cash_usd
@@ -0,0 +1,241 @@
+"""
+Reconciliation Snapshot Model
+The end of day screens show each cashier's sales, refunds, drawer takings, staff
+lunches and cash counts for the day, and owners refresh them constantly while
+closing. Instead of aggregating the day's sales on every refresh, the figures are
+kept as narrow rows per shop, day, cashier, kind, currency and method, adjusted as
+sales, lunches and counts are saved - reading a whole day is one small query.
+"""
+from decimal import Decimal
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+ZERO = Decimal('0.00')
+
+SALE_KINDS = ('sales', 'refunds', 'drawer')
+COUNT_KINDS = ('expected', 'counted')
+
+# (kind, currency, method, CashierCount field) - currency '' is the count's own
+# all-currency figure, not a sum of the per-currency ones
+COUNT_FIELDS = [
+    ('expected', '', 'cash', 'expected_cash'),
+    ('expected', 'USD', 'cash', 'expected_cash_usd'),
+    ('expected', 'ZIG', 'cash', 'expected_cash_zig'),
+    ('expected', 'RAND', 'cash', 'expected_cash_rand'),
+    ('expected', '', 'card', 'expected_card'),
+    ('expected', '', 'ecocash', 'expected_ecocash'),
+    ('counted', '', 'cash', 'total_cash'),
+    ('counted', 'USD', 'cash', 'total_cash_usd'),
+    ('counted', 'ZIG', 'cash', 'total_cash_zig'),
+    ('counted', 'RAND', 'cash', 'total_cash_rand'),
+    ('counted', '', 'card', 'total_card'),
+    ('counted', '', 'ecocash', 'total_ecocash'),
+]
+
+
+def sale_snapshot_state(sale):
+    """Snapshot of the sale fields that decide its reconciliation figures"""
+    return {
+        'day': timezone.localtime(sale.created_at).date() if sale.created_at else timezone.localdate(),
+        'cashier_id': sale.cashier_id,
+        'status': sale.status,
+        'payment_currency': sale.payment_currency or '',
+        'payment_method': sale.payment_method,
+        'total_amount': Decimal(str(sale.total_amount or 0)),
+        'refund_amount': Decimal(str(sale.refund_amount or 0)),
+    }
+
+
+def sale_snapshot_cells(state, drawer_cells):
+    """
+    {(day, cashier_id, kind, currency, method): (amount, count)} a sale adds to the
+    snapshot. drawer_cells is its sale_contribution - what reached the drawer net of change.
+    """
+    cells = {}
+    if state is None:
+        return cells
+    day, cashier_id = state['day'], state['cashier_id']
+    if state['status'] == 'completed':
+        cells[(day, cashier_id, 'sales', state['payment_currency'], state['payment_method'])] = (state['total_amount'], 1)
+        for (currency, method), amount in (drawer_cells or {}).items():
+            cells[(day, cashier_id, 'drawer', currency, method)] = (amount, 0)
+    elif state['status'] == 'refunded':
+        cells[(day, cashier_id, 'refunds', state['payment_currency'], state['payment_method'])] = (state['refund_amount'], 1)
+    return cells
+
+
+def lunch_snapshot_cells(lunch):
+    day = timezone.localtime(lunch.created_at).date() if lunch.created_at else timezone.localdate()
+    return {(day, lunch.cashier_id, 'lunch', lunch.currency or 'USD', ''): (Decimal(str(lunch.total_cost or 0)), 1)}
+
+
+def count_snapshot_cells(count):
+    return {
+        (count.date, count.cashier_id, kind, currency, method): (Decimal(str(getattr(count, field) or 0)), 1)
+        for kind, currency, method, field in COUNT_FIELDS
+    }
+
+
+def snapshot_deltas(old_cells, new_cells):
+    """What to add to move the snapshot from the old cells to the new ones"""
+    deltas = {}
+    for key in set(old_cells) | set(new_cells):
+        old_amount, old_count = old_cells.get(key, (ZERO, 0))
+        new_amount, new_count = new_cells.get(key, (ZERO, 0))
+        deltas[key] = (new_amount - old_amount, new_count - old_count)
+    return deltas
+
+
+def _add_cells(cells, more):
+    for key, (amount, count) in more.items():
+        old_amount, old_count = cells.get(key, (ZERO, 0))
+        cells[key] = (old_amount + amount, old_count + count)
+
+
+class SnapshotTotals:
+    """A shop's snapshot rows over some days, summed on demand"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def _matching(self, kind, cashier_ids, currency, method):
+        for row_kind, cashier_id, row_currency, row_method, amount, count in self.rows:
+            if row_kind != kind:
+                continue
+            if cashier_ids is not None and cashier_id not in cashier_ids:
+                continue
+            if currency is not None and row_currency != currency:
+                continue
+            if method is not None and row_method != method:
+                continue
+            yield cashier_id, amount, count
+
+    def amount(self, kind, cashier_ids=None, currency=None, method=None):
+        """Total amount of a kind; None filters match anything"""
+        return sum((amount for _, amount, _ in self._matching(kind, cashier_ids, currency, method)), ZERO)
+
+    def count(self, kind, cashier_ids=None, currency=None, method=None):
+        return sum(count for _, _, count in self._matching(kind, cashier_ids, currency, method))
+
+    def cashier_ids(self, kind):
+        return sorted({cashier_id for cashier_id, _, _ in self._matching(kind, None, None, None) if cashier_id})
+
+
+class ReconciliationSnapshot(models.Model):
+    """
+    One figure of a shop day's reconciliation.
+    sales/refunds are keyed by the sale's payment currency and method, drawer by the
+    currency and method that reached the drawer, lunch by currency, and expected/
+    counted hold the cashier's count (see COUNT_FIELDS).
+    """
+
+    KIND_CHOICES = [
+        ('sales', 'Completed Sales'),
+        ('refunds', 'Refunded Sales'),
+        ('drawer', 'Drawer Takings'),
+        ('lunch', 'Staff Lunches'),
+        ('expected', 'Count Expected'),
+        ('counted', 'Count Counted'),
+    ]
+
+    shop = models.ForeignKey('ShopConfiguration', on_delete=models.CASCADE, related_name='reconciliation_snapshots')
+    date = models.DateField(help_text="Local (shop timezone) business date")
+    cashier = models.ForeignKey('Cashier', on_delete=models.CASCADE, null=True, blank=True, related_name='reconciliation_snapshots')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    currency = models.CharField(max_length=10, blank=True)
+    method = models.CharField(max_length=20, blank=True)
+    amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    count = models.IntegerField(default=0, help_text="Sales, lunches or counts behind the amount")
+
+    class Meta:
+        verbose_name = "Reconciliation Snapshot"
+        verbose_name_plural = "Reconciliation Snapshots"
+        unique_together = ['shop', 'date', 'cashier', 'kind', 'currency', 'method']
+        indexes = [
+            models.Index(fields=['shop', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.kind} {self.currency} {self.method}: {self.amount}"
+
+    @classmethod
+    def totals(cls, shop, days, cashier_ids=None):
+        """SnapshotTotals over the given local days, optionally for some cashiers only"""
+        rows = cls.objects.filter(shop=shop, date__in=days)
+        if cashier_ids is not None:
+            rows = rows.filter(cashier_id__in=cashier_ids)
+        return SnapshotTotals(list(rows.values_list('kind', 'cashier_id', 'currency', 'method', 'amount', 'count')))
+
+    @classmethod
+    def apply(cls, shop_id, deltas):
+        """
+        Add {(day, cashier_id, kind, currency, method): (amount, count)} deltas as
+        atomic increments; rows are created the first time they are touched
+        """
+        for (day, cashier_id, kind, currency, method), (amount, count) in deltas.items():
+            if not amount and not count:
+                continue
+            row = cls.objects.filter(shop_id=shop_id, date=day, cashier_id=cashier_id, kind=kind, currency=currency, method=method)
+            if row.update(amount=F('amount') + amount, count=F('count') + count):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(shop_id=shop_id, date=day, cashier_id=cashier_id, kind=kind,
+                                       currency=currency, method=method, amount=amount, count=count)
+            except IntegrityError:
+                # Created by a concurrent save in the meantime
+                row.update(amount=F('amount') + amount, count=F('count') + count)
+
+    @classmethod
+    def set_cashier_count(cls, count):
+        """Replace a cashier's count figures for the day - counts are edited, not accumulated"""
+        with transaction.atomic():
+            cls.clear(count.shop_id, COUNT_KINDS, days=[count.date], cashier_id=count.cashier_id)
+            cls.objects.bulk_create([
+                cls(shop_id=count.shop_id, date=day, cashier_id=cashier_id, kind=kind,
+                    currency=currency, method=method, amount=amount, count=number)
+                for (day, cashier_id, kind, currency, method), (amount, number) in count_snapshot_cells(count).items()
+            ])
+
+    @classmethod
+    def clear(cls, shop_id, kinds, days=None, cashier_id=None):
+        """Drop figures whose source rows were removed without signals (queryset deletes)"""
+        rows = cls.objects.filter(shop_id=shop_id, kind__in=kinds)
+        if days is not None:
+            rows = rows.filter(date__in=days)
+        if cashier_id is not None:
+            rows = rows.filter(cashier_id=cashier_id)
+        rows.delete()
+
+    @classmethod
+    def rebuild(cls, shop_id, day):
+        """Recompute a day's snapshot from its live sales, staff lunches and cashier counts"""
+        from .models import Sale, StaffLunch
+        from .models_reconciliation import CashierCount
+        from .models_drawer_balances import sale_drawer_state, sale_contribution
+        from .drawer_totals import local_day_range, active_exchange_rate
+
+        day_start, day_end = local_day_range(day)
+        exchange_rates = active_exchange_rate()
+        cells = {}
+
+        sales = Sale.objects.filter(shop_id=shop_id, created_at__range=[day_start, day_end]).prefetch_related('payments')
+        for sale in sales:
+            payments = sale.payments.all() if sale.payment_method == 'split' else ()
+            drawer_cells = sale_contribution(sale_drawer_state(sale), payments, exchange_rates)
+            _add_cells(cells, sale_snapshot_cells(sale_snapshot_state(sale), drawer_cells))
+        for lunch in StaffLunch.objects.filter(shop_id=shop_id, created_at__range=[day_start, day_end]):
+            _add_cells(cells, lunch_snapshot_cells(lunch))
+        for count in CashierCount.objects.filter(shop_id=shop_id, date=day):
+            _add_cells(cells, count_snapshot_cells(count))
+
+        with transaction.atomic():
+            cls.objects.filter(shop_id=shop_id, date=day).delete()
+            cls.objects.bulk_create([
+                cls(shop_id=shop_id, date=cell_day, cashier_id=cashier_id, kind=kind,
+                    currency=currency, method=method, amount=amount, count=count)
+                for (cell_day, cashier_id, kind, currency, method), (amount, count) in cells.items()
+            ])
+        return len(cells)
@@ -0,0 +1,242 @@
+"""
+Restock Suggestion Model
+Precomputed, sales-velocity aware restock suggestions per product.
+Refreshed in one batch pass at close of day or on demand.
+"""
+from django.db import models, transaction
+from django.db.models import Sum, Min, F
+from django.utils import timezone
+from decimal import Decimal, ROUND_CEILING
+
+
+class RestockSuggestion(models.Model):
+    """
+    One row per product holding its sales velocity, days of cover and the
+    quantity to order. Rows are replaced wholesale by refresh_for_shop().
+    """
+
+    PRIORITY_CHOICES = [
+        ('URGENT', 'Urgent'),
+        ('HIGH', 'High'),
+        ('MEDIUM', 'Medium'),
+        ('LOW', 'Low'),
+        ('NONE', 'No action needed'),
+    ]
+
+    # Base score per priority band; velocity and shortage refine the order inside a band
+    PRIORITY_BASE_SCORES = {
+        'URGENT': Decimal('4000'),
+        'HIGH': Decimal('3000'),
+        'MEDIUM': Decimal('2000'),
+        'LOW': Decimal('1000'),
+        'NONE': Decimal('0'),
+    }
+
+    DEFAULT_WINDOW_DAYS = 30
+    DEFAULT_LEAD_TIME_DAYS = 3
+    DEFAULT_TARGET_COVER_DAYS = 14
+    # Reads recompute suggestions older than this (close of day refreshes them daily)
+    REFRESH_AFTER = timezone.timedelta(hours=24)
+
+    shop = models.ForeignKey('ShopConfiguration', on_delete=models.CASCADE)
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='restock_suggestions')
+
+    # Snapshot of the product at computation time
+    product_name = models.CharField(max_length=255)
+    category = models.CharField(max_length=100, blank=True)
+    stock_quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    min_stock_level = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    cost_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    # Sales velocity
+    units_sold = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Net units sold in the window")
+    window_days = models.IntegerField(default=DEFAULT_WINDOW_DAYS, help_text="Days of sales history the velocity is based on")
+    daily_velocity = models.DecimalField(max_digits=12, decimal_places=4, default=0, help_text="Average net units sold per day")
+    days_of_cover = models.DecimalField(max_digits=10, decimal_places=1, null=True, blank=True, help_text="Days until stock runs out at current velocity (null = no sales)")
+
+    # Suggestion
+    suggested_quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    estimated_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='NONE')
+    priority_score = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    reason = models.CharField(max_length=255, blank=True)
+
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Restock Suggestion"
+        verbose_name_plural = "Restock Suggestions"
+        unique_together = ['shop', 'product']
+        ordering = ['-priority_score']
+        indexes = [
+            models.Index(fields=['shop', '-priority_score']),
+            models.Index(fields=['shop', 'priority']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_name} - {self.priority} ({self.suggested_quantity})"
+
+    @classmethod
+    def compute_suggestion(cls, stock, min_stock, velocity, lead_time_days, target_cover_days):
+        """
+        Work out (suggested_quantity, days_of_cover, priority, score, reason) for one product.
+        Falls back to the static min_stock_level rules when a product has no sales.
+        """
+        days_of_cover = None
+        if velocity > 0:
+            days_of_cover = (max(stock, Decimal('0')) / velocity).quantize(Decimal('0.1'))
+
+        # Order enough to cover the lead time plus the target cover, minus what is on hand
+        target_stock = velocity * (lead_time_days + target_cover_days)
+        if velocity > 0:
+            suggested = max(Decimal('0'), target_stock - stock)
+            if stock <= min_stock:
+                # Never leave a selling product below its minimum level
+                suggested = max(suggested, min_stock - stock)
+        elif stock < 0:
+            suggested = abs(stock) + min_stock
+        elif stock <= min_stock:
+            suggested = min_stock * 2 if stock == 0 else min_stock
+        else:
+            suggested = Decimal('0')
+        suggested = suggested.quantize(Decimal('1'), rounding=ROUND_CEILING)
+
+        if stock < 0:
+            priority = 'URGENT'
+            reason = f'Oversold by {abs(stock)} units'
+        elif stock == 0 and velocity > 0:
+            priority = 'URGENT'
+            reason = f'Out of stock - selling {velocity:.2f}/day'
+        elif days_of_cover is not None and days_of_cover <= lead_time_days:
+            priority = 'HIGH'
+            reason = f'{days_of_cover} days of cover, below {lead_time_days}-day lead time'
+        elif days_of_cover is not None and days_of_cover < target_cover_days:
+            priority = 'MEDIUM'
+            reason = f'{days_of_cover} days of cover, target is {target_cover_days}'
+        elif stock == 0:
+            priority = 'LOW'
+            reason = 'Out of stock - no recent sales'
+        elif stock <= min_stock and velocity > 0:
+            priority = 'LOW'
+            reason = f'Below minimum level of {min_stock} - {days_of_cover} days of cover'
+        elif stock <= min_stock:
+            priority = 'LOW'
+            reason = f'Below minimum level of {min_stock} - no recent sales'
+        else:
+            priority = 'NONE'
+            reason = 'Sufficient stock'
+
+        if priority == 'NONE':
+            suggested = Decimal('0')
+
+        # Faster movers and deeper shortages float to the top of their band
+        score = cls.PRIORITY_BASE_SCORES[priority]
+        if priority != 'NONE':
+            shortage = max(Decimal('0'), target_stock - stock) if velocity > 0 else max(Decimal('0'), min_stock - stock)
+            score += min(velocity * 10 + shortage, Decimal('999'))
+
+        return suggested, days_of_cover, priority, score, reason
+
+    @classmethod
+    def needs_refresh(cls, shop):
+        """Never computed for this shop, or computed more than REFRESH_AFTER ago"""
+        refreshed_at = shop.restock_refreshed_at
+        return refreshed_at is None or refreshed_at < timezone.now() - cls.REFRESH_AFTER
+
+    @classmethod
+    def refresh_for_shop(cls, shop, window_days=None, lead_time_days=None, target_cover_days=None):
+        """
+        Recompute every product's suggestion in one pass:
+        one grouped query over the product sales rollups, one query over Product,
+        one bulk write. Returns the number of suggestion rows written.
+        """
+        from .models import Product, ProductDailySalesRollup
+
+        window_days = window_days or cls.DEFAULT_WINDOW_DAYS
+        lead_time_days = Decimal(str(lead_time_days or cls.DEFAULT_LEAD_TIME_DAYS))
+        target_cover_days = Decimal(str(target_cover_days or cls.DEFAULT_TARGET_COVER_DAYS))
+
+        # Daily rollups outlive close of day, unlike the live sale items
+        now = timezone.now()
+        today = timezone.localdate(now)
+        since = today - timezone.timedelta(days=window_days - 1)
+        sold_days = ProductDailySalesRollup.objects.filter(shop=shop, date__gte=since)
+
+        # Velocity is measured over the history actually recorded (a new shop has less than the window)
+        first_day = sold_days.aggregate(first=Min('date'))['first']
+        if first_day:
+            observed_days = max(1, min(window_days, (today - first_day).days + 1))
+        else:
+            observed_days = window_days
+
+        units_by_product = {
+            row['product_id']: row['net_units'] or Decimal('0')
+            for row in sold_days.values('product_id').annotate(
+                net_units=Sum(F('quantity_sold') - F('refund_quantity'))
+            )
+        }
+
+        products = Product.objects.filter(shop=shop, is_active=True).values_list(
+            'id', 'name', 'category', 'stock_quantity', 'min_stock_level', 'cost_price'
+        )
+
+        suggestions = []
+        for product_id, name, category, stock, min_stock, cost_price in products.iterator():
+            stock = stock or Decimal('0')
+            min_stock = min_stock or Decimal('0')
+            cost_price = cost_price or Decimal('0')
+            units_sold = max(Decimal('0'), Decimal(str(units_by_product.get(product_id, 0))))
+            velocity = (units_sold / observed_days).quantize(Decimal('0.0001'))
+
+            suggested, days_of_cover, priority, score, reason = cls.compute_suggestion(
+                stock, min_stock, velocity, lead_time_days, target_cover_days
+            )
+
+            suggestions.append(cls(
+                shop=shop,
+                product_id=product_id,
+                product_name=name,
+                category=category or '',
+                stock_quantity=stock,
+                min_stock_level=min_stock,
+                cost_price=cost_price,
+                units_sold=units_sold,
+                window_days=observed_days,
+                daily_velocity=velocity,
+                days_of_cover=days_of_cover,
+                suggested_quantity=suggested,
+                estimated_cost=(suggested * cost_price).quantize(Decimal('0.01')),
+                priority=priority,
+                priority_score=score,
+                reason=reason,
+                computed_at=now,
+            ))
+
+        with transaction.atomic():
+            cls.objects.filter(shop=shop).delete()
+            cls.objects.bulk_create(suggestions, batch_size=500)
+            # Recorded on the shop, so a shop with nothing to suggest isn't recomputed on every read
+            type(shop).objects.filter(pk=shop.pk).update(restock_refreshed_at=now)
+        shop.restock_refreshed_at = now
+
+        return len(suggestions)
+
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'product_name': self.product_name,
+            'category': self.category,
+            'stock_quantity': float(self.stock_quantity),
+            'min_stock_level': float(self.min_stock_level),
+            'cost_price': float(self.cost_price),
+            'units_sold': float(self.units_sold),
+            'window_days': self.window_days,
+            'daily_velocity': float(self.daily_velocity),
+            'days_of_cover': float(self.days_of_cover) if self.days_of_cover is not None else None,
+            'suggested_quantity': float(self.suggested_quantity),
+            'estimated_cost': float(self.estimated_cost),
+            'priority': self.priority,
+            'priority_score': float(self.priority_score),
+            'reason': self.reason,
+            'computed_at': self.computed_at.isoformat(),
+        }
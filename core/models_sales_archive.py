@@ -0,0 +1,213 @@
+"""
+Sales Archive Models
+Close of day moves the day's sales, their items and payments, and the shop's staff
+lunches into these compact tables instead of deleting them. Each table is filled
+with a single INSERT ... SELECT and the live rows are then removed with one DELETE
+per table, so closing a busy day stays a handful of statements and the history
+survives. Archived rows keep their original ids, so receipt numbers don't change.
+"""
+from django.db import models, connection
+from django.utils import timezone
+
+
+class ArchivedSale(models.Model):
+    """A sale from a closed shop day, with the cashier's name captured at close"""
+
+    id = models.BigIntegerField(primary_key=True, help_text="Id of the original sale")
+    shop = models.ForeignKey('ShopConfiguration', on_delete=models.CASCADE, related_name='archived_sales')
+    shop_day_id = models.IntegerField(null=True, blank=True, help_text="Reference to the closed ShopDay")
+    cashier = models.ForeignKey('Cashier', on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_sales')
+    cashier_name = models.CharField(max_length=255, blank=True, help_text="Cashier name at close of day")
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=4, default='USD')
+    payment_currency = models.CharField(max_length=4, default='USD')
+    payment_method = models.CharField(max_length=20)
+    wallet_account = models.CharField(max_length=4, default='USD')
+    amount_received = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    customer_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, default='completed')
+    refund_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    created_at = models.DateTimeField(help_text="When the original sale was made")
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Archived Sale"
+        verbose_name_plural = "Archived Sales"
+        indexes = [
+            # Same newest-first keyset as the live ledger
+            models.Index(fields=['shop', '-created_at', '-id']),
+            models.Index(fields=['cashier', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Archived Sale #{self.id}"
+
+    @classmethod
+    def archive_shop_day(cls, shop_day):
+        """
+        Move the sales of a shop day, with their items and payments, into the archive.
+        Returns the number of sales archived.
+        """
+        from .models import Sale
+
+        archived_at = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(_archive_sales_sql(), [archived_at, shop_day.id])
+            archived = cursor.rowcount
+            if not archived:
+                return 0
+            cursor.execute(_archive_items_sql(), [shop_day.id])
+            cursor.execute(_archive_payments_sql(), [shop_day.id])
+
+        # Items, payments and rollup states have no delete signals, so the cascade is
+        # one batched DELETE per table; only the sale ids are loaded for it
+        Sale.objects.filter(shop_day=shop_day).only('id').delete()
+        return archived
+
+
+class ArchivedSaleItem(models.Model):
+    """A line of an archived sale; the product name and category are captured at close"""
+
+    id = models.BigIntegerField(primary_key=True, help_text="Id of the original sale item")
+    sale = models.ForeignKey(ArchivedSale, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey('Product', on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_sale_items')
+    product_name = models.CharField(max_length=255, blank=True)
+    category = models.CharField(max_length=100, blank=True)
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    refunded = models.BooleanField(default=False)
+    refund_quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    refund_reason = models.TextField(blank=True)
+    refund_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Archived Sale Item"
+        verbose_name_plural = "Archived Sale Items"
+
+    def __str__(self):
+        return f"{self.product_name} x{self.quantity}"
+
+
+class ArchivedSalePayment(models.Model):
+    """One payment of an archived split sale"""
+
+    id = models.BigIntegerField(primary_key=True, help_text="Id of the original sale payment")
+    sale = models.ForeignKey(ArchivedSale, on_delete=models.CASCADE, related_name='payments')
+    payment_method = models.CharField(max_length=20)
+    currency = models.CharField(max_length=4, default='USD')
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    amount_received = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    amount_usd_equivalent = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    change_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Archived Sale Payment"
+        verbose_name_plural = "Archived Sale Payments"
+
+    def __str__(self):
+        return f"{self.payment_method} {self.amount} {self.currency}"
+
+
+class ArchivedStaffLunch(models.Model):
+    """A staff lunch cleared at close of day"""
+
+    id = models.BigIntegerField(primary_key=True, help_text="Id of the original staff lunch")
+    shop = models.ForeignKey('ShopConfiguration', on_delete=models.CASCADE, related_name='archived_staff_lunches')
+    cashier = models.ForeignKey('Cashier', on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_staff_lunches')
+    product = models.ForeignKey('Product', on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_staff_lunches')
+    product_name = models.CharField(max_length=255, blank=True, help_text="Empty for a money lunch")
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    currency = models.CharField(max_length=4, default='USD')
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Archived Staff Lunch"
+        verbose_name_plural = "Archived Staff Lunches"
+        indexes = [
+            models.Index(fields=['shop', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Archived Staff Lunch: {self.product_name or 'Money Lunch'} x{self.quantity}"
+
+    @classmethod
+    def archive_shop(cls, shop):
+        """Move every staff lunch of the shop into the archive. Returns the number archived."""
+        from .models import StaffLunch
+
+        with connection.cursor() as cursor:
+            cursor.execute(_archive_staff_lunches_sql(), [timezone.now(), shop.id])
+            archived = cursor.rowcount
+        if archived:
+            StaffLunch.objects.filter(shop=shop).delete()
+        return archived
+
+
+def _table(model_name):
+    from django.apps import apps
+    return connection.ops.quote_name(apps.get_model('core', model_name)._meta.db_table)
+
+
+def _archive_sales_sql():
+    return f"""
+        INSERT INTO {_table('ArchivedSale')} (
+            id, shop_id, shop_day_id, cashier_id, cashier_name, total_amount, currency,
+            payment_currency, payment_method, wallet_account, amount_received, customer_name,
+            status, refund_amount, created_at, archived_at
+        )
+        SELECT s.id, s.shop_id, s.shop_day_id, s.cashier_id, COALESCE(c.name, ''), s.total_amount, s.currency,
+               s.payment_currency, s.payment_method, s.wallet_account, s.amount_received, s.customer_name,
+               s.status, s.refund_amount, s.created_at, %s
+        FROM {_table('Sale')} s
+        LEFT JOIN {_table('Cashier')} c ON c.id = s.cashier_id
+        WHERE s.shop_day_id = %s
+    """
+
+
+def _archive_items_sql():
+    return f"""
+        INSERT INTO {_table('ArchivedSaleItem')} (
+            id, sale_id, product_id, product_name, category, quantity, unit_price, total_price,
+            refunded, refund_quantity, refund_reason, refund_amount
+        )
+        SELECT i.id, i.sale_id, i.product_id, COALESCE(p.name, ''), COALESCE(p.category, ''), i.quantity,
+               i.unit_price, i.total_price, i.refunded, i.refund_quantity, i.refund_reason, i.refund_amount
+        FROM {_table('SaleItem')} i
+        INNER JOIN {_table('Sale')} s ON s.id = i.sale_id
+        LEFT JOIN {_table('Product')} p ON p.id = i.product_id
+        WHERE s.shop_day_id = %s
+    """
+
+
+def _archive_payments_sql():
+    return f"""
+        INSERT INTO {_table('ArchivedSalePayment')} (
+            id, sale_id, payment_method, currency, amount, amount_received, amount_usd_equivalent,
+            change_amount, created_at
+        )
+        SELECT sp.id, sp.sale_id, sp.payment_method, sp.currency, sp.amount, sp.amount_received,
+               sp.amount_usd_equivalent, sp.change_amount, sp.created_at
+        FROM {_table('SalePayment')} sp
+        INNER JOIN {_table('Sale')} s ON s.id = sp.sale_id
+        WHERE s.shop_day_id = %s
+    """
+
+
+def _archive_staff_lunches_sql():
+    return f"""
+        INSERT INTO {_table('ArchivedStaffLunch')} (
+            id, shop_id, cashier_id, product_id, product_name, quantity, unit_price, total_cost,
+            currency, notes, created_at, archived_at
+        )
+        SELECT l.id, l.shop_id, l.cashier_id, l.product_id, COALESCE(p.name, ''), l.quantity, l.unit_price,
+               l.total_cost, l.currency, l.notes, l.created_at, %s
+        FROM {_table('StaffLunch')} l
+        LEFT JOIN {_table('Product')} p ON p.id = l.product_id
+        WHERE l.shop_id = %s
+    """
@@ -0,0 +1,256 @@
+"""
+Sales Rollup Models
+Pre-aggregated sales totals so dashboards and analytics read a handful of rows
+instead of scanning every sale. Rollup rows are not tied to Sale rows, so they
+keep the history after close of day moves the day's sales to the archive.
+"""
+from django.db import models
+from django.db.models import Sum, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from datetime import timedelta
+from decimal import Decimal
+
+
+class DailySalesRollup(models.Model):
+    """
+    Sales totals per shop, local day, currency and payment method.
+    Maintained incrementally by core.sales_rollups whenever a sale commits or is
+    refunded; the rebuild_sales_rollups command recomputes it from raw sales.
+    """
+
+    METRIC_FIELDS = ['revenue', 'order_count', 'items_sold', 'cost_of_goods', 'refund_count', 'refund_amount']
+
+    shop = models.ForeignKey('ShopConfiguration', on_delete=models.CASCADE, related_name='daily_sales_rollups')
+    date = models.DateField(help_text="Local (shop timezone) business date")
+    currency = models.CharField(max_length=4)
+    payment_method = models.CharField(max_length=20)
+
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Total of completed sales")
+    order_count = models.IntegerField(default=0, help_text="Number of completed sales")
+    items_sold = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cost_of_goods = models.DecimalField(max_digits=16, decimal_places=4, default=0, help_text="Cost price at time of sale x quantity")
+    refund_count = models.IntegerField(default=0, help_text="Sales with any refund")
+    refund_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Daily Sales Rollup"
+        verbose_name_plural = "Daily Sales Rollups"
+        unique_together = ['shop', 'date', 'currency', 'payment_method']
+        indexes = [
+            models.Index(fields=['shop', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.currency}/{self.payment_method}: {self.revenue} ({self.order_count} orders)"
+
+    @classmethod
+    def period_totals(cls, shop, start_date, end_date):
+        """Sum every metric over an inclusive date range"""
+        totals = cls.objects.filter(shop=shop, date__gte=start_date, date__lte=end_date).aggregate(
+            **{field: Sum(field) for field in cls.METRIC_FIELDS}
+        )
+        return {field: value or 0 for field, value in totals.items()}
+
+    @classmethod
+    def totals_by_date(cls, shop, start_date, end_date):
+        """{date: {metric: value}} for an inclusive date range, one grouped query"""
+        rows = cls.objects.filter(shop=shop, date__gte=start_date, date__lte=end_date).values('date').annotate(
+            **{f'{field}_total': Sum(field) for field in cls.METRIC_FIELDS}
+        )
+        return {
+            row['date']: {field: row[f'{field}_total'] or 0 for field in cls.METRIC_FIELDS}
+            for row in rows
+        }
+
+    @classmethod
+    def totals_by_shop_and_date(cls, shop_ids, start_date, end_date):
+        """{shop_id: {date: {metric: value}}} for many shops, one grouped query"""
+        rows = cls.objects.filter(shop_id__in=shop_ids, date__gte=start_date, date__lte=end_date).values(
+            'shop_id', 'date'
+        ).annotate(
+            **{f'{field}_total': Sum(field) for field in cls.METRIC_FIELDS}
+        )
+        totals = {}
+        for row in rows:
+            totals.setdefault(row['shop_id'], {})[row['date']] = {
+                field: row[f'{field}_total'] or 0 for field in cls.METRIC_FIELDS
+            }
+        return totals
+
+    @classmethod
+    def sum_days(cls, daily_totals, start_date, end_date):
+        """Sum a totals_by_date() result over an inclusive date range"""
+        totals = {field: 0 for field in cls.METRIC_FIELDS}
+        for day, day_totals in daily_totals.items():
+            if start_date <= day <= end_date:
+                for field in cls.METRIC_FIELDS:
+                    totals[field] += day_totals[field]
+        return totals
+
+
+class HourlySalesRollup(models.Model):
+    """
+    Completed-sale totals per shop and local hour (bucketed in the shop's timezone).
+    Feeds the analytics daily breakdown and hourly sales pattern.
+    """
+
+    METRIC_FIELDS = ['revenue', 'transaction_count', 'items_sold']
+
+    shop = models.ForeignKey('ShopConfiguration', on_delete=models.CASCADE, related_name='hourly_sales_rollups')
+    date = models.DateField(help_text="Local (shop timezone) business date")
+    hour = models.PositiveSmallIntegerField(help_text="Local hour of day, 0-23")
+
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.IntegerField(default=0)
+    items_sold = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Hourly Sales Rollup"
+        verbose_name_plural = "Hourly Sales Rollups"
+        unique_together = ['shop', 'date', 'hour']
+        indexes = [
+            models.Index(fields=['shop', 'date', 'hour']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.hour:02d}:00: {self.revenue} ({self.transaction_count} sales)"
+
+    @classmethod
+    def daily_series(cls, shop, start_date, end_date):
+        """[{date, revenue, transactions}] for every day in an inclusive range, zero-filled"""
+        rows = cls.objects.filter(shop=shop, date__gte=start_date, date__lte=end_date).values('date').annotate(
+            revenue_total=Sum('revenue'),
+            transaction_total=Sum('transaction_count')
+        )
+        by_date = {row['date']: row for row in rows}
+
+        series = []
+        current_date = start_date
+        while current_date <= end_date:
+            row = by_date.get(current_date, {})
+            series.append({
+                'date': current_date.isoformat(),
+                'revenue': float(row.get('revenue_total') or 0),
+                'transactions': row.get('transaction_total') or 0,
+            })
+            current_date += timedelta(days=1)
+        return series
+
+    @classmethod
+    def hourly_pattern(cls, shop, start_date, end_date):
+        """[{hour, revenue, transactions}] for all 24 hours, summed over an inclusive date range"""
+        rows = cls.objects.filter(shop=shop, date__gte=start_date, date__lte=end_date).values('hour').annotate(
+            revenue_total=Sum('revenue'),
+            transaction_total=Sum('transaction_count')
+        )
+        by_hour = {row['hour']: row for row in rows}
+
+        return [{
+            'hour': hour,
+            'revenue': float(by_hour.get(hour, {}).get('revenue_total') or 0),
+            'transactions': by_hour.get(hour, {}).get('transaction_total') or 0,
+        } for hour in range(24)]
+
+
+class ProductDailySalesRollup(models.Model):
+    """
+    Per-product sales totals per shop and local day.
+    Serves top products, slow movers and category mix without touching sale items.
+    """
+
+    METRIC_FIELDS = ['quantity_sold', 'revenue', 'cost_of_goods', 'transaction_count', 'refund_quantity', 'refund_amount']
+
+    shop = models.ForeignKey('ShopConfiguration', on_delete=models.CASCADE, related_name='product_sales_rollups')
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='daily_sales_rollups')
+    date = models.DateField(help_text="Local (shop timezone) business date")
+
+    quantity_sold = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Quantity on completed sales")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Quantity x unit price on completed sales")
+    cost_of_goods = models.DecimalField(max_digits=16, decimal_places=4, default=0, help_text="Cost price at time of sale x quantity")
+    transaction_count = models.IntegerField(default=0, help_text="Completed sales containing the product")
+    refund_quantity = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refund_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Product Daily Sales Rollup"
+        verbose_name_plural = "Product Daily Sales Rollups"
+        unique_together = ['shop', 'product', 'date']
+        indexes = [
+            models.Index(fields=['shop', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} product {self.product_id}: {self.quantity_sold} sold ({self.revenue})"
+
+    @classmethod
+    def top_products(cls, shop, start_date, end_date, limit=10):
+        """Best sellers by revenue over an inclusive date range"""
+        return cls.objects.filter(shop=shop, date__gte=start_date, date__lte=end_date).values(
+            'product_id',
+            'product__name',
+            'product__category',
+            'product__line_code'
+        ).annotate(
+            total_quantity=Sum('quantity_sold'),
+            total_revenue=Sum('revenue'),
+            total_cost=Sum('cost_of_goods'),
+            transaction_count=Sum('transaction_count')
+        ).filter(total_quantity__gt=0).order_by('-total_revenue')[:limit]
+
+    @classmethod
+    def product_totals(cls, shop, start_date, end_date):
+        """{product_id: {metric: value}} over an inclusive date range, one grouped query"""
+        rows = cls.objects.filter(shop=shop, date__gte=start_date, date__lte=end_date).values('product_id').annotate(
+            **{f'{field}_total': Sum(field) for field in cls.METRIC_FIELDS}
+        )
+        return {
+            row['product_id']: {field: row[f'{field}_total'] or 0 for field in cls.METRIC_FIELDS}
+            for row in rows
+        }
+
+    @classmethod
+    def product_total(cls, shop, start_date, end_date, field):
+        """Correlated subquery for a product's total of one metric over an inclusive date range, 0 when unsold"""
+        total = cls.objects.filter(
+            shop=shop, product=OuterRef('pk'), date__gte=start_date, date__lte=end_date
+        ).values('product').annotate(total=Sum(field)).values('total')
+        return Coalesce(Subquery(total, output_field=cls._meta.get_field(field)), Value(Decimal('0')),
+                        output_field=cls._meta.get_field(field))
+
+    @classmethod
+    def category_mix(cls, shop, start_date, end_date):
+        """Revenue, quantity and cost per product category over an inclusive date range"""
+        return cls.objects.filter(shop=shop, date__gte=start_date, date__lte=end_date).values(
+            'product__category'
+        ).annotate(
+            total_quantity=Sum('quantity_sold'),
+            total_revenue=Sum('revenue'),
+            total_cost=Sum('cost_of_goods')
+        ).filter(total_quantity__gt=0).order_by('-total_revenue')
+
+
+class SaleRollupState(models.Model):
+    """
+    The contribution a sale last made to the rollups.
+    Re-applying a sale only adds the difference, which keeps status changes and
+    refunds incremental and makes repeated refreshes harmless. Deleted with the
+    sale; the rollup rows themselves are left untouched.
+    """
+
+    sale = models.OneToOneField('Sale', on_delete=models.CASCADE, related_name='rollup_state')
+    contribution = models.JSONField(default=dict, help_text="{table: {key: {metric: decimal string}}}")
+    unit_costs = models.JSONField(default=dict, help_text="Cost price per sale item id, captured when first rolled up")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Sale Rollup State"
+        verbose_name_plural = "Sale Rollup States"
+
+    def __str__(self):
+        return f"Rollup state for sale #{self.sale_id}"
+
+    def get_unit_costs(self):
+        return {int(item_id): Decimal(cost) for item_id, cost in (self.unit_costs or {}).items()}
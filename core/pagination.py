@@ -0,0 +1,54 @@
+"""
+Keyset (cursor) pagination helpers for the sales ledgers.
+A cursor encodes the (created_at, id) of the last row served, so every page is an
+indexed range read however far back the client has scrolled.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(created_at, pk):
+    raw = f'{created_at.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor string; raises ValueError when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def newest_first(queryset, field='created_at'):
+    return queryset.order_by(f'-{field}', '-id')
+
+
+def after_cursor(queryset, cursor, field='created_at'):
+    """Rows that come after the cursor in newest-first order"""
+    if not cursor:
+        return queryset
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(Q(**{f'{field}__lt': created_at}) | Q(**{field: created_at, 'id__lt': pk}))
+
+
+def keyset_page(queryset, cursor, page_size, field='created_at'):
+    """
+    One newest-first page after the cursor.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    rows = list(after_cursor(newest_first(queryset, field), cursor, field)[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[field], last['id'])
+        else:
+            next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
@@ -453,11 +453,16 @@ class ReconciliationSessionView(APIView):
             session.complete_session(cashier)
             message = "Reconciliation session completed"
         
-        return Response({
+        response_data = {
             "success": True,
             "message": message,
             "session_data": session.get_session_summary()
-        }, status=status.HTTP_200_OK)
+        }
+        eod_job = getattr(session, 'eod_job', None)
+        if eod_job:
+            # Shop close is running in the background - poll end-day/status/ for progress
+            response_data["eod_job"] = eod_job.to_dict()
+        return Response(response_data, status=status.HTTP_200_OK)
     
     def delete(self, request):
         """
@@ -549,175 +554,27 @@ class EODReconciliationEnhancedView(APIView):
         session, _ = ReconciliationSession.get_or_create_session(shop, date)
         
         # Get cashier counts
-        cashier_counts = CashierCount.objects.filter(shop=shop, date=date)
+        cashier_counts = list(CashierCount.objects.filter(shop=shop, date=date).select_related('cashier'))
         
         # CRITICAL FIX: Calculate expected amounts from ACTUAL SALES data
-        # This matches the logic in get_all_drawers_session for consistency
-        from .models import Sale, SalePayment, CashFloat, StaffLunch
-        import datetime
-        
-        # Create proper timezone-aware datetime range for the local day
-        day_start = timezone.make_aware(
-            datetime.datetime.combine(date, datetime.time.min),
-            timezone.get_current_timezone()
-        )
-        day_end = timezone.make_aware(
-            datetime.datetime.combine(date, datetime.time.max),
-            timezone.get_current_timezone()
-        )
+        # The reconciliation snapshot's drawer figures are built with the same
+        # sale_contribution as the drawers, so the numbers agree with drawer management
+        from .models import CashFloat
+        from .models_reconciliation_snapshot import ReconciliationSnapshot
         
         # Get all active cashiers
-        cashiers = Cashier.objects.filter(shop=shop, status='active')
+        cashiers = list(Cashier.objects.filter(shop=shop, status='active'))
+        cashier_ids = [cashier.id for cashier in cashiers]
+        snapshot = ReconciliationSnapshot.totals(shop, [date])
         
-        # Initialize aggregates for expected amounts (from sales)
+        # Aggregate expected amounts (from sales) over every active cashier
         exp_usd = {'cash': Decimal('0'), 'card': Decimal('0'), 'ecocash': Decimal('0'), 'transfer': Decimal('0')}
         exp_zig = {'cash': Decimal('0'), 'card': Decimal('0'), 'ecocash': Decimal('0'), 'transfer': Decimal('0')}
         exp_rand = {'cash': Decimal('0'), 'card': Decimal('0'), 'ecocash': Decimal('0'), 'transfer': Decimal('0')}
         
-        # Get exchange rates for change calculations
-        try:
-            from .models_exchange_rates import ExchangeRate
-            rates = ExchangeRate.objects.filter(shop=shop, is_active=True).order_by('-created_at')[:5]
-            exchange_rates = None
-            if rates:
-                exchange_rates = rates[0]
-        except Exception:
-            exchange_rates = None
-        
-        # Calculate sales for each cashier
-        for cashier in cashiers:
-            today_sales = Sale.objects.filter(
-                shop=shop,
-                cashier=cashier,
-                created_at__range=[day_start, day_end],
-                status='completed'
-            )
-            
-            for sale in today_sales:
-                # Handle split payments
-                if sale.payment_method == 'split':
-                    sale_payments = SalePayment.objects.filter(sale=sale)
-                    for payment in sale_payments:
-                        currency = payment.currency.upper()
-                        method = payment.payment_method
-                        amount = Decimal(str(payment.amount))
-                        
-                        # Add to appropriate currency/method
-                        if currency == 'USD':
-                            if method == 'cash':
-                                exp_usd['cash'] += amount
-                            elif method == 'card':
-                                exp_usd['card'] += amount
-                            elif method == 'ecocash':
-                                exp_usd['ecocash'] += amount
-                            elif method == 'transfer':
-                                exp_usd['transfer'] += amount
-                        elif currency == 'ZIG':
-                            if method == 'cash':
-                                exp_zig['cash'] += amount
-                            elif method == 'card':
-                                exp_zig['card'] += amount
-                            elif method == 'ecocash':
-                                exp_zig['ecocash'] += amount
-                            elif method == 'transfer':
-                                exp_zig['transfer'] += amount
-                        elif currency == 'RAND':
-                            if method == 'cash':
-                                exp_rand['cash'] += amount
-                            elif method == 'card':
-                                exp_rand['card'] += amount
-                            elif method == 'ecocash':
-                                exp_rand['ecocash'] += amount
-                            elif method == 'transfer':
-                                exp_rand['transfer'] += amount
-                    
-                    # Calculate change for split payments
-                    total_paid_usd = Decimal('0')
-                    for payment in sale_payments:
-                        if payment.currency == 'USD':
-                            total_paid_usd += Decimal(str(payment.amount))
-                        elif exchange_rates:
-                            try:
-                                amount_usd = exchange_rates.convert_amount(payment.amount, payment.currency, 'USD')
-                                total_paid_usd += Decimal(str(amount_usd))
-                            except:
-                                pass
-                    
-                    sale_total = Decimal(str(sale.total_amount))
-                    if total_paid_usd > sale_total:
-                        change_usd = total_paid_usd - sale_total
-                        change_int_usd = int(change_usd)
-                        change_frac_usd = change_usd - Decimal(change_int_usd)
-                        
-                        # Deduct integer USD change
-                        if change_int_usd > 0:
-                            exp_usd['cash'] -= Decimal(change_int_usd)
-                        
-                        # Deduct fractional USD change as ZIG
-                        if change_frac_usd > 0 and exchange_rates:
-                            try:
-                                change_zig = exchange_rates.convert_amount(change_frac_usd, 'USD', 'ZIG')
-                                exp_zig['cash'] -= Decimal(str(change_zig))
-                            except:
-                                exp_usd['cash'] -= change_frac_usd
-                else:
-                    # Handle regular single payments
-                    sale_amount = Decimal(str(sale.total_amount))
-                    currency = (sale.payment_currency or 'USD').upper()
-                    method = sale.payment_method
-                    
-                    # Add to appropriate currency/method
-                    if currency == 'USD':
-                        if method == 'cash':
-                            exp_usd['cash'] += sale_amount
-                        elif method == 'card':
-                            exp_usd['card'] += sale_amount
-                        elif method == 'ecocash':
-                            exp_usd['ecocash'] += sale_amount
-                        elif method == 'transfer':
-                            exp_usd['transfer'] += sale_amount
-                    elif currency == 'ZIG':
-                        if method == 'cash':
-                            exp_zig['cash'] += sale_amount
-                        elif method == 'card':
-                            exp_zig['card'] += sale_amount
-                        elif method == 'ecocash':
-                            exp_zig['ecocash'] += sale_amount
-                        elif method == 'transfer':
-                            exp_zig['transfer'] += sale_amount
-                    elif currency == 'RAND':
-                        if method == 'cash':
-                            exp_rand['cash'] += sale_amount
-                        elif method == 'card':
-                            exp_rand['card'] += sale_amount
-                        elif method == 'ecocash':
-                            exp_rand['ecocash'] += sale_amount
-                        elif method == 'transfer':
-                            exp_rand['transfer'] += sale_amount
-                    
-                    # Handle change for cash payments
-                    if method == 'cash' and sale.amount_received:
-                        amount_received = Decimal(str(sale.amount_received))
-                        if amount_received > sale_amount:
-                            change_amount = amount_received - sale_amount
-                            
-                            if currency == 'USD':
-                                change_int_usd = int(change_amount)
-                                change_frac_usd = change_amount - Decimal(change_int_usd)
-                                
-                                if change_int_usd > 0:
-                                    exp_usd['cash'] -= Decimal(change_int_usd)
-                                
-                                if change_frac_usd > 0 and exchange_rates:
-                                    try:
-                                        change_zig = exchange_rates.convert_amount(change_frac_usd, 'USD', 'ZIG')
-                                        exp_zig['cash'] -= Decimal(str(change_zig))
-                                    except:
-                                        exp_usd['cash'] -= change_frac_usd
-                            elif currency == 'ZIG':
-                                exp_zig['cash'] -= change_amount
-                            elif currency == 'RAND':
-                                exp_rand['cash'] -= change_amount
+        for currency, expected in (('USD', exp_usd), ('ZIG', exp_zig), ('RAND', exp_rand)):
+            for method in expected:
+                expected[method] = snapshot.amount('drawer', cashier_ids=cashier_ids, currency=currency, method=method)
         # NOTE: Staff lunch is ALREADY subtracted in update_from_cash_float()
         # when the cashier POSTs their count. We do NOT subtract it again here
         # because we're using the stored expected_cash_usd from CashierCount.
@@ -729,9 +586,13 @@ class EODReconciliationEnhancedView(APIView):
         total_float_zig = Decimal('0')
         total_float_rand = Decimal('0')
 
+        drawers = {
+            drawer.cashier_id: drawer
+            for drawer in CashFloat.objects.filter(shop=shop, date=timezone.localdate(), cashier__in=cashiers)
+        }
         for cashier in cashiers:
             try:
-                drawer = CashFloat.get_active_drawer(shop, cashier)
+                drawer = drawers.get(cashier.id) or CashFloat.get_active_drawer(shop, cashier)
                 total_float_usd += drawer.float_amount
                 total_float_zig += drawer.float_amount_zig
                 total_float_rand += drawer.float_amount_rand
@@ -864,13 +725,19 @@ class EODReconciliationEnhancedView(APIView):
                 'variance_rand': cash_variance_rand,
                 'is_balanced': abs(cash_variance_usd + cash_variance_zig) < 0.01  # Should balance out
             },
+            'staff_lunch': {
+                'usd': float(snapshot.amount('lunch', currency='USD')),
+                'zig': float(snapshot.amount('lunch', currency='ZIG')),
+                'rand': float(snapshot.amount('lunch', currency='RAND')),
+                'count': snapshot.count('lunch')
+            },
             'cashier_details': [count.get_count_summary() for count in cashier_counts],
             'uncounted_cashiers': [count.cashier.name for count in cashier_counts if count.status != 'COMPLETED'],
             'cashier_progress': {
-                'total_cashiers': cashier_counts.count(),
-                'completed_counts': cashier_counts.filter(status='COMPLETED').count(),
-                'pending_counts': cashier_counts.filter(status='IN_PROGRESS').count(),
-                'all_completed': cashier_counts.filter(status='COMPLETED').count() == cashier_counts.count() if cashier_counts.exists() else True
+                'total_cashiers': len(cashier_counts),
+                'completed_counts': len(actual_counts),
+                'pending_counts': len([count for count in cashier_counts if count.status == 'IN_PROGRESS']),
+                'all_completed': len(actual_counts) == len(cashier_counts)
             }
         }
         
@@ -0,0 +1,136 @@
+"""
+Restock API Views
+Serves precomputed, velocity-aware restock suggestions for the low-stock and restock screens
+"""
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+from django.db.models import Sum, Count
+import logging
+
+from .models import ShopConfiguration
+from .models_restock import RestockSuggestion
+
+logger = logging.getLogger(__name__)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RestockSuggestionsView(APIView):
+    """
+    GET  /api/v1/shop/restock/suggestions/ - Sorted, paginated restock suggestions
+    POST /api/v1/shop/restock/suggestions/ - Recompute suggestions now
+
+    Query Parameters (GET):
+    - page, page_size: Pagination (max 200 per page)
+    - priority: Comma separated priorities (URGENT,HIGH,MEDIUM,LOW,NONE)
+    - category: Filter by category
+    - include_ok: 'true' to include products that need no action
+    - sort: priority (default), days_of_cover, velocity, estimated_cost, name
+    - refresh: 'true' to recompute before reading (done anyway when the last
+      refresh is more than a day old)
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    SORT_FIELDS = {
+        'priority': ['-priority_score', 'product_name'],
+        'days_of_cover': ['days_of_cover', '-priority_score'],
+        'velocity': ['-daily_velocity', 'product_name'],
+        'estimated_cost': ['-estimated_cost', 'product_name'],
+        'name': ['product_name'],
+    }
+
+    def get(self, request):
+        try:
+            shop = ShopConfiguration.objects.get()
+        except ShopConfiguration.DoesNotExist:
+            return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = min(max(1, int(request.query_params.get('page_size', 50))), 200)
+        except ValueError:
+            return Response({"error": "page and page_size must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        sort = request.query_params.get('sort', 'priority')
+        if sort not in self.SORT_FIELDS:
+            return Response(
+                {"error": f"Invalid sort. Use one of: {', '.join(self.SORT_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        suggestions = RestockSuggestion.objects.filter(shop=shop)
+        if request.query_params.get('refresh') == 'true' or RestockSuggestion.needs_refresh(shop):
+            RestockSuggestion.refresh_for_shop(shop)
+
+        priority_filter = request.query_params.get('priority')
+        if priority_filter:
+            suggestions = suggestions.filter(priority__in=[p.strip().upper() for p in priority_filter.split(',') if p.strip()])
+        elif request.query_params.get('include_ok') != 'true':
+            suggestions = suggestions.exclude(priority='NONE')
+
+        category = request.query_params.get('category')
+        if category:
+            suggestions = suggestions.filter(category=category)
+
+        total = suggestions.count()
+        offset = (page - 1) * page_size
+        rows = suggestions.order_by(*self.SORT_FIELDS[sort])[offset:offset + page_size]
+
+        # Priority breakdown for the header badges (one grouped query)
+        priority_counts = {
+            row['priority']: {'count': row['count'], 'estimated_cost': float(row['cost'] or 0)}
+            for row in RestockSuggestion.objects.filter(shop=shop).values('priority').annotate(
+                count=Count('id'), cost=Sum('estimated_cost')
+            )
+        }
+
+        latest = RestockSuggestion.objects.filter(shop=shop).order_by('-computed_at').values_list('computed_at', flat=True).first()
+
+        return Response({
+            'suggestions': [row.to_dict() for row in rows],
+            'summary': priority_counts,
+            'computed_at': latest.isoformat() if latest else None,
+            'pagination': {
+                'page': page,
+                'page_size': page_size,
+                'total': total,
+                'pages': (total + page_size - 1) // page_size,
+                'has_more': offset + page_size < total,
+            },
+        })
+
+    def post(self, request):
+        try:
+            shop = ShopConfiguration.objects.get()
+        except ShopConfiguration.DoesNotExist:
+            return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            window_days = int(request.data.get('window_days', RestockSuggestion.DEFAULT_WINDOW_DAYS))
+            lead_time_days = int(request.data.get('lead_time_days', RestockSuggestion.DEFAULT_LEAD_TIME_DAYS))
+            target_cover_days = int(request.data.get('target_cover_days', RestockSuggestion.DEFAULT_TARGET_COVER_DAYS))
+        except (TypeError, ValueError):
+            return Response({"error": "window_days, lead_time_days and target_cover_days must be integers"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            count = RestockSuggestion.refresh_for_shop(
+                shop,
+                window_days=window_days,
+                lead_time_days=lead_time_days,
+                target_cover_days=target_cover_days,
+            )
+        except Exception as e:
+            logger.error(f"Error refreshing restock suggestions: {e}")
+            return Response({"error": f"Failed to refresh restock suggestions: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            'success': True,
+            'message': f'Restock suggestions refreshed for {count} products',
+            'products_processed': count,
+        })
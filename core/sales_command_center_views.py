@@ -5,7 +5,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.utils import timezone
 from django.db import models
-from django.db.models import Sum, F, Q, Count, Avg
+from django.db.models import Sum, F, Q, Count, Avg, Prefetch, Value
+from django.db.models.functions import Concat, Upper
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
 from datetime import timedelta
 from decimal import Decimal
 import json
@@ -13,9 +15,17 @@ import json
 from .models import (
     ShopConfiguration, Cashier, Product, Sale, SaleItem, Customer, 
     StockTransfer, Waste, WasteBatch, InventoryLog, StockMovement, Shift, ShopDay,
-    CashFloat
+    CashFloat, DailySalesRollup, HourlySalesRollup, ProductDailySalesRollup, ReconciliationSnapshot
 )
 from .serializers import SaleSerializer, ProductSerializer
+from .sales_rollups import shop_timezone
+from .dashboard_cache import cache_analytics_response
+from .pagination import encode_cursor, keyset_page, newest_first
+
+# Price-variation detection: flag a line priced this far (as a fraction) from the
+# product's mean price over the surrounding window
+PRICE_VARIATION_THRESHOLD = 0.3
+PRICE_BASELINE_HOURS = 24
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -23,6 +33,9 @@ class InfiniteSalesFeedView(APIView):
     """
     Enhanced infinite scroll sales feed with advanced filtering
     GET /api/v1/shop/sales/ - Main endpoint for sales ledger
+    
+    Fixed query count per page (sales + cashiers, items + products). Pass
+    `cursor` ('' for the first page, then pagination.next_cursor) to scroll by keyset.
     """
     
     def get(self, request):
@@ -31,9 +44,14 @@ class InfiniteSalesFeedView(APIView):
         except ShopConfiguration.DoesNotExist:
             return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Pagination parameters
-        page = int(request.query_params.get('page', 1))
-        page_size = min(int(request.query_params.get('page_size', 20)), 100)  # Max 100 per page
+        # Pagination parameters - pass `cursor` (empty for the first page) for keyset
+        # paging; `page` is still honoured for older clients
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = min(max(1, int(request.query_params.get('page_size', 20))), 100)  # Max 100 per page
+        except ValueError:
+            return Response({"error": "page and page_size must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        cursor = request.query_params.get('cursor')
         offset = (page - 1) * page_size
         
         # Filtering parameters
@@ -72,16 +90,25 @@ class InfiniteSalesFeedView(APIView):
             sales_query = sales_query.filter(payment_method=payment_method)
         
         if search_query:
-            # Search by sale ID, customer name, or cashier name
-            sales_query = sales_query.filter(
-                Q(id__icontains=search_query) |
-                Q(customer_name__icontains=search_query) |
-                Q(cashier__name__icontains=search_query)
-            )
+            sales_query = sales_query.filter(self._search_filter(shop, search_query))
         
-        # Calculate totals for margin analysis
-        total_sales = sales_query.count()
-        sales_data = sales_query.order_by('-created_at')[offset:offset + page_size]
+        sales_query = sales_query.select_related('cashier').prefetch_related(
+            Prefetch('items', queryset=SaleItem.objects.select_related('product'))
+        )
+        
+        if cursor is not None:
+            # Keyset paging: no count and no offset scan, however deep the scroll
+            try:
+                sales_data, next_cursor = keyset_page(sales_query, cursor, page_size)
+            except ValueError:
+                return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+            total_sales = None
+            has_more = next_cursor is not None
+        else:
+            total_sales = sales_query.count()
+            sales_data = list(newest_first(sales_query)[offset:offset + page_size])
+            has_more = offset + page_size < total_sales
+            next_cursor = encode_cursor(sales_data[-1].created_at, sales_data[-1].id) if has_more and sales_data else None
         
         # Enhanced sales data with margin calculations
         enhanced_sales = []
@@ -89,11 +116,12 @@ class InfiniteSalesFeedView(APIView):
         total_selling_price = 0
         
         for sale in sales_data:
+            items = list(sale.items.all())  # prefetched with products
             sale_cost_price = 0
             sale_selling_price = float(sale.total_amount)
             
             # Calculate cost price for this sale
-            for item in sale.items.all():
+            for item in items:
                 item_cost = float(item.quantity) * float(item.product.cost_price)
                 sale_cost_price += item_cost
             
@@ -110,7 +138,7 @@ class InfiniteSalesFeedView(APIView):
                 'receipt_number': f'R{sale.id:03d}',
                 'created_at': sale.created_at.isoformat(),
                 'cashier_name': sale.cashier.name if sale.cashier else 'Unknown',
-                'cashier_id': sale.cashier.id if sale.cashier else None,
+                'cashier_id': sale.cashier_id,
                 'customer_name': sale.customer_name or '',
                 'customer_phone': sale.customer_phone or '',
                 'total_amount': float(sale.total_amount),
@@ -120,10 +148,10 @@ class InfiniteSalesFeedView(APIView):
                 'payment_method': sale.payment_method,
                 'currency': sale.currency,
                 'status': sale.status,
-                'item_count': sale.items.count(),
+                'item_count': len(items),
                 'items': [{
                     'product_name': item.product.name,
-                    'product_id': item.product.id,
+                    'product_id': item.product_id,
                     'quantity': float(item.quantity),
                     'unit_price': float(item.unit_price),
                     'total_price': float(item.total_price),
@@ -131,7 +159,7 @@ class InfiniteSalesFeedView(APIView):
                     'line_code': item.product.line_code,
                     'barcode': item.product.barcode,
                     'category': item.product.category
-                } for item in sale.items.all()]
+                } for item in items]
             })
         
         # Calculate overall margin
@@ -141,18 +169,21 @@ class InfiniteSalesFeedView(APIView):
             overall_margin = total_selling_price - total_cost_price
             overall_margin_percentage = (overall_margin / total_cost_price) * 100
         
-        # Check if there are more pages
-        has_more = offset + page_size < total_sales
-        
-        return Response({
-            'sales': enhanced_sales,
-            'pagination': {
+        pagination = {
+            'page_size': page_size,
+            'has_more': has_more,
+            'next_cursor': next_cursor
+        }
+        if total_sales is not None:
+            pagination.update({
                 'page': page,
-                'page_size': page_size,
                 'total': total_sales,
-                'has_more': has_more,
                 'pages': (total_sales + page_size - 1) // page_size
-            },
+            })
+        
+        return Response({
+            'sales': enhanced_sales,
+            'pagination': pagination,
             'financial_summary': {
                 'total_cost_price': round(total_cost_price, 2),
                 'total_selling_price': round(total_selling_price, 2),
@@ -168,7 +199,28 @@ class InfiniteSalesFeedView(APIView):
                 'search': search_query
             }
         }, status=status.HTTP_200_OK)
-
+    
+    def _search_filter(self, shop, search_query):
+        """
+        Receipt numbers ("R123" or "123") match the sale id exactly; anything else is a
+        prefix match on customer name or cashier name (cashiers resolved up front).
+        """
+        receipt = search_query[1:] if search_query[:1] in ('R', 'r') else search_query
+        if receipt.isdigit():
+            return Q(id=int(receipt))
+        
+        cashier_ids = list(Cashier.objects.filter(
+            shop=shop,
+            name__istartswith=search_query
+        ).values_list('id', flat=True))
+        # A range on UPPER(customer_name) rather than istartswith, so the (shop,
+        # UPPER(customer_name)) index serves it - LIKE can't use a plain index here
+        prefix = Upper(Value(search_query))
+        customer_match = (
+            Q(GreaterThanOrEqual(Upper('customer_name'), prefix))
+            & Q(LessThan(Upper('customer_name'), Concat(prefix, Value('\U0010ffff'))))
+        )
+        return customer_match | Q(cashier_id__in=cashier_ids)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class SaleAuditTrailView(APIView):
@@ -336,6 +388,7 @@ class SalesAnalyticsView(APIView):
     """
     permission_classes = [permissions.AllowAny]  # Allow anonymous access
     
+    @cache_analytics_response('sales_analytics')
     def get(self, request):
         try:
             shop = ShopConfiguration.objects.get()
@@ -364,38 +417,37 @@ class SalesAnalyticsView(APIView):
             status='completed'
         )
         
+        # Period totals come from the rollups (business dates in the shop's timezone)
+        shop_tz = shop_timezone(shop)
+        start_day = timezone.localtime(start_date, shop_tz).date()
+        end_day = timezone.localtime(end_date, shop_tz).date()
+        period_rollups = DailySalesRollup.objects.filter(shop=shop, date__gte=start_day, date__lte=end_day)
+        period_totals = DailySalesRollup.period_totals(shop, start_day, end_day)
+        
         # 1. Revenue Analytics
-        total_revenue = period_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        total_transactions = period_sales.count()
+        total_revenue = period_totals['revenue']
+        total_transactions = period_totals['order_count']
         average_transaction_value = total_revenue / max(total_transactions, 1)
         
-        # Daily revenue breakdown
-        daily_revenue = []
-        current_date = start_date.date()
-        while current_date <= end_date.date():
-            day_sales = period_sales.filter(created_at__date=current_date)
-            day_revenue = day_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-            daily_revenue.append({
-                'date': current_date.isoformat(),
-                'revenue': float(day_revenue),
-                'transactions': day_sales.count()
-            })
-            current_date += timedelta(days=1)
+        # Daily revenue breakdown - one grouped read of the hourly rollups
+        daily_revenue = HourlySalesRollup.daily_series(shop, start_day, end_day)
         
         # 2. Shrinkage Analysis (from Waste and Stock Transfer data)
         shrinkage_data = self._calculate_shrinkage(shop, start_date, end_date)
         
         # 3. Performance Metrics
-        performance_data = self._calculate_performance_metrics(shop, period_sales, start_date, end_date)
+        performance_data = self._calculate_performance_metrics(shop, period_rollups, period_totals, start_day, end_day)
         
-        # 4. Product Performance
-        top_products = self._get_top_products(shop, period_sales)
+        # 4. Product Performance (product-day sales rollup)
+        top_products = self._get_top_products(shop, start_day, end_day)
+        slow_movers = self._get_slow_movers(shop, start_day, end_day)
+        category_mix = self._get_category_mix(shop, start_day, end_day)
         
         # 5. Cashier Performance
         cashier_performance = self._get_cashier_performance(shop, period_sales)
         
         # 6. Payment Method Analysis
-        payment_analysis = self._analyze_payment_methods(period_sales)
+        payment_analysis = self._analyze_payment_methods(period_rollups, total_transactions)
         
         return Response({
             'period': {
@@ -412,6 +464,8 @@ class SalesAnalyticsView(APIView):
             'shrinkage_analysis': shrinkage_data,
             'performance_metrics': performance_data,
             'top_products': top_products,
+            'slow_movers': slow_movers,
+            'category_mix': category_mix,
             'cashier_performance': cashier_performance,
             'payment_analysis': payment_analysis
         }, status=status.HTTP_200_OK)
@@ -451,34 +505,22 @@ class SalesAnalyticsView(APIView):
             } for item in waste_by_reason]
         }
     
-    def _calculate_performance_metrics(self, shop, period_sales, start_date, end_date):
+    def _calculate_performance_metrics(self, shop, period_rollups, period_totals, start_day, end_day):
         """Calculate performance metrics including basket size and hourly patterns"""
         
         # Basket size analysis
-        total_items = SaleItem.objects.filter(
-            sale__in=period_sales
-        ).aggregate(total=Sum('quantity'))['total'] or 0
+        total_items = period_totals['items_sold']
         
-        basket_size = total_items / max(period_sales.count(), 1)
+        basket_size = total_items / max(period_totals['order_count'], 1)
         
-        # Hourly sales pattern
-        hourly_pattern = []
-        for hour in range(24):
-            hour_sales = period_sales.filter(
-                created_at__hour=hour
-            )
-            hour_revenue = hour_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-            hourly_pattern.append({
-                'hour': hour,
-                'revenue': float(hour_revenue),
-                'transactions': hour_sales.count()
-            })
+        # Hourly sales pattern (local hours in the shop's timezone)
+        hourly_pattern = HourlySalesRollup.hourly_pattern(shop, start_day, end_day)
         
         # Currency breakdown
-        currency_breakdown = period_sales.values('currency').annotate(
-            total=Sum('total_amount'),
-            count=Count('id')
-        )
+        currency_breakdown = period_rollups.values('currency').annotate(
+            total=Sum('revenue'),
+            count=Sum('order_count')
+        ).filter(count__gt=0)
         
         return {
             'basket_size': float(basket_size),
@@ -491,20 +533,9 @@ class SalesAnalyticsView(APIView):
             } for item in currency_breakdown]
         }
     
-    def _get_top_products(self, shop, period_sales):
+    def _get_top_products(self, shop, start_day, end_day):
         """Get top selling products in the period"""
-        top_products = SaleItem.objects.filter(
-            sale__in=period_sales
-        ).values(
-            'product_id',
-            'product__name',
-            'product__category',
-            'product__line_code'
-        ).annotate(
-            total_quantity=Sum('quantity'),
-            total_revenue=Sum(F('quantity') * F('unit_price')),
-            transaction_count=Count('sale_id', distinct=True)
-        ).order_by('-total_revenue')[:10]
+        top_products = ProductDailySalesRollup.top_products(shop, start_day, end_day, limit=10)
         
         return [{
             'product_id': item['product_id'],
@@ -516,6 +547,47 @@ class SalesAnalyticsView(APIView):
             'transaction_count': item['transaction_count']
         } for item in top_products]
     
+    def _get_slow_movers(self, shop, start_day, end_day, limit=10):
+        """In-stock active products that sold the least in the period"""
+        slow_movers = Product.objects.filter(
+            shop=shop,
+            is_active=True,
+            stock_quantity__gt=0
+        ).annotate(
+            total_quantity=ProductDailySalesRollup.product_total(shop, start_day, end_day, 'quantity_sold'),
+            total_revenue=ProductDailySalesRollup.product_total(shop, start_day, end_day, 'revenue'),
+            stock_value=models.ExpressionWrapper(
+                F('stock_quantity') * F('cost_price'),
+                output_field=models.DecimalField(max_digits=20, decimal_places=4)
+            )
+        ).order_by('total_quantity', '-stock_value', 'id').values(
+            'id', 'name', 'category', 'line_code', 'stock_quantity', 'stock_value', 'total_quantity', 'total_revenue'
+        )[:limit]
+        
+        return [{
+            'product_id': product['id'],
+            'name': product['name'],
+            'category': product['category'],
+            'line_code': product['line_code'],
+            'stock_quantity': float(product['stock_quantity']),
+            'stock_value': float(product['stock_value']),
+            'total_quantity': float(product['total_quantity']),
+            'total_revenue': float(product['total_revenue'])
+        } for product in slow_movers]
+    
+    def _get_category_mix(self, shop, start_day, end_day):
+        """Revenue and margin share per product category"""
+        categories = list(ProductDailySalesRollup.category_mix(shop, start_day, end_day))
+        total_revenue = sum(item['total_revenue'] for item in categories)
+        
+        return [{
+            'category': item['product__category'] or 'Uncategorized',
+            'total_quantity': float(item['total_quantity']),
+            'total_revenue': float(item['total_revenue']),
+            'gross_profit': float(item['total_revenue'] - item['total_cost']),
+            'percentage': round(float(item['total_revenue'] / total_revenue) * 100, 2) if total_revenue > 0 else 0
+        } for item in categories]
+    
     def _get_cashier_performance(self, shop, period_sales):
         """Get cashier performance metrics"""
         cashier_performance = period_sales.values(
@@ -535,18 +607,18 @@ class SalesAnalyticsView(APIView):
             'average_transaction': float(item['average_transaction'])
         } for item in cashier_performance]
     
-    def _analyze_payment_methods(self, period_sales):
+    def _analyze_payment_methods(self, period_rollups, total_transactions):
         """Analyze payment method usage"""
-        payment_analysis = period_sales.values('payment_method').annotate(
-            total=Sum('total_amount'),
-            count=Count('id')
-        ).order_by('-total')
+        payment_analysis = period_rollups.values('payment_method').annotate(
+            total=Sum('revenue'),
+            count=Sum('order_count')
+        ).filter(count__gt=0).order_by('-total')
         
         return [{
             'payment_method': item['payment_method'],
             'total_revenue': float(item['total']),
             'transaction_count': item['count'],
-            'percentage': round((item['count'] / period_sales.count()) * 100, 2) if period_sales.count() > 0 else 0
+            'percentage': round((item['count'] / total_transactions) * 100, 2) if total_transactions > 0 else 0
         } for item in payment_analysis]
 
 
@@ -555,8 +627,12 @@ class SalesExceptionReportView(APIView):
     """
     Exception Reports for voided sales, refunds, and high-discrepancy events
     GET /api/v1/shop/sales/exceptions/ - Get exception reports
+    
+    Optional price_variation (fraction, default 0.3) and price_window_hours
+    (default 24) tune price-variation detection.
     """
     
+    @cache_analytics_response('sales_exceptions')
     def get(self, request):
         try:
             shop = ShopConfiguration.objects.get()
@@ -587,7 +663,9 @@ class SalesExceptionReportView(APIView):
             shop=shop,
             status='refunded',
             created_at__range=[start_date, end_date]
-        ).select_related('cashier', 'refunded_by')
+        ).select_related('cashier', 'refunded_by').prefetch_related(
+            Prefetch('items', queryset=SaleItem.objects.select_related('product'))
+        )
         
         refunded_data = []
         for sale in refunded_sales:
@@ -618,7 +696,7 @@ class SalesExceptionReportView(APIView):
             created_at__range=[start_date, end_date],
             total_amount__gte=high_value_threshold,
             status='completed'
-        ).select_related('cashier')
+        ).select_related('cashier').annotate(item_count=Count('items'))
         
         high_value_data = []
         for sale in high_value_sales:
@@ -630,11 +708,21 @@ class SalesExceptionReportView(APIView):
                 'customer_name': sale.customer_name or 'Walk-in',
                 'cashier_name': sale.cashier.name if sale.cashier else 'Unknown',
                 'created_at': sale.created_at.isoformat(),
-                'item_count': sale.items.count()
+                'item_count': sale.item_count
             })
         
         # 3. Sales with Discrepancies (price variations, etc.)
-        discrepancy_sales = self._find_discrepancy_sales(shop, start_date, end_date)
+        try:
+            variation_threshold = float(request.query_params.get('price_variation', PRICE_VARIATION_THRESHOLD))
+        except ValueError:
+            variation_threshold = PRICE_VARIATION_THRESHOLD
+        try:
+            baseline_hours = float(request.query_params.get('price_window_hours', PRICE_BASELINE_HOURS))
+        except ValueError:
+            baseline_hours = PRICE_BASELINE_HOURS
+        discrepancy_sales = self._find_discrepancy_sales(
+            shop, start_date, end_date, variation_threshold, baseline_hours
+        )
         
         # 4. Summary Statistics
         total_refunds = len(refunded_data)
@@ -658,52 +746,75 @@ class SalesExceptionReportView(APIView):
             'discrepancy_sales': discrepancy_sales
         }, status=status.HTTP_200_OK)
     
-    def _find_discrepancy_sales(self, shop, start_date, end_date):
-        """Find sales with potential discrepancies"""
-        discrepancy_sales = []
-        
-        # Get sales in the period
-        period_sales = Sale.objects.filter(
-            shop=shop,
-            created_at__range=[start_date, end_date],
-            status='completed'
+    def _find_discrepancy_sales(self, shop, start_date, end_date,
+                                variation_threshold=PRICE_VARIATION_THRESHOLD,
+                                baseline_hours=PRICE_BASELINE_HOURS):
+        """
+        Find sales with potential discrepancies.
+        An item is a price variation when its unit price is more than variation_threshold
+        away from the mean unit price of the product's other sale lines within
+        +/- baseline_hours. Every line in the (widened) window is read in one query and
+        each product's baseline is kept as a rolling sum, so the cost is linear in lines.
+        """
+        baseline = timedelta(hours=baseline_hours)
+        lines = SaleItem.objects.filter(
+            sale__shop=shop,
+            sale__created_at__range=[start_date - baseline, end_date + baseline]
+        ).order_by('product_id', 'sale__created_at', 'id').values_list(
+            'product_id', 'sale_id', 'unit_price', 'sale__created_at', 'sale__status'
         )
         
-        for sale in period_sales:
-            discrepancies = []
+        by_product = {}
+        for product_id, sale_id, unit_price, created_at, sale_status in lines:
+            by_product.setdefault(product_id, []).append((created_at, sale_id, unit_price, sale_status))
+        
+        discrepancies_by_sale = {}
+        for product_lines in by_product.values():
+            # A sale's own lines of the product are excluded from its baseline
+            own = {}
+            for _, sale_id, unit_price, _ in product_lines:
+                own_sum, own_count = own.get(sale_id, (Decimal('0'), 0))
+                own[sale_id] = (own_sum + unit_price, own_count + 1)
             
-            # Check for unusual price combinations
-            for item in sale.items.all():
-                # Check if product price has changed significantly recently
-                recent_sales = SaleItem.objects.filter(
-                    product=item.product,
-                    sale__created_at__gte=sale.created_at - timedelta(hours=24),
-                    sale__created_at__lte=sale.created_at + timedelta(hours=24)
-                ).exclude(sale=sale)
+            low = high = 0
+            window_sum = Decimal('0')
+            for created_at, sale_id, unit_price, sale_status in product_lines:
+                while high < len(product_lines) and product_lines[high][0] <= created_at + baseline:
+                    window_sum += product_lines[high][2]
+                    high += 1
+                while product_lines[low][0] < created_at - baseline:
+                    window_sum -= product_lines[low][2]
+                    low += 1
                 
-                if recent_sales.exists():
-                    recent_prices = [float(si.unit_price) for si in recent_sales]
-                    avg_price = sum(recent_prices) / len(recent_prices)
-                    current_price = float(item.unit_price)
-                    
-                    if abs(current_price - avg_price) / avg_price > 0.3:  # 30% price variation
-                        discrepancies.append({
-                            'type': 'PRICE_VARIATION',
-                            'description': f'Price variation: {current_price} vs avg {avg_price:.2f}',
-                            'severity': 'HIGH'
-                        })
-            
-            if discrepancies:
-                discrepancy_sales.append({
-                    'sale_id': sale.id,
-                    'receipt_number': f'R{sale.id:03d}',
-                    'amount': float(sale.total_amount),
-                    'created_at': sale.created_at.isoformat(),
-                    'cashier_name': sale.cashier.name if sale.cashier else 'Unknown',
-                    'discrepancies': discrepancies
-                })
+                if sale_status != 'completed' or not (start_date <= created_at <= end_date):
+                    continue
+                
+                own_sum, own_count = own[sale_id]
+                other_count = (high - low) - own_count
+                if other_count <= 0:
+                    continue
+                avg_price = float((window_sum - own_sum) / other_count)
+                current_price = float(unit_price)
+                
+                if avg_price > 0 and abs(current_price - avg_price) / avg_price > variation_threshold:
+                    discrepancies_by_sale.setdefault(sale_id, []).append({
+                        'type': 'PRICE_VARIATION',
+                        'description': f'Price variation: {current_price} vs avg {avg_price:.2f}',
+                        'severity': 'HIGH'
+                    })
         
-        return discrepancy_sales
+        flagged_sales = Sale.objects.filter(
+            id__in=discrepancies_by_sale
+        ).select_related('cashier').order_by('created_at', 'id')
+        
+        return [{
+            'sale_id': sale.id,
+            'receipt_number': f'R{sale.id:03d}',
+            'amount': float(sale.total_amount),
+            'created_at': sale.created_at.isoformat(),
+            'cashier_name': sale.cashier.name if sale.cashier else 'Unknown',
+            'discrepancies': discrepancies_by_sale[sale.id]
+        } for sale in flagged_sales]
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -712,7 +823,7 @@ class ShopDayManagementView(APIView):
     Shop Day Management - Start of Day / End of Day functionality
     GET /api/v1/shop/shop-status/ - Get current shop status
     POST /api/v1/shop/start-day/ - Start the day (owner only)
-    POST /api/v1/shop/end-day/ - End the day (owner only)
+    POST /api/v1/shop/end-day/ - End the day (owner only) - starts an end of day job
     """
     
     def get(self, request):
@@ -802,19 +913,22 @@ class ShopDayManagementView(APIView):
                 }, status=status.HTTP_200_OK)
                 
             elif action == 'end_day':
-                # Close the shop
-                shop_day.close_shop(notes=notes)
+                # Close the shop in the background - poll end-day/status/ for progress
+                from .models_eod_job import EndOfDayJob
+                job = EndOfDayJob.submit(shop_day, notes=notes)
+                job.start()
                 
                 return Response({
-                    'message': 'Shop closed successfully',
+                    'message': 'Shop closing started',
+                    'status': job.status,
                     'shop_day': {
                         'date': shop_day.date.isoformat(),
-                        'status': shop_day.status,
-                        'closed_at': shop_day.closed_at.isoformat(),
-                        'closing_notes': shop_day.closing_notes
+                        # The job stops sales first; the day reads OPEN until its thread starts
+                        'status': 'CLOSED' if job.status == 'COMPLETED' else 'CLOSING',
+                        'closing_notes': notes
                     },
-                    'shifts_closed': True
-                }, status=status.HTTP_200_OK)
+                    'job': job.to_dict()
+                }, status=status.HTTP_202_ACCEPTED)
                 
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -822,6 +936,39 @@ class ShopDayManagementView(APIView):
             return Response({"error": f"Failed to {action.replace('_', ' ')}: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class EndOfDayJobStatusView(APIView):
+    """
+    Progress of the close of day
+    GET /api/v1/shop/end-day/status/ - Latest end of day job (or ?job_id=)
+    A job whose worker has gone away is resumed from its last completed stage.
+    """
+    
+    def get(self, request):
+        try:
+            shop = ShopConfiguration.objects.get()
+        except ShopConfiguration.DoesNotExist:
+            return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
+        
+        from .models_eod_job import EndOfDayJob
+        jobs = EndOfDayJob.objects.filter(shop=shop).select_related('shop_day')
+        job_id = request.query_params.get('job_id')
+        try:
+            job = jobs.get(pk=job_id) if job_id else jobs.first()
+        except (EndOfDayJob.DoesNotExist, ValueError):
+            return Response({"error": "End of day job not found"}, status=status.HTTP_404_NOT_FOUND)
+        
+        if job is None:
+            return Response({'success': True, 'job': None}, status=status.HTTP_200_OK)
+        
+        resumed = job.resume_if_stale()
+        return Response({
+            'success': True,
+            'job': job.to_dict(),
+            'resumed': resumed
+        }, status=status.HTTP_200_OK)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class EODReconciliationView(APIView):
     """
@@ -839,55 +986,37 @@ class EODReconciliationView(APIView):
         # Get today's date
         today = timezone.now().date()
         
-        # Get current open shop_day (for session-aware filtering)
+        # Get current open shop_day (for session-aware figures)
         current_shop_day = ShopDay.get_open_shop_day(shop)
         
         # Get all shifts for today
-        today_shifts = Shift.objects.filter(
+        today_shifts = list(Shift.objects.filter(
             shop=shop,
             start_time__date=today
-        ).select_related('cashier')
+        ).select_related('cashier'))
         
-        # Get all sales for today using shop_day and opened_at for session-aware filtering
+        # Sales, refunds and takings come from the reconciliation snapshot - kept up to
+        # date as sales are saved and emptied of a session's sales when its day closes,
+        # so the local days since the open shop day began cover exactly this session
         if current_shop_day and current_shop_day.opened_at:
-            # Filter by shop_day AND by created_at >= opened_at to ensure we only get sales from THIS session
-            # This handles the case where shop was closed and reopened on the same day
-            today_sales = Sale.objects.filter(
-                shop=shop, 
-                shop_day=current_shop_day,
-                created_at__gte=current_shop_day.opened_at
-            )
+            first_day = min(timezone.localtime(current_shop_day.opened_at).date(), today)
         else:
             # Fallback: no open shop day, use today's date
-            today_sales = Sale.objects.filter(shop=shop, created_at__date=today)
+            first_day = today
+        days = [first_day + timedelta(days=offset) for offset in range((today - first_day).days + 1)]
+        snapshot = ReconciliationSnapshot.totals(shop, days)
+        
+        def sold(method=None, currency=None, cashier_ids=None):
+            return snapshot.amount('sales', cashier_ids=cashier_ids, currency=currency, method=method)
+        
+        def refunded(method=None, cashier_ids=None):
+            return snapshot.amount('refunds', cashier_ids=cashier_ids, method=method)
         
         # Calculate refund totals by payment method
-        refunded_sales = today_sales.filter(status='refunded')
-        cash_refunds = refunded_sales.filter(payment_method='cash').aggregate(
-            total=Sum('refund_amount')
-        )['total'] or 0
-        card_refunds = refunded_sales.filter(payment_method='card').aggregate(
-            total=Sum('refund_amount')
-        )['total'] or 0
-        ecocash_refunds = refunded_sales.filter(payment_method='ecocash').aggregate(
-            total=Sum('refund_amount')
-        )['total'] or 0
-        
-        # Get only completed sales for revenue calculations
-        completed_sales = today_sales.filter(status='completed')
-
-        # CRITICAL FIX: Fetch expected amounts directly from CashFloat (Financial Neural Grid)
-        # This ensures EOD matches Drawer Management exactly and prevents "bullshit" numbers
-        from .models import CashFloat
-        drawers = CashFloat.objects.filter(shop=shop, date=today)
-
-        # Aggregate expected amounts from all drawers
-        cf_expected_usd = sum(d.expected_cash_usd for d in drawers)
-        cf_expected_zig = sum(d.expected_cash_zig for d in drawers)
-        cf_expected_rand = sum(d.expected_cash_rand for d in drawers)
-
-        # Also get session sales from CashFloat to override potentially incorrect sale-based calcs
-
+        cash_refunds = refunded('cash')
+        card_refunds = refunded('card')
+        ecocash_refunds = refunded('ecocash')
+        
         # Calculate reconciliation data
         reconciliation_data = {
             'date': today.isoformat(),
@@ -907,28 +1036,17 @@ class EODReconciliationView(APIView):
         total_ecocash_refunds = 0
         
         for shift in today_shifts:
-            shift_sales = completed_sales.filter(cashier=shift.cashier)
-            shift_refunds = refunded_sales.filter(cashier=shift.cashier)
-            
-            # Calculate expected amounts by payment method (completed sales only)
-            cash_sales = shift_sales.filter(payment_method='cash')
-            card_sales = shift_sales.filter(payment_method='card')
-            ecocash_sales = shift_sales.filter(payment_method='ecocash')
+            cashier_ids = [shift.cashier_id]
             
-            # Calculate refunds by payment method
-            cash_refunds_shift = shift_refunds.filter(payment_method='cash').aggregate(
-                total=Sum('refund_amount')
-            )['total'] or 0
-            card_refunds_shift = shift_refunds.filter(payment_method='card').aggregate(
-                total=Sum('refund_amount')
-            )['total'] or 0
-            ecocash_refunds_shift = shift_refunds.filter(payment_method='ecocash').aggregate(
-                total=Sum('refund_amount')
-            )['total'] or 0
+            # Expected amounts by payment method (completed sales only)
+            cash_total = sold('cash', cashier_ids=cashier_ids)
+            card_total = sold('card', cashier_ids=cashier_ids)
+            ecocash_total = sold('ecocash', cashier_ids=cashier_ids)
             
-            cash_total = cash_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-            card_total = card_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-            ecocash_total = ecocash_sales.aggregate(total=Sum('total_amount'))['total'] or 0
+            # Refunds by payment method
+            cash_refunds_shift = refunded('cash', cashier_ids=cashier_ids)
+            card_refunds_shift = refunded('card', cashier_ids=cashier_ids)
+            ecocash_refunds_shift = refunded('ecocash', cashier_ids=cashier_ids)
             
             # Net amounts after refunds
             net_cash = float(cash_total) - float(cash_refunds_shift)
@@ -949,7 +1067,7 @@ class EODReconciliationView(APIView):
                 'actual_cash': float(shift.closing_balance),
                 'cash_difference': float(shift.closing_balance) - expected_cash,
                 'sales_summary': {
-                    'total_sales': shift_sales.count(),
+                    'total_sales': snapshot.count('sales', cashier_ids=cashier_ids),
                     'cash_sales': float(cash_total),
                     'card_sales': float(card_total),
                     'ecocash_sales': float(ecocash_total),
@@ -977,107 +1095,78 @@ class EODReconciliationView(APIView):
             total_ecocash_refunds += float(ecocash_refunds_shift)
         
         # Overall summary
-        total_sales = completed_sales.count()
-        total_revenue = completed_sales.aggregate(total=Sum('total_amount'))['total'] or 0
+        total_sales = snapshot.count('sales')
+        total_revenue = sold()
         
         # If no formal shifts exist, create individual cashier entries from sales data
-        if not today_shifts.exists():
-            # Group sales by cashier (only completed sales)
-            cashier_sales = completed_sales.values(
-                'cashier_id',
-                'cashier__name'
-            ).annotate(
-                total_sales=Count('id'),
-                total_revenue=Sum('total_amount'),
-                cash_sales=Sum('total_amount', filter=Q(payment_method='cash')),
-                card_sales=Sum('total_amount', filter=Q(payment_method='card')),
-                ecocash_sales=Sum('total_amount', filter=Q(payment_method='ecocash'))
-            )
-            
-            # Group refunds by cashier
-            cashier_refunds = refunded_sales.values(
-                'cashier_id'
-            ).annotate(
-                cash_refunds=Sum('refund_amount', filter=Q(payment_method='cash')),
-                card_refunds=Sum('refund_amount', filter=Q(payment_method='card')),
-                ecocash_refunds=Sum('refund_amount', filter=Q(payment_method='ecocash'))
-            )
-            
-            # Create a lookup for refunds by cashier
-            refund_lookup = {}
-            for refund_data in cashier_refunds:
-                refund_lookup[refund_data['cashier_id']] = {
-                    'cash_refunds': refund_data['cash_refunds'] or 0,
-                    'card_refunds': refund_data['card_refunds'] or 0,
-                    'ecocash_refunds': refund_data['ecocash_refunds'] or 0
-                }
+        if not today_shifts:
+            # Cashiers with completed sales, named in one query
+            cashier_names = dict(Cashier.objects.filter(
+                id__in=snapshot.cashier_ids('sales')
+            ).values_list('id', 'name'))
             
             # Process each cashier's sales
-            for cashier_data in cashier_sales:
-                if cashier_data['cashier_id']:  # Only include sales with assigned cashiers
-                    cash_total = cashier_data['cash_sales'] or 0
-                    card_total = cashier_data['card_sales'] or 0
-                    ecocash_total = cashier_data['ecocash_sales'] or 0
-                    
-                    # Get refunds for this cashier
-                    cashier_refund_data = refund_lookup.get(cashier_data['cashier_id'], {
-                        'cash_refunds': 0, 'card_refunds': 0, 'ecocash_refunds': 0
-                    })
-                    
-                    # Calculate net amounts after refunds
-                    net_cash = float(cash_total) - float(cashier_refund_data['cash_refunds'])
-                    net_card = float(card_total) - float(cashier_refund_data['card_refunds'])
-                    net_ecocash = float(ecocash_total) - float(cashier_refund_data['ecocash_refunds'])
-                    
-                    reconciliation_data['shifts'].append({
-                        'shift_id': f"sales_{cashier_data['cashier_id']}",  # Use prefix to distinguish from real shift IDs
-                        'cashier_name': cashier_data['cashier__name'],
-                        'cashier_id': cashier_data['cashier_id'],
-                        'start_time': today.isoformat() + 'T08:00:00',  # Default start time
-                        'end_time': '',
-                        'opening_balance': 0,
-                        'closing_balance': 0,
-                        'expected_cash': net_cash,  # Net cash after refunds
-                        'actual_cash': 0,
-                        'cash_difference': -net_cash,
-                        'sales_summary': {
-                            'total_sales': cashier_data['total_sales'],
-                            'cash_sales': float(cash_total),
-                            'card_sales': float(card_total),
-                            'ecocash_sales': float(ecocash_total),
-                            'total_amount': float(cashier_data['total_revenue'])
-                        },
-                        'refund_summary': {
-                            'cash_refunds': float(cashier_refund_data['cash_refunds']),
-                            'card_refunds': float(cashier_refund_data['card_refunds']),
-                            'ecocash_refunds': float(cashier_refund_data['ecocash_refunds']),
-                            'total_refunds': float(cashier_refund_data['cash_refunds'] + cashier_refund_data['card_refunds'] + cashier_refund_data['ecocash_refunds'])
-                        },
-                        'net_amounts': {
-                            'net_cash': net_cash,
-                            'net_card': net_card,
-                            'net_ecocash': net_ecocash,
-                            'net_total': net_cash + net_card + net_ecocash
-                        }
-                    })
-                    
-                    total_cash_expected += net_cash
-                    total_card_expected += net_card
-                    total_ecocash_expected += net_ecocash
-                    total_cash_refunds += float(cashier_refund_data['cash_refunds'])
-                    total_card_refunds += float(cashier_refund_data['card_refunds'])
-                    total_ecocash_refunds += float(cashier_refund_data['ecocash_refunds'])
+            for cashier_id in snapshot.cashier_ids('sales'):
+                cashier_ids = [cashier_id]
+                cash_total = sold('cash', cashier_ids=cashier_ids)
+                card_total = sold('card', cashier_ids=cashier_ids)
+                ecocash_total = sold('ecocash', cashier_ids=cashier_ids)
+                
+                # Get refunds for this cashier
+                cashier_refund_data = {
+                    'cash_refunds': refunded('cash', cashier_ids=cashier_ids),
+                    'card_refunds': refunded('card', cashier_ids=cashier_ids),
+                    'ecocash_refunds': refunded('ecocash', cashier_ids=cashier_ids)
+                }
+                
+                # Calculate net amounts after refunds
+                net_cash = float(cash_total) - float(cashier_refund_data['cash_refunds'])
+                net_card = float(card_total) - float(cashier_refund_data['card_refunds'])
+                net_ecocash = float(ecocash_total) - float(cashier_refund_data['ecocash_refunds'])
+                
+                reconciliation_data['shifts'].append({
+                    'shift_id': f"sales_{cashier_id}",  # Use prefix to distinguish from real shift IDs
+                    'cashier_name': cashier_names.get(cashier_id),
+                    'cashier_id': cashier_id,
+                    'start_time': today.isoformat() + 'T08:00:00',  # Default start time
+                    'end_time': '',
+                    'opening_balance': 0,
+                    'closing_balance': 0,
+                    'expected_cash': net_cash,  # Net cash after refunds
+                    'actual_cash': 0,
+                    'cash_difference': -net_cash,
+                    'sales_summary': {
+                        'total_sales': snapshot.count('sales', cashier_ids=cashier_ids),
+                        'cash_sales': float(cash_total),
+                        'card_sales': float(card_total),
+                        'ecocash_sales': float(ecocash_total),
+                        'total_amount': float(sold(cashier_ids=cashier_ids))
+                    },
+                    'refund_summary': {
+                        'cash_refunds': float(cashier_refund_data['cash_refunds']),
+                        'card_refunds': float(cashier_refund_data['card_refunds']),
+                        'ecocash_refunds': float(cashier_refund_data['ecocash_refunds']),
+                        'total_refunds': float(cashier_refund_data['cash_refunds'] + cashier_refund_data['card_refunds'] + cashier_refund_data['ecocash_refunds'])
+                    },
+                    'net_amounts': {
+                        'net_cash': net_cash,
+                        'net_card': net_card,
+                        'net_ecocash': net_ecocash,
+                        'net_total': net_cash + net_card + net_ecocash
+                    }
+                })
+                
+                total_cash_expected += net_cash
+                total_card_expected += net_card
+                total_ecocash_expected += net_ecocash
+                total_cash_refunds += float(cashier_refund_data['cash_refunds'])
+                total_card_refunds += float(cashier_refund_data['card_refunds'])
+                total_ecocash_refunds += float(cashier_refund_data['ecocash_refunds'])
         
         # Calculate overall totals by payment method
-        gross_cash_sales = completed_sales.filter(payment_method='cash').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        gross_card_sales = completed_sales.filter(payment_method='card').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        gross_ecocash_sales = completed_sales.filter(payment_method='ecocash').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
+        gross_cash_sales = sold('cash')
+        gross_card_sales = sold('card')
+        gross_ecocash_sales = sold('ecocash')
         
         # Net amounts after refunds
         net_cash_sales = float(gross_cash_sales) - float(cash_refunds)
@@ -1085,72 +1174,18 @@ class EODReconciliationView(APIView):
         net_ecocash_sales = float(gross_ecocash_sales) - float(ecocash_refunds)
         
         # Calculate sales by currency (multi-currency support)
-        # USD sales
-        usd_cash_sales = completed_sales.filter(payment_currency='USD', payment_method='cash').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        usd_card_sales = completed_sales.filter(payment_currency='USD', payment_method='card').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        usd_ecocash_sales = completed_sales.filter(payment_currency='USD', payment_method='ecocash').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        usd_transfer_sales = completed_sales.filter(payment_currency='USD', payment_method='transfer').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        
-        # ZIG sales
-        zig_cash_sales = completed_sales.filter(payment_currency='ZIG', payment_method='cash').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        zig_card_sales = completed_sales.filter(payment_currency='ZIG', payment_method='card').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        zig_ecocash_sales = completed_sales.filter(payment_currency='ZIG', payment_method='ecocash').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        zig_transfer_sales = completed_sales.filter(payment_currency='ZIG', payment_method='transfer').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        
-        # RAND sales
-        rand_cash_sales = completed_sales.filter(payment_currency='RAND', payment_method='cash').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        rand_card_sales = completed_sales.filter(payment_currency='RAND', payment_method='card').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        rand_ecocash_sales = completed_sales.filter(payment_currency='RAND', payment_method='ecocash').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        rand_transfer_sales = completed_sales.filter(payment_currency='RAND', payment_method='transfer').aggregate(
-            total=Sum('total_amount')
-        )['total'] or 0
-        
-        # Build sales_by_currency breakdown
-        sales_by_currency = {
-            'usd': {
-                'cash_sales': float(usd_cash_sales),
-                'card_sales': float(usd_card_sales),
-                'ecocash_sales': float(usd_ecocash_sales),
-                'transfer_sales': float(usd_transfer_sales),
-                'total_sales': float(usd_cash_sales + usd_card_sales + usd_ecocash_sales + usd_transfer_sales)
-            },
-            'zig': {
-                'cash_sales': float(zig_cash_sales),
-                'card_sales': float(zig_card_sales),
-                'ecocash_sales': float(zig_ecocash_sales),
-                'transfer_sales': float(zig_transfer_sales),
-                'total_sales': float(zig_cash_sales + zig_card_sales + zig_ecocash_sales + zig_transfer_sales)
-            },
-            'rand': {
-                'cash_sales': float(rand_cash_sales),
-                'card_sales': float(rand_card_sales),
-                'ecocash_sales': float(rand_ecocash_sales),
-                'transfer_sales': float(rand_transfer_sales),
-                'total_sales': float(rand_cash_sales + rand_card_sales + rand_ecocash_sales + rand_transfer_sales)
+        sales_by_currency = {}
+        for currency in ('USD', 'ZIG', 'RAND'):
+            currency_sales = {
+                'cash_sales': float(sold('cash', currency)),
+                'card_sales': float(sold('card', currency)),
+                'ecocash_sales': float(sold('ecocash', currency)),
+                'transfer_sales': float(sold('transfer', currency)),
             }
-        }
+            currency_sales['total_sales'] = float(sum(
+                sold(method, currency) for method in ('cash', 'card', 'ecocash', 'transfer')
+            ))
+            sales_by_currency[currency.lower()] = currency_sales
         
         reconciliation_data['overall_summary'] = {
             'total_transactions': total_sales,
@@ -1185,10 +1220,11 @@ class EODReconciliationView(APIView):
         # This ensures EOD matches Drawer Management exactly and prevents "bullshit" numbers
         # UPDATED: Use exclude(status='SETTLED') to match Drawer Management logic
         # This handles cases where the session spans across midnight (date change)
-        drawers = CashFloat.objects.filter(shop=shop).exclude(status='SETTLED')
+        # Balances are prefetched - every figure below reads the same loaded rows
+        drawers = list(CashFloat.objects.filter(shop=shop).exclude(status='SETTLED').prefetch_related('balances'))
         
-        if not drawers.exists():
-            drawers = CashFloat.objects.filter(shop=shop, date=today)
+        if not drawers:
+            drawers = list(CashFloat.objects.filter(shop=shop, date=today).prefetch_related('balances'))
         
         # Aggregate expected amounts from all drawers
         cf_expected_usd = sum(d.expected_cash_usd for d in drawers)
@@ -1220,7 +1256,7 @@ class EODReconciliationView(APIView):
         }
         
         # Override with CashFloat data if available to match Drawer Management
-        if drawers.exists():
+        if drawers:
             # Update sales_by_currency with CashFloat session data
             reconciliation_data['sales_by_currency']['usd']['cash_sales'] = float(cf_sales_usd)
             reconciliation_data['sales_by_currency']['usd']['transfer_sales'] = float(cf_transfer_usd)
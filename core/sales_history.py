@@ -0,0 +1,277 @@
+"""
+Sales history helpers shared by the owner and cashier history endpoints.
+Pages are served by (created_at, id) cursor, summaries come from database
+aggregation, and export=ndjson streams every matching sale one line at a time
+so full exports never build the whole response in memory.
+
+Sales of closed days live in the archive tables, so the helpers take a list of
+querysets - the live sales and the matching archived sales (see history_sources).
+Archived sales carry the same field names, and pages, exports and summaries are
+merged across the sources.
+"""
+import heapq
+import json
+
+from django.db.models import Case, When, F, Sum, Count, Min, Max, Q, Prefetch, CharField
+from django.db.models.functions import TruncDate
+from django.http import StreamingHttpResponse
+
+from django.db.models import QuerySet
+
+from .models import Sale, SaleItem
+from .models_sales_archive import ArchivedSale
+from .pagination import keyset_page, newest_first, encode_cursor
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 500
+
+
+def history_sources(**filters):
+    """Live and archived sales matching the same filters"""
+    return [Sale.objects.filter(**filters), ArchivedSale.objects.filter(**filters)]
+
+
+def _sources(querysets):
+    return [querysets] if isinstance(querysets, QuerySet) else list(querysets)
+
+
+def _newest_first_key(sale):
+    return (sale.created_at, sale.id)
+
+
+def with_history_relations(queryset):
+    """Cashier joined, items and their products prefetched - a fixed query count per page"""
+    if queryset.model is ArchivedSale:
+        # Cashier and product names were captured when the day was archived
+        return queryset.prefetch_related('items')
+    return queryset.select_related('cashier').prefetch_related(
+        Prefetch('items', queryset=SaleItem.objects.select_related('product'))
+    )
+
+
+def _cashier_name(sale):
+    if isinstance(sale, ArchivedSale):
+        return sale.cashier_name or 'Unknown'
+    return sale.cashier.name if sale.cashier else 'Unknown'
+
+
+def _item_product(item):
+    """(name, category) of a sale item's product"""
+    if hasattr(item, 'product_name'):
+        return item.product_name or 'Unknown Product', item.category
+    if item.product:
+        return item.product.name, item.product.category
+    return 'Unknown Product', ''
+
+
+def serialize_history_sale(sale):
+    """Full sale row as served by the all-sales and cashier history endpoints"""
+    return {
+        'id': sale.id,
+        'receipt_number': f'R{sale.id:03d}',
+        'created_at': sale.created_at.isoformat(),
+        'cashier_id': sale.cashier_id,
+        'cashier_name': _cashier_name(sale),
+        'payment_method': sale.payment_method,
+        'customer_name': sale.customer_name or '',
+        'total_amount': float(sale.total_amount),
+        'currency': sale.currency,
+        'payment_currency': sale.payment_currency,
+        'wallet_account': sale.wallet_account,
+        'status': sale.status,
+        'items': [{
+            'product_id': item.product_id,
+            'product_name': _item_product(item)[0],
+            'category': _item_product(item)[1],
+            'quantity': float(item.quantity),
+            'unit_price': float(item.unit_price),
+            'total_price': float(item.total_price),
+            'refunded': item.refunded,
+            'refund_reason': item.refund_reason or ''
+        } for item in sale.items.all()]
+    }
+
+
+def parse_page_size(request):
+    """page_size query param clamped to 1..MAX_PAGE_SIZE; raises ValueError when not an integer"""
+    return min(max(1, int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE))), MAX_PAGE_SIZE)
+
+
+def wants_page(request):
+    """Paging is opt-in for endpoints that used to return every sale"""
+    return 'page_size' in request.query_params or 'cursor' in request.query_params
+
+
+def wants_ndjson(request):
+    # Not ?format= - DRF reserves that for renderer selection
+    return request.query_params.get('export') == 'ndjson'
+
+
+def history_page(querysets, cursor, page_size, serialize=serialize_history_sale):
+    """
+    One newest-first page of serialized sales across the sources.
+    Each source serves its own page after the cursor and the newest page_size of
+    them are kept, so the cursor stays a plain (created_at, id) keyset.
+    Returns (rows, pagination); raises ValueError for a malformed cursor.
+    """
+    sales = []
+    has_more = False
+    for queryset in _sources(querysets):
+        rows, next_cursor = keyset_page(with_history_relations(queryset), cursor, page_size)
+        sales.extend(rows)
+        has_more = has_more or next_cursor is not None
+    sales.sort(key=_newest_first_key, reverse=True)
+    if len(sales) > page_size:
+        sales = sales[:page_size]
+        has_more = True
+    next_cursor = encode_cursor(sales[-1].created_at, sales[-1].id) if has_more else None
+    return [serialize(sale) for sale in sales], {
+        'page_size': page_size,
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+    }
+
+
+def history_all(querysets, serialize=serialize_history_sale):
+    """Every matching sale serialized, newest first across the sources"""
+    return [serialize(sale) for sale in _newest_first_merged(querysets)]
+
+
+def _newest_first_merged(querysets):
+    streams = [
+        newest_first(with_history_relations(queryset)).iterator(chunk_size=STREAM_CHUNK_SIZE)
+        for queryset in _sources(querysets)
+    ]
+    return heapq.merge(*streams, key=_newest_first_key, reverse=True)
+
+
+def stream_ndjson(querysets, serialize=serialize_history_sale):
+    """Every matching sale as one JSON object per line, fetched in chunks and merged newest first"""
+    lines = (json.dumps(serialize(sale)) + '\n' for sale in _newest_first_merged(querysets))
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+
+def _currency_key():
+    # Currency actually received, falling back to the price currency when unset
+    return Case(
+        When(payment_currency='', then=F('currency')),
+        default=F('payment_currency'),
+        output_field=CharField(),
+    )
+
+
+def _add(totals, key, amount):
+    totals[key] = totals.get(key, 0) + (amount or 0)
+
+
+def _date_range(rows):
+    """Earliest and latest sale over the per-source aggregate rows"""
+    earliest = [row['earliest'] for row in rows if row['earliest']]
+    latest = [row['latest'] for row in rows if row['latest']]
+    return {
+        'earliest': min(earliest).isoformat() if earliest else None,
+        'latest': max(latest).isoformat() if latest else None
+    }
+
+
+def history_summary(querysets):
+    """Totals, daily, payment method and currency breakdowns - computed in the database per source"""
+    sources = _sources(querysets)
+    revenue = {}
+    transactions = {}
+    daily_revenue = {}
+    daily_transactions = {}
+    payment_revenue = {}
+    currency_revenue = {}
+    currency_transactions = {}
+    bounds = []
+
+    for queryset in sources:
+        totals = queryset.aggregate(
+            total_revenue=Sum('total_amount'),
+            total_transactions=Count('id'),
+            earliest=Min('created_at'),
+            latest=Max('created_at'),
+        )
+        bounds.append(totals)
+        _add(revenue, 'all', totals['total_revenue'])
+        _add(transactions, 'all', totals['total_transactions'])
+
+        daily = queryset.annotate(day=TruncDate('created_at')).values('day').annotate(
+            revenue=Sum('total_amount'),
+            transactions=Count('id')
+        )
+        for row in daily:
+            _add(daily_revenue, row['day'], row['revenue'])
+            _add(daily_transactions, row['day'], row['transactions'])
+
+        for row in queryset.values('payment_method').annotate(revenue=Sum('total_amount')):
+            _add(payment_revenue, row['payment_method'], row['revenue'])
+
+        currencies = queryset.annotate(currency_key=_currency_key()).values('currency_key').annotate(
+            revenue=Sum('total_amount'),
+            transactions=Count('id')
+        )
+        for row in currencies:
+            _add(currency_revenue, row['currency_key'], row['revenue'])
+            _add(currency_transactions, row['currency_key'], row['transactions'])
+
+    total_revenue = float(revenue.get('all', 0))
+    total_transactions = transactions.get('all', 0)
+
+    return {
+        'summary': {
+            'total_revenue': total_revenue,
+            'total_transactions': total_transactions,
+            'average_transaction': total_revenue / total_transactions if total_transactions else 0,
+            'date_range': _date_range(bounds)
+        },
+        'daily_breakdown': [{
+            'date': day.isoformat(),
+            'revenue': f"{float(daily_revenue[day]):.2f}",
+            'transactions': daily_transactions[day]
+        } for day in sorted(daily_revenue, reverse=True)],
+        'payment_analysis': [{
+            'payment_method': method,
+            'total_revenue': float(amount),
+            'percentage': (float(amount) / total_revenue * 100) if total_revenue > 0 else 0
+        } for method, amount in sorted(payment_revenue.items(), key=lambda item: item[1], reverse=True)],
+        'currency_breakdown': [{
+            'currency': currency,
+            'total_revenue': float(amount),
+            'transaction_count': currency_transactions[currency]
+        } for currency, amount in sorted(currency_revenue.items(), key=lambda item: item[1], reverse=True)],
+    }
+
+
+def cashier_history_summary(querysets):
+    """Per-cashier totals with cash/card/transfer splits - one aggregate query per source"""
+    sources = _sources(querysets)
+    aggregates = {
+        'total_sales': Count('id'),
+        'total_revenue': Sum('total_amount'),
+    }
+    for method in ('cash', 'card', 'transfer'):
+        aggregates[f'{method}_sales'] = Count('id', filter=Q(payment_method=method))
+        aggregates[f'{method}_revenue'] = Sum('total_amount', filter=Q(payment_method=method))
+
+    totals = {}
+    bounds = []
+    for queryset in sources:
+        row = queryset.aggregate(earliest=Min('created_at'), latest=Max('created_at'), **aggregates)
+        for key in aggregates:
+            _add(totals, key, row[key])
+        bounds.append(row)
+
+    total_revenue = float(totals['total_revenue'])
+    summary = {
+        'total_sales': totals['total_sales'],
+        'total_revenue': total_revenue,
+        'average_sale': total_revenue / totals['total_sales'] if totals['total_sales'] else 0,
+    }
+    for method in ('cash', 'card', 'transfer'):
+        summary[f'{method}_sales'] = totals[f'{method}_sales']
+        summary[f'{method}_revenue'] = float(totals[f'{method}_revenue'])
+    summary['date_range'] = _date_range(bounds)
+    return summary
@@ -0,0 +1,315 @@
+"""
+Sales rollup maintenance.
+Turns a sale into its contribution to each rollup table and applies only the
+change since that sale was last rolled up. Refreshes run after the sale's
+transaction commits, so the sale items created alongside it are included.
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+import logging
+import threading
+import weakref
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.utils import timezone
+
+from .models import Sale, SaleItem
+from .models_sales_archive import ArchivedSale, ArchivedSaleItem
+from .models_sales_rollup import DailySalesRollup, HourlySalesRollup, ProductDailySalesRollup, SaleRollupState
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0')
+
+# table name -> (model, [(key field, parser)]). Every rollup model has a
+# `date` field so a rebuild can clear whole days.
+ROLLUP_TABLES = {
+    'daily': (DailySalesRollup, [('date', date.fromisoformat), ('currency', str), ('payment_method', str)]),
+    'hourly': (HourlySalesRollup, [('date', date.fromisoformat), ('hour', int)]),
+    'product': (ProductDailySalesRollup, [('date', date.fromisoformat), ('product_id', int)]),
+}
+
+INTEGER_METRICS = {'order_count', 'refund_count', 'transaction_count'}
+
+
+def shop_timezone(shop):
+    """The shop's configured business timezone (Africa/Harare unless set otherwise)"""
+    try:
+        return ZoneInfo(shop.timezone or settings.TIME_ZONE)
+    except Exception:
+        return ZoneInfo(settings.TIME_ZONE)
+
+
+def _make_key(*parts):
+    return '|'.join(part.isoformat() if hasattr(part, 'isoformat') else str(part) for part in parts)
+
+
+def _parse_key(table, key):
+    _, key_fields = ROLLUP_TABLES[table]
+    return {name: parser(part) for (name, parser), part in zip(key_fields, key.split('|'))}
+
+
+def _item_costs(items, unit_costs):
+    """Cost price per item id - captured costs win, new items use the product's current cost"""
+    costs = dict(unit_costs)
+    for item in items:
+        if item.id not in costs:
+            # Archived lines keep no product once it is deleted
+            costs[item.id] = Decimal(str(item.product.cost_price or 0)) if item.product else ZERO
+    return costs
+
+
+def sale_contribution(sale, items, unit_costs, tz):
+    """
+    What a sale adds to each rollup table, as {table: {key: {metric: Decimal}}}.
+    Completed sales count as revenue (the dashboards' definition); refunded sales
+    only count towards refunds; pending sales contribute nothing yet.
+    Days and hours are bucketed in the shop's timezone (tz).
+    """
+    local_time = timezone.localtime(sale.created_at, tz)
+    day = local_time.date()
+    item_refunds = sum((item.refund_amount for item in items), ZERO)
+
+    if sale.status == 'completed':
+        items_sold = sum((item.quantity for item in items), ZERO)
+        daily = {
+            'revenue': sale.total_amount,
+            'order_count': Decimal('1'),
+            'items_sold': items_sold,
+            'cost_of_goods': sum((item.quantity * unit_costs.get(item.id, ZERO) for item in items), ZERO),
+            'refund_count': Decimal('1') if item_refunds > 0 else ZERO,
+            'refund_amount': item_refunds,
+        }
+        hourly = {
+            'revenue': sale.total_amount,
+            'transaction_count': Decimal('1'),
+            'items_sold': items_sold,
+        }
+    elif sale.status == 'refunded':
+        daily = {
+            'refund_count': Decimal('1'),
+            'refund_amount': sale.refund_amount or item_refunds,
+        }
+        hourly = None
+    else:
+        return {}
+
+    contribution = {
+        'daily': {_make_key(day, sale.currency, sale.payment_method): daily},
+    }
+    if hourly:
+        contribution['hourly'] = {_make_key(day, local_time.hour): hourly}
+
+    products = {}
+    for item in items:
+        if sale.status == 'completed':
+            metrics = {
+                'quantity_sold': item.quantity,
+                'revenue': item.quantity * item.unit_price,
+                'cost_of_goods': item.quantity * unit_costs.get(item.id, ZERO),
+                'transaction_count': Decimal('1'),
+                'refund_quantity': item.refund_quantity,
+                'refund_amount': item.refund_amount,
+            }
+        else:
+            # A refunded sale without per-item refunds returns every line in full
+            metrics = {
+                'refund_quantity': item.refund_quantity or item.quantity,
+                'refund_amount': item.refund_amount or item.total_price,
+            }
+        product_metrics = products.setdefault(_make_key(day, item.product_id), {})
+        for metric, value in metrics.items():
+            if metric == 'transaction_count':
+                # Several lines of the same product are still one transaction
+                product_metrics[metric] = value
+            else:
+                product_metrics[metric] = product_metrics.get(metric, ZERO) + value
+    if products:
+        contribution['product'] = products
+    return contribution
+
+
+def _serialize(contribution):
+    return {
+        table: {key: {metric: str(value) for metric, value in metrics.items()} for key, metrics in rows.items()}
+        for table, rows in contribution.items()
+    }
+
+
+def _diff(old, new):
+    """Per-key metric deltas between two serialized contributions, zero deltas dropped"""
+    deltas = {}
+    for table in set(old) | set(new):
+        old_rows, new_rows = old.get(table, {}), new.get(table, {})
+        for key in set(old_rows) | set(new_rows):
+            old_metrics, new_metrics = old_rows.get(key, {}), new_rows.get(key, {})
+            changes = {}
+            for metric in set(old_metrics) | set(new_metrics):
+                delta = Decimal(new_metrics.get(metric, '0')) - Decimal(old_metrics.get(metric, '0'))
+                if delta:
+                    changes[metric] = int(delta) if metric in INTEGER_METRICS else delta
+            if changes:
+                deltas.setdefault(table, {})[key] = changes
+    return deltas
+
+
+def _apply_deltas(shop_id, deltas):
+    for table, rows in deltas.items():
+        model, _ = ROLLUP_TABLES[table]
+        for key, changes in rows.items():
+            row, _ = model.objects.get_or_create(shop_id=shop_id, **_parse_key(table, key))
+            model.objects.filter(pk=row.pk).update(
+                **{metric: F(metric) + delta for metric, delta in changes.items()}
+            )
+
+
+def refresh_sale_rollups(sale_id):
+    """Bring every rollup table in line with the sale's current state"""
+    with transaction.atomic():
+        sale = Sale.objects.select_for_update(of=('self',)).select_related('shop').filter(id=sale_id).first()
+        if sale is None:
+            # Archived (or deleted) at close of day - rollups keep the history
+            return
+
+        state = SaleRollupState.objects.filter(sale_id=sale_id).first()
+        items = list(sale.items.select_related('product'))
+        unit_costs = _item_costs(items, state.get_unit_costs() if state else {})
+        contribution = _serialize(sale_contribution(sale, items, unit_costs, shop_timezone(sale.shop)))
+        old_contribution = state.contribution if state else {}
+
+        if state is not None and contribution == old_contribution:
+            return
+
+        _apply_deltas(sale.shop_id, _diff(old_contribution, contribution))
+        SaleRollupState.objects.update_or_create(
+            sale_id=sale_id,
+            defaults={
+                'contribution': contribution,
+                'unit_costs': {str(item_id): str(cost) for item_id, cost in unit_costs.items()},
+            }
+        )
+
+
+def _safe_refresh(sale_id):
+    try:
+        refresh_sale_rollups(sale_id)
+    except Exception as e:
+        logger.error(f"Failed to refresh sales rollups for sale #{sale_id}: {e}")
+
+
+class _PendingRefreshes:
+    """The sales whose rollups one transaction's commit will refresh"""
+
+    def __init__(self):
+        self.sale_ids = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        for sale_id in sorted(self.sale_ids):
+            _safe_refresh(sale_id)
+
+
+# Weak reference to this thread's queued batch: only Django's on-commit list holds
+# the batch, so a rollback that discards the callback also ends the batch
+_pending = threading.local()
+
+
+def schedule_sale_rollup_refresh(sale_id):
+    """
+    Refresh a sale's rollups once its transaction commits.
+    Sales are queued in one batch per transaction and each is refreshed once, so
+    creating a sale with many items (or refunding several items) costs a single refresh.
+    """
+    pending_ref = getattr(_pending, 'batch', None)
+    batch = pending_ref() if pending_ref else None
+    if batch is not None and not batch.done:
+        batch.sale_ids.add(sale_id)
+        return
+
+    batch = _PendingRefreshes()
+    batch.sale_ids.add(sale_id)
+    _pending.batch = weakref.ref(batch)
+    transaction.on_commit(batch)
+
+
+def _local_day_start(day, tz):
+    return timezone.make_aware(datetime.combine(day, time.min), tz)
+
+
+def rebuild_sales_rollups(shop, start_date=None, end_date=None):
+    """
+    Recompute rollups for every shop-local day that has live or archived sales
+    (optionally limited to a date range). A day closed after midnight can have its
+    sales split between the live table and the archive, so both are read. Days
+    whose sales predate the archive (deleted at close of day) are left alone,
+    since their rollups are the only record left.
+    """
+    tz = shop_timezone(shop)
+    bounds = {}
+    if start_date:
+        bounds['created_at__gte'] = _local_day_start(start_date, tz)
+    if end_date:
+        bounds['created_at__lt'] = _local_day_start(end_date + timedelta(days=1), tz)
+
+    live_sales = Sale.objects.filter(shop=shop, **bounds).select_related('rollup_state').prefetch_related(
+        Prefetch('items', queryset=SaleItem.objects.select_related('product'))
+    )
+    archived_sales = ArchivedSale.objects.filter(shop=shop, **bounds).prefetch_related(
+        Prefetch('items', queryset=ArchivedSaleItem.objects.select_related('product'))
+    )
+
+    dates = set()
+    totals = {}
+    states = []
+
+    def add(sale, captured_costs):
+        dates.add(timezone.localtime(sale.created_at, tz).date())
+        items = list(sale.items.all())
+        unit_costs = _item_costs(items, captured_costs)
+        contribution = sale_contribution(sale, items, unit_costs, tz)
+
+        for table, rows in contribution.items():
+            for key, metrics in rows.items():
+                row_totals = totals.setdefault(table, {}).setdefault(key, {})
+                for metric, value in metrics.items():
+                    row_totals[metric] = row_totals.get(metric, ZERO) + value
+        return contribution, unit_costs
+
+    for sale in live_sales:
+        try:
+            captured_costs = sale.rollup_state.get_unit_costs()
+        except SaleRollupState.DoesNotExist:
+            captured_costs = {}
+        contribution, unit_costs = add(sale, captured_costs)
+        states.append(SaleRollupState(
+            sale=sale,
+            contribution=_serialize(contribution),
+            unit_costs={str(item_id): str(cost) for item_id, cost in unit_costs.items()},
+        ))
+
+    # Archived sales lost their captured costs with the live row - current cost prices are used
+    archived = 0
+    for sale in archived_sales:
+        add(sale, {})
+        archived += 1
+
+    with transaction.atomic():
+        for table, (model, _) in ROLLUP_TABLES.items():
+            model.objects.filter(shop=shop, date__in=dates).delete()
+            model.objects.bulk_create([
+                model(
+                    shop=shop,
+                    **_parse_key(table, key),
+                    **{metric: int(value) if metric in INTEGER_METRICS else value for metric, value in metrics.items()}
+                )
+                for key, metrics in totals.get(table, {}).items()
+            ], batch_size=500)
+
+        SaleRollupState.objects.filter(sale_id__in=[state.sale_id for state in states]).delete()
+        SaleRollupState.objects.bulk_create(states, batch_size=500)
+
+    return {'sales': len(states) + archived, 'days': len(dates)}
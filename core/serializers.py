@@ -451,9 +451,15 @@ class StockValuationSerializer(serializers.Serializer):
         shop = products[0].shop if products else None
 
         # Calculate totals with proper business logic
-        total_products = len(products)
-        # STOCK VALUE: Never negative - using model property for consistency
-        total_stock_value = sum(p.stock_value for p in products)
+        # Prefer the incrementally maintained inventory summary when the view supplies it
+        inventory_summary = obj.get('inventory_summary')
+        if inventory_summary is not None:
+            total_products = inventory_summary.total_products
+            total_stock_value = inventory_summary.total_value
+        else:
+            total_products = len(products)
+            # STOCK VALUE: Never negative - using model property for consistency
+            total_stock_value = sum(p.stock_value for p in products)
         total_items_in_stock = sum(p.actual_stock_quantity for p in products)  # Also prevent negative stock in totals
 
         # Calculate overall sales and GP (excluding refunded amounts)
@@ -500,7 +506,10 @@ class StockValuationSerializer(serializers.Serializer):
         overall_net_margin = (net_profit / total_sales_amount) * 100 if total_sales_amount > 0 else 0
 
         # Low stock products
-        low_stock_products = sum(1 for p in products if p.is_low_stock)
+        if inventory_summary is not None:
+            low_stock_products = inventory_summary.low_stock_count
+        else:
+            low_stock_products = sum(1 for p in products if p.is_low_stock)
 
         # Calculate slow/fast moving and aging products from the processed data
         slow_moving_products = 0
@@ -508,20 +517,15 @@ class StockValuationSerializer(serializers.Serializer):
         aging_products = 0
         old_products = 0
 
-        # We need to process each product to calculate these metrics
+        # 90-day sales per product from the product-day sales rollup (one grouped query)
+        from .models import ProductDailySalesRollup
+        today = timezone.localdate()
+        product_sales = ProductDailySalesRollup.product_totals(shop, today - timedelta(days=90), today) if shop else {}
+
         for product in products:
-            # Get sales data for this product
-            sales_data = SaleItem.objects.filter(
-                product=product,
-                sale__shop=shop,
-                sale__created_at__gte=timezone.now() - timezone.timedelta(days=90)
-            ).aggregate(
-                total_quantity=Sum('quantity'),
-                total_sales=Sum(F('quantity') * F('unit_price'))
-            )
-
-            total_quantity_sold = sales_data['total_quantity'] or 0
-            total_sales_amount = sales_data['total_sales'] or 0
+            sales_data = product_sales.get(product.id, {})
+            total_quantity_sold = sales_data.get('quantity_sold', 0)
+            total_sales_amount = sales_data.get('revenue', 0)
             days_in_stock = (timezone.now().date() - product.created_at.date()).days
             avg_daily_sales = total_quantity_sold / max(days_in_stock, 1)
 
@@ -1,7 +1,16 @@
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from core.models import Sale, CashFloat, StaffLunch, ShopDay
+from core.models import Sale, SaleItem, CashFloat, StaffLunch, ShopDay, Product, Shift, Cashier, Waste, StockTransfer, ShopConfiguration
+from core.models_drawer_balances import DrawerBalance, sale_drawer_state, sale_contribution, needs_exchange_rate
+from core.models_reconciliation import CashierCount
+from core.models_reconciliation_snapshot import (
+    ReconciliationSnapshot, sale_snapshot_state, sale_snapshot_cells, lunch_snapshot_cells, snapshot_deltas
+)
+from core.models_inventory_summary import ShopInventorySummary, product_inventory_state
+from core.sales_rollups import schedule_sale_rollup_refresh
+from core.dashboard_cache import invalidate_shop_caches, invalidate_drawer_status
+from core.live_events import publish_on_commit
 from django.utils import timezone
 from core.models_exchange_rates import ExchangeRate
 from django.db.models import Sum
@@ -32,330 +41,224 @@ def auto_create_reconciliation_session(sender, instance, created, **kwargs):
         except Exception as e:
             logger.error(f"Failed to auto-create reconciliation session: {e}")
 
+@receiver(post_save, sender=Product)
+def update_inventory_summary_on_product_save(sender, instance, created, **kwargs):
+    """
+    Keep the shop inventory summary in step with product stock/cost changes.
+    Only the difference between the previous and new state is applied.
+    """
+    try:
+        old_state = None if created else getattr(instance, '_inventory_state', None)
+        new_state = product_inventory_state(instance)
+        if old_state is None and not created:
+            # Instance wasn't loaded from the DB, so the previous state is unknown
+            ShopInventorySummary.rebuild_for_shop(instance.shop)
+        else:
+            ShopInventorySummary.apply_product_change(instance.shop_id, old_state, new_state)
+        instance._inventory_state = new_state
+    except Exception as e:
+        logger.error(f"Error updating inventory summary for product {instance.id}: {str(e)}")
+
+
+@receiver(post_delete, sender=Product)
+def update_inventory_summary_on_product_delete(sender, instance, **kwargs):
+    """Remove a deleted product's contribution from the shop inventory summary"""
+    try:
+        old_state = getattr(instance, '_inventory_state', None) or product_inventory_state(instance)
+        ShopInventorySummary.apply_product_change(instance.shop_id, old_state, None)
+    except Exception as e:
+        logger.error(f"Error updating inventory summary for deleted product {instance.id}: {str(e)}")
+
+
 @receiver(post_save, sender=Sale)
-def update_cash_float_on_sale(sender, instance, created, **kwargs):
+def update_sales_rollups_on_sale(sender, instance, **kwargs):
+    """Roll a sale into the sales rollups once it commits (items included)"""
+    try:
+        schedule_sale_rollup_refresh(instance.id)
+    except Exception as e:
+        logger.error(f"Error scheduling sales rollup refresh for sale {instance.id}: {str(e)}")
+
+
+@receiver(post_save, sender=SaleItem)
+def update_sales_rollups_on_sale_item(sender, instance, **kwargs):
+    """Item refunds change the sale's rollup contribution"""
+    try:
+        schedule_sale_rollup_refresh(instance.sale_id)
+    except Exception as e:
+        logger.error(f"Error scheduling sales rollup refresh for sale {instance.sale_id}: {str(e)}")
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ShopDay)
+@receiver(post_save, sender=Shift)
+@receiver(post_save, sender=Cashier)
+@receiver(post_delete, sender=Cashier)
+@receiver(post_save, sender=Waste)
+@receiver(post_delete, sender=Waste)
+@receiver(post_save, sender=StockTransfer)
+def invalidate_shop_caches_on_change(sender, instance, **kwargs):
     """
-    Automatically update cash float drawer when a sale is created or updated
-    ENHANCED: Now tracks currency-specific drawer amounts
-    CRITICAL FIX: Uses proper timezone-aware date filtering to only show today's sales
+    Drop the cached owner dashboard and start a new analytics data generation when
+    anything they show changes (registered after the rollup refresh)
     """
     try:
-        # Mark that we've updated the cash float to avoid recursive updates
-        instance._cash_float_updated = True
-
-        # Get the shop and cashier
-        shop = instance.shop
-        cashier = instance.cashier
-
-        # CRITICAL FIX: Use timezone-aware datetime range for proper date filtering
-        # This ensures we only get today's sales regardless of server timezone
-        today = timezone.localdate()  # Local date (Africa/Harare)
-
-        # Create proper timezone-aware datetime range for the local day
-        # This ensures we capture all sales made during local business hours (00:00 to 23:59:59 local time)
-        day_start = timezone.make_aware(
-            datetime.datetime.combine(today, datetime.time.min),
-            timezone.get_current_timezone()
-        )
-        day_end = timezone.make_aware(
-            datetime.datetime.combine(today, datetime.time.max),
-            timezone.get_current_timezone()
-        )
+        invalidate_shop_caches(instance.shop_id)
+    except Exception as e:
+        logger.error(f"Error invalidating shop caches: {str(e)}")
 
-        logger.info(f"Processing sale for drawer update - Local date: {today}, Range: {day_start} to {day_end}")
 
-        # Get or create the drawer for today
-        drawer, created_drawer = CashFloat.objects.get_or_create(
-            shop=shop,
-            cashier=cashier,
-            date=today,
-            defaults={
-                'status': 'ACTIVE',
-                'float_amount': Decimal('0.00'),
-                # Legacy fields
-                'current_cash': Decimal('0.00'),
-                'current_card': Decimal('0.00'),
-                'current_ecocash': Decimal('0.00'),
-                'current_transfer': Decimal('0.00'),
-                'current_total': Decimal('0.00'),
-                'session_cash_sales': Decimal('0.00'),
-                'session_card_sales': Decimal('0.00'),
-                'session_ecocash_sales': Decimal('0.00'),
-                'session_transfer_sales': Decimal('0.00'),
-                'session_total_sales': Decimal('0.00'),
-                'expected_cash_at_eod': Decimal('0.00'),
-                # Currency-specific fields
-                'current_cash_usd': Decimal('0.00'),
-                'current_cash_zig': Decimal('0.00'),
-                'current_cash_rand': Decimal('0.00'),
-                'current_card_usd': Decimal('0.00'),
-                'current_card_zig': Decimal('0.00'),
-                'current_card_rand': Decimal('0.00'),
-                'current_ecocash_usd': Decimal('0.00'),
-                'current_ecocash_zig': Decimal('0.00'),
-                'current_ecocash_rand': Decimal('0.00'),
-                'current_transfer_usd': Decimal('0.00'),
-                'current_transfer_zig': Decimal('0.00'),
-                'current_transfer_rand': Decimal('0.00'),
-                'current_total_usd': Decimal('0.00'),
-                'current_total_zig': Decimal('0.00'),
-                'current_total_rand': Decimal('0.00'),
-                'session_cash_sales_usd': Decimal('0.00'),
-                'session_cash_sales_zig': Decimal('0.00'),
-                'session_cash_sales_rand': Decimal('0.00'),
-                'session_card_sales_usd': Decimal('0.00'),
-                'session_card_sales_zig': Decimal('0.00'),
-                'session_card_sales_rand': Decimal('0.00'),
-                'session_ecocash_sales_usd': Decimal('0.00'),
-                'session_ecocash_sales_zig': Decimal('0.00'),
-                'session_ecocash_sales_rand': Decimal('0.00'),
-                'session_transfer_sales_usd': Decimal('0.00'),
-                'session_transfer_sales_zig': Decimal('0.00'),
-                'session_transfer_sales_rand': Decimal('0.00'),
-                'session_total_sales_usd': Decimal('0.00'),
-                'session_total_sales_zig': Decimal('0.00'),
-                'session_total_sales_rand': Decimal('0.00')
-            }
-        )
+@receiver(post_save, sender=Sale)
+def publish_sale_event(sender, instance, created, **kwargs):
+    """Tell live streams about new sales and status changes (refunds) once committed"""
+    try:
+        publish_on_commit(instance.shop_id, 'sale', {
+            'sale_id': instance.id,
+            'created': created,
+            'cashier_id': instance.cashier_id,
+            'status': instance.status,
+            'total_amount': float(instance.total_amount or 0),
+            'refund_amount': float(instance.refund_amount or 0),
+            'payment_currency': instance.payment_currency,
+            'payment_method': instance.payment_method,
+            'created_at': instance.created_at.isoformat() if instance.created_at else None
+        })
+    except Exception as e:
+        logger.error(f"Error publishing sale event for sale {instance.id}: {str(e)}")
 
-        # If drawer was just created, activate it
-        if created_drawer:
-            drawer.status = 'ACTIVE'
 
-        # Add the sale to the drawer with currency tracking
-        sale_amount = Decimal(str(instance.total_amount))
-        payment_method = instance.payment_method
-        payment_currency = instance.payment_currency or 'USD'
+@receiver(post_save, sender=CashFloat)
+def publish_drawer_event(sender, instance, **kwargs):
+    """Drawer status and float changes for live streams"""
+    try:
+        publish_on_commit(instance.shop_id, 'drawer', {
+            'drawer_id': instance.pk,
+            'cashier_id': instance.cashier_id,
+            'date': instance.date.isoformat() if instance.date else None,
+            'status': instance.status,
+            'float_amount': float(instance.float_amount or 0)
+        })
+    except Exception as e:
+        logger.error(f"Error publishing drawer event: {str(e)}")
+
 
-        logger.info(f"Processing sale: ${sale_amount} {payment_method} in {payment_currency} by {cashier.name} (Sale ID: {instance.id})")
+@receiver(post_save, sender=ShopDay)
+def publish_shop_day_event(sender, instance, **kwargs):
+    """Shop opened, closing or closed"""
+    try:
+        publish_on_commit(instance.shop_id, 'shop_day', {
+            'shop_day_id': instance.pk,
+            'date': instance.date.isoformat() if instance.date else None,
+            'status': instance.status
+        })
+    except Exception as e:
+        logger.error(f"Error publishing shop day event: {str(e)}")
 
-        # Ensure drawer is active
-        if drawer.status != 'ACTIVE':
-            drawer.status = 'ACTIVE'
 
-        # CRITICAL FIX: Use proper timezone-aware datetime range for filtering
-        # This ensures we ONLY count sales from TODAY (local time), not old sales
-        actual_sales_today = Sale.objects.filter(
-            shop=shop,
-            cashier=cashier,
-            created_at__range=[day_start, day_end],
-            status='completed'
-        )
+@receiver(post_save, sender=CashFloat)
+@receiver(post_delete, sender=CashFloat)
+def invalidate_drawer_status_on_change(sender, instance, **kwargs):
+    """Drawer floats, balances and statuses feed the cached shop drawer status"""
+    try:
+        invalidate_drawer_status(instance.shop_id)
+    except Exception as e:
+        logger.error(f"Error invalidating drawer status cache: {str(e)}")
 
-        logger.info(f"Signal processing {actual_sales_today.count()} sales for {cashier.name} on {today}")
-        for sale in actual_sales_today:
-            logger.info(f"  Sale {sale.id}: {sale.payment_method} {sale.payment_currency} ${sale.total_amount}")
 
-        logger.info(f"Found {actual_sales_today.count()} completed sales for today ({today})")
+@receiver(post_save, sender=SaleItem)
+def invalidate_shop_caches_on_sale_item(sender, instance, **kwargs):
+    """Item refunds change the dashboard and analytics figures too"""
+    try:
+        invalidate_shop_caches(instance.sale.shop_id)
+    except Exception as e:
+        logger.error(f"Error invalidating shop caches: {str(e)}")
 
-        # Fetch current exchange rates
-        try:
-            exchange_rates = ExchangeRate.get_current_rates()
-        except Exception as e:
-            logger.error(f"Could not fetch exchange rates: {e}")
-            exchange_rates = None
-
-        # Calculate actual totals from database by payment_currency and payment method
-        # CRITICAL FIX: Handle both single payments and split payments
-        from .models import SalePayment
-
-        # Initialize currency totals
-        currency_totals = {
-            'USD': {'cash': Decimal('0.00'), 'card': Decimal('0.00'), 'ecocash': Decimal('0.00'), 'transfer': Decimal('0.00'), 'total': Decimal('0.00')},
-            'ZIG': {'cash': Decimal('0.00'), 'card': Decimal('0.00'), 'ecocash': Decimal('0.00'), 'transfer': Decimal('0.00'), 'total': Decimal('0.00')},
-            'RAND': {'cash': Decimal('0.00'), 'card': Decimal('0.00'), 'ecocash': Decimal('0.00'), 'transfer': Decimal('0.00'), 'total': Decimal('0.00')}
-        }
-
-
-        # Process split payments - aggregate from SalePayment records
-        split_sales = actual_sales_today.filter(payment_method='split')
-        for sale in split_sales:
-            # Get all payments for this sale
-            sale_payments = SalePayment.objects.filter(sale=sale)
-            for payment in sale_payments:
-                currency = payment.currency
-                method = payment.payment_method
-                amount = payment.amount
-                amount_received = payment.amount_received
-
-                # Add the sale amount to currency totals
-                # Use amount_received for cash inflow if available to track physical cash
-                amount_to_add = amount
-                if method == 'cash' and amount_received is not None:
-                    amount_to_add = amount_received
-
-                if currency in currency_totals and method in currency_totals[currency]:
-                    currency_totals[currency][method] += amount_to_add
-                    currency_totals[currency]['total'] += amount_to_add
-
-                # Calculate change for this specific payment method if amount_received is provided
-                if amount_received and amount_received > amount:
-                    change_amount = amount_received - amount
-
-                    # STRICT LOGIC: Deduct change from the SAME currency as payment
-                    # This prevents negative balances in other currencies
-                    if currency in currency_totals:
-                        currency_totals[currency]['cash'] -= change_amount
-                        currency_totals[currency]['total'] -= change_amount
-                        logger.info(f"Deducting change {change_amount} {currency} from drawer")
-
-        # Process single payments (non-split)
-        single_sales = actual_sales_today.exclude(payment_method='split')
-        for sale in single_sales:
-            # Use the saved total_amount which is already in payment_currency
-            # Do NOT recalculate from items as they might be in a different base currency
-            sale_amount = sale.total_amount
-            payment_method = sale.payment_method
-            payment_currency = sale.payment_currency or 'USD'
-
-            # Determine amount received (in payment currency)
-            amount_received = sale.amount_received if sale.amount_received is not None else sale_amount
-
-            # Add inflow to drawer (Amount Received)
-            if payment_currency in currency_totals and payment_method in currency_totals[payment_currency]:
-                currency_totals[payment_currency][payment_method] += amount_received
-                currency_totals[payment_currency]['total'] += amount_received
-                logger.info(f"Sale {sale.id}: Added {amount_received} to {payment_currency} {payment_method}")
-
-            # Handle change for cash payments
-            if payment_method == 'cash' and amount_received > sale_amount:
-                change_amount = amount_received - sale_amount
-                
-                # HYBRID LOGIC for USD: Split change into Notes (USD) and Cents (ZIG)
-                if payment_currency == 'USD':
-                    change_int_usd = int(change_amount)
-                    change_frac_usd = change_amount - Decimal(change_int_usd)
-                    
-                    # Deduct Integer USD (Notes) from drawer
-                    if change_int_usd > 0:
-                        currency_totals['USD']['cash'] -= Decimal(change_int_usd)
-                        currency_totals['USD']['total'] -= Decimal(change_int_usd)
-                        logger.info(f"Deducting change {change_int_usd} USD from drawer")
-                    
-                    # Deduct Fractional part (converted to ZIG) from drawer
-                    if change_frac_usd > 0:
-                        if exchange_rates:
-                            try:
-                                change_zig = exchange_rates.convert_amount(change_frac_usd, 'USD', 'ZIG')
-                                currency_totals['ZIG']['cash'] -= change_zig
-                                currency_totals['ZIG']['total'] -= change_zig
-                                logger.info(f"Deducting change {change_zig} ZIG (from {change_frac_usd} USD) from drawer")
-                            except Exception as e:
-                                logger.error(f"Error converting fractional change to ZIG: {e}")
-                                # Fallback: deduct from USD if conversion fails
-                                currency_totals['USD']['cash'] -= change_frac_usd
-                                currency_totals['USD']['total'] -= change_frac_usd
-                        else:
-                            # No rates available, deduct from USD
-                            currency_totals['USD']['cash'] -= change_frac_usd
-                            currency_totals['USD']['total'] -= change_frac_usd
-                
-                # STANDARD LOGIC for ZIG/RAND: Deduct full change from same currency
-                elif payment_currency in currency_totals:
-                    currency_totals[payment_currency]['cash'] -= change_amount
-                    currency_totals[payment_currency]['total'] -= change_amount
-                    logger.info(f"Deducting change {change_amount} {payment_currency} from drawer")
-
-        # Update drawer currency-specific fields
-        for currency_code, totals in currency_totals.items():
-            if currency_code == 'USD':
-                drawer.session_cash_sales_usd = totals['cash']
-                drawer.session_card_sales_usd = totals['card']
-                drawer.session_ecocash_sales_usd = totals['ecocash']
-                drawer.session_transfer_sales_usd = totals['transfer']
-                drawer.session_total_sales_usd = totals['total']
-                drawer.current_cash_usd = drawer.float_amount + totals['cash']
-                drawer.current_card_usd = totals['card']
-                drawer.current_ecocash_usd = totals['ecocash']
-                drawer.current_transfer_usd = totals['transfer']
-                drawer.current_total_usd = totals['total']
-            elif currency_code == 'ZIG':
-                drawer.session_cash_sales_zig = totals['cash']
-                drawer.session_card_sales_zig = totals['card']
-                drawer.session_ecocash_sales_zig = totals['ecocash']
-                drawer.session_transfer_sales_zig = totals['transfer']
-                drawer.session_total_sales_zig = totals['total']
-                drawer.current_cash_zig = drawer.float_amount_zig + totals['cash']
-                drawer.current_card_zig = totals['card']
-                drawer.current_ecocash_zig = totals['ecocash']
-                drawer.current_transfer_zig = totals['transfer']
-                drawer.current_total_zig = totals['total']
-            elif currency_code == 'RAND':
-                drawer.session_cash_sales_rand = totals['cash']
-                drawer.session_card_sales_rand = totals['card']
-                drawer.session_ecocash_sales_rand = totals['ecocash']
-                drawer.session_transfer_sales_rand = totals['transfer']
-                drawer.session_total_sales_rand = totals['total']
-                drawer.current_cash_rand = drawer.float_amount_rand + totals['cash']
-                drawer.current_card_rand = totals['card']
-                drawer.current_ecocash_rand = totals['ecocash']
-                drawer.current_transfer_rand = totals['transfer']
-                drawer.current_total_rand = totals['total']
-
-        # Update legacy fields for backward compatibility using PRIMARY CURRENCY
-        # Determine primary currency based on total sales
-        usd_total = drawer.session_total_sales_usd
-        zig_total = drawer.session_total_sales_zig
-        rand_total = drawer.session_total_sales_rand
-
-        primary_currency = 'USD'
-        if zig_total > 0:
-            primary_currency = 'ZIG'
-        elif rand_total > 0:
-            primary_currency = 'RAND'
-        elif usd_total > 0:
-            primary_currency = 'USD'
-
-        logger.info(f"Setting legacy fields to {primary_currency} values: USD=${usd_total}, ZIG={zig_total}, RAND={rand_total}")
-
-        # Set legacy fields to primary currency values
-        if primary_currency == 'ZIG':
-            drawer.session_cash_sales = drawer.session_cash_sales_zig
-            drawer.session_card_sales = drawer.session_card_sales_zig
-            drawer.session_ecocash_sales = drawer.session_ecocash_sales_zig
-            drawer.session_transfer_sales = drawer.session_transfer_sales_zig
-            drawer.session_total_sales = drawer.session_total_sales_zig
-
-            drawer.current_cash = drawer.current_cash_zig
-            drawer.current_card = drawer.current_card_zig
-            drawer.current_ecocash = drawer.current_ecocash_zig
-            drawer.current_transfer = drawer.current_transfer_zig
-            drawer.current_total = drawer.current_total_zig
-        elif primary_currency == 'RAND':
-            drawer.session_cash_sales = drawer.session_cash_sales_rand
-            drawer.session_card_sales = drawer.session_card_sales_rand
-            drawer.session_ecocash_sales = drawer.session_ecocash_sales_rand
-            drawer.session_transfer_sales = drawer.session_transfer_sales_rand
-            drawer.session_total_sales = drawer.session_total_sales_rand
-
-            drawer.current_cash = drawer.current_cash_rand
-            drawer.current_card = drawer.current_card_rand
-            drawer.current_ecocash = drawer.current_ecocash_rand
-            drawer.current_transfer = drawer.current_transfer_rand
-            drawer.current_total = drawer.current_total_rand
+
+@receiver(post_save, sender=ExchangeRate)
+def invalidate_shop_caches_on_exchange_rate(sender, instance, **kwargs):
+    """Exchange rates are global, so every shop's cached figures are affected"""
+    try:
+        for shop_id in ShopConfiguration.objects.values_list('id', flat=True):
+            invalidate_shop_caches(shop_id)
+    except Exception as e:
+        logger.error(f"Error invalidating shop caches: {str(e)}")
+
+
+@receiver(post_save, sender=Sale)
+def update_cash_float_on_sale(sender, instance, created, **kwargs):
+    """
+    Keep the cashier's drawer for today in step with the sale.
+    Only the difference between what the sale put in the drawer before this save and
+    what it puts in now is applied, as atomic increments on the balance cells it
+    touches. A sale whose previous state is unknown rebuilds the drawer instead.
+    """
+    instance._drawer_change = None
+    try:
+        old_state = getattr(instance, '_drawer_state', None)
+        new_state = sale_drawer_state(instance)
+        is_split = 'split' in (new_state['payment_method'], (old_state or {}).get('payment_method'))
+        payments = list(instance.payments.all()) if is_split else []
+        exchange_rates = None
+        if needs_exchange_rate(new_state) or needs_exchange_rate(old_state):
+            try:
+                exchange_rates = ExchangeRate.get_current_rates()
+            except Exception as e:
+                logger.error(f"Could not fetch exchange rates: {e}")
+
+        new_cells = sale_contribution(new_state, payments, exchange_rates)
+        if created:
+            old_cells = {}
+        elif getattr(instance, '_drawer_contribution', None) is not None:
+            old_cells = instance._drawer_contribution
+        elif old_state is not None:
+            old_cells = sale_contribution(old_state, payments, exchange_rates)
+        else:
+            old_cells = None
+
+        # The reconciliation snapshot applies the same change, see update_reconciliation_snapshot_on_sale
+        instance._drawer_change = (old_cells, new_cells)
+
+        # Only today's drawer tracks sales (local business day, Africa/Harare)
+        today = timezone.localdate()
+        if timezone.localtime(instance.created_at).date() != today:
+            instance._drawer_state = new_state
+            instance._drawer_contribution = new_cells
+            return
+
+        drawer, created_drawer = CashFloat.objects.get_or_create(
+            shop_id=instance.shop_id,
+            cashier_id=instance.cashier_id,
+            date=today,
+            defaults={'status': 'ACTIVE', 'float_amount': Decimal('0.00')}
+        )
+        if not created_drawer:
+            # Ensure drawer is active - a narrow update, the balance cells are applied below
+            CashFloat.objects.filter(pk=drawer.pk).update(status='ACTIVE', last_activity=timezone.now())
+
+        if old_cells is None:
+            DrawerBalance.rebuild_for_drawer(drawer)
+            changes = None
         else:
-            drawer.session_cash_sales = drawer.session_cash_sales_usd
-            drawer.session_card_sales = drawer.session_card_sales_usd
-            drawer.session_ecocash_sales = drawer.session_ecocash_sales_usd
-            drawer.session_transfer_sales = drawer.session_transfer_sales_usd
-            drawer.session_total_sales = drawer.session_total_sales_usd
-
-            drawer.current_cash = drawer.current_cash_usd
-            drawer.current_card = drawer.current_card_usd
-            drawer.current_ecocash = drawer.current_ecocash_usd
-            drawer.current_transfer = drawer.current_transfer_usd
-            drawer.current_total = drawer.current_total_usd
-
-        # Update expected cash at EOD (use primary currency's cash sales + float)
-        # CRITICAL FIX: Always update expected_cash_at_eod for ALL currencies, not just primary
-        # This ensures variance calculation works correctly for all currencies
-        drawer.expected_cash_at_eod = drawer.float_amount + drawer.session_cash_sales_usd
-        drawer.expected_cash_usd = drawer.float_amount + drawer.session_cash_sales_usd
-        drawer.expected_cash_zig = drawer.float_amount_zig + drawer.session_cash_sales_zig
-        drawer.expected_cash_rand = drawer.float_amount_rand + drawer.session_cash_sales_rand
-
-        # Also call the model's method for additional consistency
-        drawer.update_expected_cash()
+            deltas = {}
+            for key in set(new_cells) | set(old_cells):
+                delta = new_cells.get(key, Decimal('0.00')) - old_cells.get(key, Decimal('0.00'))
+                deltas[key] = (delta, delta)
+            DrawerBalance.apply(drawer.pk, deltas)
+            changes = [[currency, method, float(delta)] for (currency, method), (delta, _) in deltas.items() if delta]
+
+        # Live streams get the cells' deltas; a rebuilt drawer has to be refetched
+        publish_on_commit(instance.shop_id, 'drawer_totals', {
+            'drawer_id': drawer.pk,
+            'cashier_id': instance.cashier_id,
+            'sale_id': instance.id,
+            'changes': changes,
+            'rebuilt': changes is None
+        })
+
+        instance._drawer_state = new_state
+        instance._drawer_contribution = new_cells
+        logger.info(f"Drawer for {instance.cashier_id} on {today} updated for sale {instance.id}: {new_cells}")
 
         # PERMANENT FIX: Staff lunch is ONLY deducted in CashierCount.update_from_cash_float()
         # when calculating the expected amount for reconciliation.
@@ -364,16 +267,68 @@ def update_cash_float_on_sale(sender, instance, created, **kwargs):
         # 2. Staff lunch is a deduction from what the cashier needs to account for
         # 3. Expected amount = Float + Sales - Staff Lunch
         # 4. If we deduct lunch from both drawer AND expected, we get double-deduction
-        #
-        # The drawer fields (current_cash, session_cash_sales) show raw sales data.
-        # The expected_cash_at_eod already includes the calculation in update_expected_cash().
 
-        # Update last activity
-        drawer.last_activity = timezone.now()
-        drawer.save()
+    except Exception as e:
+        logger.error(f"Error updating cash float for sale {instance.id}: {str(e)}")
+        # Don't raise the exception to avoid breaking the sale creation
+
+
+@receiver(post_save, sender=Sale)
+def update_reconciliation_snapshot_on_sale(sender, instance, created, **kwargs):
+    """
+    Apply the sale's change to the reconciliation snapshot, reusing the drawer cells
+    update_cash_float_on_sale worked out for this save (registered after it). A sale
+    whose previous state is unknown rebuilds its day instead.
+    """
+    try:
+        new_state = sale_snapshot_state(instance)
+        old_state = None if created else getattr(instance, '_snapshot_state', None)
+        drawer_change = getattr(instance, '_drawer_change', None)
 
-        logger.info(f"Drawer synchronized with actual sales by currency for {today}. Total USD: ${drawer.current_total_usd}, ZIG: {drawer.current_total_zig}, RAND: {drawer.current_total_rand}")
+        if drawer_change is None or drawer_change[0] is None or (not created and old_state is None):
+            ReconciliationSnapshot.rebuild(instance.shop_id, new_state['day'])
+        else:
+            old_drawer_cells, new_drawer_cells = drawer_change
+            ReconciliationSnapshot.apply(instance.shop_id, snapshot_deltas(
+                sale_snapshot_cells(old_state, old_drawer_cells),
+                sale_snapshot_cells(new_state, new_drawer_cells)
+            ))
+        instance._snapshot_state = new_state
+    except Exception as e:
+        logger.error(f"Error updating reconciliation snapshot for sale {instance.id}: {str(e)}")
 
+
+@receiver(post_save, sender=StaffLunch)
+def update_reconciliation_snapshot_on_lunch(sender, instance, created, **kwargs):
+    """New lunches are added to the snapshot; an edited one rebuilds its day"""
+    try:
+        if created:
+            ReconciliationSnapshot.apply(instance.shop_id, lunch_snapshot_cells(instance))
+        else:
+            ReconciliationSnapshot.rebuild(instance.shop_id, timezone.localtime(instance.created_at).date())
     except Exception as e:
-        logger.error(f"Error updating cash float for sale {instance.id}: {str(e)}")
-        # Don't raise the exception to avoid breaking the sale creation
\ No newline at end of file
+        logger.error(f"Error updating reconciliation snapshot for staff lunch {instance.id}: {str(e)}")
+
+
+@receiver(post_delete, sender=StaffLunch)
+def remove_lunch_from_reconciliation_snapshot(sender, instance, **kwargs):
+    try:
+        ReconciliationSnapshot.apply(instance.shop_id, snapshot_deltas(lunch_snapshot_cells(instance), {}))
+    except Exception as e:
+        logger.error(f"Error updating reconciliation snapshot for staff lunch {instance.id}: {str(e)}")
+
+
+@receiver(post_save, sender=CashierCount)
+def update_reconciliation_snapshot_on_count(sender, instance, **kwargs):
+    try:
+        ReconciliationSnapshot.set_cashier_count(instance)
+    except Exception as e:
+        logger.error(f"Error updating reconciliation snapshot for cashier count {instance.id}: {str(e)}")
+
+
+@receiver(post_delete, sender=CashierCount)
+def remove_count_from_reconciliation_snapshot(sender, instance, **kwargs):
+    try:
+        ReconciliationSnapshot.clear(instance.shop_id, ('expected', 'counted'), days=[instance.date], cashier_id=instance.cashier_id)
+    except Exception as e:
+        logger.error(f"Error updating reconciliation snapshot for cashier count {instance.id}: {str(e)}")
@@ -0,0 +1,232 @@
+"""
+Incremental totals - sales rollups, the reconciliation snapshot and drawer balance
+cells - are adjusted as each sale is saved. These tests drive sales through the
+same paths the till uses and check the incremental figures land where a full
+rebuild from the sales would put them.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import (
+    ShopConfiguration, Cashier, Product, Sale, ShopDay, CashFloat,
+    DailySalesRollup, HourlySalesRollup, ProductDailySalesRollup, ReconciliationSnapshot
+)
+from .models_exchange_rates import ExchangeRate
+from .models_drawer_balances import DrawerBalance
+from .models_sales_archive import ArchivedSale
+from .models_eod_job import EndOfDayJob
+from .drawer_totals import drawer_totals, empty_totals
+from .sales_rollups import rebuild_sales_rollups
+
+ROLLUP_MODELS = (DailySalesRollup, HourlySalesRollup, ProductDailySalesRollup)
+
+
+def rollup_rows(shop):
+    """Every rollup row with a non-zero metric, as comparable tuples"""
+    rows = set()
+    for model in ROLLUP_MODELS:
+        keys = [field.attname for field in model._meta.concrete_fields
+                if field.attname not in model.METRIC_FIELDS + ['id', 'shop_id', 'updated_at']]
+        for row in model.objects.filter(shop=shop).values(*keys, *model.METRIC_FIELDS):
+            metrics = tuple(Decimal(str(row[field])) for field in model.METRIC_FIELDS)
+            if any(metrics):
+                rows.add((model.__name__,) + tuple(row[key] for key in keys) + metrics)
+    return rows
+
+
+def snapshot_rows(shop):
+    """Every reconciliation snapshot row with a non-zero amount or count"""
+    return {
+        (day, cashier_id, kind, currency, method, Decimal(str(amount)), count)
+        for day, cashier_id, kind, currency, method, amount, count in ReconciliationSnapshot.objects.filter(
+            shop=shop
+        ).values_list('date', 'cashier_id', 'kind', 'currency', 'method', 'amount', 'count')
+        if amount or count
+    }
+
+
+class TillTestCase(TestCase):
+    """A shop open for the day with a cashier, a few products and a USD:ZiG rate of 25"""
+
+    def setUp(self):
+        self.shop = ShopConfiguration.objects.create(
+            register_id='T0001', name='Test Shop', address='1 Main St', email='owner@example.com',
+            phone='0770000000', shop_owner_master_password='owner-pass'
+        )
+        self.cashier = Cashier.objects.create(shop=self.shop, name='Tendai', status='active')
+        ExchangeRate.objects.create(date=timezone.localdate(), usd_to_zig=Decimal('25'), usd_to_rand=Decimal('18.5'))
+        self.shop_day = ShopDay.objects.create(shop=self.shop, date=timezone.localdate(), status='OPEN',
+                                               opened_at=timezone.now())
+        self.bread = Product.objects.create(shop=self.shop, name='Bread', price=Decimal('2.50'),
+                                            cost_price=Decimal('1.50'), stock_quantity=100, line_code='BRD')
+        self.milk = Product.objects.create(shop=self.shop, name='Milk', price=Decimal('4.00'),
+                                           cost_price=Decimal('3.00'), stock_quantity=100, line_code='MLK')
+
+    def sell(self, items, **payment):
+        """Ring up a sale through the sales endpoint, running its on-commit work"""
+        data = {
+            'cashier_id': self.cashier.id,
+            'items': [{'product_id': str(product.id), 'quantity': str(quantity)} for product, quantity in items],
+            **payment,
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/shop/sales/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Sale.objects.get(id=response.json()['id'])
+
+    def refund_item(self, item, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/v1/shop/sale-items/{item.id}/', {
+                'quantity': quantity, 'refund_type': 'cash', 'password': 'owner-pass'
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def refund_sale(self, sale):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/v1/shop/sales/{sale.id}/', {
+                'action': 'refund', 'refund_type': 'cash', 'password': 'owner-pass',
+                'refund_items': [{'item_id': item.id, 'quantity': int(item.remaining_quantity)}
+                                 for item in sale.items.all()],
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def ring_up_a_day(self):
+        """Cash with change, card, split and ZiG sales, then a refund and an edit"""
+        change_sale = self.sell([(self.bread, 1)], payment_method='cash', payment_currency='USD',
+                                amount_received='5.00')
+        self.sell([(self.milk, 2), (self.bread, 2)], payment_method='card', payment_currency='USD')
+        self.sell([(self.milk, 3)], payment_method='split', payments=[
+            {'payment_method': 'cash', 'currency': 'USD', 'amount': '10.00', 'amount_received': '12.00'},
+            {'payment_method': 'ecocash', 'currency': 'ZIG', 'amount': '50.00'},
+        ])
+        refunded = self.sell([(self.bread, 4)], payment_method='cash', payment_currency='USD',
+                             amount_received='10.00')
+        partly_refunded = self.sell([(self.milk, 3)], payment_method='ecocash', payment_currency='USD')
+
+        self.refund_sale(refunded)
+        self.refund_item(partly_refunded.items.get(), 1)
+
+        # Edit the change sale into a two-loaf card sale
+        item = change_sale.items.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            item.quantity = Decimal('2')
+            item.total_price = item.unit_price * 2
+            item.save()
+            change_sale.refresh_from_db()
+            change_sale.total_amount = item.total_price
+            change_sale.payment_method = 'card'
+            change_sale.amount_received = None
+            change_sale.save()
+
+
+class IncrementalTotalsTests(TillTestCase):
+
+    def test_rollups_match_rebuild_after_create_refund_and_edit(self):
+        self.ring_up_a_day()
+        incremental = rollup_rows(self.shop)
+        self.assertTrue(incremental)
+
+        rebuild_sales_rollups(self.shop)
+        self.assertEqual(rollup_rows(self.shop), incremental)
+
+    def test_snapshot_matches_rebuild_after_create_refund_and_edit(self):
+        self.ring_up_a_day()
+        incremental = snapshot_rows(self.shop)
+        self.assertTrue(incremental)
+
+        ReconciliationSnapshot.rebuild(self.shop.id, timezone.localdate())
+        self.assertEqual(snapshot_rows(self.shop), incremental)
+
+    def test_drawer_cells_match_rebuild_after_create_refund_and_edit(self):
+        self.ring_up_a_day()
+        drawer = CashFloat.objects.get(shop=self.shop, cashier=self.cashier, date=timezone.localdate())
+        cells = lambda: {(cell.currency, cell.method): cell.session for cell in drawer.balances.all() if cell.session}
+        incremental = cells()
+
+        DrawerBalance.rebuild_for_drawer(drawer)
+        self.assertEqual(cells(), incremental)
+
+
+class DrawerCellTests(TillTestCase):
+
+    def drawer_cells(self):
+        drawer = CashFloat.objects.get(shop=self.shop, cashier=self.cashier, date=timezone.localdate())
+        return {(cell.currency, cell.method): cell.session for cell in drawer.balances.all() if cell.session}
+
+    def test_usd_change_leaves_dollars_from_usd_and_cents_as_zig(self):
+        self.sell([(self.bread, 1)], payment_method='cash', payment_currency='USD', amount_received='5.00')
+
+        # $5 in, $2 back in notes and the 50c as ZiG 12.50
+        self.assertEqual(self.drawer_cells(), {('USD', 'cash'): Decimal('3.00'), ('ZIG', 'cash'): Decimal('-12.50')})
+        totals = drawer_totals(self.shop, timezone.localdate(), cashier_ids=[self.cashier.id])[self.cashier.id]
+        self.assertEqual(totals['usd']['cash'], Decimal('3.00'))
+        self.assertEqual(totals['zig']['cash'], Decimal('-12.50'))
+        self.assertEqual(totals['usd']['count'], 1)
+
+    def test_split_payment_change_comes_out_of_its_own_currency(self):
+        self.sell([(self.milk, 3)], payment_method='split', payments=[
+            {'payment_method': 'cash', 'currency': 'USD', 'amount': '10.00', 'amount_received': '12.00'},
+            {'payment_method': 'ecocash', 'currency': 'ZIG', 'amount': '50.00'},
+        ])
+
+        self.assertEqual(self.drawer_cells(), {('USD', 'cash'): Decimal('10.00'), ('ZIG', 'ecocash'): Decimal('50.00')})
+        totals = drawer_totals(self.shop, timezone.localdate())[self.cashier.id]
+        self.assertEqual(totals['usd']['cash'], Decimal('10.00'))
+        self.assertEqual(totals['zig']['ecocash'], Decimal('50.00'))
+
+    def test_refund_takes_the_sale_out_of_the_drawer(self):
+        sale = self.sell([(self.bread, 2)], payment_method='cash', payment_currency='USD', amount_received='5.00')
+        self.refund_sale(sale)
+
+        self.assertEqual(self.drawer_cells(), {})
+        totals = drawer_totals(self.shop, timezone.localdate()).get(self.cashier.id, empty_totals())
+        self.assertEqual(totals['usd']['cash'], Decimal('0'))
+        self.assertEqual(totals['usd']['count'], 0)
+
+
+class EndOfDayJobTests(TillTestCase):
+
+    def test_failed_job_resumes_from_the_unfinished_stage(self):
+        self.ring_up_a_day()
+        rollups = rollup_rows(self.shop)
+        job = EndOfDayJob.submit(self.shop_day, closed_by=self.cashier)
+
+        with mock.patch.object(EndOfDayJob, '_stage_archive_sales', side_effect=RuntimeError('disk full')):
+            job.run()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'FAILED')
+        self.assertEqual(job.current_stage, 'archive_sales')
+        self.assertEqual(job.completed_stages, ['begin_closing', 'reconciliation', 'restock'])
+        self.assertEqual(Sale.objects.filter(shop=self.shop).count(), 5)
+
+        with mock.patch.object(ShopDay, '_begin_closing') as begin_closing:
+            job.run()
+        begin_closing.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.completed_stages, [stage for stage, _ in EndOfDayJob.STAGES])
+        self.assertEqual(job.results['archive_sales'], 5)
+
+        self.shop_day.refresh_from_db()
+        self.assertEqual(self.shop_day.status, 'CLOSED')
+        self.assertFalse(Sale.objects.filter(shop=self.shop).exists())
+        self.assertEqual(ArchivedSale.objects.filter(shop=self.shop).count(), 5)
+
+        # The rollups keep the day, and rebuilding from the archive agrees with them
+        self.assertEqual(rollup_rows(self.shop), rollups)
+        rebuild_sales_rollups(self.shop)
+        self.assertEqual(rollup_rows(self.shop), rollups)
+
+    def test_completed_job_is_not_run_again(self):
+        job = EndOfDayJob.submit(self.shop_day)
+        job.run()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'COMPLETED')
+
+        job.run()
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
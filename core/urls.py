@@ -7,15 +7,18 @@ from .retrieve_credentials_view import RetrieveCredentialsView
 from .staff_views import PendingStaffListView, ApprovedStaffListView, ApproveStaffView, RejectStaffView, DeactivateCashierView, DeleteCashierView, InactiveStaffListView, ReactivateCashierView, CashierDetailsView, EditCashierView
 from .cashier_registration_view import CashierSelfRegistrationView
 from .waste_batch_views import WasteBatchListView, WasteBatchDetailView
-from .sales_command_center_views import InfiniteSalesFeedView, SaleAuditTrailView, SalesAnalyticsView, SalesExceptionReportView, EODReconciliationView, ShopDayManagementView
+from .sales_command_center_views import InfiniteSalesFeedView, SaleAuditTrailView, SalesAnalyticsView, SalesExceptionReportView, EODReconciliationView, ShopDayManagementView, EndOfDayJobStatusView
 from .cash_float_refund_view import add_drawer_refund
 from .reconciliation_views import CashierCountView, ReconciliationSessionView, EODReconciliationEnhancedView
-from .cashier_history_views import CashierHistoryView, CashierPerformanceView, CashierArchiveStatsView
+from .cashier_history_views import CashierHistoryView, CashierPerformanceView, CashierArchiveStatsView, CashierArchiveBackfillView
 from .cashier_refund_view import process_cashier_refund, get_cashier_refunds
+from .restock_views import RestockSuggestionsView
+from .forecast_views import DemandForecastView
 # Import cash float API views
 from .models import cash_float_management, activate_cashier_drawer, update_drawer_sale, settle_drawer_at_eod, get_all_cashiers_drawer_status, reset_all_drawers_at_eod, emergency_reset_all_drawers, check_cashier_drawer_access, update_cashier_drawer_access, get_shop_status, get_cashier_drawer_today, get_cashier_drawer_session, get_all_drawers_session
 # Import exchange rate views
 from .exchange_rate_views import exchange_rate_api, exchange_rate_history_api, convert_currency_api, set_current_rates_api
+from .live_events_views import live_events_stream
 
 
 
@@ -94,6 +97,7 @@ urlpatterns = [
     path('cashiers/history/', CashierHistoryView.as_view(), name='cashier-history'),
     path('cashiers/performance/', CashierPerformanceView.as_view(), name='cashier-performance'),
     path('cashiers/archive-stats/', CashierArchiveStatsView.as_view(), name='cashier-archive-stats'),
+    path('cashiers/archive-backfill/', CashierArchiveBackfillView.as_view(), name='cashier-archive-backfill'),
     
     # Exchange Rate Management endpoints
     path('exchange-rates/', exchange_rate_api, name='exchange-rate-management'),
@@ -105,6 +109,7 @@ urlpatterns = [
     path('shop-status/', ShopDayManagementView.as_view(), name='shop-status-management'),
     path('start-day/', ShopDayManagementView.as_view(), name='start-day'),
     path('end-day/', ShopDayManagementView.as_view(), name='end-day'),
+    path('end-day/status/', EndOfDayJobStatusView.as_view(), name='end-day-status'),
     
     # Cash Float Management endpoints
     path('cash-float/', cash_float_management, name='cash-float-management'),
@@ -143,6 +148,7 @@ urlpatterns = [
     path('founder/login/', views.FounderLoginView.as_view(), name='founder-login'),
     path('founder/shops/', views.FounderShopListView.as_view(), name='founder-shop-list'),
     path('founder/shops/dashboard/', views.FounderShopDashboardView.as_view(), name='founder-shop-dashboard'),
+    path('founder/portfolio/', views.FounderPortfolioView.as_view(), name='founder-portfolio'),
     path('founder/shops/reset-password/', views.FounderResetShopPasswordView.as_view(), name='founder-reset-shop-password'),
     
     # Currency Wallet Management endpoints
@@ -164,6 +170,9 @@ urlpatterns = [
     # NEW: All drawers session endpoint - fetches session-aware data for ALL cashiers (shop open/close aware)
     path('cash-float/all-drawers-session/', get_all_drawers_session, name='all-drawers-session'),
     
+    # Live updates - server-sent events for the drawer, sales and dashboard screens
+    path('events/', live_events_stream, name='live-events'),
+    
     # DELETE TODAY'S SALES - Owner only endpoint to start fresh
     path('delete-today-sales/', views.DeleteTodaySalesView.as_view(), name='delete-today-sales'),
     
@@ -173,6 +182,8 @@ urlpatterns = [
     # Inventory Receiving - for cashier and owner product receiving
     path('inventory/receive/', views.InventoryReceiveView.as_view(), name='inventory-receive'),
     path('inventory/receiving/history/', views.InventoryReceivingHistoryView.as_view(), name='inventory-receiving-history'),
+    path('restock/suggestions/', RestockSuggestionsView.as_view(), name='restock-suggestions'),
+    path('demand-forecast/', DemandForecastView.as_view(), name='demand-forecast'),
     
     # ALL SALES HISTORY - Never affected by EOD deletion - for Owner Dashboard
     path('all-sales-history/', views.AllSalesHistoryView.as_view(), name='all-sales-history'),
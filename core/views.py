@@ -2,7 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from rest_framework import viewsets
+from rest_framework import viewsets, serializers
 from rest_framework.decorators import action
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -12,10 +12,13 @@ from django.db.models import Sum, F, Q
 from django.db.models.functions import Cast
 from datetime import timedelta
 from decimal import Decimal
-from .models import ShopConfiguration, Cashier, Product, Sale, SaleItem, Customer, Discount, Shift, Expense, StaffLunch, StockTake, StockTakeItem, InventoryLog, StockTransfer, Waste, ShopDay, CurrencyWallet, CurrencyTransaction, SalePayment, CashFloat
+from .models import ShopConfiguration, Cashier, Product, Sale, SaleItem, Customer, Discount, Shift, Expense, StaffLunch, StockTake, StockTakeItem, InventoryLog, StockTransfer, Waste, ShopDay, CurrencyWallet, CurrencyTransaction, SalePayment, CashFloat, ShopInventorySummary, DailySalesRollup, ProductDailySalesRollup
 from .serializers import ShopConfigurationSerializer, ShopLoginSerializer, ResetPasswordSerializer, CashierSerializer, CashierLoginSerializer, ProductSerializer, SaleSerializer, CreateSaleSerializer, ExpenseSerializer, StockValuationSerializer, StaffLunchSerializer, BulkProductSerializer, CustomerSerializer, DiscountSerializer, StockTakeSerializer, StockTakeItemSerializer, CreateStockTakeSerializer, AddStockTakeItemSerializer, BulkAddStockTakeItemsSerializer, CashierResetPasswordSerializer, InventoryLogSerializer, StockTransferSerializer
 from django.db import transaction
 from django.shortcuts import get_object_or_404
+from .dashboard_cache import owner_dashboard_cache_key, get_cached_owner_dashboard, cache_owner_dashboard, portfolio_cache_key, get_cached_portfolio, cache_portfolio
+from .founder_portfolio import build_portfolio
+from .sales_history import history_page, history_summary, cashier_history_summary, history_sources, history_all, parse_page_size, stream_ndjson, wants_ndjson, wants_page
 
 # Import waste views
 from .waste_views import WasteListView, WasteSummaryView, WasteProductSearchView
@@ -567,17 +570,6 @@ class CashierLoginView(APIView):
                             date=today,
                             defaults={
                                 'float_amount': Decimal('0.00'),
-                                'current_cash': Decimal('0.00'),
-                                'current_card': Decimal('0.00'),
-                                'current_ecocash': Decimal('0.00'),
-                                'current_transfer': Decimal('0.00'),
-                                'current_total': Decimal('0.00'),
-                                'session_cash_sales': Decimal('0.00'),
-                                'session_card_sales': Decimal('0.00'),
-                                'session_ecocash_sales': Decimal('0.00'),
-                                'session_transfer_sales': Decimal('0.00'),
-                                'session_total_sales': Decimal('0.00'),
-                                'expected_cash_at_eod': Decimal('0.00'),
                                 'status': 'ACTIVE'
                             }
                         )
@@ -1438,8 +1430,9 @@ class StockValuationView(APIView):
     def get(self, request):
         shop = ShopConfiguration.objects.get()
         products = Product.objects.filter(shop=shop)
+        inventory_summary = ShopInventorySummary.get_for_shop(shop)
 
-        serializer = StockValuationSerializer({'products': products})
+        serializer = StockValuationSerializer({'products': products, 'inventory_summary': inventory_summary})
         return Response(serializer.data)
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -1998,7 +1991,6 @@ class StaffLunchDeductMoneyView(APIView):
                     date=today,
                     defaults={
                         'float_amount': Decimal('0.00'),
-                        'current_cash': Decimal('0.00'),
                         'status': 'ACTIVE'
                     }
                 )
@@ -2014,7 +2006,6 @@ class StaffLunchDeductMoneyView(APIView):
                             cashier=first_cashier,
                             date=today,
                             float_amount=Decimal('0.00'),
-                            current_cash=Decimal('0.00'),
                             status='ACTIVE'
                         )
                     else:
@@ -2024,7 +2015,6 @@ class StaffLunchDeductMoneyView(APIView):
                             cashier=None,
                             date=today,
                             float_amount=Decimal('0.00'),
-                            current_cash=Decimal('0.00'),
                             status='ACTIVE'
                         )
             
@@ -2071,17 +2061,9 @@ class StaffLunchDeductMoneyView(APIView):
                     }, status=status.HTTP_400_BAD_REQUEST)
             
             # FIFTH: Deduct amount from drawer (real money)
-            cash_float.current_cash -= amount
-            cash_float.current_cash_usd -= amount
-            cash_float.current_total_usd -= amount
-            cash_float.current_total = cash_float.current_cash + cash_float.current_card + cash_float.current_ecocash + cash_float.current_transfer
-            
-            # Also reduce expected cash at EOD (staff lunch is intentional deduction)
-            # This ensures EOD variance doesn't show a false shortage
-            cash_float.expected_cash_at_eod -= amount
-            cash_float.expected_cash_usd -= amount
-            
-            cash_float.save()
+            # Expected cash is float + cash sales, so it is left alone; the lunch is
+            # taken off the expected amount in CashierCount.update_from_cash_float()
+            cash_float.add_to_balance('USD', 'cash', current=-amount)
             
             # NOTE: Wallet is NOT deducted for staff lunch
             # Staff lunch is a cash expense from the drawer, not a wallet transaction
@@ -2494,6 +2476,11 @@ class StockTakeProductSearchView(APIView):
 
 @method_decorator(csrf_exempt, name='dispatch')
 class OwnerDashboardView(APIView):
+    """
+    Owner dashboard payload.
+    Built from a fixed set of queries (rollups, inventory summary, a few counts) and
+    cached per shop; sale, product, shift and shop-day changes invalidate the cache.
+    """
     permission_classes = [AllowAny]
     authentication_classes = []
     def get(self, request):
@@ -2502,133 +2489,63 @@ class OwnerDashboardView(APIView):
         except ShopConfiguration.DoesNotExist:
             return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Calculate date ranges
-        today = timezone.now().date()
+        cache_key = owner_dashboard_cache_key(shop.id)
+        dashboard_data = get_cached_owner_dashboard(cache_key)
+        if dashboard_data is None:
+            dashboard_data = self._build_dashboard(shop)
+            cache_owner_dashboard(cache_key, dashboard_data)
+
+        return Response(dashboard_data, status=status.HTTP_200_OK)
+
+    def _build_dashboard(self, shop):
+        # Calculate date ranges (local business dates, matching the sales rollups)
+        today = timezone.localdate()
         yesterday = today - timedelta(days=1)
         week_ago = today - timedelta(days=7)
         month_ago = today - timedelta(days=30)
+        last_week_start = week_ago - timedelta(days=7)
+        last_month_start = month_ago - timedelta(days=30)
 
         # Get current open shop_day (for session-aware filtering)
         current_shop_day = ShopDay.get_open_shop_day(shop)
-        
-        # Get yesterday's closed shop_day
-        yesterday_shop_day = ShopDay.objects.filter(
-            shop=shop,
-            date=yesterday,
-            status='CLOSED'
-        ).first()
-        
-        # Get this week's shop_days (closed ones for historical data)
-        week_shop_days = ShopDay.objects.filter(
-            shop=shop,
-            date__gte=week_ago,
-            date__lte=today,
-            status='CLOSED'
-        )
-        
-        # Get last week's shop_days for comparison
-        last_week_start = week_ago - timedelta(days=7)
-        last_week_shop_days = ShopDay.objects.filter(
-            shop=shop,
-            date__gte=last_week_start,
-            date__lt=week_ago,
-            status='CLOSED'
-        )
-        
-        # Get this month's shop_days
-        month_shop_days = ShopDay.objects.filter(
-            shop=shop,
-            date__gte=month_ago,
-            date__lte=today,
-            status='CLOSED'
-        )
-        
-        # Get last month's shop_days for comparison
-        last_month_start = month_ago - timedelta(days=30)
-        last_month_shop_days = ShopDay.objects.filter(
-            shop=shop,
-            date__gte=last_month_start,
-            date__lt=month_ago,
-            status='CLOSED'
-        )
 
-        # Sales Data - use shop_day for session-aware filtering
-        if current_shop_day:
-            today_sales = Sale.objects.filter(shop=shop, shop_day=current_shop_day, status='completed')
-        else:
-            # Fallback: no open shop day, use today's date as fallback
-            today_sales = Sale.objects.filter(shop=shop, created_at__date=today, status='completed')
-        
-        if yesterday_shop_day:
-            yesterday_sales = Sale.objects.filter(shop=shop, shop_day=yesterday_shop_day, status='completed')
-        else:
-            # Fallback: use yesterday's date
-            yesterday_sales = Sale.objects.filter(shop=shop, created_at__date=yesterday, status='completed')
-        
-        # For week/month comparisons, use shop_days if available, otherwise fall back to date
-        week_shop_day_ids = list(week_shop_days.values_list('id', flat=True))
-        if week_shop_day_ids:
-            week_sales = Sale.objects.filter(shop=shop, shop_day_id__in=week_shop_day_ids, status='completed')
-        else:
-            week_sales = Sale.objects.filter(shop=shop, created_at__date__gte=week_ago, status='completed')
-        
-        month_shop_day_ids = list(month_shop_days.values_list('id', flat=True))
-        if month_shop_day_ids:
-            month_sales = Sale.objects.filter(shop=shop, shop_day_id__in=month_shop_day_ids, status='completed')
-        else:
-            month_sales = Sale.objects.filter(shop=shop, created_at__date__gte=month_ago, status='completed')
+        # Sales Data - one grouped read of the daily rollups covers every period.
+        # Rollups outlive the sales deleted at close of day, so past periods stay populated.
+        daily_totals = DailySalesRollup.totals_by_date(shop, last_month_start, today)
+        today_totals = DailySalesRollup.sum_days(daily_totals, today, today)
+        yesterday_totals = DailySalesRollup.sum_days(daily_totals, yesterday, yesterday)
+        week_totals = DailySalesRollup.sum_days(daily_totals, week_ago, today)
+        prev_week_totals = DailySalesRollup.sum_days(daily_totals, last_week_start, week_ago - timedelta(days=1))
+        month_totals = DailySalesRollup.sum_days(daily_totals, month_ago, today)
+        prev_month_totals = DailySalesRollup.sum_days(daily_totals, last_month_start, month_ago - timedelta(days=1))
 
         # Calculate sales metrics
-        today_revenue = today_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        yesterday_revenue = yesterday_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        today_orders = today_sales.count()
-        yesterday_orders = yesterday_sales.count()
+        today_revenue = today_totals['revenue']
+        yesterday_revenue = yesterday_totals['revenue']
+        today_orders = today_totals['order_count']
+        yesterday_orders = yesterday_totals['order_count']
 
         # Growth calculations
         today_growth = ((today_revenue - yesterday_revenue) / max(yesterday_revenue, 1)) * 100 if yesterday_revenue > 0 else 0
         today_orders_growth = ((today_orders - yesterday_orders) / max(yesterday_orders, 1)) * 100 if yesterday_orders > 0 else 0
 
-        week_revenue = week_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        week_orders = week_sales.count()
-        
-        # Previous week comparison
-        last_week_shop_day_ids = list(last_week_shop_days.values_list('id', flat=True))
-        if last_week_shop_day_ids:
-            prev_week_sales = Sale.objects.filter(shop=shop, shop_day_id__in=last_week_shop_day_ids, status='completed')
-        else:
-            prev_week_sales = Sale.objects.filter(
-                shop=shop, 
-                created_at__date__gte=last_week_start, 
-                created_at__date__lt=week_ago, 
-                status='completed'
-            )
-        prev_week_revenue = prev_week_sales.aggregate(total=Sum('total_amount'))['total'] or 0
+        week_revenue = week_totals['revenue']
+        week_orders = week_totals['order_count']
+        prev_week_revenue = prev_week_totals['revenue']
         week_growth = ((week_revenue - prev_week_revenue) / max(prev_week_revenue, 1)) * 100 if prev_week_revenue > 0 else 0
 
-        month_revenue = month_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        month_orders = month_sales.count()
-        
-        # Previous month comparison
-        last_month_shop_day_ids = list(last_month_shop_days.values_list('id', flat=True))
-        if last_month_shop_day_ids:
-            prev_month_sales = Sale.objects.filter(shop=shop, shop_day_id__in=last_month_shop_day_ids, status='completed')
-        else:
-            prev_month_sales = Sale.objects.filter(
-                shop=shop, 
-                created_at__date__gte=last_month_start, 
-                created_at__date__lt=month_ago, 
-                status='completed'
-            )
-        prev_month_revenue = prev_month_sales.aggregate(total=Sum('total_amount'))['total'] or 0
+        month_revenue = month_totals['revenue']
+        month_orders = month_totals['order_count']
+        prev_month_revenue = prev_month_totals['revenue']
         month_growth = ((month_revenue - prev_month_revenue) / max(prev_month_revenue, 1)) * 100 if prev_month_revenue > 0 else 0
 
-        # Inventory Data
-        products = Product.objects.filter(shop=shop)
-        total_products = products.count()
-        low_stock_items = products.filter(models.Q(stock_quantity__lte=models.F('min_stock_level'))).count()
-        negative_stock_items = products.filter(stock_quantity__lt=0).count()
-        # FIXED: Stock value never negative - if oversold, value is $0 (no physical assets)
-        total_inventory_value = sum(max(0, p.stock_quantity) * p.cost_price for p in products)
+        # Inventory Data - read from the incrementally maintained summary row
+        # Stock value is never negative - if oversold, value is $0 (no physical assets)
+        inventory_summary = ShopInventorySummary.get_for_shop(shop)
+        total_products = inventory_summary.total_products
+        low_stock_items = inventory_summary.low_stock_count
+        negative_stock_items = inventory_summary.negative_stock_count
+        total_inventory_value = inventory_summary.total_value
 
         # Employee Data
         total_cashiers = Cashier.objects.filter(shop=shop).count()
@@ -2638,20 +2555,9 @@ class OwnerDashboardView(APIView):
             is_active=True
         ).count()
 
-        # Top Products (last 30 days)
+        # Top Products (last 30 days) - from the product-day sales rollup
         top_products_data = []
-        sale_items_30_days = SaleItem.objects.filter(
-            sale__shop=shop,
-            sale__created_at__date__gte=month_ago,
-            sale__status='completed'
-        ).values(
-            'product_id',
-            'product__name',
-            'product__category'
-        ).annotate(
-            total_quantity=Sum('quantity'),
-            total_revenue=Sum(F('quantity') * F('unit_price'))
-        ).order_by('-total_revenue')[:10]
+        sale_items_30_days = ProductDailySalesRollup.top_products(shop, month_ago, today, limit=10)
 
         for item in sale_items_30_days:
             top_products_data.append({
@@ -2666,7 +2572,7 @@ class OwnerDashboardView(APIView):
         recent_sales = Sale.objects.filter(
             shop=shop, 
             status='completed'
-        ).order_by('-created_at')[:10]
+        ).select_related('cashier').order_by('-created_at')[:10]
 
         recent_sales_data = []
         for sale in recent_sales:
@@ -2741,7 +2647,8 @@ class OwnerDashboardView(APIView):
                 'totalProducts': total_products,
                 'lowStockItems': low_stock_items,
                 'negativeStockItems': negative_stock_items,
-                'totalValue': float(total_inventory_value)
+                'totalValue': float(total_inventory_value),
+                'categoryValues': {category or 'Uncategorized': float(value) for category, value in inventory_summary.get_category_values().items()}
             },
             'employees': {
                 'totalCashiers': total_cashiers,
@@ -2752,7 +2659,7 @@ class OwnerDashboardView(APIView):
             'alerts': alerts
         }
 
-        return Response(dashboard_data, status=status.HTTP_200_OK)
+        return dashboard_data
 
 @method_decorator(csrf_exempt, name='dispatch')
 class FounderLoginView(APIView):
@@ -2838,55 +2745,50 @@ class FounderShopDashboardView(APIView):
             return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # Use the existing OwnerDashboardView logic but for the specific shop
-        # Calculate date ranges
-        today = timezone.now().date()
+        # Calculate date ranges (local business dates, matching the sales rollups)
+        today = timezone.localdate()
         yesterday = today - timedelta(days=1)
         week_ago = today - timedelta(days=7)
         month_ago = today - timedelta(days=30)
 
-        # Sales Data
-        today_sales = Sale.objects.filter(shop=shop, created_at__date=today, status='completed')
-        yesterday_sales = Sale.objects.filter(shop=shop, created_at__date=yesterday, status='completed')
-        week_sales = Sale.objects.filter(shop=shop, created_at__date__gte=week_ago, status='completed')
-        month_sales = Sale.objects.filter(shop=shop, created_at__date__gte=month_ago, status='completed')
+        # Sales Data - one grouped read of the daily rollups covers every period
+        daily_totals = DailySalesRollup.totals_by_date(shop, month_ago - timedelta(days=30), today)
+        today_totals = DailySalesRollup.sum_days(daily_totals, today, today)
+        yesterday_totals = DailySalesRollup.sum_days(daily_totals, yesterday, yesterday)
+        week_totals = DailySalesRollup.sum_days(daily_totals, week_ago, today)
+        month_totals = DailySalesRollup.sum_days(daily_totals, month_ago, today)
 
         # Calculate sales metrics
-        today_revenue = today_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        yesterday_revenue = yesterday_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        today_orders = today_sales.count()
-        yesterday_orders = yesterday_sales.count()
+        today_revenue = today_totals['revenue']
+        yesterday_revenue = yesterday_totals['revenue']
+        today_orders = today_totals['order_count']
+        yesterday_orders = yesterday_totals['order_count']
 
         # Growth calculations
         today_growth = ((today_revenue - yesterday_revenue) / max(yesterday_revenue, 1)) * 100 if yesterday_revenue > 0 else 0
         today_orders_growth = ((today_orders - yesterday_orders) / max(yesterday_orders, 1)) * 100 if yesterday_orders > 0 else 0
 
-        week_revenue = week_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        week_orders = week_sales.count()
-        prev_week_revenue = Sale.objects.filter(
-            shop=shop, 
-            created_at__date__gte=week_ago - timedelta(days=7), 
-            created_at__date__lt=week_ago, 
-            status='completed'
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
+        week_revenue = week_totals['revenue']
+        week_orders = week_totals['order_count']
+        prev_week_revenue = DailySalesRollup.sum_days(
+            daily_totals, week_ago - timedelta(days=7), week_ago - timedelta(days=1)
+        )['revenue']
         week_growth = ((week_revenue - prev_week_revenue) / max(prev_week_revenue, 1)) * 100 if prev_week_revenue > 0 else 0
 
-        month_revenue = month_sales.aggregate(total=Sum('total_amount'))['total'] or 0
-        month_orders = month_sales.count()
-        prev_month_revenue = Sale.objects.filter(
-            shop=shop, 
-            created_at__date__gte=month_ago - timedelta(days=30), 
-            created_at__date__lt=month_ago, 
-            status='completed'
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
+        month_revenue = month_totals['revenue']
+        month_orders = month_totals['order_count']
+        prev_month_revenue = DailySalesRollup.sum_days(
+            daily_totals, month_ago - timedelta(days=30), month_ago - timedelta(days=1)
+        )['revenue']
         month_growth = ((month_revenue - prev_month_revenue) / max(prev_month_revenue, 1)) * 100 if prev_month_revenue > 0 else 0
 
-        # Inventory Data
-        products = Product.objects.filter(shop=shop)
-        total_products = products.count()
-        low_stock_items = products.filter(models.Q(stock_quantity__lte=models.F('min_stock_level'))).count()
-        negative_stock_items = products.filter(stock_quantity__lt=0).count()
-        # FIXED: Stock value never negative - if oversold, value is $0 (no physical assets)
-        total_inventory_value = sum(max(0, p.stock_quantity) * p.cost_price for p in products)
+        # Inventory Data - read from the incrementally maintained summary row
+        # Stock value is never negative - if oversold, value is $0 (no physical assets)
+        inventory_summary = ShopInventorySummary.get_for_shop(shop)
+        total_products = inventory_summary.total_products
+        low_stock_items = inventory_summary.low_stock_count
+        negative_stock_items = inventory_summary.negative_stock_count
+        total_inventory_value = inventory_summary.total_value
 
         # Employee Data
         total_cashiers = Cashier.objects.filter(shop=shop).count()
@@ -2896,20 +2798,9 @@ class FounderShopDashboardView(APIView):
             is_active=True
         ).count()
 
-        # Top Products (last 30 days)
+        # Top Products (last 30 days) - from the product-day sales rollup
         top_products_data = []
-        sale_items_30_days = SaleItem.objects.filter(
-            sale__shop=shop,
-            sale__created_at__date__gte=month_ago,
-            sale__status='completed'
-        ).values(
-            'product_id',
-            'product__name',
-            'product__category'
-        ).annotate(
-            total_quantity=Sum('quantity'),
-            total_revenue=Sum(F('quantity') * F('unit_price'))
-        ).order_by('-total_revenue')[:10]
+        sale_items_30_days = ProductDailySalesRollup.top_products(shop, month_ago, today, limit=10)
 
         for item in sale_items_30_days:
             top_products_data.append({
@@ -3001,7 +2892,8 @@ class FounderShopDashboardView(APIView):
                 'totalProducts': total_products,
                 'lowStockItems': low_stock_items,
                 'negativeStockItems': negative_stock_items,
-                'totalValue': float(total_inventory_value)
+                'totalValue': float(total_inventory_value),
+                'categoryValues': {category or 'Uncategorized': float(value) for category, value in inventory_summary.get_category_values().items()}
             },
             'employees': {
                 'totalCashiers': total_cashiers,
@@ -3014,6 +2906,33 @@ class FounderShopDashboardView(APIView):
 
         return Response(dashboard_data, status=status.HTTP_200_OK)
 
+@method_decorator(csrf_exempt, name='dispatch')
+class FounderPortfolioView(APIView):
+    """
+    Portfolio dashboard across every shop - sales, stock, staff and alerts per shop
+    plus portfolio totals. Built from the rollups in a fixed number of queries and
+    cached until any shop's data changes.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    def post(self, request):
+        # Verify founder credentials
+        username = request.data.get('username')
+        password = request.data.get('password')
+        
+        if not ShopConfiguration.validate_founder_credentials(username, password):
+            return Response({"error": "Invalid founder credentials"}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        shops = list(ShopConfiguration.objects.all().order_by('id'))
+        # Keyed before building, like the analytics cache
+        cache_key = portfolio_cache_key([shop.id for shop in shops])
+        portfolio = get_cached_portfolio(cache_key)
+        if portfolio is None:
+            portfolio = build_portfolio(shops)
+            cache_portfolio(cache_key, portfolio)
+        
+        return Response(portfolio, status=status.HTTP_200_OK)
+
 @method_decorator(csrf_exempt, name='dispatch')
 class FounderResetShopPasswordView(APIView):
     permission_classes = [AllowAny]
@@ -3108,23 +3027,12 @@ class CashierTopProductsView(APIView):
         except ShopConfiguration.DoesNotExist:
             return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Get top 5 selling products from last 30 days
-        from datetime import timedelta
-        month_ago = timezone.now() - timedelta(days=30)
+        # Get top 5 selling products from last 30 days (product-day sales rollup)
+        today = timezone.localdate()
+        month_ago = today - timedelta(days=30)
         
         top_products_data = []
-        sale_items_30_days = SaleItem.objects.filter(
-            sale__shop=shop,
-            sale__created_at__gte=month_ago,
-            sale__status='completed'
-        ).values(
-            'product_id',
-            'product__name',
-            'product__category'
-        ).annotate(
-            total_quantity=Sum('quantity'),
-            total_revenue=Sum(F('quantity') * F('unit_price'))
-        ).order_by('-total_revenue')[:5]
+        sale_items_30_days = ProductDailySalesRollup.top_products(shop, month_ago, today, limit=5)
 
         for item in sale_items_30_days:
             top_products_data.append({
@@ -3221,37 +3129,37 @@ class SalesHistoryView(APIView):
         except ShopConfiguration.DoesNotExist:
             return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        sales = Sale.objects.filter(shop=shop).order_by('-created_at')
+        # Live sales of the open day plus the archive of closed days
+        sales = history_sources(shop=shop)
         
-        # Enhanced serialization with more details for the frontend
-        sales_data = []
-        for sale in sales:
-            sale_data = {
-                'id': sale.id,
-                'receipt_number': f'R{sale.id:03d}',  # Format as R001, R002, etc.
-                'created_at': sale.created_at.isoformat(),
-                'cashier_name': sale.cashier.name if sale.cashier else 'Unknown',
-                'payment_method': sale.payment_method,
-                'customer_name': sale.customer_name or '',
-                'total_amount': float(sale.total_amount),
-                'currency': sale.currency,
-                'status': sale.status,
-                'items': []
-            }
-            
-            # Add sale items with product details
-            for item in sale.items.all():
-                sale_data['items'].append({
-                    'product_id': item.product.id,
-                    'product_name': item.product.name,
-                    'quantity': float(item.quantity),
-                    'unit_price': float(item.unit_price),
-                    'total_price': float(item.total_price)
-                })
-            
-            sales_data.append(sale_data)
+        if wants_ndjson(request):
+            return stream_ndjson(sales)
+        
+        # Without page_size/cursor the whole history is returned, as before paging existed
+        if not wants_page(request):
+            return Response(history_all(sales))
+        
+        # The body stays a plain list; the next page's cursor travels in a header
+        try:
+            sales_data, pagination = history_page(sales, request.query_params.get('cursor'), parse_page_size(request))
+        except ValueError:
+            return Response({"error": "Invalid cursor or page_size"}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response(sales_data)
+        response = Response(sales_data)
+        if pagination['next_cursor']:
+            response['X-Next-Cursor'] = pagination['next_cursor']
+        return response
+
+
+def _confirm_warnings(data):
+    """
+    The confirm_warnings flag of a batch body - JSON booleans and form strings alike,
+    so "false" or "0" stays False. None when the value isn't a boolean.
+    """
+    try:
+        return serializers.BooleanField().to_internal_value(data.get('confirm_warnings', False))
+    except serializers.ValidationError:
+        return None
 
 
 class StockTransferViewSet(viewsets.ViewSet):
@@ -3422,6 +3330,67 @@ class StockTransferViewSet(viewsets.ViewSet):
                 'error': f'Internal server error: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Apply many transfers/splits in one atomic pass.
+        Body: {"transfers": [{...same fields as create...}], "confirm_warnings": false}
+        Nothing is applied if any transfer fails validation.
+        """
+        try:
+            shop_id = request.META.get('HTTP_X_SHOP_ID')
+            if not shop_id:
+                return Response({'error': 'Shop ID required in X-Shop-ID header'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            shop = get_object_or_404(ShopConfiguration, shop_id=shop_id)
+            
+            cashier = None
+            cashier_id = request.META.get('HTTP_X_CASHIER_ID')
+            if cashier_id:
+                try:
+                    cashier = Cashier.objects.get(id=cashier_id, shop=shop)
+                except Cashier.DoesNotExist:
+                    return Response({'error': 'Invalid cashier ID'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            transfers = request.data.get('transfers')
+            if not isinstance(transfers, list) or not transfers:
+                return Response({
+                    'success': False,
+                    'error': 'transfers must be a non-empty list'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            confirm_warnings = _confirm_warnings(request.data)
+            if confirm_warnings is None:
+                return Response({
+                    'success': False,
+                    'error': 'confirm_warnings must be true or false'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            result = StockTransfer.process_batch(
+                shop,
+                transfers,
+                performed_by=cashier,
+                confirm_warnings=confirm_warnings
+            )
+            
+            if result['success']:
+                result['message'] = f"{result['transfers_processed']} stock transfers completed successfully"
+                return Response(result, status=status.HTTP_201_CREATED)
+            if result['can_proceed']:
+                result['message'] = 'Transfers have warnings but can proceed with user confirmation'
+                return Response(result, status=status.HTTP_200_OK)
+            if result.get('conflict'):
+                result['error'] = f"Stock changed for {result['product']['name']} - nothing was applied, please retry"
+                return Response(result, status=status.HTTP_409_CONFLICT)
+            result['error'] = 'Validation failed'
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+            
+        except Exception as e:
+            return Response({
+                'success': False,
+                'error': f'Internal server error: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
     @action(detail=False, methods=['post'])
     def find_product(self, request):
         """Find a product by line code or barcode"""
@@ -3679,6 +3648,53 @@ class ProductSplittingViewSet(viewsets.ViewSet):
             'stock_quantity': 0  # New product starts with 0 stock
         }
     
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Split many source products in one atomic pass (e.g. breaking bulk sacks into retail packs).
+        Body: {"splits": [{"from_line_code", "from_quantity", "to_line_code", "to_quantity",
+                          "expected_ratio"?, "new_product_data"?}], "confirm_warnings": false}
+        """
+        try:
+            shop_id = request.META.get('HTTP_X_SHOP_ID')
+            if not shop_id:
+                return Response({'error': 'Shop ID required in X-Shop-ID header'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            shop = get_object_or_404(ShopConfiguration, shop_id=shop_id)
+            
+            splits = request.data.get('splits')
+            if not isinstance(splits, list) or not splits:
+                return Response({'success': False, 'error': 'splits must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            confirm_warnings = _confirm_warnings(request.data)
+            if confirm_warnings is None:
+                return Response({'success': False, 'error': 'confirm_warnings must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            entries = [dict(split, transfer_type='SPLIT') if isinstance(split, dict) else split for split in splits]
+            result = StockTransfer.process_batch(
+                shop,
+                entries,
+                confirm_warnings=confirm_warnings
+            )
+            
+            if result['success']:
+                result['message'] = f"{result['transfers_processed']} splits completed successfully"
+                return Response(result, status=status.HTTP_201_CREATED)
+            if result['can_proceed']:
+                result['message'] = 'Splits have warnings but can proceed with user confirmation'
+                return Response(result, status=status.HTTP_200_OK)
+            if result.get('conflict'):
+                result['error'] = f"Stock changed for {result['product']['name']} - nothing was applied, please retry"
+                return Response(result, status=status.HTTP_409_CONFLICT)
+            result['error'] = 'Validation failed'
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+            
+        except Exception as e:
+            return Response({
+                'success': False,
+                'error': f'Batch split failed: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
     @action(detail=False, methods=['post'])
     def validate_split(self, request):
         """Validate if a product can be split"""
@@ -3981,11 +3997,6 @@ class GrantDrawerAccessView(APIView):
                     'float_amount': Decimal('0.00'),
                     'float_amount_zig': Decimal('0.00'),
                     'float_amount_rand': Decimal('0.00'),
-                    'current_cash': Decimal('0.00'),
-                    'current_card': Decimal('0.00'),
-                    'current_ecocash': Decimal('0.00'),
-                    'current_transfer': Decimal('0.00'),
-                    'current_total': Decimal('0.00'),
                     'status': 'ACTIVE'
                 }
             )
@@ -4104,134 +4115,13 @@ class RevokeDrawerAccessView(APIView):
 
 @method_decorator(csrf_exempt, name='dispatch')
 class AllSalesHistoryView(APIView):
-    """Get ALL sales history - never affected by EOD deletion - for Owner Dashboard"""
-    permission_classes = [AllowAny]
-    authentication_classes = []
-    
-    def get(self, request):
-        try:
-            shop = ShopConfiguration.objects.get()
-        except ShopConfiguration.DoesNotExist:
-            return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
-        
-        # Get all sales regardless of shop day status
-        sales = Sale.objects.filter(
-            shop=shop,
-            status='completed'
-        ).order_by('-created_at')
-        
-        # Serialize sales with full details
-        sales_data = []
-        for sale in sales:
-            sale_data = {
-                'id': sale.id,
-                'receipt_number': f'R{sale.id:03d}',
-                'created_at': sale.created_at.isoformat(),
-                'cashier_name': sale.cashier.name if sale.cashier else 'Unknown',
-                'payment_method': sale.payment_method,
-                'customer_name': sale.customer_name or '',
-                'total_amount': float(sale.total_amount),
-                'currency': sale.currency,
-                'payment_currency': sale.payment_currency,
-                'wallet_account': sale.wallet_account,
-                'status': sale.status,
-                'items': []
-            }
-            
-            # Add sale items with product details
-            for item in sale.items.all():
-                sale_data['items'].append({
-                    'product_id': item.product.id if item.product else None,
-                    'product_name': item.product.name if item.product else 'Unknown Product',
-                    'quantity': float(item.quantity),
-                    'unit_price': float(item.unit_price),
-                    'total_price': float(item.total_price),
-                    'refunded': item.refunded,
-                    'refund_reason': item.refund_reason or ''
-                })
-            
-            sales_data.append(sale_data)
-        
-        # Calculate summary statistics
-        total_revenue = sum(sale.total_amount for sale in sales)
-        total_transactions = sales.count()
-        avg_transaction = total_revenue / total_transactions if total_transactions > 0 else 0
-        
-        # Group by date for daily breakdown
-        from collections import defaultdict
-        daily_sales = defaultdict(lambda: {'revenue': 0, 'transactions': 0})
-        for sale in sales:
-            date_key = sale.created_at.date().isoformat()
-            daily_sales[date_key]['revenue'] += float(sale.total_amount)
-            daily_sales[date_key]['transactions'] += 1
-        
-        daily_breakdown = [
-            {
-                'date': date,
-                'revenue': f"{data['revenue']:.2f}",
-                'transactions': data['transactions']
-            }
-            for date, data in sorted(daily_sales.items(), reverse=True)
-        ]
-        
-        # Group by payment method
-        payment_methods = defaultdict(float)
-        for sale in sales:
-            payment_methods[sale.payment_method] += float(sale.total_amount)
-        
-        # Convert total_revenue to float for percentage calculation
-        total_revenue_float = float(total_revenue)
-        
-        payment_analysis = [
-            {
-                'payment_method': method,
-                'total_revenue': amount,
-                'percentage': (amount / total_revenue_float * 100) if total_revenue_float > 0 else 0
-            }
-            for method, amount in payment_methods.items()
-        ]
-        
-        # Group by currency
-        currencies = defaultdict(float)
-        for sale in sales:
-            currency_key = sale.payment_currency or sale.currency
-            currencies[currency_key] += float(sale.total_amount)
-        
-        currency_breakdown = [
-            {
-                'currency': currency,
-                'total_revenue': amount,
-                'transaction_count': Sale.objects.filter(
-                    shop=shop,
-                    status='completed'
-                ).filter(
-                    models.Q(payment_currency=currency) | models.Q(currency=currency)
-                ).count()
-            }
-            for currency, amount in currencies.items()
-        ]
-        
-        return Response({
-            'success': True,
-            'all_sales': sales_data,
-            'summary': {
-                'total_revenue': float(total_revenue),
-                'total_transactions': total_transactions,
-                'average_transaction': float(avg_transaction),
-                'date_range': {
-                    'earliest': sales.last().created_at.isoformat() if sales.exists() else None,
-                    'latest': sales.first().created_at.isoformat() if sales.exists() else None
-                }
-            },
-            'daily_breakdown': daily_breakdown,
-            'payment_analysis': payment_analysis,
-            'currency_breakdown': currency_breakdown
-        })
-
+    """
+    Get ALL sales history - never affected by EOD deletion - for Owner Dashboard
 
-@method_decorator(csrf_exempt, name='dispatch')
-class AllSalesHistoryView(APIView):
-    """Get ALL sales history - never affected by EOD deletion - for Owner Dashboard"""
+    Every sale by default; page_size (max 500) and/or cursor=pagination.next_cursor
+    ask for cursor pages instead, with the summary and breakdowns on the first page.
+    export=ndjson streams every sale as one JSON object per line.
+    """
     permission_classes = [AllowAny]
     authentication_classes = []
     
@@ -4241,126 +4131,44 @@ class AllSalesHistoryView(APIView):
         except ShopConfiguration.DoesNotExist:
             return Response({"error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Get all sales regardless of shop day status
-        sales = Sale.objects.filter(
-            shop=shop,
-            status='completed'
-        ).order_by('-created_at')
-        
-        # Serialize sales with full details
-        sales_data = []
-        for sale in sales:
-            sale_data = {
-                'id': sale.id,
-                'receipt_number': f'R{sale.id:03d}',
-                'created_at': sale.created_at.isoformat(),
-                'cashier_id': sale.cashier.id if sale.cashier else None,
-                'cashier_name': sale.cashier.name if sale.cashier else 'Unknown',
-                'payment_method': sale.payment_method,
-                'customer_name': sale.customer_name or '',
-                'total_amount': float(sale.total_amount),
-                'currency': sale.currency,
-                'payment_currency': sale.payment_currency,
-                'wallet_account': sale.wallet_account,
-                'status': sale.status,
-                'items': []
-            }
-            
-            # Add sale items with product details
-            for item in sale.items.all():
-                sale_data['items'].append({
-                    'product_id': item.product.id if item.product else None,
-                    'product_name': item.product.name if item.product else 'Unknown Product',
-                    'category': item.product.category if item.product else '',
-                    'quantity': float(item.quantity),
-                    'unit_price': float(item.unit_price),
-                    'total_price': float(item.total_price),
-                    'refunded': item.refunded,
-                    'refund_reason': item.refund_reason or ''
-                })
-            
-            sales_data.append(sale_data)
-        
-        # Calculate summary statistics
-        total_revenue = sum(sale.total_amount for sale in sales)
-        total_transactions = sales.count()
-        avg_transaction = total_revenue / total_transactions if total_transactions > 0 else 0
-        
-        # Group by date for daily breakdown
-        from collections import defaultdict
-        daily_sales = defaultdict(lambda: {'revenue': 0, 'transactions': 0})
-        for sale in sales:
-            date_key = sale.created_at.date().isoformat()
-            daily_sales[date_key]['revenue'] += float(sale.total_amount)
-            daily_sales[date_key]['transactions'] += 1
-        
-        daily_breakdown = [
-            {
-                'date': date,
-                'revenue': f"{data['revenue']:.2f}",
-                'transactions': data['transactions']
-            }
-            for date, data in sorted(daily_sales.items(), reverse=True)
-        ]
-        
-        # Group by payment method
-        payment_methods = defaultdict(float)
-        for sale in sales:
-            payment_methods[sale.payment_method] += float(sale.total_amount)
+        # Get all sales regardless of shop day status - closed days come from the archive
+        sales = history_sources(shop=shop, status='completed')
         
-        # Convert total_revenue to float for percentage calculation
-        total_revenue_float = float(total_revenue)
+        if wants_ndjson(request):
+            return stream_ndjson(sales)
         
-        payment_analysis = [
-            {
-                'payment_method': method,
-                'total_revenue': amount,
-                'percentage': (amount / total_revenue_float * 100) if total_revenue_float > 0 else 0
-            }
-            for method, amount in payment_methods.items()
-        ]
+        if not wants_page(request):
+            # Unpaged, as before paging existed - the dashboard aggregates the whole list
+            response_data = {'success': True, 'all_sales': history_all(sales)}
+            response_data.update(history_summary(sales))
+            return Response(response_data)
         
-        # Group by currency
-        currencies = defaultdict(float)
-        for sale in sales:
-            currency_key = sale.payment_currency or sale.currency
-            currencies[currency_key] += float(sale.total_amount)
-        
-        currency_breakdown = [
-            {
-                'currency': currency,
-                'total_revenue': amount,
-                'transaction_count': Sale.objects.filter(
-                    shop=shop,
-                    status='completed'
-                ).filter(
-                    models.Q(payment_currency=currency) | models.Q(currency=currency)
-                ).count()
-            }
-            for currency, amount in currencies.items()
-        ]
+        cursor = request.query_params.get('cursor')
+        try:
+            sales_data, pagination = history_page(sales, cursor, parse_page_size(request))
+        except ValueError:
+            return Response({"error": "Invalid cursor or page_size"}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({
+        response_data = {
             'success': True,
             'all_sales': sales_data,
-            'summary': {
-                'total_revenue': float(total_revenue),
-                'total_transactions': total_transactions,
-                'average_transaction': float(avg_transaction),
-                'date_range': {
-                    'earliest': sales.last().created_at.isoformat() if sales.exists() else None,
-                    'latest': sales.first().created_at.isoformat() if sales.exists() else None
-                }
-            },
-            'daily_breakdown': daily_breakdown,
-            'payment_analysis': payment_analysis,
-            'currency_breakdown': currency_breakdown
-        })
+            'pagination': pagination
+        }
+        if not cursor:
+            # Summary statistics via database aggregation, first page only
+            response_data.update(history_summary(sales))
+        
+        return Response(response_data)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
 class AllCashierSalesHistoryView(APIView):
-    """Get ALL sales history for a specific cashier - never affected by EOD deletion"""
+    """
+    Get ALL sales history for a specific cashier - never affected by EOD deletion
+
+    Every sale by default, or cursor pages like AllSalesHistoryView when page_size
+    or cursor is given; export=ndjson streams every sale.
+    """
     permission_classes = [AllowAny]
     authentication_classes = []
     
@@ -4374,8 +4182,6 @@ class AllCashierSalesHistoryView(APIView):
         cashier_id = request.query_params.get('cashier_id')
         cashier_identifier = request.query_params.get('cashier_identifier')  # Can be name or ID
         
-        print(f"🔍 AllCashierSalesHistoryView: cashier_id={cashier_id}, cashier_identifier={cashier_identifier}")
-        
         # Try to find the cashier by multiple methods
         cashier = None
         
@@ -4383,27 +4189,23 @@ class AllCashierSalesHistoryView(APIView):
             try:
                 # Try to find by numeric ID first
                 cashier = Cashier.objects.get(id=int(cashier_id), shop=shop)
-                print(f"✅ Found cashier by ID: {cashier.name}")
             except (Cashier.DoesNotExist, ValueError):
                 # Try to find by name/email as identifier
                 try:
                     cashier = Cashier.objects.get(shop=shop, name__iexact=str(cashier_id))
-                    print(f"✅ Found cashier by name: {cashier.name}")
                 except Cashier.DoesNotExist:
                     try:
                         cashier = Cashier.objects.get(shop=shop, email__iexact=str(cashier_id))
-                        print(f"✅ Found cashier by email: {cashier.name}")
                     except Cashier.DoesNotExist:
-                        print(f"❌ Cashier not found by ID: {cashier_id}")
+                        pass
         
         # If cashier_identifier provided and cashier still not found
         if not cashier and cashier_identifier:
             try:
                 # Use icontains for case-insensitive partial matching (more flexible)
                 cashier = Cashier.objects.get(shop=shop, name__icontains=str(cashier_identifier))
-                print(f"✅ Found cashier by identifier (icontains): {cashier.name}")
             except Cashier.DoesNotExist:
-                print(f"❌ Cashier not found by identifier: {cashier_identifier}")
+                pass
             except Cashier.MultipleObjectsReturned:
                 # If multiple cashiers match, try to find the best match
                 cashiers = Cashier.objects.filter(shop=shop, name__icontains=str(cashier_identifier))
@@ -4411,106 +4213,60 @@ class AllCashierSalesHistoryView(APIView):
                 exact_match = cashiers.filter(name__iexact=str(cashier_identifier)).first()
                 if exact_match:
                     cashier = exact_match
-                    print(f"✅ Found exact match among multiples: {cashier.name}")
                 else:
                     # Return the first one as fallback
                     cashier = cashiers.first()
-                    print(f"⚠️ Multiple cashiers matched, using first: {cashier.name if cashier else 'None'}")
         
-        # Build the sales query
-        sales_query = Sale.objects.filter(
-            shop=shop,
-            status='completed'
-        ).order_by('-created_at')
+        # Build the sales queries - live sales and the archive of closed days
+        live_sales, archived_sales = history_sources(shop=shop, status='completed')
         
         if cashier:
-            sales_query = sales_query.filter(cashier=cashier)
-            print(f"📊 Filtering sales by cashier ID: {cashier.id}, name: {cashier.name}")
+            live_sales = live_sales.filter(cashier=cashier)
+            archived_sales = archived_sales.filter(cashier=cashier)
         elif cashier_identifier:
             # If no cashier found, try to filter by cashier_name in the sale data using icontains
-            sales_query = sales_query.filter(
+            live_sales = live_sales.filter(
                 models.Q(cashier__name__icontains=cashier_identifier)
             )
-            print(f"📊 Filtering sales by cashier_name (icontains): {cashier_identifier}")
-        else:
-            # If no cashier info provided, return ALL sales
-            print(f"📊 No cashier specified, returning ALL sales")
+            archived_sales = archived_sales.filter(cashier_name__icontains=cashier_identifier)
+        # No cashier info provided - ALL sales
         
-        sales = sales_query
-        print(f"📊 Found {sales.count()} sales")
+        sales = [live_sales, archived_sales]
         
-        # Print sample sale cashier info to debug
-        if sales.exists():
-            sample_sale = sales.first()
-            print(f"📊 Sample sale cashier: {sample_sale.cashier}, cashier_name: {sample_sale.cashier.name if sample_sale.cashier else 'None'}")
+        if wants_ndjson(request):
+            return stream_ndjson(sales)
         
-        # Serialize sales with full details
-        sales_data = []
-        for sale in sales:
-            sale_data = {
-                'id': sale.id,
-                'receipt_number': f'R{sale.id:03d}',
-                'created_at': sale.created_at.isoformat(),
-                'cashier_name': sale.cashier.name if sale.cashier else 'Unknown',
-                'cashier_id': sale.cashier.id if sale.cashier else None,
-                'payment_method': sale.payment_method,
-                'customer_name': sale.customer_name or '',
-                'total_amount': float(sale.total_amount),
-                'currency': sale.currency,
-                'payment_currency': sale.payment_currency,
-                'wallet_account': sale.wallet_account,
-                'status': sale.status,
-                'items': []
-            }
-            
-            # Add sale items with product details
-            for item in sale.items.all():
-                sale_data['items'].append({
-                    'product_id': item.product.id if item.product else None,
-                    'product_name': item.product.name if item.product else 'Unknown Product',
-                    'category': item.product.category if item.product else '',
-                    'quantity': float(item.quantity),
-                    'unit_price': float(item.unit_price),
-                    'total_price': float(item.total_price),
-                    'refunded': item.refunded,
-                    'refund_reason': item.refund_reason or ''
-                })
-            
-            sales_data.append(sale_data)
-        
-        # Calculate summary statistics
-        total_revenue = sum(sale.total_amount for sale in sales)
-        total_transactions = sales.count()
-        avg_transaction = total_revenue / total_transactions if total_transactions > 0 else 0
-        
-        # Payment method breakdown
-        cash_sales = sales.filter(payment_method='cash')
-        card_sales = sales.filter(payment_method='card')
-        transfer_sales = sales.filter(payment_method='transfer')
-        
-        summary = {
-            'cashier_name': cashier.name if cashier else (cashier_identifier or 'All Sales'),
-            'cashier_id': cashier.id if cashier else None,
-            'total_sales': total_transactions,
-            'total_revenue': float(total_revenue),
-            'average_sale': float(avg_transaction),
-            'cash_sales': cash_sales.count(),
-            'cash_revenue': float(cash_sales.aggregate(total=Sum('total_amount'))['total'] or 0),
-            'card_sales': card_sales.count(),
-            'card_revenue': float(card_sales.aggregate(total=Sum('total_amount'))['total'] or 0),
-            'transfer_sales': transfer_sales.count(),
-            'transfer_revenue': float(transfer_sales.aggregate(total=Sum('total_amount'))['total'] or 0),
-            'date_range': {
-                'earliest': sales.last().created_at.isoformat() if sales.exists() else None,
-                'latest': sales.first().created_at.isoformat() if sales.exists() else None
+        def summary():
+            # Summary statistics via database aggregation
+            return {
+                'cashier_name': cashier.name if cashier else (cashier_identifier or 'All Sales'),
+                'cashier_id': cashier.id if cashier else None,
+                **cashier_history_summary(sales)
             }
-        }
         
-        return Response({
+        if not wants_page(request):
+            return Response({
+                'success': True,
+                'cashier_sales': history_all(sales),
+                'summary': summary()
+            })
+        
+        cursor = request.query_params.get('cursor')
+        try:
+            sales_data, pagination = history_page(sales, cursor, parse_page_size(request))
+        except ValueError:
+            return Response({"error": "Invalid cursor or page_size"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_data = {
             'success': True,
             'cashier_sales': sales_data,
-            'summary': summary
-        })
+            'pagination': pagination
+        }
+        if not cursor:
+            # Summary statistics via database aggregation, first page only
+            response_data['summary'] = summary()
+        
+        return Response(response_data)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -4569,73 +4325,27 @@ class DeleteTodaySalesView(APIView):
             
             print(f"🗑️ Deleting {sale_count} sales for {today}")
             
-            # Get unique shops and cashiers from these sales
-            shops = set()
-            cashiers = set()
-            for sale in today_sales:
-                shops.add(sale.shop)
-                cashiers.add((sale.shop, sale.cashier))
+            # Cashiers who sold today - their drawers are reset below
+            cashier_ids = list(today_sales.values_list('cashier_id', flat=True).distinct())
+            shop_ids = list(today_sales.values_list('shop_id', flat=True).distinct())
             
             # Delete all sales for today
             today_sales.delete()
             print(f"✅ Deleted {sale_count} sales")
             
+            # The bulk delete skips the sale signals - recompute the day's reconciliation
+            from .models_reconciliation_snapshot import ReconciliationSnapshot
+            for shop_id in shop_ids:
+                ReconciliationSnapshot.rebuild(shop_id, today)
+            
             # Reset all CashFloat records for today to zero
             from decimal import Decimal
-            for shop_obj, cashier in cashiers:
-                try:
-                    drawer = CashFloat.objects.get(shop=shop_obj, cashier=cashier, date=today)
-                    
-                    # Reset all currency fields to zero
-                    drawer.current_cash = Decimal('0.00')
-                    drawer.current_card = Decimal('0.00')
-                    drawer.current_ecocash = Decimal('0.00')
-                    drawer.current_transfer = Decimal('0.00')
-                    drawer.current_total = Decimal('0.00')
-                    
-                    drawer.current_cash_usd = Decimal('0.00')
-                    drawer.current_cash_zig = Decimal('0.00')
-                    drawer.current_cash_rand = Decimal('0.00')
-                    drawer.current_card_usd = Decimal('0.00')
-                    drawer.current_card_zig = Decimal('0.00')
-                    drawer.current_card_rand = Decimal('0.00')
-                    drawer.current_ecocash_usd = Decimal('0.00')
-                    drawer.current_ecocash_zig = Decimal('0.00')
-                    drawer.current_ecocash_rand = Decimal('0.00')
-                    drawer.current_transfer_usd = Decimal('0.00')
-                    drawer.current_transfer_zig = Decimal('0.00')
-                    drawer.current_transfer_rand = Decimal('0.00')
-                    drawer.current_total_usd = Decimal('0.00')
-                    drawer.current_total_zig = Decimal('0.00')
-                    drawer.current_total_rand = Decimal('0.00')
-                    
-                    drawer.session_cash_sales = Decimal('0.00')
-                    drawer.session_card_sales = Decimal('0.00')
-                    drawer.session_ecocash_sales = Decimal('0.00')
-                    drawer.session_transfer_sales = Decimal('0.00')
-                    drawer.session_total_sales = Decimal('0.00')
-                    
-                    drawer.session_cash_sales_usd = Decimal('0.00')
-                    drawer.session_cash_sales_zig = Decimal('0.00')
-                    drawer.session_cash_sales_rand = Decimal('0.00')
-                    drawer.session_card_sales_usd = Decimal('0.00')
-                    drawer.session_card_sales_zig = Decimal('0.00')
-                    drawer.session_card_sales_rand = Decimal('0.00')
-                    drawer.session_ecocash_sales_usd = Decimal('0.00')
-                    drawer.session_ecocash_sales_zig = Decimal('0.00')
-                    drawer.session_ecocash_sales_rand = Decimal('0.00')
-                    drawer.session_transfer_sales_usd = Decimal('0.00')
-                    drawer.session_transfer_sales_zig = Decimal('0.00')
-                    drawer.session_transfer_sales_rand = Decimal('0.00')
-                    drawer.session_total_sales_usd = Decimal('0.00')
-                    drawer.session_total_sales_zig = Decimal('0.00')
-                    drawer.session_total_sales_rand = Decimal('0.00')
-                    
-                    drawer.status = 'INACTIVE'
-                    drawer.save()
-                    print(f"✅ Reset drawer for {cashier.name}")
-                except CashFloat.DoesNotExist:
-                    print(f"ℹ️ No drawer found for {cashier.name}")
+            from .drawer_reset import reset_drawers
+            reset_count = reset_drawers(
+                CashFloat.objects.filter(date=today, cashier_id__in=cashier_ids),
+                status='INACTIVE'
+            )
+            print(f"✅ Reset {reset_count} drawers")
             
             # Reset CurrencyWallet balances to zero
             wallet, created = CurrencyWallet.objects.get_or_create(shop=shop)
@@ -13,6 +13,7 @@ from django.db import models
 from django.db.models import Q
 from .models import ShopConfiguration, Product
 from .serializers import ProductSerializer
+from .dashboard_cache import cache_analytics_response
 from django.utils import timezone
 import logging
 
@@ -114,6 +115,7 @@ class ProductCategoriesView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = []
     
+    @cache_analytics_response('product_categories')
     def get(self, request):
         """Get all unique categories"""
         try:
@@ -251,6 +253,7 @@ class ProductStatsView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = []
     
+    @cache_analytics_response('product_stats')
     def get(self, request):
         """Get product statistics"""
         try:
@@ -298,7 +298,8 @@ class WasteBatchDetailView(View):
                     'reason': waste_item.reason,
                     'reason_display': waste_item.get_reason_display(),
                     'waste_value': float(waste_item.waste_value),
-                    'new_stock': float(waste_item.product.stock_quantity)
+                    'new_stock': float(waste_item.product.stock_quantity),
+                    'stock_pending': not waste_item.stock_applied  # Deducted when the batch is completed
                 },
                 'batch': {
                     'id': batch.id,
@@ -4,6 +4,7 @@ from django.utils.decorators import method_decorator
 from django.views import View
 from django.http import JsonResponse
 from .models import ShopConfiguration, Cashier, Product, Waste
+from .dashboard_cache import cache_analytics_response
 import json
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -180,6 +181,7 @@ class WasteListView(View):
 class WasteSummaryView(View):
     """Get waste summary and statistics"""
     
+    @cache_analytics_response('waste_summary')
     def get(self, request):
         """Get waste summary for the shop"""
         try:
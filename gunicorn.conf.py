@@ -0,0 +1,33 @@
+"""
+Gunicorn settings, picked up automatically when the server is started from the
+project root with `gunicorn luminan_backend.wsgi:application`.
+
+The live events stream (core/live_events_views) holds its request open for minutes
+and the end of day job runs on a background thread, so requests are served by
+threads rather than a single blocking sync worker. The per-shop caches are in the
+database cache table and shared, but the live event bus lives in process memory, so
+everything must run in ONE worker process - another process would never see this
+one's sales events.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# One process, many threads: each open event stream occupies a thread
+worker_class = 'gthread'
+workers = 1
+threads = int(os.environ.get('GUNICORN_THREADS', '32'))
+
+# gthread workers heartbeat independently of long requests, so this only bounds
+# a stuck worker, not the length of a stream
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    if server.cfg.workers != 1:
+        raise RuntimeError(
+            "Run a single gunicorn worker (use GUNICORN_THREADS for concurrency): "
+            "live events are delivered in-process"
+        )
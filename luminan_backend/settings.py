@@ -102,6 +102,21 @@ DATABASES = {
     }
 }
 
+# Cache
+# Shared through the database so gunicorn threads, management commands (EOD, rebuilds,
+# forecasts) and any other process see the same dashboard entries and data generations.
+# The table is created by migration core/0075_cache_table.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -192,4 +207,9 @@ CORS_ALLOW_HEADERS = [
     'x-request-time',
     'x-shop-id',
     'x-cashier-id',
-]
\ No newline at end of file
+]
+
+# Response headers browser clients may read (the sales history's next page cursor)
+CORS_EXPOSE_HEADERS = [
+    'X-Next-Cursor',
+]